@@ -2,7 +2,7 @@ CREATE DATABASE IF NOT EXISTS energy_tariff;
 USE energy_tariff;
 
 CREATE TABLE IF NOT EXISTS fact_tariff_search_simple (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     current_supplier_name VARCHAR(100) NOT NULL,
     pay_method VARCHAR(100) NOT NULL,
     EV_question VARCHAR(100) NOT NULL,
@@ -40,6 +40,66 @@ CREATE TABLE IF NOT EXISTS fact_tariff_search_simple (
     INDEX idx_tariff (tariff_name),
     INDEX idx_fuel_type (fuel_type),
     INDEX idx_search_date (search_date),
-    INDEX idx_valid_dates (valid_from, valid_to)
+    INDEX idx_valid_dates (valid_from, valid_to),
+    -- The partition column must be part of every unique key.
+    PRIMARY KEY (id, search_date)
+)
+-- Monthly partitions are split off pmax by python -m src.tools.tariff_maintenance (run daily),
+-- which also fills the rollups below and drops months past TARIFF_DETAIL_RETENTION_MONTHS.
+PARTITION BY RANGE COLUMNS(search_date) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
 );
 
+-- Monthly summaries that outlive the detail partitions (see src/data/tariff_partitions.py).
+CREATE TABLE IF NOT EXISTS agg_tariff_supplier_monthly (
+    month_start DATE NOT NULL,
+    dno_id VARCHAR(20) NOT NULL,
+    region_name VARCHAR(100),
+    new_supplier_name VARCHAR(100) NOT NULL,
+    fuel_type VARCHAR(20) NOT NULL,
+    searches INT NOT NULL,
+    tariff_rows INT NOT NULL,
+    tariffs INT NOT NULL,
+    green_tariffs INT NOT NULL,
+    min_unit_rate DECIMAL(10, 4),
+    avg_unit_rate DECIMAL(10, 4),
+    max_unit_rate DECIMAL(10, 4),
+    avg_standing_charge DECIMAL(10, 4),
+    min_annual_cost_new DECIMAL(10, 2),
+    avg_annual_cost_new DECIMAL(10, 2),
+    rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (month_start, dno_id, new_supplier_name, fuel_type),
+    INDEX idx_supplier_month (new_supplier_name, month_start)
+);
+
+CREATE TABLE IF NOT EXISTS agg_tariff_region_monthly (
+    month_start DATE NOT NULL,
+    dno_id VARCHAR(20) NOT NULL,
+    region_name VARCHAR(100),
+    fuel_type VARCHAR(20) NOT NULL,
+    searches INT NOT NULL,
+    postcodes INT NOT NULL,
+    suppliers INT NOT NULL,
+    tariff_rows INT NOT NULL,
+    min_unit_rate DECIMAL(10, 4),
+    avg_unit_rate DECIMAL(10, 4),
+    avg_standing_charge DECIMAL(10, 4),
+    min_annual_cost_new DECIMAL(10, 2),
+    avg_annual_cost_new DECIMAL(10, 2),
+    first_search DATE,
+    last_search DATE,
+    rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (month_start, dno_id, fuel_type)
+);
+
+-- Monthly price histograms for /api/tariff-trends medians (see src/data/tariff_trends.py).
+CREATE TABLE IF NOT EXISTS agg_tariff_price_hist (
+    month_start DATE NOT NULL,
+    dno_id VARCHAR(20) NOT NULL,
+    new_supplier_name VARCHAR(100) NOT NULL,
+    fuel_type VARCHAR(20) NOT NULL,
+    metric CHAR(2) NOT NULL,
+    bucket INT NOT NULL,
+    n INT NOT NULL,
+    PRIMARY KEY (month_start, dno_id, new_supplier_name, fuel_type, metric, bucket)
+);
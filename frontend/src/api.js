@@ -118,11 +118,25 @@ export async function fetchExportPriceReference() {
   return data
 }
 
+/** Per-tab id so the server can reuse this tab's optimiser sweep when only prices or bounds change. */
+function optimiserSessionId() {
+  try {
+    let id = sessionStorage.getItem('powerplan.optimiserSession')
+    if (!id) {
+      id = (crypto.randomUUID && crypto.randomUUID()) || `${Date.now()}-${Math.random().toString(36).slice(2)}`
+      sessionStorage.setItem('powerplan.optimiserSession', id)
+    }
+    return id
+  } catch {
+    return undefined
+  }
+}
+
 export async function fetchRecommend(payload) {
   const r = await fetch(apiUrl('/api/recommend'), {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(payload),
+    body: JSON.stringify({ session_id: optimiserSessionId(), ...payload }),
   })
   const data = await r.json()
   if (!r.ok) throw new Error(data.error || 'Request failed')
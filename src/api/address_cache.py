@@ -0,0 +1,183 @@
+"""
+Persistent cache of address options per postcode (the /api/scrape-address-options picker).
+
+Addresses in a postcode barely change, but each lookup is a getAddress.io call (up to
+ADDRESS_LOOKUP_TIMEOUT_S) or, as a fallback, a whole Camoufox session. Results are kept as one
+JSON file per postcode under output/cache/addresses/ (or ADDRESS_CACHE_DIR), with a small
+in-memory map in front:
+- options are served for ADDRESS_CACHE_TTL_DAYS (default 30);
+- an empty answer (postcode without addresses) from an authoritative source (NEGATIVE_SOURCES,
+  i.e. getAddress.io) is cached for ADDRESS_CACHE_NEGATIVE_TTL_S (default 3600), so repeated
+  typos do not hit the API or start browsers;
+- a failed lookup (the fetch raises, or an empty answer from the browser fallback, which is what
+  a timeout or scrape failure looks like) is never cached, and a stale entry is served instead
+  when there is one.
+
+Concurrent requests for the same postcode are single-flighted: one caller runs the upstream
+lookup, and the others wait for its result (or error) instead of starting their own.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from src.metrics import record_cache
+
+__all__ = ["NEGATIVE_SOURCES", "AddressOptions", "clear_memory", "lookup"]
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# Sources whose empty answer means "no addresses" rather than "lookup failed".
+NEGATIVE_SOURCES = frozenset({"getaddress"})
+_MEMORY_MAX = 4096
+# Followers wait this long for the leader (the browser fallback can take minutes).
+_FLIGHT_WAIT_S = 300.0
+
+_lock = threading.Lock()
+_memory: dict[str, dict] = {}
+_inflight: dict[str, "_Flight"] = {}
+
+
+@dataclass
+class AddressOptions:
+    postcode: str
+    options: list[str]
+    source: str
+    cached: bool
+    age_s: float = 0.0
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: AddressOptions | None = None
+    error: BaseException | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _cache_dir() -> Path:
+    raw = (os.environ.get("ADDRESS_CACHE_DIR") or "").strip()
+    return Path(raw) if raw else _PROJECT_ROOT / "output" / "cache" / "addresses"
+
+
+def _path(postcode_norm: str) -> Path:
+    return _cache_dir() / f"{re.sub(r'[^A-Z0-9]', '', postcode_norm)}.json"
+
+
+def _ttl_s(entry: dict) -> float:
+    if entry.get("options"):
+        return _env_float("ADDRESS_CACHE_TTL_DAYS", 30.0) * 86400.0
+    return _env_float("ADDRESS_CACHE_NEGATIVE_TTL_S", 3600.0)
+
+
+def _read(postcode_norm: str) -> dict | None:
+    with _lock:
+        entry = _memory.get(postcode_norm)
+    if entry is not None:
+        return entry
+    try:
+        with open(_path(postcode_norm), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or "fetched_at" not in entry:
+        return None
+    _remember(postcode_norm, entry)
+    return entry
+
+
+def _remember(postcode_norm: str, entry: dict) -> None:
+    with _lock:
+        if len(_memory) >= _MEMORY_MAX and postcode_norm not in _memory:
+            _memory.pop(next(iter(_memory)))
+        _memory[postcode_norm] = entry
+
+
+def _write(postcode_norm: str, entry: dict) -> None:
+    _remember(postcode_norm, entry)
+    path = _path(postcode_norm)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[address-cache] could not write {path}: {e}", flush=True)
+
+
+def _result(postcode_norm: str, entry: dict, cached: bool, now: float) -> AddressOptions:
+    return AddressOptions(
+        postcode=postcode_norm,
+        options=list(entry.get("options") or []),
+        source=str(entry.get("source") or ""),
+        cached=cached,
+        age_s=max(0.0, now - float(entry["fetched_at"])),
+    )
+
+
+def lookup(postcode_norm: str, fetch: Callable[[], tuple[list[str], str]]) -> AddressOptions:
+    """
+    Address options for a normalised postcode: from the cache while fresh, otherwise from
+    fetch() -> (options, source), at most one fetch per postcode at a time. fetch() raises on
+    failure (an empty answer from a source outside NEGATIVE_SOURCES raises LookupError); the
+    error propagates unless a stale entry can be served.
+    """
+    now = time.time()
+    entry = _read(postcode_norm)
+    if entry is not None and now - float(entry["fetched_at"]) <= _ttl_s(entry):
+        record_cache("address_options", True)
+        return _result(postcode_norm, entry, True, now)
+    record_cache("address_options", False)
+
+    with _lock:
+        flight = _inflight.get(postcode_norm)
+        leader = flight is None
+        if leader:
+            flight = _inflight[postcode_norm] = _Flight()
+    if not leader:
+        if not flight.done.wait(_FLIGHT_WAIT_S):
+            raise TimeoutError(f"address lookup for {postcode_norm} still running")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        try:
+            options, source = fetch()
+            if not options and source not in NEGATIVE_SOURCES:
+                raise LookupError(f"{source} returned no addresses for {postcode_norm}")
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"[address-cache] lookup failed for {postcode_norm} ({e}); serving stale entry", flush=True)
+            flight.result = _result(postcode_norm, entry, True, now)
+            return flight.result
+        fresh = {"options": list(options), "source": source, "fetched_at": time.time()}
+        _write(postcode_norm, fresh)
+        flight.result = _result(postcode_norm, fresh, False, fresh["fetched_at"])
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(postcode_norm, None)
+        flight.done.set()
+
+
+def clear_memory() -> None:
+    """Drop the in-memory layer (tests; the files stay)."""
+    with _lock:
+        _memory.clear()
@@ -5,11 +5,18 @@ Updated to use Camoufox
 """
 
 from camoufox.sync_api import Camoufox
-from bs4 import BeautifulSoup
 try:
     from .Tariff import Tariff
+    from .scrape_har import ScrapeFlow
+    from .tariff_extract import extract_results
+    from .debug_capture import DebugCapture
 except ImportError:
     from Tariff import Tariff
+    from scrape_har import ScrapeFlow
+    from tariff_extract import extract_results
+    from debug_capture import DebugCapture
+from src.api.postcode_lookup import lookup_local
+from src.data.dno_regions import DNO_MAPPING, dno_for_outward_code
 import time
 from datetime import datetime
 import re
@@ -18,7 +25,6 @@ import re
 import requests
 from difflib import SequenceMatcher
 from typing import Dict, Optional
-from pathlib import Path
 import os
 import sys
 
@@ -37,19 +43,6 @@ def _configure_live_stdio() -> None:
             pass
 
 
-# Debug output for scrape (HTML, screenshots) – keeps repo root clean
-_DEBUG_DIR = Path(__file__).resolve().parents[3] / "output" / "scrape_debug"
-
-
-def _debug_path(name: str) -> str:
-    """Return path for debug file. Creates output dir if possible; else falls back to cwd so scrape never fails on debug write."""
-    try:
-        _DEBUG_DIR.mkdir(parents=True, exist_ok=True)
-        return str(_DEBUG_DIR / name)
-    except Exception:
-        return name
-
-
 def _scrape_pace_mult() -> float:
     """
     Scale all scraper pacing sleeps. Set SCRAPER_PACE_MULT=0.65 locally to run ~35% faster
@@ -78,91 +71,6 @@ def _typing_delay_ms() -> int:
     return max(0, min(120, ms))
 
 
-def _usage_text_to_annual_kwh(consumption_text: str) -> int | None:
-    """
-    Parse kWh from comparison-site usage copy (e.g. '2,900 kWh / year' or '242 kWh / month').
-    Returns annual kWh, scaling up when the site states a monthly figure.
-    """
-    if not consumption_text:
-        return None
-    match = re.search(r"([\d,]+)\s*kwh", consumption_text, re.IGNORECASE)
-    if not match:
-        return None
-    try:
-        value = int(match.group(1).replace(",", ""))
-    except ValueError:
-        return None
-    low = consumption_text.lower()
-    monthly_markers = ("/month", "/ month", "per month", "a month", "pcm", "p.m.", " monthly")
-    yearly_markers = ("/year", "/ year", "per year", "a year", "p.a.", "annum", "annual", "/yr", "/ yr")
-    if any(m in low for m in monthly_markers):
-        return value * 12
-    if any(m in low for m in yearly_markers):
-        return value
-    # Plain "X kWh" with no period: treat as annual (legacy pages often imply yearly usage).
-    return value
-
-
-def _tariff_card_annual_cost_gbp(cost_sub_value: str) -> float:
-    """Parse 'or £1,234 a year' vs '£103 a month' style strings into an annual £ total."""
-    if not cost_sub_value:
-        return 0.0
-    m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", cost_sub_value)
-    if not m:
-        return 0.0
-    try:
-        val = float(m.group(1).replace(",", ""))
-    except ValueError:
-        return 0.0
-    low = cost_sub_value.lower()
-    if any(x in low for x in ("month", "/mo", " pcm", "p.m.")):
-        return val * 12.0
-    return val
-
-
-def _standing_charge_cell_to_pence_per_day(display_text: str) -> float:
-    """
-    Standing charge may be shown as pence/day or as £/month. Tariff model stores pence per day.
-    """
-    if not display_text:
-        return 0.0
-    t = display_text.replace("\u00a0", " ").strip()
-    low = t.lower()
-
-    def _gbp_month_to_pence_per_day(gbp_month: float) -> float:
-        days_per_month = 365.25 / 12.0
-        return round((gbp_month * 100.0) / days_per_month, 4)
-
-    if re.search(r"month|/mo\b|pcm|per\s+month", low):
-        m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", t)
-        if m:
-            try:
-                return _gbp_month_to_pence_per_day(float(m.group(1).replace(",", "")))
-            except ValueError:
-                return 0.0
-    m = re.search(r"([\d,]+(?:\.\d+)?)\s*p", low)
-    if m:
-        try:
-            return float(m.group(1).replace(",", ""))
-        except ValueError:
-            return 0.0
-    m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", t)
-    if m and not re.search(r"[\d,]+(?:\.\d+)?\s*p", low):
-        try:
-            gbp = float(m.group(1).replace(",", ""))
-        except ValueError:
-            gbp = 0.0
-        if gbp >= 5.0:
-            return _gbp_month_to_pence_per_day(gbp)
-    m = re.search(r"([\d,]+(?:\.\d+)?)", t)
-    if m:
-        try:
-            return float(m.group(1).replace(",", ""))
-        except ValueError:
-            return 0.0
-    return 0.0
-
-
 # Pacing between Playwright actions (seconds). Multiplied at runtime by SCRAPER_PACE_MULT (default 1).
 # Increase base values here (or set SCRAPER_PACE_MULT>1) if the comparison site flakes.
 _SCRAPE_AFTER_GOTO = 1.6
@@ -183,163 +91,20 @@ _SCRAPE_SHORT = 0.38
 class PostcodeLookup:
     """Lookup location data from UK postcodes"""
     
-    # DNO (Distribution Network Operator) mapping by postcode area
-    DNO_MAPPING = {
-        # Scotland
-        'AB': ('SPEN', 'SPEN_1'),
-        'DD': ('SPEN', 'SPEN_1'),
-        'DG': ('SPEN', 'SPEN_1'),
-        'EH': ('SPEN', 'SPEN_1'),
-        'FK': ('SPEN', 'SPEN_1'),
-        'G': ('SPEN', 'SPEN_1'),
-        'HS': ('SSEN', 'SSEN_1'),
-        'IV': ('SSEN', 'SSEN_1'),
-        'KA': ('SPEN', 'SPEN_1'),
-        'KW': ('SSEN', 'SSEN_1'),
-        'KY': ('SPEN', 'SPEN_1'),
-        'ML': ('SPEN', 'SPEN_1'),
-        'PA': ('SPEN', 'SPEN_1'),
-        'PH': ('SSEN', 'SSEN_1'),
-        'ZE': ('SSEN', 'SSEN_1'),
-        
-        # Northern England
-        'BD': ('NPG', 'NPG_1'),
-        'CA': ('ENWL', 'ENWL_1'),
-        'DH': ('NPG', 'NPG_1'),
-        'DL': ('NPG', 'NPG_1'),
-        'DN': ('NPG', 'NPG_1'),
-        'HG': ('NPG', 'NPG_1'),
-        'HU': ('NPG', 'NPG_1'),
-        'HX': ('ENWL', 'ENWL_1'),
-        'LA': ('ENWL', 'ENWL_1'),
-        'LS': ('NPG', 'NPG_1'),
-        'NE': ('NPG', 'NPG_1'),
-        'SR': ('NPG', 'NPG_1'),
-        'TS': ('NPG', 'NPG_1'),
-        'YO': ('NPG', 'NPG_1'),
-        
-        # North West England
-        'BB': ('ENWL', 'ENWL_1'),
-        'BL': ('ENWL', 'ENWL_1'),
-        'CH': ('SPMW', 'SPMW_1'),
-        'CW': ('ENWL', 'ENWL_1'),
-        'FY': ('ENWL', 'ENWL_1'),
-        'L': ('ENWL', 'ENWL_1'),
-        'M': ('ENWL', 'ENWL_1'),
-        'OL': ('ENWL', 'ENWL_1'),
-        'PR': ('ENWL', 'ENWL_1'),
-        'SK': ('ENWL', 'ENWL_1'),
-        'WA': ('ENWL', 'ENWL_1'),
-        'WN': ('ENWL', 'ENWL_1'),
-        
-        # Midlands
-        'B': ('WPD_WM', 'WPD_4'),
-        'CV': ('WPD_WM', 'WPD_4'),
-        'DE': ('WPD_EM', 'WPD_3'),
-        'DY': ('WPD_WM', 'WPD_4'),
-        'LE': ('WPD_EM', 'WPD_3'),
-        'LN': ('WPD_EM', 'WPD_3'),
-        'NG': ('WPD_EM', 'WPD_3'),
-        'NN': ('WPD_EM', 'WPD_3'),
-        'S': ('NPG', 'NPG_1'),
-        'ST': ('WPD_WM', 'WPD_4'),
-        'SY': ('SPMW', 'SPMW_1'),
-        'TF': ('SPMW', 'SPMW_1'),
-        'WS': ('WPD_WM', 'WPD_4'),
-        'WV': ('WPD_WM', 'WPD_4'),
-        
-        # East England
-        'CB': ('UKPN_EPN', 'UKPN_2'),
-        'CM': ('UKPN_EPN', 'UKPN_2'),
-        'CO': ('UKPN_EPN', 'UKPN_2'),
-        'IP': ('UKPN_EPN', 'UKPN_2'),
-        'LU': ('UKPN_EPN', 'UKPN_2'),
-        'NR': ('UKPN_EPN', 'UKPN_2'),
-        'PE': ('UKPN_EPN', 'UKPN_2'),
-        'SG': ('UKPN_EPN', 'UKPN_2'),
-        
-        # London
-        'E': ('UKPN_LPN', 'UKPN_1'),
-        'EC': ('UKPN_LPN', 'UKPN_1'),
-        'EN': ('UKPN_LPN', 'UKPN_1'),
-        'IG': ('UKPN_LPN', 'UKPN_1'),
-        'N': ('UKPN_LPN', 'UKPN_1'),
-        'NW': ('UKPN_LPN', 'UKPN_1'),
-        'RM': ('UKPN_LPN', 'UKPN_1'),
-        'SE': ('UKPN_LPN', 'UKPN_1'),
-        'SW': ('UKPN_LPN', 'UKPN_1'),
-        'W': ('UKPN_LPN', 'UKPN_1'),
-        'WC': ('UKPN_LPN', 'UKPN_1'),
-        
-        # South East England
-        'BN': ('SSEN_SEPD', 'SSEN_2'),
-        'BR': ('UKPN_SPN', 'UKPN_3'),
-        'CR': ('UKPN_SPN', 'UKPN_3'),
-        'CT': ('UKPN_SPN', 'UKPN_3'),
-        'DA': ('UKPN_SPN', 'UKPN_3'),
-        'GU': ('SSEN_SEPD', 'SSEN_2'),
-        'HA': ('UKPN_LPN', 'UKPN_1'),
-        'HP': ('SSEN_SEPD', 'SSEN_2'),
-        'KT': ('UKPN_SPN', 'UKPN_3'),
-        'ME': ('UKPN_SPN', 'UKPN_3'),
-        'MK': ('SSEN_SEPD', 'SSEN_2'),
-        'OX': ('SSEN_SEPD', 'SSEN_2'),
-        'PO': ('SSEN_SEPD', 'SSEN_2'),
-        'RG': ('SSEN_SEPD', 'SSEN_2'),
-        'RH': ('SSEN_SEPD', 'SSEN_2'),
-        'SL': ('SSEN_SEPD', 'SSEN_2'),
-        'SM': ('UKPN_SPN', 'UKPN_3'),
-        'SO': ('SSEN_SEPD', 'SSEN_2'),
-        'TN': ('UKPN_SPN', 'UKPN_3'),
-        'TW': ('UKPN_LPN', 'UKPN_1'),
-        'UB': ('UKPN_LPN', 'UKPN_1'),
-        
-        # South West England
-        'BA': ('WPD_SW', 'WPD_1'),
-        'BH': ('SSEN_SEPD', 'SSEN_2'),
-        'BS': ('WPD_SW', 'WPD_1'),
-        'DT': ('WPD_SW', 'WPD_1'),
-        'EX': ('WPD_SW', 'WPD_1'),
-        'GL': ('WPD_SW', 'WPD_1'),
-        'PL': ('WPD_SW', 'WPD_1'),
-        'SN': ('SSEN_SEPD', 'SSEN_2'),
-        'SP': ('SSEN_SEPD', 'SSEN_2'),
-        'TA': ('WPD_SW', 'WPD_1'),
-        'TQ': ('WPD_SW', 'WPD_1'),
-        'TR': ('WPD_SW', 'WPD_1'),
-        
-        # Wales
-        'CF': ('WPD_SW', 'WPD_2'),
-        'LD': ('WPD_SW', 'WPD_2'),
-        'LL': ('SPMW', 'SPMW_1'),
-        'NP': ('WPD_SW', 'WPD_2'),
-        'SA': ('WPD_SW', 'WPD_2'),
-    }
+    # DNO (Distribution Network Operator) mapping by postcode area (shared with src.data.dno_regions)
+    DNO_MAPPING = DNO_MAPPING
     
     @staticmethod
     def _get_dno_from_outward_code(outward_code: str):
         """
         Try 2-letter outward code first, then fall back to 1-letter.
         """
-        if not outward_code:
-            return ('Unknown', 'Unknown')
-
-        outward_code = outward_code.upper()
-
-        # Try first two letters (e.g. "SW", "EC")
-        if len(outward_code) >= 2:
-            key_2 = outward_code[:2]
-            if key_2 in PostcodeLookup.DNO_MAPPING:
-                return PostcodeLookup.DNO_MAPPING[key_2]
-
-        # Fall back to first letter (e.g. "S", "L")
-        key_1 = outward_code[0]
-        return PostcodeLookup.DNO_MAPPING.get(key_1, ('Unknown', 'Unknown'))
+        return dno_for_outward_code(outward_code)
 
     @staticmethod
     def lookup(postcode: str) -> Optional[Dict]:
         """
-        Lookup postcode data from postcodes.io API
+        Lookup postcode data from the offline index, falling back to postcodes.io API
         
         Returns dict with:
         - postcode
@@ -354,6 +119,10 @@ class PostcodeLookup:
         """
         if not postcode:
             return None
+
+        local = lookup_local(postcode)
+        if local is not None:
+            return local
         
         # Clean postcode
         postcode_clean = postcode.strip().upper().replace(" ", "")
@@ -401,11 +170,13 @@ class PostcodeLookup:
 class ScrapeTariff:
 
     def __init__(self):
-        self.soup = None
         self.tariff = None
         self.browser = None
         self.page = None
         self.location_data = None
+        self.last_flow = None
+        # Debug artifacts (HTML, screenshots) by SCRAPER_DEBUG_CAPTURE policy; see debug_capture.py
+        self.debug = DebugCapture()
 
     def fetch_address_options(self, postcode: str, headless: bool | str = False) -> List[str]:
         """
@@ -582,6 +353,20 @@ class ScrapeTariff:
                 'dno_id': dno_id,
             }
 
+        # Step timings (always) and HAR record/replay (SCRAPER_HAR_MODE); see scrape_har.py.
+        flow = ScrapeFlow.from_env(postcode, {
+            "postcode": postcode,
+            "address_index": address_index,
+            "address_name": address_name,
+            "fuel_type": fuel_type,
+            "current_supplier": current_supplier,
+            "pay_method": pay_method,
+            "has_ev": has_ev,
+            "home_or_business": home_or_business,
+        })
+        self.last_flow = flow
+        self.debug = DebugCapture(postcode)
+
         try:
             # Use Camoufox with humanized settings
             print("Launching Camoufox browser...")
@@ -590,9 +375,9 @@ class ScrapeTariff:
                     humanize=False,  # Try disabling humanize
                     # Extra arguments to improve stability in linux containers.
                     args=["--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage"],
-            ) as browser:
+            ) as browser, flow.page(browser) as page:
                 self.browser = browser
-                self.page = browser.new_page()
+                self.page = page
 
                 # Set headers to request uncompressed content
                 self.page.set_extra_http_headers({
@@ -614,26 +399,27 @@ class ScrapeTariff:
                     ("commit", max(30000, nav_timeout_ms // 2)),
                 ]
                 last_nav_error = None
-                for idx, (wait_until, timeout_ms) in enumerate(nav_attempts, start=1):
-                    try:
-                        print(
-                            f"↻ goto attempt {idx}/{len(nav_attempts)} "
-                            f"(wait_until={wait_until}, timeout={timeout_ms}ms)"
-                        )
-                        self.page.goto(url, wait_until=wait_until, timeout=timeout_ms)
-                        last_nav_error = None
-                        break
-                    except Exception as e:
-                        last_nav_error = e
-                        print(f"⚠ goto attempt {idx} failed: {e}")
-                        # Lightweight recovery before retrying.
+                with flow.step("load_page"):
+                    for idx, (wait_until, timeout_ms) in enumerate(nav_attempts, start=1):
                         try:
-                            self.page.wait_for_load_state("domcontentloaded", timeout=5000)
-                        except Exception:
-                            pass
-                        _scrape_sleep(1.0)
-                if last_nav_error is not None:
-                    raise last_nav_error
+                            print(
+                                f"↻ goto attempt {idx}/{len(nav_attempts)} "
+                                f"(wait_until={wait_until}, timeout={timeout_ms}ms)"
+                            )
+                            self.page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+                            last_nav_error = None
+                            break
+                        except Exception as e:
+                            last_nav_error = e
+                            print(f"⚠ goto attempt {idx} failed: {e}")
+                            # Lightweight recovery before retrying.
+                            try:
+                                self.page.wait_for_load_state("domcontentloaded", timeout=5000)
+                            except Exception:
+                                pass
+                            _scrape_sleep(1.0)
+                    if last_nav_error is not None:
+                        raise last_nav_error
 
                 _scrape_sleep(_SCRAPE_AFTER_GOTO)
 
@@ -661,99 +447,114 @@ class ScrapeTariff:
                     _scrape_sleep(_SCRAPE_CLOUDFLARE)
 
                 # STEP 0: Handle cookies and start quote button
-                self._step0_cookies_and_start()
+                with flow.step("step0_cookies_and_start"):
+                    self._step0_cookies_and_start()
 
                 # STEP 1: Enter email
-                self._step1_enter_email()
+                with flow.step("step1_enter_email"):
+                    self._step1_enter_email()
 
                 # STEP 2: Postcode and address
-                self._step2_postcode_and_address(postcode, address_index, address_name)
+                with flow.step("step2_postcode_and_address"):
+                    self._step2_postcode_and_address(postcode, address_index, address_name)
 
                 # STEP 3: Home or Business – user choice: "No, it's a home" or "Yes, it's a business"
-                self._step3_home_or_business(home_or_business)
+                with flow.step("step3_home_or_business"):
+                    self._step3_home_or_business(home_or_business)
                 _scrape_sleep(_SCRAPE_BEFORE_FUEL)  # Let fuel type options appear
 
                 # STEP 4: Select fuel type
-                self._step4_select_fuel_type(fuel_type)
+                with flow.step("step4_select_fuel_type"):
+                    self._step4_select_fuel_type(fuel_type)
 
                 # STEP 4b: Supplier details (new required section on comparison form)
-                self._step4b_supplier_details(current_supplier)
+                with flow.step("step4b_supplier_details"):
+                    self._step4b_supplier_details(current_supplier)
 
                 # STEP 5: Select EV option
-                self._step5_select_ev(has_ev)
+                with flow.step("step5_select_ev"):
+                    self._step5_select_ev(has_ev)
 
                 # STEP 6: See results
-                self._step6_see_results()
+                with flow.step("step6_see_results"):
+                    self._step6_see_results()
 
                 # Wait for results to load (page may render cards via JS)
-                print("Waiting for results...")
-                _scrape_sleep(_SCRAPE_RESULTS_POLL)
-                result_selectors = [
-                    ".results-new-item",
-                    "[data-testid*='result']",
-                    "[data-testid*='tariff']",
-                    ".tariff-card",
-                    ".deal-card",
-                    ".result-card",
-                    "article",
-                ]
-                # Wait for at least one result card or common container to appear
-                for selector in result_selectors:
+                with flow.step("wait_for_results"):
+                    print("Waiting for results...")
+                    _scrape_sleep(_SCRAPE_RESULTS_POLL)
+                    result_selectors = [
+                        ".results-new-item",
+                        "[data-testid*='result']",
+                        "[data-testid*='tariff']",
+                        ".tariff-card",
+                        ".deal-card",
+                        ".result-card",
+                        "article",
+                    ]
+                    # Wait for at least one result card or common container to appear
+                    for selector in result_selectors:
+                        try:
+                            self.page.wait_for_selector(selector, timeout=12000)
+                            _scrape_sleep(_SCRAPE_AFTER_RESULTS_SELECTOR)
+                            break
+                        except Exception:
+                            continue
+                    # If still on enquiry form, click "See results" again and wait a bit longer.
                     try:
-                        self.page.wait_for_selector(selector, timeout=12000)
-                        _scrape_sleep(_SCRAPE_AFTER_RESULTS_SELECTOR)
-                        break
-                    except Exception:
-                        continue
-                # If still on enquiry form, click "See results" again and wait a bit longer.
-                try:
-                    if self.page.locator(".enquiry-view-new__form").first.is_visible(timeout=1000):
-                        retry_btn = self.page.locator(
-                            "button[data-qa='enquiry-submit-button'], button:has-text('See results')"
-                        ).first
-                        if retry_btn.is_visible(timeout=1000):
-                            retry_btn.scroll_into_view_if_needed()
-                            _scrape_sleep(_SCRAPE_SHORT)
-                            retry_btn.click()
-                            print("↻ Clicked 'See results' again (still on enquiry form)")
-                            try:
-                                self.page.wait_for_load_state("domcontentloaded", timeout=12000)
-                            except Exception:
-                                try:
-                                    self.page.wait_for_load_state("networkidle", timeout=8000)
-                                except Exception:
-                                    pass
-                            for selector in result_selectors:
+                        if self.page.locator(".enquiry-view-new__form").first.is_visible(timeout=1000):
+                            retry_btn = self.page.locator(
+                                "button[data-qa='enquiry-submit-button'], button:has-text('See results')"
+                            ).first
+                            if retry_btn.is_visible(timeout=1000):
+                                retry_btn.scroll_into_view_if_needed()
+                                _scrape_sleep(_SCRAPE_SHORT)
+                                retry_btn.click()
+                                print("↻ Clicked 'See results' again (still on enquiry form)")
                                 try:
-                                    self.page.wait_for_selector(selector, timeout=12000)
-                                    break
+                                    self.page.wait_for_load_state("domcontentloaded", timeout=12000)
                                 except Exception:
-                                    continue
-                except Exception:
-                    pass
-                _scrape_sleep(_SCRAPE_AFTER_RESULTS_SELECTOR)
-
-                # Get results HTML
-                html = self.page.content()
-                self.soup = BeautifulSoup(html, 'lxml')
-
-                # Save for debugging (non-fatal: if this fails, we still extract from self.soup)
-                try:
-                    with open(_debug_path('results_page.html'), 'w', encoding='utf-8') as f:
-                        f.write(self.soup.prettify())
-                    print("💾 Saved results to 'output/scrape_debug/results_page.html'")
-                except Exception as save_err:
-                    print(f"⚠ Could not save debug HTML: {save_err}")
+                                    try:
+                                        self.page.wait_for_load_state("networkidle", timeout=8000)
+                                    except Exception:
+                                        pass
+                                for selector in result_selectors:
+                                    try:
+                                        self.page.wait_for_selector(selector, timeout=12000)
+                                        break
+                                    except Exception:
+                                        continue
+                    except Exception:
+                        pass
+                    _scrape_sleep(_SCRAPE_AFTER_RESULTS_SELECTOR)
 
-                # Extract tariff data for all result cards
-                self.tariff = self._extract_tariff_data()
+                with flow.step("extract_tariffs"):
+                    # Get results HTML
+                    html = self.page.content()
 
-                # Persist each tariff to the database
-                for t in self.tariff:
+                    # Extract tariff data for all result cards. The results page is kept when
+                    # extraction fails or finds nothing, or when this scrape was sampled.
                     try:
-                        t.save(current_supplier, pay_method, has_ev)
-                    except Exception as db_err:
-                        print(f"⚠ Failed to save tariff '{t.new_supplier_name} - {t.tariff_name}': {db_err}")
+                        self.tariff = self._extract_tariff_data(html)
+                    except Exception:
+                        self.debug.html('results_page.html', html)
+                        raise
+                    self.debug.html('results_page.html', html, failure=not self.tariff)
+
+                # Persist each tariff to the database (not for replayed flows: offline benchmark)
+                if not flow.replaying:
+                    with flow.step("save_tariffs"):
+                        # One connection and transaction for the whole scrape; per-row on failure
+                        # so one bad row does not lose the rest.
+                        try:
+                            Tariff.save_many(self.tariff, current_supplier, pay_method, has_ev)
+                        except Exception as bulk_err:
+                            print(f"⚠ Bulk save failed ({bulk_err}); saving tariffs one by one")
+                            for t in self.tariff:
+                                try:
+                                    t.save(current_supplier, pay_method, has_ev)
+                                except Exception as db_err:
+                                    print(f"⚠ Failed to save tariff '{t.new_supplier_name} - {t.tariff_name}': {db_err}")
 
                 return self.tariff
 
@@ -783,13 +584,8 @@ class ScrapeTariff:
                     _retry_on_target_closed=False,
                 )
             if self.page:
-                try:
-                    self.page.screenshot(path=_debug_path('error_screenshot.png'))
-                    with open(_debug_path('error_page.html'), 'w', encoding='utf-8') as f:
-                        f.write(self.page.content())
-                    print("📸 Saved error screenshot and HTML")
-                except Exception:
-                    pass
+                self.debug.screenshot('error_screenshot.png', self.page)
+                self.debug.html('error_page.html', self.page)
             # Release refs before context manager closes to reduce risk of double-close crash
             self.page = None
             self.browser = None
@@ -898,14 +694,8 @@ class ScrapeTariff:
 
             if not quote_started:
                 print("\n✗ Failed to find 'Start a quote' button")
-                print("Taking screenshot for debugging...")
-                self.page.screenshot(path=_debug_path("debug_no_start_button.png"))
-
-                # Also save the full HTML
-                html_content = self.page.content()
-                with open(_debug_path("debug_page_content.html"), "w", encoding="utf-8") as f:
-                    f.write(html_content)
-                print("✓ Saved debug_no_start_button.png and debug_page_content.html")
+                self.debug.screenshot("debug_no_start_button.png", self.page)
+                self.debug.html("debug_page_content.html", self.page)
 
                 # Don't raise error - maybe we're already on the form
                 print("⚠ Could not find 'Start a quote' button - may already be on form")
@@ -982,7 +772,7 @@ class ScrapeTariff:
 
             if not email_entered:
                 print("✗ Failed to find email input field")
-                self.page.screenshot(path=_debug_path("debug_no_email_field.png"))
+                self.debug.screenshot("debug_no_email_field.png", self.page)
                 raise Exception("Could not locate email input field")
 
             # Now click submit/continue button
@@ -1023,7 +813,7 @@ class ScrapeTariff:
                     _scrape_sleep(_SCRAPE_AFTER_SUBMIT)
                 except:
                     print("✗ Failed to submit form")
-                    self.page.screenshot(path=_debug_path("debug_no_submit.png"))
+                    self.debug.screenshot("debug_no_submit.png", self.page)
 
             print(f"✓ Step 1 complete - email entered: {random_email}")
 
@@ -1327,14 +1117,9 @@ class ScrapeTariff:
                 if wanted:
                     print(f"⚠ Address name match not found for {wanted!r}; no fallback selection succeeded.")
                 print("✗ Failed to select address")
-                try:
-                    if self.page is not None and not self.page.is_closed():
-                        self.page.screenshot(path=_debug_path('step2_address_error.png'))
-                        with open(_debug_path("step2_address_page.html"), "w", encoding="utf-8") as f:
-                            f.write(self.page.content())
-                        print("Saved debug files: step2_address_error.png and step2_address_page.html")
-                except Exception:
-                    pass
+                self.debug.screenshot('step2_address_error.png', self.page)
+                if self.page is not None and not self.page.is_closed():
+                    self.debug.html("step2_address_page.html", self.page)
                 raise Exception("Could not select address from dropdown")
 
             # Submit address selection
@@ -1369,11 +1154,7 @@ class ScrapeTariff:
 
         except Exception as e:
             print(f"✗ Error in Step 2: {e}")
-            try:
-                if self.page is not None and not self.page.is_closed():
-                    self.page.screenshot(path=_debug_path('step2_error.png'))
-            except Exception:
-                pass
+            self.debug.screenshot('step2_error.png', self.page)
             raise
 
     def _step3_home_or_business(self, home_or_business: str = 'home'):
@@ -1473,13 +1254,8 @@ class ScrapeTariff:
 
             # Save page state for debugging if step fails (so we can inspect structure)
             def _save_step4_debug():
-                try:
-                    self.page.screenshot(path=_debug_path('step4_fuel_type_error.png'))
-                    with open(_debug_path("step4_fuel_page.html"), "w", encoding="utf-8") as f:
-                        f.write(self.page.content())
-                    print("Saved debug files: step4_fuel_type_error.png and step4_fuel_page.html")
-                except Exception:
-                    pass
+                self.debug.screenshot('step4_fuel_type_error.png', self.page)
+                self.debug.html("step4_fuel_page.html", self.page)
 
             # Map fuel_type parameter to button/link text (site may use various wordings)
             # Note: MoneySupermarket uses "Gas  & Electicity" (two spaces, typo) - include exact match
@@ -1696,7 +1472,7 @@ class ScrapeTariff:
 
         except Exception as e:
             print(f"✗ Error in Step 4: {str(e)}")
-            self.page.screenshot(path=_debug_path('step4_error.png'))
+            self.debug.screenshot('step4_error.png', self.page)
             raise
 
     def _step4b_supplier_details(self, current_supplier: str = ""):
@@ -1916,7 +1692,7 @@ class ScrapeTariff:
 
             if not ev_selected:
                 print("⚠ Failed to find EV selection - may be optional")
-                self.page.screenshot(path=_debug_path('step5_ev_error.png'))
+                self.debug.screenshot('step5_ev_error.png', self.page)
                 # Don't raise error - EV question might be optional
                 print("⚠ Continuing without EV selection")
                 return
@@ -2003,312 +1779,48 @@ class ScrapeTariff:
             raise
 
 
-    def _extract_tariff_data(self) -> List[Tariff]:
-        """Extract tariff data for all tariff result cards on the page."""
-
-        # Try multiple selectors – site may have changed class names
-        CARD_SELECTORS = [
-            ".results-new-item",
-            "[data-testid*='tariff']",
-            "[data-testid*='result']",
-            ".tariff-card",
-            ".deal-card",
-            ".result-card",
-            ".energy-deal",
-            ".product-card",
-            ".comparison-result",
-            "article[class*='result']",
-            "article[class*='tariff']",
-            "li[class*='result']",
-            "li[class*='tariff']",
-            "[class*='results-new-item']",
-            "[class*='tariff-card']",
-        ]
-        cards = []
-        for sel in CARD_SELECTORS:
-            cards = self.soup.select(sel)
-            if len(cards) >= 1:
-                print(f"  Found {len(cards)} cards using selector: {sel}")
-                break
-        if not cards:
-            # Log sample of class names in the page to help debug
-            all_classes = set()
-            for tag in self.soup.find_all(class_=True):
-                c = tag.get("class") or []
-                for cl in c:
-                    if isinstance(cl, str):
-                        all_classes.add(cl)
-            sample = sorted(all_classes)[:40]
-            print("  No tariff cards found. Sample class names on page:", sample)
+    def _extract_tariff_data(self, html: str | None = None) -> List[Tariff]:
+        """
+        Extract tariff data for all tariff result cards on the page.
+        Parsing and selectors live in tariff_extract (one lxml pass; page-level usage and cost
+        are read once and shared by every card).
+        """
+        if html is None:
+            html = self.page.content()
+        page = extract_results(html)
+        if not page.card_selector:
+            print("  No tariff cards found. Sample class names on page:", page.class_sample)
             raise Exception(
-                "Could not find any tariff result cards in results_page.html. "
-                "The comparison site may have changed its HTML. Check output/scrape_debug/results_page.html "
-                "and look for the class used for each tariff/result card, then add it to CARD_SELECTORS in _extract_tariff_data."
-            )
-
-        def build_tariff_from_card(card) -> Tariff:
-            # Annual cost from page-level usage callout (may be absent if layout changed)
-            annual_cost_ = 0
-            cost_span = self.soup.find(
-                "span",
-                class_="current-usage-card__callout__value",
-                string=re.compile("/yr")
-            )
-            if cost_span:
-                text = cost_span.get_text(strip=True)
-                m = re.search(r"£([\d,]+)/yr", text, re.IGNORECASE)
-                if m:
-                    try:
-                        annual_cost_ = int(m.group(1).replace(",", ""))
-                    except ValueError:
-                        pass
-                else:
-                    m = re.search(r"£([\d,]+)/mo", text, re.IGNORECASE)
-                    if m:
-                        try:
-                            annual_cost_ = int(m.group(1).replace(",", "")) * 12
-                        except ValueError:
-                            pass
-
-            annual_electricity_kwh = None
-            annual_gas_kwh = None
-            
-            usage_overview = self.soup.select_one(".current-usage-overview")
-
-            if usage_overview:
-                fuel_sections = usage_overview.select(".current-usage-overview__fuel")
-                for fuel_section in fuel_sections:
-                    # Find the fuel type and consumption spans that are siblings
-                    fuel_type_span = fuel_section.select_one(".current-usage-overview__consumption__type")
-                    
-                    if fuel_type_span:
-                        fuel_type_text = fuel_type_span.get_text(strip=True).lower()
-                        
-                        # The consumption value is the next sibling span
-                        consumption_span = fuel_type_span.find_next_sibling("span")
-                        
-                        if consumption_span:
-                            consumption_text = consumption_span.get_text(strip=True)
-                            print(f"  Found {fuel_type_text}: {consumption_text}")
-                            value = _usage_text_to_annual_kwh(consumption_text)
-                            if value is not None:
-                                if "gas" in fuel_type_text:
-                                    annual_gas_kwh = value
-                                elif "electric" in fuel_type_text:
-                                    annual_electricity_kwh = value
-
-            # Fallbacks for newer/variant markup where usage appears outside .current-usage-overview.
-            if annual_electricity_kwh is None or annual_gas_kwh is None:
-                usage_blocks = self.soup.select(
-                    ".enquiry-usage-prepop__container__item, .enquiry-usage, [class*='usage-prepop']"
-                )
-                for block in usage_blocks:
-                    text = block.get_text(" ", strip=True)
-                    low = text.lower()
-                    value = _usage_text_to_annual_kwh(text)
-                    if value is None:
-                        continue
-                    if annual_electricity_kwh is None and "electric" in low:
-                        annual_electricity_kwh = value
-                    if annual_gas_kwh is None and "gas" in low:
-                        annual_gas_kwh = value
-
-            # Last-resort parse from full page text.
-            if annual_electricity_kwh is None or annual_gas_kwh is None:
-                page_text = self.soup.get_text(" ", strip=True)
-                if annual_gas_kwh is None:
-                    m = re.search(r"gas[^\\d]{0,40}([\\d,]+)\\s*kwh(?:\\s*/\\s*(year|yr|month|mo))?", page_text, re.IGNORECASE)
-                    if m:
-                        annual_gas_kwh = _usage_text_to_annual_kwh(f"{m.group(1)} kWh / {m.group(2) or 'year'}")
-                if annual_electricity_kwh is None:
-                    m = re.search(r"electric(?:ity)?[^\\d]{0,40}([\\d,]+)\\s*kwh(?:\\s*/\\s*(year|yr|month|mo))?", page_text, re.IGNORECASE)
-                    if m:
-                        annual_electricity_kwh = _usage_text_to_annual_kwh(f"{m.group(1)} kWh / {m.group(2) or 'year'}")
-
-            if annual_electricity_kwh is not None or annual_gas_kwh is not None:
-                print(
-                    f"  Parsed usage: electricity={annual_electricity_kwh} kWh/yr, "
-                    f"gas={annual_gas_kwh} kWh/yr"
-                )
-            # Helper: get text within this card; try multiple selectors
-            def get_card_text(selectors, default: str = "") -> str:
-                if isinstance(selectors, str):
-                    selectors = [selectors]
-                for sel in selectors:
-                    el = card.select_one(sel)
-                    if el:
-                        return el.get_text(strip=True)
-                return default
-
-            # --- Supplier & tariff names (try multiple possible class names) ---
-            new_supplier_name = get_card_text([
-                ".results-new-item-brand__provider-name",
-                "[class*='provider-name']",
-                "[class*='supplier']",
-                ".supplier-name",
-                "h3",
-            ], "Unknown Supplier")
-            tariff_name = get_card_text([
-                ".results-new-item-brand__tariff-name",
-                "[class*='tariff-name']",
-                "[class*='tariff-name']",
-                ".tariff-name",
-            ], "Unknown Tariff")
-
-            # --- Tariff type & fixed length ---
-            fixed_price_length_months = 0
-            tariff_type = "Unknown"
-
-            rate_label_el = card.select_one(".results-new-item-rate-type__label")
-            rate_value_el = card.select_one(".results-new-item-rate-type__value")
-
-            rate_label_text = (
-                rate_label_el.get_text(strip=True).lower() if rate_label_el else ""
+                "Could not find any tariff result cards on the results page. "
+                "The comparison site may have changed its HTML. Check the captured *_results_page.html.gz in "
+                "output/scrape_debug and look for the class used for each tariff/result card, then add it to CARD_SELECTORS in tariff_extract.py."
             )
-            rate_value_text = (
-                rate_value_el.get_text(" ", strip=True).lower() if rate_value_el else ""
-            )
-
-            if "fixed" in rate_label_text or "fixed" in rate_value_text:
-                tariff_type = "Fixed"
-            elif "variable" in rate_label_text or "variable" in rate_value_text:
-                tariff_type = "Variable"
-
-            if rate_value_text:
-                m = re.search(r"(\d+)", rate_value_text)
-                if m:
-                    try:
-                        fixed_price_length_months = int(m.group(1))
-                    except ValueError:
-                        fixed_price_length_months = 0
-
-            # --- Exit fee & yearly saving / annual cost ---
-            exit_fee = 0.0
-            annual_cost_new = 0.0
-
-            # Exit fee lives in the callouts section
-            callout_cells = card.select(".results-new-item-callouts__cells__cell")
-            for cell in callout_cells:
-                label_el = cell.select_one(
-                    ".results-new-item-callouts__cells__cell__label"
-                )
-                if not label_el:
-                    continue
-                label = label_el.get_text(strip=True).lower()
-                if "early exit fee" in label:
-                    value_el = cell.select_one(
-                        ".results-new-item-callouts__cells__cell__value"
-                    )
-                    if value_el:
-                        text = value_el.get_text(" ", strip=True)
-                        cleaned = text.replace("£", "").replace(",", "").strip()
-                        try:
-                            exit_fee = float(cleaned)
-                        except ValueError:
-                            exit_fee = 0.0
-                    break
-
-            # Annual cost is in the "or £1,234 a year" / "£103 a month" style text
-            cost_sub_value = get_card_text(".results-new-item-cost__sub_value", "")
-            if cost_sub_value:
-                annual_cost_new = _tariff_card_annual_cost_gbp(cost_sub_value)
-
-            # --- Unit rate & standing charge (take Electricity column if present) ---
-            unit_rate = 0.0
-            standing_charge_day = 0.0
-            fuel_type = "Unknown"
-
-            table = card.select_one(".results-new-item-charges-breakdown__table")
-            if table:
-                # Determine fuel type from table headers
-                header_cells = table.select("thead tr th")
-                header_texts = [h.get_text(strip=True).lower() for h in header_cells]
-
-                has_gas = any("gas" in t for t in header_texts)
-                has_elec = any("electric" in t for t in header_texts)
-
-                if has_gas and has_elec:
-                    fuel_type = "gas_and_electricity"
-                elif has_elec:
-                    fuel_type = "electricity"
-                elif has_gas:
-                    fuel_type = "gas"
-
-                # When both present, the last column is Electricity
-                # We read standing charge and unit rate from that column
-                rows = table.select("tbody tr")
-                for row in rows:
-                    header_el = row.select_one("th")
-                    if not header_el:
-                        continue
-                    label = header_el.get_text(strip=True).lower()
-                    cells = row.select("td")
-                    if not cells:
-                        continue
-
-                    # Prefer electricity column = last cell
-                    value_el = cells[-1]
-                    text = value_el.get_text(" ", strip=True)
 
-                    if "standing charge" in label:
-                        standing_charge_day = _standing_charge_cell_to_pence_per_day(text)
-                    elif "unit rate" in label:
-                        text_lower = text.lower()
-                        m_gbp = re.search(r"£\s*([\d.]+)", text)
-                        if m_gbp:
-                            try:
-                                unit_rate = float(m_gbp.group(1)) * 100.0
-                            except ValueError:
-                                unit_rate = 0.0
-                        else:
-                            m_p = re.search(r"([\d.]+)\s*p\b", text_lower)
-                            if m_p:
-                                try:
-                                    unit_rate = float(m_p.group(1))
-                                except ValueError:
-                                    unit_rate = 0.0
-                            else:
-                                m = re.search(r"([\d.]+)", text)
-                                if m:
-                                    try:
-                                        unit_rate = float(m.group(1))
-                                    except ValueError:
-                                        unit_rate = 0.0
-                        # --- Check if tariff is green/renewable ---
-            is_green = False
-            # Check for green-electricity-decal within tariff-decals
-            decals_section = card.select_one(".tariff-decals")
-            if decals_section:
-                green_decal = decals_section.select_one(".green-electricity-decal")
-                if green_decal:
-                    # Check if it contains "Green electricity" text
-                    decal_text = green_decal.get_text(strip=True).lower()
-                    if "green" in decal_text or "renewable" in decal_text:
-                        is_green = True
-
-
-            # --- Build Tariff object ---
-            now = datetime.now()
-
-            tariff = Tariff(
+        now = datetime.now()
+        valid_from = self._parse_date_or_now(page.valid_from_text, now)
+        valid_to = self._parse_date_or_now(page.valid_to_text, now)
+        loc = self.location_data or {}
+        tariffs: List[Tariff] = []
+        for card in page.cards:
+            tariffs.append(Tariff(
                 # Tariff details
-                new_supplier_name=new_supplier_name,
-                tariff_name=tariff_name,
-                tariff_type=tariff_type,
-                fixed_price_length_months=fixed_price_length_months,
-                is_green=is_green,
+                new_supplier_name=card.new_supplier_name,
+                tariff_name=card.tariff_name,
+                tariff_type=card.tariff_type,
+                fixed_price_length_months=card.fixed_price_length_months,
+                is_green=card.is_green,
 
                 # Location details - USE LOOKUP DATA
-                region_code=self.location_data.get('region_code', ''),
-                region_name=self.location_data.get('region', ''),
-                dno_name=self.location_data.get('dno_name', ''),
-                dno_id=self.location_data.get('dno_id', ''),
-                postcode=self.location_data.get('postcode', ''),
-                outward_code=self.location_data.get('outward_code', ''),
-                latitude=self.location_data.get('latitude', 0.0),
-                longitude=self.location_data.get('longitude', 0.0),
+                region_code=loc.get('region_code', ''),
+                region_name=loc.get('region', ''),
+                dno_name=loc.get('dno_name', ''),
+                dno_id=loc.get('dno_id', ''),
+                postcode=loc.get('postcode', ''),
+                outward_code=loc.get('outward_code', ''),
+                latitude=loc.get('latitude', 0.0),
+                longitude=loc.get('longitude', 0.0),
 
-                fuel_type=fuel_type,
+                fuel_type=card.fuel_type,
 
                 # Search details
                 search_date=now,
@@ -2316,50 +1828,23 @@ class ScrapeTariff:
                 year=now.year,
 
                 # Cost details
-                annual_electricity_kwh=annual_electricity_kwh,
-                annual_gas_kwh=annual_gas_kwh,
-                unit_rate=unit_rate,
-                standing_charge_day=standing_charge_day,
-                exit_fee=exit_fee,
-                annual_cost_current=annual_cost_,
-                annual_cost_new=annual_cost_new,
-                valid_from=self._get_datetime(".valid-from"),
-                valid_to=self._get_datetime(".valid-to"),
+                annual_electricity_kwh=page.annual_electricity_kwh,
+                annual_gas_kwh=page.annual_gas_kwh,
+                unit_rate=card.unit_rate,
+                standing_charge_day=card.standing_charge_day,
+                exit_fee=card.exit_fee,
+                annual_cost_current=page.annual_cost_current,
+                annual_cost_new=card.annual_cost_new,
+                valid_from=valid_from,
+                valid_to=valid_to,
                 created_at=now,
                 last_updated=now,
-            )
-
-            return tariff
-
-        tariffs: List[Tariff] = []
-        for idx, card in enumerate(cards):
-            try:
-                tariffs.append(build_tariff_from_card(card))
-            except Exception as e:
-                print(f"⚠ Skipping result card {idx} due to error: {e}")
-
+            ))
         return tariffs
 
-    # Helper methods for extracting data
-    def _get_text(self, selector: str, default: str = '') -> str:
-        """Get text content from CSS selector"""
-        element = self.soup.select_one(selector)
-        return element.get_text(strip=True) if element else default
-
-
-    def _get_bool(self, selector: str, default: bool = False) -> bool:
-        """Get boolean value from CSS selector"""
-        element = self.soup.select_one(selector)
-        if not element:
-            return default
-
-        text = element.get_text(strip=True).lower()
-        return text in ['true', 'yes', '1', 'green', 'renewable']
-
-    def _get_datetime(self, selector: str) -> datetime:
-        """Get datetime value from CSS selector"""
-        text = self._get_text(selector)
+    @staticmethod
+    def _parse_date_or_now(text: str, now: datetime) -> datetime:
         try:
             return datetime.strptime(text, '%Y-%m-%d')
-        except (ValueError, AttributeError):
-            return datetime.now() 
\ No newline at end of file
+        except (ValueError, TypeError):
+            return now
@@ -3,6 +3,8 @@ Created 02-03-26
 @author: Tom Osborne
 """
 
+import os
+
 import mysql.connector
 from dataclasses import dataclass
 from datetime import datetime
@@ -59,6 +61,73 @@ class Tariff:
         finally:
             conn.close()
 
+    # One row of fact_tariff_search_simple (save and save_many). created_at is left to the column's
+    # DEFAULT CURRENT_TIMESTAMP so it is on the database clock, which the star ETL's lag compares against.
+    _INSERT = """
+    INSERT INTO fact_tariff_search_simple (
+        current_supplier_name, pay_method, EV_question, new_supplier_name, 
+        tariff_name, tariff_type, fixed_price_length_months, 
+        is_green, region_code, region_name, dno_name, dno_id, postcode, 
+        outward_code, latitude, longitude, fuel_type, search_date, month, 
+        year, annual_electricity_kwh, annual_gas_kwh, unit_rate, 
+        standing_charge, exit_fee, annual_cost_current, annual_cost_new, 
+        valid_from, valid_to, last_updated
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+    )
+    """
+
+    def _row(self, current_supplier: str, pay_method: str, EV_question: str) -> tuple:
+        """Column values for _INSERT, in order."""
+        return (
+            current_supplier,
+            pay_method,
+            EV_question,
+            self.new_supplier_name,
+            self.tariff_name,
+            self.tariff_type,
+            self.fixed_price_length_months,
+            self.is_green,
+            self.region_code,
+            self.region_name,
+            self.dno_name,
+            self.dno_id,
+            self.postcode,
+            self.outward_code,
+            self.latitude,
+            self.longitude,
+            self.fuel_type,
+            self.search_date,
+            self.month,
+            self.year,
+            self.annual_electricity_kwh,
+            self.annual_gas_kwh,
+            self.unit_rate,
+            self.standing_charge_day,
+            self.exit_fee,
+            self.annual_cost_current,
+            self.annual_cost_new,
+            self.valid_from,
+            self.valid_to,
+            self.last_updated
+        )
+
+    @staticmethod
+    def _record_trends(conn, tariffs: list["Tariff"]) -> None:
+        """Add saved tariffs to the price-trend histograms (src/data/tariff_trends.py); never fails the save."""
+        if (os.environ.get("TARIFF_TRENDS_ON_INGEST") or "1").strip().lower() in ("0", "false", "no", "off"):
+            return
+        try:
+            from src.data.tariff_trends import record_ingest
+
+            record_ingest(conn, [
+                (t.search_date, t.dno_id, t.new_supplier_name, t.fuel_type, t.unit_rate, t.standing_charge_day)
+                for t in tariffs
+            ])
+        except Exception as err:
+            print(f"⚠ Tariff trend update failed: {err}")
+
     def save(self, current_supplier: str, pay_method: str, EV_question: str):
         """Save tariff to database using parameterized query
         
@@ -69,62 +138,35 @@ class Tariff:
         """
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
+            try:
+                cursor.execute(self._INSERT, self._row(current_supplier, pay_method, EV_question))
+                conn.commit()
+                self._record_trends(conn, [self])
+                return cursor.lastrowid
+            except mysql.connector.Error as err:
+                conn.rollback()
+                raise Exception(f"Database error: {err}")
+            finally:
+                cursor.close()
 
-            query = """
-            INSERT INTO fact_tariff_search_simple (
-                current_supplier_name, pay_method, EV_question, new_supplier_name, 
-                tariff_name, tariff_type, fixed_price_length_months, 
-                is_green, region_code, region_name, dno_name, dno_id, postcode, 
-                outward_code, latitude, longitude, fuel_type, search_date, month, 
-                year, annual_electricity_kwh, annual_gas_kwh, unit_rate, 
-                standing_charge, exit_fee, annual_cost_current, annual_cost_new, 
-                valid_from, valid_to, created_at, last_updated
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-            """
-
-            values = (
-                current_supplier,
-                pay_method,
-                EV_question,
-                self.new_supplier_name,
-                self.tariff_name,
-                self.tariff_type,
-                self.fixed_price_length_months,
-                self.is_green,
-                self.region_code,
-                self.region_name,
-                self.dno_name,
-                self.dno_id,
-                self.postcode,
-                self.outward_code,
-                self.latitude,
-                self.longitude,
-                self.fuel_type,
-                self.search_date,
-                self.month,
-                self.year,
-                self.annual_electricity_kwh,
-                self.annual_gas_kwh,
-                self.unit_rate,
-                self.standing_charge_day,
-                self.exit_fee,
-                self.annual_cost_current,
-                self.annual_cost_new,
-                self.valid_from,
-                self.valid_to,
-                self.created_at,
-                self.last_updated
-            )
+    @classmethod
+    def save_many(cls, tariffs: list["Tariff"], current_supplier: str, pay_method: str, EV_question: str) -> int:
+        """Bulk ingest: save all tariffs of one scrape on one connection in one transaction.
 
+        Returns the number of rows written. On error nothing is written and an Exception is raised
+        (callers can fall back to save() per tariff).
+        """
+        if not tariffs:
+            return 0
+        with tariffs[0]._get_db_connection() as conn:
+            cursor = conn.cursor()
             try:
-                cursor.execute(query, values)
+                cursor.executemany(cls._INSERT, [t._row(current_supplier, pay_method, EV_question) for t in tariffs])
                 conn.commit()
-                return cursor.lastrowid
+                cls._record_trends(conn, tariffs)
+                return len(tariffs)
             except mysql.connector.Error as err:
                 conn.rollback()
                 raise Exception(f"Database error: {err}")
             finally:
-                cursor.close()
\ No newline at end of file
+                cursor.close()
@@ -0,0 +1,173 @@
+"""
+Debug artifacts (page HTML, screenshots) for scrapes, captured by policy and written off the scrape thread.
+
+SCRAPER_DEBUG_CAPTURE decides which scrapes leave artifacts in output/scrape_debug:
+- failure (default): only failure paths (a step that cannot find its control, an extraction that
+  finds no tariffs, the scrape's final error page).
+- sample: failures, plus the results page of a random SCRAPER_DEBUG_SAMPLE fraction of successful
+  scrapes (default 0.05). The draw happens once per scrape. always is sample with fraction 1.
+- off: nothing.
+
+The scrape thread only grabs page.content() / screenshot bytes, and only when the policy wants
+them. A single background thread gzips the HTML and writes the files as
+<timestamp>_<postcode>_<name>[.gz]. After each write it prunes the oldest files so the directory
+stays under SCRAPER_DEBUG_MAX_MB (default 50). Scrape processes call drain() before they exit so
+queued writes are not lost.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+__all__ = ["DebugCapture", "capture_policy", "drain", "prune"]
+
+DEBUG_DIR = Path(__file__).resolve().parents[3] / "output" / "scrape_debug"
+
+
+def capture_policy() -> str:
+    """SCRAPER_DEBUG_CAPTURE: off, failure, sample or always."""
+    policy = (os.environ.get("SCRAPER_DEBUG_CAPTURE") or "failure").strip().lower()
+    return policy if policy in ("off", "failure", "sample", "always") else "failure"
+
+
+def _sample_rate() -> float:
+    try:
+        return min(1.0, max(0.0, float(os.environ.get("SCRAPER_DEBUG_SAMPLE", "0.05"))))
+    except ValueError:
+        return 0.05
+
+
+def _max_bytes() -> int:
+    try:
+        return int(max(1.0, float(os.environ.get("SCRAPER_DEBUG_MAX_MB", "50"))) * 1024 * 1024)
+    except ValueError:
+        return 50 * 1024 * 1024
+
+
+def prune(directory: Path, max_bytes: int) -> int:
+    """Delete the oldest files in directory until it holds at most max_bytes; returns files removed."""
+    try:
+        files = [(e.stat().st_mtime, e.stat().st_size, Path(e.path)) for e in os.scandir(directory) if e.is_file()]
+    except OSError:
+        return 0
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+class _Writer:
+    """One daemon thread draining a queue of (path, bytes, compress) writes."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path, data: bytes, compress: bool) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="scrape-debug-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((path, data, compress))
+
+    def _run(self) -> None:
+        while True:
+            path, data, compress = self._queue.get()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if compress:
+                    data = gzip.compress(data, compresslevel=6)
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+                prune(path.parent, _max_bytes())
+            except Exception as e:
+                print(f"⚠ Could not save debug file {path.name}: {e}", flush=True)
+            finally:
+                self._queue.task_done()
+
+    def drain(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+_WRITER = _Writer()
+
+
+def drain(timeout: float = 10.0) -> bool:
+    """Wait (up to timeout seconds) for queued debug writes; True when everything was written."""
+    return _WRITER.drain(timeout)
+
+
+class DebugCapture:
+    """The debug artifact policy for one scrape (label: the postcode, used in file names)."""
+
+    def __init__(self, label: str = "", policy: str | None = None, sample_rate: float | None = None,
+                 directory: Path | None = None) -> None:
+        self.policy = policy or capture_policy()
+        rate = _sample_rate() if sample_rate is None else sample_rate
+        self.sampled = self.policy == "always" or (self.policy == "sample" and random.random() < rate)
+        self.directory = Path(directory) if directory else DEBUG_DIR
+        self.slug = re.sub(r"[^A-Z0-9]", "", (label or "").upper()) or "scrape"
+        self.saved: list[str] = []
+
+    def wants(self, failure: bool = True) -> bool:
+        """Whether an artifact of this kind (failure path or success sample) is captured."""
+        if self.policy == "off":
+            return False
+        return failure or self.sampled
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{self.slug}_{name}"
+
+    def html(self, name: str, source: Any, failure: bool = True) -> None:
+        """Queue page HTML (a str, or a page whose content() is read here) as <name>.gz."""
+        if not self.wants(failure):
+            return
+        try:
+            content = source if isinstance(source, str) else source.content()
+        except Exception as e:
+            print(f"⚠ Could not read page for {name}: {e}")
+            return
+        path = self._path(name + ".gz")
+        _WRITER.submit(path, content.encode("utf-8"), compress=True)
+        self.saved.append(path.name)
+        print(f"💾 Queued debug HTML {path.name}")
+
+    def screenshot(self, name: str, page: Any, failure: bool = True) -> None:
+        """Queue a PNG screenshot of page (already compressed, written as-is)."""
+        if not self.wants(failure):
+            return
+        try:
+            if page is None or page.is_closed():
+                return
+            data = page.screenshot()
+        except Exception as e:
+            print(f"⚠ Could not take screenshot {name}: {e}")
+            return
+        path = self._path(name)
+        _WRITER.submit(path, data, compress=False)
+        self.saved.append(path.name)
+        print(f"📸 Queued debug screenshot {path.name}")
@@ -0,0 +1,353 @@
+"""
+Record/replay of scrape flows, so ScrapeTariff.scrape can be timed and regressed without the live site.
+
+SCRAPER_HAR_MODE selects what a scrape does with its browser traffic:
+- off (default): normal scrape. Steps are still timed and logged.
+- record: the browser context records a HAR (navigations, XHRs and bodies, with their timings) to
+  <dir>/flow.har. The DOM after each step goes to <dir>/steps/NN_<step>.html, and the scrape
+  arguments and step timings go to <dir>/flow.json. <dir> is SCRAPER_HAR_DIR, or
+  output/scrape_flows/<timestamp>_<postcode>.
+- replay: a local HTTP server (HarReplayServer) serves the recorded responses. It waits each
+  entry's recorded time, scaled by SCRAPER_REPLAY_TIMING (1 = as recorded, 0 = no delay). Every
+  browser request is routed to it, and requests it cannot match are aborted. Nothing is saved to
+  the database. SCRAPER_HAR_DIR names the recorded flow.
+
+Run one with `python -m src.tools.scrape_replay` (record / replay / per-step benchmark).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+__all__ = [
+    "HarIndex",
+    "HarReplayServer",
+    "ScrapeFlow",
+    "entry_body",
+    "flow_dir_for",
+    "har_mode",
+]
+
+_FLOWS_DIR = Path(__file__).resolve().parents[3] / "output" / "scrape_flows"
+
+# Hop-by-hop or already-applied headers: bodies in the HAR are decoded and re-sent whole.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def har_mode() -> str:
+    """SCRAPER_HAR_MODE: off, record or replay."""
+    mode = (os.environ.get("SCRAPER_HAR_MODE") or "off").strip().lower()
+    return mode if mode in ("record", "replay") else "off"
+
+
+def _replay_timing() -> float:
+    try:
+        return max(0.0, float(os.environ.get("SCRAPER_REPLAY_TIMING", "1")))
+    except ValueError:
+        return 1.0
+
+
+def flow_dir_for(postcode: str) -> Path:
+    """SCRAPER_HAR_DIR, or a fresh output/scrape_flows/<timestamp>_<postcode> directory."""
+    explicit = (os.environ.get("SCRAPER_HAR_DIR") or "").strip()
+    if explicit:
+        return Path(explicit)
+    slug = re.sub(r"[^A-Z0-9]", "", (postcode or "").upper()) or "flow"
+    return _FLOWS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{slug}"
+
+
+def _strip_fragment(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+
+
+def _without_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+class HarIndex:
+    """
+    Recorded responses looked up by method and URL.
+
+    Repeated requests for one URL get the recorded responses in order (the last one repeats).
+    A POST whose body matches a recorded body gets that response. When the exact URL was never
+    recorded, the same path with another query string is used (cache busters, timestamps).
+    """
+
+    def __init__(self, har: dict[str, Any]):
+        self.entries: list[dict[str, Any]] = list((har.get("log") or {}).get("entries") or [])
+        self._by_url: dict[tuple[str, str], list[int]] = {}
+        self._by_path: dict[tuple[str, str], list[int]] = {}
+        for i, entry in enumerate(self.entries):
+            method = entry["request"]["method"].upper()
+            url = entry["request"]["url"]
+            self._by_url.setdefault((method, _strip_fragment(url)), []).append(i)
+            self._by_path.setdefault((method, _without_query(url)), []).append(i)
+        self._served: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses: list[str] = []
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HarIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, method: str, url: str, body: bytes | None = None) -> dict[str, Any] | None:
+        method = method.upper()
+        with self._lock:
+            key = (method, _strip_fragment(url))
+            candidates = self._by_url.get(key)
+            if not candidates:
+                key = (method, _without_query(url))
+                candidates = self._by_path.get(key)
+            if not candidates:
+                self.misses.append(f"{method} {url}")
+                return None
+            self.hits += 1
+            if body:
+                text = body.decode("utf-8", errors="replace")
+                for i in candidates:
+                    if ((self.entries[i]["request"].get("postData") or {}).get("text")) == text:
+                        return self.entries[i]
+            n = self._served.get(key, 0)
+            self._served[key] = n + 1
+            return self.entries[candidates[min(n, len(candidates) - 1)]]
+
+
+def entry_body(entry: dict[str, Any]) -> bytes:
+    content = entry["response"].get("content") or {}
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+class HarReplayServer:
+    """
+    Local HTTP server answering recorded requests after their recorded time.
+
+    The browser side (ScrapeFlow in replay mode) POSTs each intercepted request to /replay, with
+    the original method and URL in X-Replay-Method / X-Replay-Url and the original body as the
+    body. The answer is the recorded status, headers and body; unmatched requests get 404 with
+    X-Replay-Miss. Requests are handled on separate threads, so parallel loads overlap as they
+    did live.
+    """
+
+    def __init__(self, har_path: str | Path, timing: float | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.index = HarIndex.load(har_path)
+        self.timing = _replay_timing() if timing is None else max(0.0, float(timing))
+        index, scale = self.index, self.timing
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802 (http.server naming)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                entry = index.match(
+                    self.headers.get("X-Replay-Method") or "GET",
+                    self.headers.get("X-Replay-Url") or "",
+                    body or None,
+                )
+                if entry is None:
+                    self.send_response(404)
+                    self.send_header("X-Replay-Miss", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if scale > 0:
+                    time.sleep(max(0.0, float(entry.get("time") or 0.0)) / 1000.0 * scale)
+                payload = entry_body(entry)
+                self.send_response(int(entry["response"].get("status") or 200))
+                for h in entry["response"].get("headers") or []:
+                    if h["name"].lower() not in _DROP_HEADERS:
+                        self.send_header(h["name"], h["value"])
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/replay"
+
+    def start(self) -> "HarReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="har-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "HarReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+class ScrapeFlow:
+    """
+    Per-scrape step timer plus HAR record/replay wiring (see module docstring).
+
+    ScrapeTariff opens its page through page() and wraps each step in step(); the timings are
+    logged in every mode and written to flow.json when recording.
+    """
+
+    def __init__(self, mode: str, directory: Path | None = None, args: dict[str, Any] | None = None):
+        self.mode = mode
+        self.directory = directory
+        self.args = dict(args or {})
+        self.steps: list[dict[str, Any]] = []
+        self.server: HarReplayServer | None = None
+        self._page = None
+        self._started = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, postcode: str, args: dict[str, Any]) -> "ScrapeFlow":
+        mode = har_mode()
+        if mode == "off":
+            return cls("off", args=args)
+        directory = flow_dir_for(postcode)
+        if mode == "replay" and directory.suffix == ".har":
+            directory = directory.parent
+        return cls(mode, directory, args)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def har_path(self) -> Path | None:
+        return self.directory / "flow.har" if self.directory is not None else None
+
+    @contextmanager
+    def page(self, browser: Any) -> Iterator[Any]:
+        """A page on browser: recording a HAR, routed to the replay server, or plain."""
+        context = None
+        if self.mode == "record":
+            (self.directory / "steps").mkdir(parents=True, exist_ok=True)
+            context = browser.new_context(record_har_path=str(self.har_path), record_har_content="embed")
+            page = context.new_page()
+            print(f"⏺ Recording scrape flow to {self.directory}", flush=True)
+        elif self.mode == "replay":
+            if not self.har_path.is_file():
+                raise FileNotFoundError(f"No recorded flow at {self.har_path} (set SCRAPER_HAR_DIR)")
+            (self.directory / "replay_steps").mkdir(parents=True, exist_ok=True)
+            self.server = HarReplayServer(self.har_path).start()
+            context = browser.new_context()
+            context.route("**/*", self._replay_route(context))
+            page = context.new_page()
+            print(
+                f"⏵ Replaying {len(self.server.index.entries)} recorded requests from {self.har_path} "
+                f"(timing x{self.server.timing:g})",
+                flush=True,
+            )
+        else:
+            page = browser.new_page()
+        self._page = page
+        try:
+            yield page
+        finally:
+            self._page = None
+            if context is not None:
+                try:
+                    context.close()  # flushes the HAR when recording
+                except Exception as e:
+                    print(f"⚠ Could not close recording context: {e}")
+            if self.server is not None:
+                self.server.stop()
+            self.finish()
+
+    def _replay_route(self, context: Any):
+        server_url = self.server.url
+
+        def handle(route: Any, request: Any) -> None:
+            try:
+                resp = context.request.fetch(
+                    server_url,
+                    method="POST",
+                    headers={"X-Replay-Method": request.method, "X-Replay-Url": request.url},
+                    data=request.post_data_buffer or b"",
+                    max_redirects=0,
+                )
+            except Exception:
+                route.abort()
+                return
+            if resp.headers.get("x-replay-miss"):
+                route.abort()
+                return
+            route.fulfill(status=resp.status, headers=resp.headers, body=resp.body())
+
+        return handle
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time one scrape step; when recording or replaying, also keep the DOM it left behind."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            seconds = time.perf_counter() - started
+            row: dict[str, Any] = {"name": name, "seconds": round(seconds, 3), "ok": ok}
+            if self.directory is not None and self._page is not None:
+                sub = "steps" if self.mode == "record" else "replay_steps"
+                dom = self.directory / sub / f"{len(self.steps):02d}_{name}.html"
+                try:
+                    dom.write_text(self._page.content(), encoding="utf-8")
+                    row["dom"] = str(dom.relative_to(self.directory))
+                except Exception:
+                    pass
+            self.steps.append(row)
+            print(f"⏱ {name}: {seconds:.2f}s{'' if ok else ' (failed)'}", flush=True)
+
+    def report(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "mode": self.mode,
+            "args": self.args,
+            "steps": self.steps,
+            "total_seconds": round(time.perf_counter() - self._started, 3),
+        }
+        if self.server is not None:
+            out["replay"] = {
+                "timing": self.server.timing,
+                "hits": self.server.index.hits,
+                "misses": len(self.server.index.misses),
+                "missed_urls": self.server.index.misses[:50],
+            }
+        return out
+
+    def finish(self) -> None:
+        """Log the step summary; when recording, write flow.json next to the HAR."""
+        report = self.report()
+        summary = ", ".join(f"{s['name']} {s['seconds']:.1f}s" for s in self.steps)
+        print(f"⏱ Scrape steps ({self.mode}): {summary}; total {report['total_seconds']:.1f}s", flush=True)
+        if self.mode == "record" and self.directory is not None:
+            report["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+            try:
+                (self.directory / "flow.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+            except Exception as e:
+                print(f"⚠ Could not write flow.json: {e}")
@@ -0,0 +1,515 @@
+"""
+Tariff card extraction from the comparison site's results page.
+
+One lxml parse per page. The card and field selectors are compiled to XPath once, at import.
+Cards are searched for inside the results container (not the whole document, where promo or
+header blocks can match the looser card selectors); the document is the fallback when no
+container matches or it holds no cards.
+Page-level facts (current annual cost, annual electricity/gas usage, valid-from/to) are resolved
+once per page, not once per card, and each card's fields are read relative to its own element,
+so per-card work is bounded by the card's subtree rather than the page.
+
+Values follow the same rules as the BeautifulSoup extractor this replaces: same selectors in the
+same priority order, same text normalisation (get_text semantics: script/style/template and
+comments excluded) and the same parsers for costs, rates and usage.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from lxml import etree, html as lxml_html
+
+__all__ = [
+    "CARD_SELECTORS",
+    "RESULTS_CONTAINER_SELECTORS",
+    "CardFields",
+    "ResultsPage",
+    "compile_css",
+    "extract_results",
+]
+
+# Try multiple selectors – site may have changed class names
+CARD_SELECTORS = [
+    ".results-new-item",
+    "[data-testid*='tariff']",
+    "[data-testid*='result']",
+    ".tariff-card",
+    ".deal-card",
+    ".result-card",
+    ".energy-deal",
+    ".product-card",
+    ".comparison-result",
+    "article[class*='result']",
+    "article[class*='tariff']",
+    "li[class*='result']",
+    "li[class*='tariff']",
+    "[class*='results-new-item']",
+    "[class*='tariff-card']",
+]
+
+# The list that holds the result cards, tried in order (first match wins).
+RESULTS_CONTAINER_SELECTORS = [
+    ".results-new",
+    "[data-testid*='results-list']",
+    "[class*='results-list']",
+]
+
+
+def _usage_text_to_annual_kwh(consumption_text: str) -> int | None:
+    """
+    Parse kWh from comparison-site usage copy (e.g. '2,900 kWh / year' or '242 kWh / month').
+    Returns annual kWh, scaling up when the site states a monthly figure.
+    """
+    if not consumption_text:
+        return None
+    match = re.search(r"([\d,]+)\s*kwh", consumption_text, re.IGNORECASE)
+    if not match:
+        return None
+    try:
+        value = int(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    low = consumption_text.lower()
+    monthly_markers = ("/month", "/ month", "per month", "a month", "pcm", "p.m.", " monthly")
+    yearly_markers = ("/year", "/ year", "per year", "a year", "p.a.", "annum", "annual", "/yr", "/ yr")
+    if any(m in low for m in monthly_markers):
+        return value * 12
+    if any(m in low for m in yearly_markers):
+        return value
+    # Plain "X kWh" with no period: treat as annual (legacy pages often imply yearly usage).
+    return value
+
+
+def _tariff_card_annual_cost_gbp(cost_sub_value: str) -> float:
+    """Parse 'or £1,234 a year' vs '£103 a month' style strings into an annual £ total."""
+    if not cost_sub_value:
+        return 0.0
+    m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", cost_sub_value)
+    if not m:
+        return 0.0
+    try:
+        val = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return 0.0
+    low = cost_sub_value.lower()
+    if any(x in low for x in ("month", "/mo", " pcm", "p.m.")):
+        return val * 12.0
+    return val
+
+
+def _standing_charge_cell_to_pence_per_day(display_text: str) -> float:
+    """
+    Standing charge may be shown as pence/day or as £/month. Tariff model stores pence per day.
+    """
+    if not display_text:
+        return 0.0
+    t = display_text.replace("\u00a0", " ").strip()
+    low = t.lower()
+
+    def _gbp_month_to_pence_per_day(gbp_month: float) -> float:
+        days_per_month = 365.25 / 12.0
+        return round((gbp_month * 100.0) / days_per_month, 4)
+
+    if re.search(r"month|/mo\b|pcm|per\s+month", low):
+        m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", t)
+        if m:
+            try:
+                return _gbp_month_to_pence_per_day(float(m.group(1).replace(",", "")))
+            except ValueError:
+                return 0.0
+    m = re.search(r"([\d,]+(?:\.\d+)?)\s*p", low)
+    if m:
+        try:
+            return float(m.group(1).replace(",", ""))
+        except ValueError:
+            return 0.0
+    m = re.search(r"£\s*([\d,]+(?:\.\d+)?)", t)
+    if m and not re.search(r"[\d,]+(?:\.\d+)?\s*p", low):
+        try:
+            gbp = float(m.group(1).replace(",", ""))
+        except ValueError:
+            gbp = 0.0
+        if gbp >= 5.0:
+            return _gbp_month_to_pence_per_day(gbp)
+    m = re.search(r"([\d,]+(?:\.\d+)?)", t)
+    if m:
+        try:
+            return float(m.group(1).replace(",", ""))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def _unit_rate_cell_to_pence(text: str) -> float:
+    """Unit rate cell ('£0.2450', '24.5p', '24.5') in pence per kWh."""
+    m_gbp = re.search(r"£\s*([\d.]+)", text)
+    if m_gbp:
+        try:
+            return float(m_gbp.group(1)) * 100.0
+        except ValueError:
+            return 0.0
+    m_p = re.search(r"([\d.]+)\s*p\b", text.lower())
+    if m_p:
+        try:
+            return float(m_p.group(1))
+        except ValueError:
+            return 0.0
+    m = re.search(r"([\d.]+)", text)
+    if m:
+        try:
+            return float(m.group(1))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+# --- CSS -> XPath for the selector subset used here ---------------------------------------------
+
+_COMPOUND = re.compile(
+    r"""(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\#[\w-]+|\[[^\]]+\])*)$"""
+)
+_PART = re.compile(r"\.(?P<cls>[\w-]+)|\#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?P<q>['\"]?)(?P<val>.*?)(?P=q))?\]")
+
+
+def _xpath_literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in parts) + ")"
+
+
+def _compound_xpath(compound: str) -> str:
+    m = _COMPOUND.match(compound)
+    if not m:
+        raise ValueError(f"unsupported selector: {compound!r}")
+    predicates: list[str] = []
+    for p in _PART.finditer(m.group("rest") or ""):
+        if p.group("cls"):
+            token = _xpath_literal(f" {p.group('cls')} ")
+            predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), {token})")
+        elif p.group("id"):
+            predicates.append(f"@id={_xpath_literal(p.group('id'))}")
+        else:
+            attr, op, val = p.group("attr"), p.group("op"), p.group("val")
+            lit = _xpath_literal(val or "")
+            if op is None:
+                predicates.append(f"@{attr}")
+            elif op == "=":
+                predicates.append(f"@{attr}={lit}")
+            elif op == "*=":
+                predicates.append(f"contains(@{attr}, {lit})")
+            elif op == "^=":
+                predicates.append(f"starts-with(@{attr}, {lit})")
+            else:  # $=
+                predicates.append(f"substring(@{attr}, string-length(@{attr}) - string-length({lit}) + 1)={lit}")
+    return (m.group("tag") or "*") + "".join(f"[{p}]" for p in predicates)
+
+
+def compile_css(selector: str) -> etree.XPath:
+    """
+    Compile a CSS selector (groups, descendant combinator, tag, .class, #id, [attr], [attr=|*=|^=|$=v])
+    to an XPath evaluated relative to an element; results come back in document order like select().
+    """
+    paths = []
+    for group in selector.split(","):
+        steps = group.split()
+        if not steps:
+            raise ValueError(f"empty selector group in {selector!r}")
+        paths.append("".join(f"descendant::{_compound_xpath(s)}" if i == 0 else f"/descendant::{_compound_xpath(s)}"
+                             for i, s in enumerate(steps)))
+    return etree.XPath(" | ".join(paths))
+
+
+def _first(path: etree.XPath, el: Any) -> Any:
+    found = path(el)
+    return found[0] if found else None
+
+
+_SKIP_TEXT = {"script", "style", "template"}
+
+
+def _strings(el: Any):
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el: Any, sep: str = "") -> str:
+    """BeautifulSoup get_text(sep, strip=True): stripped visible strings joined by sep."""
+    return sep.join(s for s in (x.strip() for x in _strings(el)) if s)
+
+
+# Field selectors, tried in order (first match wins), compiled once.
+_CONTAINER_PATHS = [compile_css(sel) for sel in RESULTS_CONTAINER_SELECTORS]
+_CARD_PATHS = [(sel, compile_css(sel)) for sel in CARD_SELECTORS]
+_SUPPLIER = [compile_css(s) for s in (
+    ".results-new-item-brand__provider-name", "[class*='provider-name']", "[class*='supplier']", ".supplier-name", "h3",
+)]
+_TARIFF_NAME = [compile_css(s) for s in (
+    ".results-new-item-brand__tariff-name", "[class*='tariff-name']", ".tariff-name",
+)]
+_RATE_LABEL = compile_css(".results-new-item-rate-type__label")
+_RATE_VALUE = compile_css(".results-new-item-rate-type__value")
+_CALLOUT_CELLS = compile_css(".results-new-item-callouts__cells__cell")
+_CALLOUT_LABEL = compile_css(".results-new-item-callouts__cells__cell__label")
+_CALLOUT_VALUE = compile_css(".results-new-item-callouts__cells__cell__value")
+_COST_SUB = compile_css(".results-new-item-cost__sub_value")
+_CHARGES_TABLE = compile_css(".results-new-item-charges-breakdown__table")
+_TABLE_HEADERS = compile_css("thead tr th")
+_TABLE_ROWS = compile_css("tbody tr")
+_TH = compile_css("th")
+_TD = compile_css("td")
+_DECALS = compile_css(".tariff-decals")
+_GREEN_DECAL = compile_css(".green-electricity-decal")
+
+_USAGE_CALLOUT = compile_css("span.current-usage-card__callout__value")
+_USAGE_OVERVIEW = compile_css(".current-usage-overview")
+_USAGE_FUEL = compile_css(".current-usage-overview__fuel")
+_USAGE_FUEL_TYPE = compile_css(".current-usage-overview__consumption__type")
+_USAGE_BLOCKS = compile_css(".enquiry-usage-prepop__container__item, .enquiry-usage, [class*='usage-prepop']")
+_VALID_FROM = compile_css(".valid-from")
+_VALID_TO = compile_css(".valid-to")
+_CLASSED = etree.XPath("descendant-or-self::*[@class]")
+
+_GAS_TEXT = re.compile(r"gas[^\d]{0,40}([\d,]+)\s*kwh(?:\s*/\s*(year|yr|month|mo))?", re.IGNORECASE)
+_ELEC_TEXT = re.compile(r"electric(?:ity)?[^\d]{0,40}([\d,]+)\s*kwh(?:\s*/\s*(year|yr|month|mo))?", re.IGNORECASE)
+
+
+@dataclass
+class CardFields:
+    """Per-card values for one Tariff (page-level values live on ResultsPage)."""
+
+    new_supplier_name: str = "Unknown Supplier"
+    tariff_name: str = "Unknown Tariff"
+    tariff_type: str = "Unknown"
+    fixed_price_length_months: int = 0
+    exit_fee: float = 0.0
+    annual_cost_new: float = 0.0
+    unit_rate: float = 0.0
+    standing_charge_day: float = 0.0
+    fuel_type: str = "Unknown"
+    is_green: bool = False
+
+
+@dataclass
+class ResultsPage:
+    """Everything extracted from one results page."""
+
+    cards: list[CardFields] = field(default_factory=list)
+    card_selector: str | None = None
+    scoped_to_container: bool = False
+    annual_cost_current: int = 0
+    annual_electricity_kwh: int | None = None
+    annual_gas_kwh: int | None = None
+    valid_from_text: str = ""
+    valid_to_text: str = ""
+    skipped_cards: int = 0
+    class_sample: list[str] = field(default_factory=list)
+
+
+def _page_annual_cost(root: Any) -> int:
+    for span in _USAGE_CALLOUT(root):
+        if len(span) or "/yr" not in (span.text or ""):
+            continue  # BeautifulSoup string=/yr/ matches spans whose only content is that text
+        text = _text(span)
+        m = re.search(r"£([\d,]+)/yr", text, re.IGNORECASE)
+        if m:
+            try:
+                return int(m.group(1).replace(",", ""))
+            except ValueError:
+                return 0
+        m = re.search(r"£([\d,]+)/mo", text, re.IGNORECASE)
+        if m:
+            try:
+                return int(m.group(1).replace(",", "")) * 12
+            except ValueError:
+                return 0
+        return 0
+    return 0
+
+
+def _page_usage(root: Any, log: bool) -> tuple[int | None, int | None]:
+    electricity: int | None = None
+    gas: int | None = None
+    overview = _first(_USAGE_OVERVIEW, root)
+    if overview is not None:
+        for section in _USAGE_FUEL(overview):
+            type_span = _first(_USAGE_FUEL_TYPE, section)
+            if type_span is None:
+                continue
+            fuel_type_text = _text(type_span).lower()
+            consumption_span = next(type_span.itersiblings("span"), None)
+            if consumption_span is None:
+                continue
+            consumption_text = _text(consumption_span)
+            if log:
+                print(f"  Found {fuel_type_text}: {consumption_text}")
+            value = _usage_text_to_annual_kwh(consumption_text)
+            if value is not None:
+                if "gas" in fuel_type_text:
+                    gas = value
+                elif "electric" in fuel_type_text:
+                    electricity = value
+
+    # Fallbacks for newer/variant markup where usage appears outside .current-usage-overview.
+    if electricity is None or gas is None:
+        for block in _USAGE_BLOCKS(root):
+            text = _text(block, " ")
+            low = text.lower()
+            value = _usage_text_to_annual_kwh(text)
+            if value is None:
+                continue
+            if electricity is None and "electric" in low:
+                electricity = value
+            if gas is None and "gas" in low:
+                gas = value
+
+    # Last-resort parse from full page text.
+    if electricity is None or gas is None:
+        page_text = _text(root, " ")
+        if gas is None:
+            m = _GAS_TEXT.search(page_text)
+            if m:
+                gas = _usage_text_to_annual_kwh(f"{m.group(1)} kWh / {m.group(2) or 'year'}")
+        if electricity is None:
+            m = _ELEC_TEXT.search(page_text)
+            if m:
+                electricity = _usage_text_to_annual_kwh(f"{m.group(1)} kWh / {m.group(2) or 'year'}")
+    return electricity, gas
+
+
+def _card_text(paths: list[etree.XPath], card: Any, default: str) -> str:
+    for path in paths:
+        el = _first(path, card)
+        if el is not None:
+            return _text(el)
+    return default
+
+
+def _card_fields(card: Any) -> CardFields:
+    out = CardFields(
+        new_supplier_name=_card_text(_SUPPLIER, card, "Unknown Supplier"),
+        tariff_name=_card_text(_TARIFF_NAME, card, "Unknown Tariff"),
+    )
+
+    # --- Tariff type & fixed length ---
+    label_el = _first(_RATE_LABEL, card)
+    value_el = _first(_RATE_VALUE, card)
+    rate_label_text = _text(label_el).lower() if label_el is not None else ""
+    rate_value_text = _text(value_el, " ").lower() if value_el is not None else ""
+    if "fixed" in rate_label_text or "fixed" in rate_value_text:
+        out.tariff_type = "Fixed"
+    elif "variable" in rate_label_text or "variable" in rate_value_text:
+        out.tariff_type = "Variable"
+    if rate_value_text:
+        m = re.search(r"(\d+)", rate_value_text)
+        if m:
+            out.fixed_price_length_months = int(m.group(1))
+
+    # --- Exit fee (callouts) & annual cost ---
+    for cell in _CALLOUT_CELLS(card):
+        label = _first(_CALLOUT_LABEL, cell)
+        if label is None or "early exit fee" not in _text(label).lower():
+            continue
+        value = _first(_CALLOUT_VALUE, cell)
+        if value is not None:
+            cleaned = _text(value, " ").replace("£", "").replace(",", "").strip()
+            try:
+                out.exit_fee = float(cleaned)
+            except ValueError:
+                out.exit_fee = 0.0
+        break
+    cost_el = _first(_COST_SUB, card)
+    if cost_el is not None:
+        out.annual_cost_new = _tariff_card_annual_cost_gbp(_text(cost_el))
+
+    # --- Unit rate & standing charge (Electricity = last column when both fuels are listed) ---
+    table = _first(_CHARGES_TABLE, card)
+    if table is not None:
+        headers = [_text(h).lower() for h in _TABLE_HEADERS(table)]
+        has_gas = any("gas" in t for t in headers)
+        has_elec = any("electric" in t for t in headers)
+        if has_gas and has_elec:
+            out.fuel_type = "gas_and_electricity"
+        elif has_elec:
+            out.fuel_type = "electricity"
+        elif has_gas:
+            out.fuel_type = "gas"
+        for row in _TABLE_ROWS(table):
+            header = _first(_TH, row)
+            if header is None:
+                continue
+            label = _text(header).lower()
+            cells = _TD(row)
+            if not cells:
+                continue
+            text = _text(cells[-1], " ")
+            if "standing charge" in label:
+                out.standing_charge_day = _standing_charge_cell_to_pence_per_day(text)
+            elif "unit rate" in label:
+                out.unit_rate = _unit_rate_cell_to_pence(text)
+
+    # --- Green/renewable decal ---
+    decals = _first(_DECALS, card)
+    if decals is not None:
+        green = _first(_GREEN_DECAL, decals)
+        if green is not None:
+            decal_text = _text(green).lower()
+            out.is_green = "green" in decal_text or "renewable" in decal_text
+    return out
+
+
+def extract_results(page_html: str | bytes, log: bool = True) -> ResultsPage:
+    """Parse a results page once and extract page-level facts and every tariff card."""
+    root = lxml_html.document_fromstring(page_html)
+    page = ResultsPage()
+
+    container = next((el for el in (_first(path, root) for path in _CONTAINER_PATHS) if el is not None), None)
+    cards: list[Any] = []
+    for scope in (container, root) if container is not None else (root,):
+        for sel, path in _CARD_PATHS:
+            cards = path(scope)
+            if cards:
+                page.card_selector = sel
+                page.scoped_to_container = scope is container
+                if log:
+                    where = "results container" if page.scoped_to_container else "page"
+                    print(f"  Found {len(cards)} cards using selector: {sel} ({where})")
+                break
+        if cards:
+            break
+    if not cards:
+        classes: set[str] = set()
+        for el in _CLASSED(root):
+            classes.update((el.get("class") or "").split())
+        page.class_sample = sorted(classes)[:40]
+        return page
+
+    # Page-level facts: once per page.
+    page.annual_cost_current = _page_annual_cost(root)
+    page.annual_electricity_kwh, page.annual_gas_kwh = _page_usage(root, log)
+    if log and (page.annual_electricity_kwh is not None or page.annual_gas_kwh is not None):
+        print(f"  Parsed usage: electricity={page.annual_electricity_kwh} kWh/yr, gas={page.annual_gas_kwh} kWh/yr")
+    el = _first(_VALID_FROM, root)
+    page.valid_from_text = _text(el) if el is not None else ""
+    el = _first(_VALID_TO, root)
+    page.valid_to_text = _text(el) if el is not None else ""
+
+    # Cards: every field lookup is relative to the card element, so it only walks that card.
+    for idx, card in enumerate(cards):
+        try:
+            page.cards.append(_card_fields(card))
+        except Exception as e:
+            page.skipped_cards += 1
+            if log:
+                print(f"⚠ Skipping result card {idx} due to error: {e}")
+    return page
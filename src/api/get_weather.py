@@ -6,11 +6,28 @@ import pandas as pd
 import requests_cache
 from retry_requests import retry
 
+from src.metrics import record_cache, span
+
 # Forecast API (next ~16 days); use_archive=True uses Historical Weather API (past data).
 FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 
 
+class _CacheTrackingSession:
+    """Session proxy that counts requests_cache hits/misses for the weather cache metric."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def get(self, *args, **kwargs):
+        response = self._session.get(*args, **kwargs)
+        record_cache("weather", bool(getattr(response, "from_cache", False)))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
 def _is_quota_error(err: Exception) -> bool:
     """Best-effort detection for provider quota / rate-limit responses."""
     text = str(err).lower()
@@ -138,7 +155,7 @@ def get_weather(latitude, longitude, start_date, end_date, variables, frequency,
 
     cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
     retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
+    openmeteo = openmeteo_requests.Client(session=_CacheTrackingSession(retry_session))
 
     url = ARCHIVE_URL if use_archive else FORECAST_URL
     params = {
@@ -154,12 +171,13 @@ def get_weather(latitude, longitude, start_date, end_date, variables, frequency,
         params["daily"] = variables
         params["timezone"] = "UTC"
 
-    response_first = _fetch_with_provider_failover(
-        openmeteo_client=openmeteo,
-        url=url,
-        base_params=params,
-        use_archive=use_archive,
-    )
+    with span("weather.fetch"):
+        response_first = _fetch_with_provider_failover(
+            openmeteo_client=openmeteo,
+            url=url,
+            base_params=params,
+            use_archive=use_archive,
+        )
 
     response = response_first.Hourly() if frequency == "hourly" else response_first.Daily()
     data = {
@@ -0,0 +1,329 @@
+"""
+Offline UK postcode geocoder backed by a memory-mapped, sorted record file.
+
+The file is built once from the ONS Postcode Directory (ONSPD CSV, ~2.6M live postcodes) with
+`python -m src.tools.build_postcode_index`, then opened read-only with mmap so every worker
+shares the page cache. Lookups are a binary search over fixed-width records (no parsing, no
+per-process load time), returning the same dict shape as src.api.postcode_lookup.lookup.
+
+File layout (little-endian):
+    header   8s magic | I record_count | I strings_len
+    strings  UTF-8 JSON {"regions": [...], "countries": [...], "districts": [[code, name], ...]}
+    records  record_count × RECORD (sorted by key)
+RECORD = 7s key (postcode without space, space-padded) | f lat | f lon | B region | B country | H district
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from src.data.dno_regions import dno_for_outward_code
+
+__all__ = [
+    "PostcodeIndex",
+    "build_index",
+    "default_index_path",
+    "get_default_index",
+    "normalize_postcode",
+]
+
+MAGIC = b"PPPCIDX1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<7sffBBH")
+KEY_LEN = 7
+
+# ONS region (rgn) and country (ctry) codes → names used in lookup results.
+# Non-English "regions" are pseudo-codes in ONSPD; postcodes.io reports the country instead.
+ONS_REGION_NAMES = {
+    "E12000001": "North East",
+    "E12000002": "North West",
+    "E12000003": "Yorkshire and The Humber",
+    "E12000004": "East Midlands",
+    "E12000005": "West Midlands",
+    "E12000006": "East of England",
+    "E12000007": "London",
+    "E12000008": "South East",
+    "E12000009": "South West",
+}
+ONS_COUNTRY_NAMES = {
+    "E92000001": "England",
+    "W92000004": "Wales",
+    "S92000003": "Scotland",
+    "N92000002": "Northern Ireland",
+    "L93000001": "Channel Islands",
+    "M83000003": "Isle of Man",
+}
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def normalize_postcode(postcode: str) -> str:
+    """Uppercase, no whitespace (e.g. ' bs1 1aa ' → 'BS11AA')."""
+    return "".join((postcode or "").split()).upper()
+
+
+def _format_postcode(norm: str) -> str:
+    """'BS11AA' → 'BS1 1AA' (inward code is always the last 3 characters)."""
+    return f"{norm[:-3]} {norm[-3:]}" if len(norm) > 3 else norm
+
+
+def _key(norm: str) -> bytes | None:
+    raw = norm.encode("ascii", "ignore")
+    if not raw or len(raw) > KEY_LEN:
+        return None
+    return raw.ljust(KEY_LEN, b" ")
+
+
+class _KeyView:
+    """Sequence of record keys over the mmap so bisect can search without materialising a list."""
+
+    __slots__ = ("_buf", "_offset", "_count")
+
+    def __init__(self, buf: mmap.mmap, offset: int, count: int):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = self._offset + i * RECORD.size
+        return self._buf[start:start + KEY_LEN]
+
+
+class PostcodeIndex:
+    """Read-only view of a built postcode index file."""
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, strings_len = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            self._buf.close()
+            raise ValueError(f"{self.path} is not a postcode index (bad magic {magic!r})")
+        strings = json.loads(self._buf[HEADER.size:HEADER.size + strings_len].decode("utf-8"))
+        self._regions: list[str] = strings.get("regions", [])
+        self._countries: list[str] = strings.get("countries", [])
+        self._districts: list[list[str]] = strings.get("districts", [])
+        self._records_offset = HEADER.size + strings_len
+        self._count = count
+        self._keys = _KeyView(self._buf, self._records_offset, count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def lookup(self, postcode: str) -> dict[str, Any] | None:
+        """Resolve a full postcode, or None when it is not in the index."""
+        norm = normalize_postcode(postcode)
+        key = _key(norm)
+        if key is None:
+            return None
+        i = bisect.bisect_left(self._keys, key)
+        if i >= self._count or self._keys[i] != key:
+            return None
+        _, lat, lon, region_i, country_i, district_i = RECORD.unpack_from(
+            self._buf, self._records_offset + i * RECORD.size
+        )
+        outward_code = norm[:-3]
+        dno_name, dno_id = dno_for_outward_code(outward_code)
+        district_code, district_name = (
+            self._districts[district_i] if district_i < len(self._districts) else ("", "")
+        )
+        return {
+            "postcode": _format_postcode(norm),
+            "outward_code": outward_code,
+            "latitude": round(float(lat), 6),
+            "longitude": round(float(lon), 6),
+            "region": self._regions[region_i] if region_i < len(self._regions) else "",
+            "region_code": district_code,
+            "admin_district": district_name,
+            "country": self._countries[country_i] if country_i < len(self._countries) else "",
+            "dno_name": dno_name,
+            "dno_id": dno_id,
+            "source": "local_index",
+        }
+
+    def postcodes_in_outward(self, outward_code: str, limit: int = 10) -> list[str]:
+        """Up to limit postcodes (normalised, in key order) whose outward code is outward_code."""
+        outward = normalize_postcode(outward_code)
+        if not outward or len(outward) > KEY_LEN - 3:
+            return []
+        prefix = outward.encode("ascii", "ignore")
+        found: list[str] = []
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < self._count and len(found) < limit:
+            key = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            norm = key.decode("ascii").rstrip()
+            # "BS1" also prefixes BS10..BS16 (interleaved in key order); keep 3-character inward codes.
+            if len(norm) == len(outward) + 3:
+                found.append(norm)
+            i += 1
+        return found
+
+    def outward_centroids(self) -> dict[str, tuple[float, float]]:
+        """Mean (lat, lon) of every outward code's postcodes. Reads the whole file; for offline tools."""
+        sums: dict[str, list] = {}
+        end = self._records_offset + self._count * RECORD.size
+        with memoryview(self._buf) as view, view[self._records_offset:end] as records:
+            for key, lat, lon, _r, _c, _d in RECORD.iter_unpack(records):
+                acc = sums.setdefault(key.decode("ascii").rstrip()[:-3], [0.0, 0.0, 0])
+                acc[0] += lat
+                acc[1] += lon
+                acc[2] += 1
+        return {code: (round(s_lat / n, 6), round(s_lon / n, 6)) for code, (s_lat, s_lon, n) in sums.items()}
+
+
+def _intern(table: list[Any], index: dict[Any, int], value: Any, limit: int) -> int:
+    i = index.get(value)
+    if i is None:
+        if len(table) >= limit:
+            raise ValueError(f"string table overflow ({limit} entries)")
+        i = index[value] = len(table)
+        table.append(value)
+    return i
+
+
+def _read_district_names(path: str | os.PathLike[str] | None) -> dict[str, str]:
+    """Optional ONSPD 'LA_UA names and codes' CSV: first column code, second column name."""
+    if not path:
+        return {}
+    names: dict[str, str] = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) >= 2 and row[0].strip():
+                names[row[0].strip()] = row[1].strip()
+    return names
+
+
+def build_index(
+    rows: Iterable[dict[str, str]],
+    out_path: str | os.PathLike[str],
+    *,
+    district_names: dict[str, str] | None = None,
+) -> int:
+    """
+    Write an index file from ONSPD-style rows (columns pcds or pcd, lat, long, rgn, ctry, oslaua,
+    optional doterm). Terminated postcodes and rows without a grid reference are skipped.
+    Returns the number of postcodes written.
+    """
+    district_names = district_names or {}
+    regions: list[str] = [""]
+    countries: list[str] = [""]
+    districts: list[list[str]] = [["", ""]]
+    region_idx: dict[str, int] = {"": 0}
+    country_idx: dict[str, int] = {"": 0}
+    district_idx: dict[str, int] = {"": 0}
+
+    packed: list[bytes] = []
+    for row in rows:
+        if (row.get("doterm") or "").strip():
+            continue
+        norm = normalize_postcode(row.get("pcds") or row.get("pcd") or "")
+        key = _key(norm)
+        if key is None or len(norm) < 5:
+            continue
+        try:
+            lat = float(row.get("lat") or "")
+            lon = float(row.get("long") or "")
+        except ValueError:
+            continue
+        # ONSPD uses 99.999999 / 0.000000 for postcodes without a grid reference.
+        if lat > 90.0 or (lat == 0.0 and lon == 0.0):
+            continue
+        rgn = (row.get("rgn") or "").strip()
+        ctry = (row.get("ctry") or "").strip()
+        country_name = ONS_COUNTRY_NAMES.get(ctry, "")
+        region_name = ONS_REGION_NAMES.get(rgn, country_name)
+        lad = (row.get("oslaua") or "").strip()
+        r_i = _intern(regions, region_idx, region_name, 255)
+        c_i = _intern(countries, country_idx, country_name, 255)
+        d_i = district_idx.get(lad)
+        if d_i is None:
+            d_i = _intern(districts, district_idx, lad, 65535)
+            districts[d_i] = [lad, district_names.get(lad, "")]
+        packed.append(RECORD.pack(key, lat, lon, r_i, c_i, d_i))
+
+    packed.sort()
+    strings = json.dumps(
+        {"regions": regions, "countries": countries, "districts": districts},
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    written = 0
+    last_key = b""
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, len(strings)))
+        f.write(strings)
+        for rec in packed:
+            if rec[:KEY_LEN] == last_key:
+                continue  # duplicate postcode rows: keep the first
+            last_key = rec[:KEY_LEN]
+            f.write(rec)
+            written += 1
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, written, len(strings)))
+    os.replace(tmp_path, out_path)
+    return written
+
+
+def build_index_from_csv(
+    csv_path: str | os.PathLike[str],
+    out_path: str | os.PathLike[str],
+    *,
+    district_names_csv: str | os.PathLike[str] | None = None,
+) -> int:
+    """Stream an ONSPD CSV into an index file (see build_index)."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        return build_index(
+            csv.DictReader(f),
+            out_path,
+            district_names=_read_district_names(district_names_csv),
+        )
+
+
+def default_index_path() -> Path:
+    """POSTCODE_INDEX_PATH, or output/postcode_index.bin under the project root."""
+    raw = (os.environ.get("POSTCODE_INDEX_PATH") or "").strip()
+    return Path(raw) if raw else _PROJECT_ROOT / "output" / "postcode_index.bin"
+
+
+_default_index: PostcodeIndex | None = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> PostcodeIndex | None:
+    """Shared index for this process, or None when no index file has been built."""
+    global _default_index, _default_index_loaded
+    if _default_index_loaded:
+        return _default_index
+    with _default_index_lock:
+        if not _default_index_loaded:
+            path = default_index_path()
+            try:
+                _default_index = PostcodeIndex(path) if path.is_file() else None
+            except (OSError, ValueError) as e:
+                print(f"[postcode-index] could not open {path}: {e}", flush=True)
+                _default_index = None
+            _default_index_loaded = True
+    return _default_index
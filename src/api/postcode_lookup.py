@@ -1,31 +1,146 @@
 """
-UK postcode lookup using postcodes.io. Used for weather location and by the web app.
+UK postcode lookup: local memory-mapped index first (src/api/postcode_index.py), postcodes.io for
+anything the index does not know. Used for weather location and by the web app.
 Shared by the scraping workflow (ScrapeTariff uses PostcodeLookup there with DNO mapping).
+
+lookup_many() resolves large batches: inputs are deduplicated, served from an in-process LRU
+cache or the offline index where possible, and the remainder sent to postcodes.io's bulk
+endpoint (100 postcodes per POST) on a small thread pool under a request-rate limit.
 """
 
 from __future__ import annotations
 
-from typing import Any
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+from src.api.postcode_index import get_default_index, normalize_postcode
+from src.data.dno_regions import dno_for_outward_code
+from src.metrics import record_cache
 
 try:
     import requests
 except ImportError:
     requests = None
 
+POSTCODES_IO_URL = "https://api.postcodes.io/postcodes"
+# postcodes.io bulk lookup accepts at most 100 postcodes per request.
+BULK_BATCH_SIZE = 100
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+class _LRUCache:
+    """Thread-safe LRU of normalized postcode -> result (None caches a definitive 'not found')."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, dict[str, Any] | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, dict[str, Any] | None]:
+        with self._lock:
+            if key not in self._data:
+                return False, None
+            self._data.move_to_end(key)
+            return True, self._data[key]
+
+    def put(self, key: str, value: dict[str, Any] | None) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class _RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across threads (rate <= 0 disables)."""
+
+    def __init__(self, rate_per_s: float):
+        self.interval = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_cache = _LRUCache(_env_int("POSTCODE_CACHE_SIZE", 50_000))
+_bulk_rate_limiter = _RateLimiter(_env_float("POSTCODE_BULK_MAX_RPS", 5.0))
+
+
+def _from_postcodes_io(result: dict[str, Any], fallback_postcode: str) -> dict[str, Any] | None:
+    """Map a postcodes.io result object onto our lookup dict (None if it has no coordinates)."""
+    if result.get("latitude") is None or result.get("longitude") is None:
+        return None
+    outward_code = result.get("outcode", "")
+    dno_name, dno_id = dno_for_outward_code(outward_code)
+    return {
+        "postcode": result.get("postcode", fallback_postcode),
+        "outward_code": outward_code,
+        "latitude": float(result.get("latitude", 0.0)),
+        "longitude": float(result.get("longitude", 0.0)),
+        "region": result.get("region", ""),
+        "admin_district": result.get("admin_district", ""),
+        "country": result.get("country", ""),
+        "dno_name": dno_name,
+        "dno_id": dno_id,
+        "source": "postcodes_io",
+    }
+
+
+def lookup_local(postcode: str) -> dict[str, Any] | None:
+    """Resolve from the offline index only; None when there is no index or the postcode is unknown."""
+    index = get_default_index()
+    if index is None or not postcode:
+        return None
+    result = index.lookup(postcode)
+    record_cache("postcode_index", result is not None)
+    return result
+
 
 def lookup(postcode: str) -> dict[str, Any] | None:
     """
-    Lookup postcode data from postcodes.io API.
+    Lookup postcode data: offline index when available, otherwise postcodes.io API.
 
     Returns dict with: latitude, longitude, admin_district, region, postcode, outward_code,
-    or None if lookup fails.
+    country, dno_name, dno_id, source ("local_index" or "postcodes_io"), or None if lookup fails.
     """
+    local = lookup_local(postcode)
+    if local is not None:
+        return local
     if not postcode or not requests:
         return None
     postcode_clean = postcode.strip().upper().replace(" ", "")
     try:
         r = requests.get(
-            f"https://api.postcodes.io/postcodes/{postcode_clean}",
+            f"{POSTCODES_IO_URL}/{postcode_clean}",
             timeout=5,
         )
         if r.status_code != 200:
@@ -33,16 +148,89 @@ def lookup(postcode: str) -> dict[str, Any] | None:
         data = r.json()
         if data.get("status") != 200:
             return None
-        result = data["result"]
-        outward_code = result.get("outcode", "")
-        return {
-            "postcode": result.get("postcode", postcode),
-            "outward_code": outward_code,
-            "latitude": float(result.get("latitude", 0.0)),
-            "longitude": float(result.get("longitude", 0.0)),
-            "region": result.get("region", ""),
-            "admin_district": result.get("admin_district", ""),
-            "country": result.get("country", ""),
-        }
+        return _from_postcodes_io(data["result"], postcode)
     except Exception:
         return None
+
+
+def _bulk_fetch(batch: list[str]) -> dict[str, dict[str, Any] | None] | None:
+    """
+    One postcodes.io bulk POST (<= BULK_BATCH_SIZE postcodes, already normalized).
+    Returns normalized postcode -> result (None = postcode not found), or None if the call failed.
+    """
+    if not requests:
+        return None
+    _bulk_rate_limiter.wait()
+    try:
+        r = requests.post(
+            POSTCODES_IO_URL,
+            json={"postcodes": batch},
+            timeout=_env_float("POSTCODE_BULK_TIMEOUT_S", 10.0),
+        )
+        if r.status_code != 200:
+            print(f"[postcode-bulk] status={r.status_code} batch={len(batch)}", flush=True)
+            return None
+        data = r.json()
+        if data.get("status") != 200:
+            return None
+        out: dict[str, dict[str, Any] | None] = {}
+        for item in data.get("result") or []:
+            query = normalize_postcode(item.get("query") or "")
+            result = item.get("result")
+            out[query] = _from_postcodes_io(result, query) if result else None
+        return out
+    except Exception as e:
+        print(f"[postcode-bulk] error batch={len(batch)}: {e}", flush=True)
+        return None
+
+
+def bulk_max_items() -> int:
+    """Most postcodes one /api/postcode/bulk request may carry (POSTCODE_BULK_MAX_ITEMS, default 10000)."""
+    return _env_int("POSTCODE_BULK_MAX_ITEMS", 10_000)
+
+
+def lookup_many(postcodes: Iterable[str]) -> list[dict[str, Any] | None]:
+    """
+    Resolve many postcodes; returns one entry per input, in input order (None when unresolved).
+
+    Duplicates (after normalization) are resolved once. Order of sources: LRU cache, offline
+    index, then postcodes.io bulk calls (batches of 100, POSTCODE_BULK_WORKERS concurrent,
+    at most POSTCODE_BULK_MAX_RPS requests per second). Failed batches are not cached so a
+    later call can retry them.
+    """
+    inputs = list(postcodes)
+    keys = [normalize_postcode(p) if isinstance(p, str) else "" for p in inputs]
+
+    resolved: dict[str, dict[str, Any] | None] = {}
+    misses: list[str] = []
+    for key in dict.fromkeys(k for k in keys if k):
+        hit, value = _cache.get(key)
+        record_cache("postcode_lru", hit)
+        if hit:
+            resolved[key] = value
+            continue
+        local = lookup_local(key)
+        if local is not None:
+            resolved[key] = local
+            _cache.put(key, local)
+            continue
+        misses.append(key)
+
+    if misses:
+        batches = [misses[i:i + BULK_BATCH_SIZE] for i in range(0, len(misses), BULK_BATCH_SIZE)]
+        workers = min(len(batches), _env_int("POSTCODE_BULK_WORKERS", 4))
+        if workers == 1:
+            fetched = [_bulk_fetch(b) for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="postcode-bulk") as pool:
+                fetched = list(pool.map(_bulk_fetch, batches))
+        for batch, results in zip(batches, fetched):
+            if results is None:
+                continue
+            for key in batch:
+                if key not in results:
+                    continue
+                resolved[key] = results[key]
+                _cache.put(key, results[key])
+
+    return [resolved.get(k) if k else None for k in keys]
@@ -2,15 +2,25 @@
 Reference export price (£/kWh) from a public tariff API (Octopus Energy).
 
 Used as a live *indicator* — the user's actual export rate depends on their supplier and region.
+
+The rate changes a few times a year, so the web app serves it from ExportPriceCache: a background
+thread re-checks the product on a schedule with a conditional GET (ETag / Last-Modified), the last
+good value is persisted under output/cache/, and a stale value is still served if Octopus is down.
 """
 
 from __future__ import annotations
 
+import json
 import os
+import threading
+import time
+from pathlib import Path
 from typing import Any
 
 import requests
 
+from src.metrics import record_cache
+
 # Octopus "Outgoing Octopus" flat export product (public API, no key).
 DEFAULT_OUTGOING_PRODUCT = "OUTGOING-VAR-24-10-26"
 OCTOPUS_PRODUCT_URL = "https://api.octopus.energy/v1/products/{product}/"
@@ -27,21 +37,33 @@ def fetch_reference_export_price_gbp_per_kwh(
     Uses the first region entry under single_register_electricity_tariffs (rates are national bands;
     all regions share the same headline rate in the product snapshot).
     """
-    code = (product_code or os.environ.get("OCTOPUS_EXPORT_PRODUCT_CODE") or DEFAULT_OUTGOING_PRODUCT).strip()
+    code = _product_code(product_code)
     url = OCTOPUS_PRODUCT_URL.format(product=code)
     try:
         r = requests.get(url, timeout=timeout_s)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
-        return {
-            "export_price_per_kwh": None,
-            "source": "octopus_product",
-            "product_code": code,
-            "error": str(e),
-            "disclaimer": "Could not reach Octopus API. Enter export price manually.",
-        }
+        return _unreachable(code, e)
+    return _parse_product(data, code)
+
+
+def _product_code(product_code: str | None) -> str:
+    return (product_code or os.environ.get("OCTOPUS_EXPORT_PRODUCT_CODE") or DEFAULT_OUTGOING_PRODUCT).strip()
+
 
+def _unreachable(code: str, e: Exception) -> dict[str, Any]:
+    return {
+        "export_price_per_kwh": None,
+        "source": "octopus_product",
+        "product_code": code,
+        "error": str(e),
+        "disclaimer": "Could not reach Octopus API. Enter export price manually.",
+    }
+
+
+def _parse_product(data: dict[str, Any], code: str) -> dict[str, Any]:
+    """Octopus product JSON → export price result dict (export_price_per_kwh None on bad data)."""
     tariffs = data.get("single_register_electricity_tariffs") or {}
     if not isinstance(tariffs, dict) or not tariffs:
         return {
@@ -79,3 +101,194 @@ def fetch_reference_export_price_gbp_per_kwh(
         ),
         "more_info": "https://octopus.energy/outgoing/",
     }
+
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# Re-check every 6 hours; a value older than STALE_AFTER_S is still served but flagged stale.
+DEFAULT_REFRESH_INTERVAL_S = 6 * 3600.0
+DEFAULT_STALE_AFTER_S = 3 * 24 * 3600.0
+# With no value yet, get() starts at most one background fetch per this many seconds.
+COLD_RETRY_S = 60.0
+
+
+def _default_cache_path() -> Path:
+    raw = (os.environ.get("EXPORT_PRICE_CACHE_PATH") or "").strip()
+    return Path(raw) if raw else _PROJECT_ROOT / "output" / "cache" / "export_price.json"
+
+
+class ExportPriceCache:
+    """
+    Last good reference export price, refreshed in the background with conditional requests.
+
+    get() never blocks on Octopus: with no value yet (fresh install, nothing persisted) it starts a
+    single background fetch and returns the "enter export price manually" fallback until it lands.
+    Refresh failures keep the previous value and record last_error.
+    """
+
+    def __init__(
+        self,
+        *,
+        product_code: str | None = None,
+        cache_path: str | os.PathLike[str] | None = None,
+        refresh_interval_s: float | None = None,
+        stale_after_s: float = DEFAULT_STALE_AFTER_S,
+        timeout_s: float = 12.0,
+    ):
+        self.product_code = _product_code(product_code)
+        self.cache_path = Path(cache_path) if cache_path else _default_cache_path()
+        self.refresh_interval_s = float(
+            refresh_interval_s
+            if refresh_interval_s is not None
+            else os.environ.get("EXPORT_PRICE_REFRESH_S", DEFAULT_REFRESH_INTERVAL_S)
+        )
+        self.stale_after_s = stale_after_s
+        self.timeout_s = timeout_s
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._value: dict[str, Any] | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._fetched_at: float | None = None  # last time upstream confirmed the value (200 or 304)
+        self._last_error: str | None = None
+        self._thread: threading.Thread | None = None
+        self._fetch_thread: threading.Thread | None = None  # one-shot fetch started by get() on a cold cache
+        self._fetch_started_at: float | None = None
+        self._stop = threading.Event()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get("product_code") != self.product_code or not saved.get("value"):
+            return
+        self._value = saved["value"]
+        self._etag = saved.get("etag")
+        self._last_modified = saved.get("last_modified")
+        self._fetched_at = saved.get("fetched_at")
+
+    def _persist(self) -> None:
+        payload = {
+            "product_code": self.product_code,
+            "value": self._value,
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "fetched_at": self._fetched_at,
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"[export-price] could not persist cache {self.cache_path}: {e}", flush=True)
+
+    def _http_get(self, url: str, headers: dict[str, str]) -> requests.Response:
+        return requests.get(url, headers=headers, timeout=self.timeout_s)
+
+    def refresh(self) -> bool:
+        """Conditional fetch from Octopus. Returns True if the cached value is confirmed or updated."""
+        with self._refresh_lock:
+            headers: dict[str, str] = {}
+            with self._lock:
+                if self._value is not None:
+                    if self._etag:
+                        headers["If-None-Match"] = self._etag
+                    if self._last_modified:
+                        headers["If-Modified-Since"] = self._last_modified
+            url = OCTOPUS_PRODUCT_URL.format(product=self.product_code)
+            try:
+                r = self._http_get(url, headers)
+                if r.status_code == 304:
+                    with self._lock:
+                        self._fetched_at = time.time()
+                        self._last_error = None
+                        self._persist()
+                    return True
+                r.raise_for_status()
+                parsed = _parse_product(r.json(), self.product_code)
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                print(f"[export-price] refresh failed product={self.product_code}: {e}", flush=True)
+                return False
+            if parsed.get("export_price_per_kwh") is None:
+                with self._lock:
+                    self._last_error = parsed.get("error") or "no export price in product"
+                return False
+            with self._lock:
+                self._value = parsed
+                self._etag = r.headers.get("ETag")
+                self._last_modified = r.headers.get("Last-Modified")
+                self._fetched_at = time.time()
+                self._last_error = None
+                self._persist()
+            return True
+
+    def get(self) -> dict[str, Any]:
+        """Cached result (same shape as fetch_reference_export_price_gbp_per_kwh) plus cache metadata."""
+        with self._lock:
+            have = self._value is not None
+        record_cache("export_price", have)
+        if not have:
+            self._refresh_in_background()
+        with self._lock:
+            if self._value is None:
+                return _unreachable(self.product_code, RuntimeError(self._last_error or "export price not fetched yet"))
+            age = time.time() - self._fetched_at if self._fetched_at else None
+            out = dict(self._value)
+            out["cached_at"] = self._fetched_at
+            out["stale"] = age is None or age > self.stale_after_s
+            if self._last_error:
+                out["last_refresh_error"] = self._last_error
+            return out
+
+    def _refresh_in_background(self) -> None:
+        """Start one background refresh unless one is running or the last cold fetch was under COLD_RETRY_S ago."""
+        now = time.time()
+        with self._lock:
+            if self._refresh_lock.locked() or (self._fetch_thread is not None and self._fetch_thread.is_alive()):
+                return
+            if self._fetch_started_at is not None and now - self._fetch_started_at < COLD_RETRY_S:
+                return
+            self._fetch_started_at = now
+            self._fetch_thread = threading.Thread(target=self.refresh, name="export-price-fetch", daemon=True)
+            self._fetch_thread.start()
+
+    def start(self) -> None:
+        """Start the daemon refresher (idempotent). It refreshes immediately if the value is due."""
+        with self._lock:
+            if self._thread is not None or self.refresh_interval_s <= 0:
+                return
+            self._thread = threading.Thread(target=self._run, name="export-price-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                age = time.time() - self._fetched_at if self._fetched_at else None
+            if age is None or age >= self.refresh_interval_s:
+                self.refresh()
+                wait_s = self.refresh_interval_s
+            else:
+                wait_s = self.refresh_interval_s - age
+            self._stop.wait(wait_s)
+
+
+_default_cache: ExportPriceCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cached_reference_export_price() -> dict[str, Any]:
+    """Process-wide cached export price; starts the background refresher on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExportPriceCache()
+            _default_cache.start()
+    return _default_cache.get()
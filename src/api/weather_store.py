@@ -0,0 +1,185 @@
+"""
+Persistent per-location store of monthly weather aggregates, one entry per complete calendar year.
+
+Past years never change, so once a year has been pulled from the Open-Meteo archive it is kept on
+disk (JSON per location under output/cache/weather/, or WEATHER_STORE_DIR) and later requests for
+the same location only fetch the years they are missing, in a single archive call.
+Locations are keyed on lat/lon rounded to 2 dp (~1 km), well inside the archive's grid spacing.
+
+Each year holds monthly GHI and wind (for generation) and the daily mean temperature (for the
+degree-day heating model). Years stored before temperatures were kept are re-fetched the first
+time temperatures are asked for.
+
+Years a successful archive call could not supply (e.g. the latest year before the archive has
+caught up) are remembered in memory for WEATHER_STORE_UNAVAILABLE_TTL_S (default 3600), so every
+request for that location does not repeat the same fruitless call.
+"""
+
+from __future__ import annotations
+
+import calendar
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.metrics import record_cache
+
+__all__ = ["get_daily_temperature_years", "get_monthly_flux_years", "last_complete_years"]
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_DAILY_VARIABLES = ["shortwave_radiation_sum", "wind_speed_10m_max", "temperature_2m_max", "temperature_2m_min"]
+# Open-Meteo archive (ERA5) coverage starts in 1940; cap requests at a sensible span.
+MAX_YEARS = 30
+
+_lock = threading.Lock()
+# (location file path, year) -> monotonic expiry of "the archive had no data for this year".
+_unavailable: dict[tuple[str, int], float] = {}
+
+
+def _unavailable_ttl_s() -> float:
+    try:
+        return float(os.environ.get("WEATHER_STORE_UNAVAILABLE_TTL_S", "3600"))
+    except ValueError:
+        return 3600.0
+
+
+def _store_dir() -> Path:
+    raw = (os.environ.get("WEATHER_STORE_DIR") or "").strip()
+    return Path(raw) if raw else _PROJECT_ROOT / "output" / "cache" / "weather"
+
+
+def _location_path(lat: float, lon: float) -> Path:
+    return _store_dir() / f"{round(float(lat), 2):.2f}_{round(float(lon), 2):.2f}.json"
+
+
+def last_complete_years(n_years: int) -> list[int]:
+    """The n most recent complete calendar years, oldest first."""
+    n = max(1, min(MAX_YEARS, int(n_years)))
+    last = datetime.utcnow().year - 1
+    return list(range(last - n + 1, last + 1))
+
+
+def _read(path: Path) -> dict[str, dict[str, list[float]]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return (json.load(f) or {}).get("years", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path: Path, years: dict[str, dict[str, list[float]]]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"years": years}), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[weather-store] could not write {path}: {e}", flush=True)
+
+
+def _fetch_years(lat: float, lon: float, first: int, last: int) -> dict[str, dict[str, list[float]]]:
+    """One archive call for [first-01-01, last-12-31], aggregated to months per year."""
+    from src.api.get_weather import get_weather
+
+    df = get_weather(
+        lat, lon,
+        f"{first}-01-01", f"{last}-12-31",
+        _DAILY_VARIABLES,
+        frequency="daily",
+        use_archive=True,
+    )
+    df["date"] = pd.to_datetime(df["date"], utc=True)
+    df["temperature_mean"] = (df["temperature_2m_max"] + df["temperature_2m_min"]) / 2.0
+    grouped = df.groupby([df["date"].dt.year, df["date"].dt.month]).agg(
+        {"shortwave_radiation_sum": "sum", "wind_speed_10m_max": "mean"}
+    )
+    out: dict[str, dict[str, list[float]]] = {}
+    for year in range(first, last + 1):
+        if year not in grouped.index.get_level_values(0):
+            continue
+        rows = grouped.loc[year]
+        if len(rows) != 12:
+            continue
+        daily = df.loc[df["date"].dt.year == year, "temperature_mean"]
+        out[str(year)] = {
+            "ghi_mj_per_m2": [float(x) for x in rows["shortwave_radiation_sum"]],
+            "wind_speed_10m_max": [float(x) for x in rows["wind_speed_10m_max"]],
+            "temperature_mean_daily": [round(float(x), 2) for x in daily],
+        }
+    return out
+
+
+def _ensure_years(lat: float, lon: float, years: list[int], required_key: str, cache_name: str) -> dict:
+    """Stored entries for the location, fetching (in one call) any year lacking required_key."""
+    path = _location_path(lat, lon)
+    with _lock:
+        stored = _read(path)
+        now = time.monotonic()
+        missing = [
+            y for y in years
+            if required_key not in stored.get(str(y), {}) and _unavailable.get((str(path), y), 0.0) <= now
+        ]
+    for y in years:
+        record_cache(cache_name, y not in missing)
+    if missing:
+        fetched = _fetch_years(lat, lon, min(missing), max(missing))
+        with _lock:
+            if fetched:
+                stored = {**_read(path), **fetched}
+                _write(path, stored)
+            now = time.monotonic()
+            for key in [k for k, t in _unavailable.items() if t <= now]:
+                del _unavailable[key]
+            for y in missing:
+                if required_key not in fetched.get(str(y), {}):
+                    _unavailable[(str(path), y)] = now + _unavailable_ttl_s()
+    return stored
+
+
+def get_monthly_flux_years(lat: float, lon: float, years: list[int]) -> pd.DataFrame:
+    """
+    Monthly flux for each requested year, from the store where possible.
+
+    Returns a DataFrame indexed by (year, month) with columns ghi_mj_per_m2 (monthly sum, MJ/m²),
+    wind_speed_10m_max (monthly mean, m/s) and days_in_month. Years the archive could not supply
+    are omitted; raises RuntimeError if none are available.
+    """
+    stored = _ensure_years(lat, lon, years, "ghi_mj_per_m2", "weather_store")
+
+    rows = []
+    for y in years:
+        entry = stored.get(str(y))
+        if not entry:
+            continue
+        for m in range(12):
+            rows.append({
+                "year": y,
+                "month": m + 1,
+                "ghi_mj_per_m2": entry["ghi_mj_per_m2"][m],
+                "wind_speed_10m_max": entry["wind_speed_10m_max"][m],
+                "days_in_month": calendar.monthrange(y, m + 1)[1],
+            })
+    if not rows:
+        raise RuntimeError(f"No archive weather available for lat={lat} lon={lon} years={years}")
+    return pd.DataFrame(rows).set_index(["year", "month"])
+
+
+def get_daily_temperature_years(lat: float, lon: float, years: list[int]) -> dict[int, list[float]]:
+    """
+    Daily mean temperature (°C, (max + min) / 2) for each requested year, from the store where
+    possible. Years the archive could not supply are omitted; raises RuntimeError if none are.
+    """
+    stored = _ensure_years(lat, lon, years, "temperature_mean_daily", "weather_store_temperature")
+    out = {
+        y: stored[str(y)]["temperature_mean_daily"]
+        for y in years
+        if stored.get(str(y), {}).get("temperature_mean_daily")
+    }
+    if not out:
+        raise RuntimeError(f"No archive temperatures available for lat={lat} lon={lon} years={years}")
+    return out
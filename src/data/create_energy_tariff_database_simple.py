@@ -44,7 +44,7 @@ def create_energy_tariff_database_simple():
             print("\nCreating fact table...")
             cursor.execute("""
                 CREATE TABLE fact_tariff_search_simple (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    id INT AUTO_INCREMENT,
                     current_supplier_name VARCHAR(100) NOT NULL,
                     pay_method VARCHAR(100) NOT NULL,
                     EV_question VARCHAR(100) NOT NULL,
@@ -82,11 +82,20 @@ def create_energy_tariff_database_simple():
                     INDEX idx_tariff (tariff_name),
                     INDEX idx_fuel_type (fuel_type),
                     INDEX idx_search_date (search_date),
-                    INDEX idx_valid_dates (valid_from, valid_to)
+                    INDEX idx_valid_dates (valid_from, valid_to),
+                    PRIMARY KEY (id, search_date)
+                )
+                PARTITION BY RANGE COLUMNS(search_date) (
+                    PARTITION pmax VALUES LESS THAN (MAXVALUE)
                 )
             """)
             print("✓ Created fact_tariff_data")
 
+            # Monthly partitions and rollup tables (src/data/tariff_partitions.py)
+            from src.data.tariff_partitions import run_maintenance
+            run_maintenance(conn)
+            print("✓ Created monthly partitions and rollup tables")
+
     except Error as e:
         print(f"\n✗ Error: {e}")
 
@@ -0,0 +1,161 @@
+"""
+DNO (Distribution Network Operator) regions by UK postcode area.
+Kept free of scraper/browser imports so postcode lookups and schedulers can use it cheaply.
+"""
+
+from __future__ import annotations
+
+__all__ = ["DNO_MAPPING", "dno_for_outward_code"]
+
+# DNO (Distribution Network Operator) mapping by postcode area
+DNO_MAPPING: dict[str, tuple[str, str]] = {
+    # Scotland
+    'AB': ('SPEN', 'SPEN_1'),
+    'DD': ('SPEN', 'SPEN_1'),
+    'DG': ('SPEN', 'SPEN_1'),
+    'EH': ('SPEN', 'SPEN_1'),
+    'FK': ('SPEN', 'SPEN_1'),
+    'G': ('SPEN', 'SPEN_1'),
+    'HS': ('SSEN', 'SSEN_1'),
+    'IV': ('SSEN', 'SSEN_1'),
+    'KA': ('SPEN', 'SPEN_1'),
+    'KW': ('SSEN', 'SSEN_1'),
+    'KY': ('SPEN', 'SPEN_1'),
+    'ML': ('SPEN', 'SPEN_1'),
+    'PA': ('SPEN', 'SPEN_1'),
+    'PH': ('SSEN', 'SSEN_1'),
+    'ZE': ('SSEN', 'SSEN_1'),
+    
+    # Northern England
+    'BD': ('NPG', 'NPG_1'),
+    'CA': ('ENWL', 'ENWL_1'),
+    'DH': ('NPG', 'NPG_1'),
+    'DL': ('NPG', 'NPG_1'),
+    'DN': ('NPG', 'NPG_1'),
+    'HG': ('NPG', 'NPG_1'),
+    'HU': ('NPG', 'NPG_1'),
+    'HX': ('ENWL', 'ENWL_1'),
+    'LA': ('ENWL', 'ENWL_1'),
+    'LS': ('NPG', 'NPG_1'),
+    'NE': ('NPG', 'NPG_1'),
+    'SR': ('NPG', 'NPG_1'),
+    'TS': ('NPG', 'NPG_1'),
+    'YO': ('NPG', 'NPG_1'),
+    
+    # North West England
+    'BB': ('ENWL', 'ENWL_1'),
+    'BL': ('ENWL', 'ENWL_1'),
+    'CH': ('SPMW', 'SPMW_1'),
+    'CW': ('ENWL', 'ENWL_1'),
+    'FY': ('ENWL', 'ENWL_1'),
+    'L': ('ENWL', 'ENWL_1'),
+    'M': ('ENWL', 'ENWL_1'),
+    'OL': ('ENWL', 'ENWL_1'),
+    'PR': ('ENWL', 'ENWL_1'),
+    'SK': ('ENWL', 'ENWL_1'),
+    'WA': ('ENWL', 'ENWL_1'),
+    'WN': ('ENWL', 'ENWL_1'),
+    
+    # Midlands
+    'B': ('WPD_WM', 'WPD_4'),
+    'CV': ('WPD_WM', 'WPD_4'),
+    'DE': ('WPD_EM', 'WPD_3'),
+    'DY': ('WPD_WM', 'WPD_4'),
+    'LE': ('WPD_EM', 'WPD_3'),
+    'LN': ('WPD_EM', 'WPD_3'),
+    'NG': ('WPD_EM', 'WPD_3'),
+    'NN': ('WPD_EM', 'WPD_3'),
+    'S': ('NPG', 'NPG_1'),
+    'ST': ('WPD_WM', 'WPD_4'),
+    'SY': ('SPMW', 'SPMW_1'),
+    'TF': ('SPMW', 'SPMW_1'),
+    'WS': ('WPD_WM', 'WPD_4'),
+    'WV': ('WPD_WM', 'WPD_4'),
+    
+    # East England
+    'CB': ('UKPN_EPN', 'UKPN_2'),
+    'CM': ('UKPN_EPN', 'UKPN_2'),
+    'CO': ('UKPN_EPN', 'UKPN_2'),
+    'IP': ('UKPN_EPN', 'UKPN_2'),
+    'LU': ('UKPN_EPN', 'UKPN_2'),
+    'NR': ('UKPN_EPN', 'UKPN_2'),
+    'PE': ('UKPN_EPN', 'UKPN_2'),
+    'SG': ('UKPN_EPN', 'UKPN_2'),
+    
+    # London
+    'E': ('UKPN_LPN', 'UKPN_1'),
+    'EC': ('UKPN_LPN', 'UKPN_1'),
+    'EN': ('UKPN_LPN', 'UKPN_1'),
+    'IG': ('UKPN_LPN', 'UKPN_1'),
+    'N': ('UKPN_LPN', 'UKPN_1'),
+    'NW': ('UKPN_LPN', 'UKPN_1'),
+    'RM': ('UKPN_LPN', 'UKPN_1'),
+    'SE': ('UKPN_LPN', 'UKPN_1'),
+    'SW': ('UKPN_LPN', 'UKPN_1'),
+    'W': ('UKPN_LPN', 'UKPN_1'),
+    'WC': ('UKPN_LPN', 'UKPN_1'),
+    
+    # South East England
+    'BN': ('SSEN_SEPD', 'SSEN_2'),
+    'BR': ('UKPN_SPN', 'UKPN_3'),
+    'CR': ('UKPN_SPN', 'UKPN_3'),
+    'CT': ('UKPN_SPN', 'UKPN_3'),
+    'DA': ('UKPN_SPN', 'UKPN_3'),
+    'GU': ('SSEN_SEPD', 'SSEN_2'),
+    'HA': ('UKPN_LPN', 'UKPN_1'),
+    'HP': ('SSEN_SEPD', 'SSEN_2'),
+    'KT': ('UKPN_SPN', 'UKPN_3'),
+    'ME': ('UKPN_SPN', 'UKPN_3'),
+    'MK': ('SSEN_SEPD', 'SSEN_2'),
+    'OX': ('SSEN_SEPD', 'SSEN_2'),
+    'PO': ('SSEN_SEPD', 'SSEN_2'),
+    'RG': ('SSEN_SEPD', 'SSEN_2'),
+    'RH': ('SSEN_SEPD', 'SSEN_2'),
+    'SL': ('SSEN_SEPD', 'SSEN_2'),
+    'SM': ('UKPN_SPN', 'UKPN_3'),
+    'SO': ('SSEN_SEPD', 'SSEN_2'),
+    'TN': ('UKPN_SPN', 'UKPN_3'),
+    'TW': ('UKPN_LPN', 'UKPN_1'),
+    'UB': ('UKPN_LPN', 'UKPN_1'),
+    
+    # South West England
+    'BA': ('WPD_SW', 'WPD_1'),
+    'BH': ('SSEN_SEPD', 'SSEN_2'),
+    'BS': ('WPD_SW', 'WPD_1'),
+    'DT': ('WPD_SW', 'WPD_1'),
+    'EX': ('WPD_SW', 'WPD_1'),
+    'GL': ('WPD_SW', 'WPD_1'),
+    'PL': ('WPD_SW', 'WPD_1'),
+    'SN': ('SSEN_SEPD', 'SSEN_2'),
+    'SP': ('SSEN_SEPD', 'SSEN_2'),
+    'TA': ('WPD_SW', 'WPD_1'),
+    'TQ': ('WPD_SW', 'WPD_1'),
+    'TR': ('WPD_SW', 'WPD_1'),
+    
+    # Wales
+    'CF': ('WPD_SW', 'WPD_2'),
+    'LD': ('WPD_SW', 'WPD_2'),
+    'LL': ('SPMW', 'SPMW_1'),
+    'NP': ('WPD_SW', 'WPD_2'),
+    'SA': ('WPD_SW', 'WPD_2'),
+}
+
+
+def dno_for_outward_code(outward_code: str) -> tuple[str, str]:
+    """
+    (dno_name, dno_id) for an outward code. Tries the 2-letter area first, then 1-letter.
+    """
+    if not outward_code:
+        return ('Unknown', 'Unknown')
+
+    outward_code = outward_code.upper()
+
+    # Try first two letters (e.g. "SW", "EC")
+    if len(outward_code) >= 2:
+        key_2 = outward_code[:2]
+        if key_2 in DNO_MAPPING:
+            return DNO_MAPPING[key_2]
+
+    # Fall back to first letter (e.g. "S", "L")
+    key_1 = outward_code[0]
+    return DNO_MAPPING.get(key_1, ('Unknown', 'Unknown'))
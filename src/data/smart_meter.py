@@ -0,0 +1,345 @@
+"""
+Half-hourly smart-meter consumption: streaming CSV ingest and an in-memory profile store.
+
+Supplier and DCC exports come in two shapes, both detected from the header row:
+- long: one reading per row, a timestamp column (start / timestamp / datetime / date[+time])
+  and a kWh column (consumption / kwh / value / import / usage), e.g. Octopus
+  "Consumption (kWh), Start, End" or Glowmarkt "timestamp,value";
+- wide: a date column plus one column per half-hour ("00:00" … "23:30").
+
+Rows are parsed one at a time from any iterable of lines (an upload stream wrapped in a text
+reader) into compact array.array buffers; no DataFrame is built. Readings are then bucketed onto
+a dense float32 half-hour grid (15-minute data is summed, hourly data split evenly), validated,
+and folded into a typical calendar year: 365 × 48 float32 kWh, Feb 29 dropped, each day the mean
+of that day-of-year across the years covered. Days with no data take the mean day of their month;
+months with no data take the overall mean day scaled by the usual seasonal weights.
+
+Timestamps with an offset are converted to UTC; naive ones are taken as UTC.
+"""
+
+from __future__ import annotations
+
+import array
+import csv
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+import numpy as np
+
+__all__ = [
+    "SmartMeterError",
+    "get_profile",
+    "parse_smart_meter_csv",
+    "profile_summary",
+    "store_profile",
+]
+
+SLOT_S = 1800
+DAYS_PER_YEAR = 365
+# Domestic supplies top out around 100 A (~23 kW): anything above 25 kWh in a half-hour is a bad read.
+MAX_SLOT_KWH = 25.0
+MIN_DAYS = 28
+MAX_REJECTED_FRACTION = 0.05
+# The half-hour grid is sized by the date span, so stray dates are refused before it is allocated.
+EARLIEST_EPOCH = int(datetime(2000, 1, 1, tzinfo=timezone.utc).timestamp())
+MAX_SPAN_DAYS = 3 * 366
+# Below this share of the span's half-hours present, the profile would be mostly fill.
+MIN_COVERAGE_PCT = 20.0
+
+_TIMESTAMP_KEYS = ("start", "timestamp", "datetime", "date", "time", "interval", "period")
+_VALUE_KEYS = ("consumption", "kwh", "value", "import", "usage", "reading")
+_DATE_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M", "%d/%m/%Y", "%Y-%m-%d")
+
+
+class SmartMeterError(ValueError):
+    """The upload is not a usable half-hourly consumption export."""
+
+
+def _max_rows() -> int:
+    try:
+        return max(1000, int(os.environ.get("SMART_METER_MAX_ROWS", "400000")))
+    except ValueError:
+        return 400000
+
+
+def _epoch(raw: str) -> int:
+    s = raw.strip()
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        for fmt in _DATE_FORMATS:
+            try:
+                dt = datetime.strptime(s, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _slot_of_day(label: str) -> int | None:
+    hours, sep, minutes = label.strip().partition(":")
+    if not sep or not hours.isdigit() or not minutes[:2].isdigit():
+        return None
+    h, m = int(hours), int(minutes[:2])
+    if h > 24 or m not in (0, 30):
+        return None
+    return (h * 2 + m // 30) % 48
+
+
+def _pick(header: list[str], keys: tuple[str, ...], exclude: set[int]) -> int | None:
+    for key in keys:
+        for i, name in enumerate(header):
+            if i not in exclude and key in name:
+                return i
+    return None
+
+
+def _read_rows(lines: Iterable[str]) -> tuple[array.array, array.array, int, int]:
+    """Stream rows into (epoch seconds, kWh) buffers; returns (times, values, rows_read, rows_rejected)."""
+    reader = csv.reader(lines)
+    times = array.array("q")
+    values = array.array("f")
+    header = next(reader, None)
+    if not header:
+        raise SmartMeterError("empty file")
+    header = [h.strip().lower().lstrip("\ufeff") for h in header]
+    wide = {i: s for i, h in enumerate(header) if (s := _slot_of_day(h)) is not None}
+    rows_read = rows_rejected = 0
+    limit = _max_rows()
+
+    if len(wide) >= 46:
+        date_col = _pick(header, ("date", "day"), set(wide))
+        if date_col is None:
+            raise SmartMeterError("wide format needs a date column")
+        for row in reader:
+            if not row:
+                continue
+            rows_read += 1
+            if rows_read > limit:
+                raise SmartMeterError(f"more than {limit} rows")
+            try:
+                day = _epoch(row[date_col].split(" ")[0].split("T")[0])
+            except (ValueError, IndexError):
+                rows_rejected += 1
+                continue
+            for col, slot in wide.items():
+                try:
+                    values.append(float(row[col]))
+                    times.append(day + slot * SLOT_S)
+                except (ValueError, IndexError):
+                    pass
+        return times, values, rows_read, rows_rejected
+
+    time_col = _pick(header, _TIMESTAMP_KEYS, set())
+    value_col = _pick(header, _VALUE_KEYS, {time_col} if time_col is not None else set())
+    if time_col is None or value_col is None:
+        raise SmartMeterError(f"could not find timestamp and kWh columns in header {header}")
+    # Separate "date" and "time" columns are joined.
+    clock_col = header.index("time") if header[time_col] == "date" and "time" in header else None
+    for row in reader:
+        if not row:
+            continue
+        rows_read += 1
+        if rows_read > limit:
+            raise SmartMeterError(f"more than {limit} rows")
+        try:
+            stamp = row[time_col] if clock_col is None else f"{row[time_col]} {row[clock_col]}"
+            t = _epoch(stamp)
+            v = float(row[value_col])
+        except (ValueError, IndexError):
+            rows_rejected += 1
+            continue
+        times.append(t)
+        values.append(v)
+    return times, values, rows_read, rows_rejected
+
+
+def _to_half_hours(times: np.ndarray, values: np.ndarray) -> tuple[int, np.ndarray, int]:
+    """Dense float32 half-hour grid (NaN = missing). Returns (first slot epoch, grid, interval s)."""
+    order = np.argsort(times, kind="stable")
+    times, values = times[order], values[order]
+    steps = np.diff(times)
+    interval = int(np.median(steps[steps > 0])) if np.any(steps > 0) else SLOT_S
+    if interval > SLOT_S:
+        # Coarser than half-hourly: spread each reading over its slots.
+        parts = interval // SLOT_S
+        times = (times[:, None] + np.arange(parts) * SLOT_S).ravel()
+        values = np.repeat(values / parts, parts)
+    slots = times // SLOT_S
+    first = int(slots.min())
+    grid = np.zeros(int(slots.max()) - first + 1, dtype=np.float32)
+    seen = np.zeros(len(grid), dtype=bool)
+    np.add.at(grid, slots - first, values.astype(np.float32))
+    seen[slots - first] = True
+    grid[~seen] = np.nan
+    return first * SLOT_S, grid, interval
+
+
+def _typical_year(first_epoch: int, grid: np.ndarray) -> np.ndarray:
+    """Fold a dense half-hour series into 365 × 48 (see module docstring)."""
+    from src.models.energy_balancing import _typical_monthly_profile_weights
+
+    pad_front = (first_epoch // SLOT_S) % 48
+    padded = np.concatenate([np.full(pad_front, np.nan, np.float32), grid])
+    padded = np.concatenate([padded, np.full((-len(padded)) % 48, np.nan, np.float32)])
+    days = padded.reshape(-1, 48)
+    day0 = np.datetime64(first_epoch // 86400, "D")
+    dates = day0 + np.arange(len(days))
+    months = dates.astype("datetime64[M]").astype(int) % 12
+    day_of_month = (dates - dates.astype("datetime64[M]")).astype(int)
+    keep = ~((months == 1) & (day_of_month == 28))  # drop Feb 29
+    days, months, day_of_month = days[keep], months[keep], day_of_month[keep]
+
+    cumulative = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+    doy = cumulative[months] + day_of_month
+    # Mean per (day-of-year, slot) across years, ignoring gaps.
+    total = np.zeros((DAYS_PER_YEAR, 48))
+    count = np.zeros((DAYS_PER_YEAR, 48))
+    valid = ~np.isnan(days)
+    np.add.at(total, doy, np.where(valid, days, 0.0))
+    np.add.at(count, doy, valid)
+    year = np.divide(total, count, out=np.full_like(total, np.nan), where=count > 0)
+
+    year_month = np.repeat(np.arange(12), np.diff(np.append(cumulative, DAYS_PER_YEAR)))
+    overall = np.nanmean(year, axis=0)
+    non_heating_w, heating_w = _typical_monthly_profile_weights()
+    seasonal = np.add(non_heating_w, heating_w) / 2.0
+    covered = [m for m in range(12) if not np.all(np.isnan(year[year_month == m]))]
+    seasonal_ref = seasonal[covered].mean()
+    for m in range(12):
+        rows = year_month == m
+        month_days = year[rows]
+        fill = np.nanmean(month_days, axis=0) if m in covered else overall * (seasonal[m] / seasonal_ref)
+        # Slots the month never saw fall back to the overall mean for that slot.
+        fill = np.where(np.isnan(fill), overall, fill)
+        year[rows] = np.where(np.isnan(month_days), fill, month_days)
+    return year.astype(np.float32)
+
+
+def parse_smart_meter_csv(lines: Iterable[str]) -> dict[str, Any]:
+    """
+    Parse and validate a consumption export (see module docstring).
+
+    Returns {typical_year_kwh (365×48 float32), annual_kwh, monthly_kwh, mean_day_kwh (48),
+    start, end, interval_minutes, days_covered, coverage_pct, rows_read, rows_rejected}.
+    Raises SmartMeterError when the file is unusable (unknown layout, too many bad rows,
+    negative or implausible readings, timestamps before 2000 or in the future, a span over
+    MAX_SPAN_DAYS, under MIN_DAYS of data or under MIN_COVERAGE_PCT of the span covered).
+    """
+    times_buf, values_buf, rows_read, rows_rejected = _read_rows(lines)
+    if rows_read and rows_rejected / rows_read > MAX_REJECTED_FRACTION:
+        raise SmartMeterError(f"{rows_rejected} of {rows_read} rows could not be parsed")
+    if not len(values_buf):
+        raise SmartMeterError("no readings found")
+    times = np.frombuffer(times_buf, dtype=np.int64)
+    values = np.frombuffer(values_buf, dtype=np.float32)
+    if np.any(values < 0):
+        raise SmartMeterError("negative consumption readings (is this an export/generation file?)")
+    t_min, t_max = int(times.min()), int(times.max())
+    if t_min < EARLIEST_EPOCH or t_max > time.time() + 86400:
+        bad = t_min if t_min < EARLIEST_EPOCH else t_max
+        raise SmartMeterError(
+            f"timestamp {datetime.fromtimestamp(bad, timezone.utc):%Y-%m-%d} is outside 2000 to today; check the date column"
+        )
+    if t_max - t_min > MAX_SPAN_DAYS * 86400:
+        raise SmartMeterError(f"readings span more than {MAX_SPAN_DAYS} days; upload at most 3 years")
+
+    first_epoch, grid, interval = _to_half_hours(times, values)
+    if np.nanmax(grid) > MAX_SLOT_KWH:
+        raise SmartMeterError(f"readings above {MAX_SLOT_KWH:g} kWh per half-hour; check the units (Wh vs kWh)")
+    present = int(np.count_nonzero(~np.isnan(grid)))
+    days_covered = present / 48.0
+    if days_covered < MIN_DAYS:
+        raise SmartMeterError(f"only {days_covered:.1f} days of data; at least {MIN_DAYS} are needed")
+    coverage_pct = 100.0 * present / len(grid)
+    if coverage_pct < MIN_COVERAGE_PCT:
+        raise SmartMeterError(
+            f"only {coverage_pct:.1f}% of half-hours between the first and last reading are present; "
+            f"at least {MIN_COVERAGE_PCT:g}% are needed"
+        )
+
+    year = _typical_year(first_epoch, grid)
+    month_lengths = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    month_of_day = np.repeat(np.arange(12), month_lengths)
+    monthly = np.bincount(month_of_day, weights=year.sum(axis=1), minlength=12)
+    end_epoch = first_epoch + (len(grid) - 1) * SLOT_S
+    return {
+        "typical_year_kwh": year,
+        "annual_kwh": round(float(year.sum(dtype=np.float64)), 1),
+        "monthly_kwh": [round(float(x), 1) for x in monthly],
+        "mean_day_kwh": [round(float(x), 4) for x in year.mean(axis=0)],
+        "start": datetime.fromtimestamp(first_epoch, timezone.utc).isoformat(),
+        "end": datetime.fromtimestamp(end_epoch, timezone.utc).isoformat(),
+        "interval_minutes": interval // 60,
+        "days_covered": round(days_covered, 1),
+        "coverage_pct": round(coverage_pct, 1),
+        "rows_read": rows_read,
+        "rows_rejected": rows_rejected,
+    }
+
+
+class _ProfileStore:
+    """Thread-safe LRU of profile id -> parsed profile, with a TTL."""
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_s:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+_store = _ProfileStore(
+    maxsize=max(1, int(_env_number("SMART_METER_MAX_PROFILES", 200))),
+    ttl_s=_env_number("SMART_METER_PROFILE_TTL_S", 86400),
+)
+
+
+def store_profile(profile: dict[str, Any]) -> str:
+    """Keep a parsed profile in memory; returns its id (content hash, so re-uploads dedupe)."""
+    profile_id = hashlib.sha1(profile["typical_year_kwh"].tobytes()).hexdigest()[:16]
+    _store.put(profile_id, profile)
+    return profile_id
+
+
+def get_profile(profile_id: str) -> dict[str, Any] | None:
+    """A stored profile, or None when unknown or expired."""
+    return _store.get(str(profile_id or "").strip().lower())
+
+
+def profile_summary(profile: dict[str, Any]) -> dict[str, Any]:
+    """JSON-safe view of a profile (everything except the 365×48 array)."""
+    return {k: v for k, v in profile.items() if k != "typical_year_kwh"}
@@ -0,0 +1,317 @@
+"""
+Incremental load of fact_tariff_search_simple into the star schema (create_energy_tariff_database.py).
+
+The scraper only writes the wide simple table. run_etl() copies rows added since the last run
+into fact_tariff_search with integer dimension keys:
+- Watermark: etl_watermark stores the last loaded simple-table id (and its search_date, which
+  bounds the scan to recent partitions). Each batch's dimension upserts, fact inserts and
+  watermark update commit together, so a failed run resumes where the last batch committed.
+- Lag: AUTO_INCREMENT ids are handed out before commit, so a slow transaction can commit a lower
+  id after a higher one was loaded. Each batch stops at the first row created less than
+  STAR_ETL_LAG_S seconds (default 600) ago; later runs pick those rows up. created_at is the
+  column's DEFAULT CURRENT_TIMESTAMP (Tariff.save does not set it) and the age test runs in the
+  SELECT against NOW(), so both sides are the database clock in the same session time zone.
+  Only insert transactions that stay open longer than the lag can still be skipped.
+- Dimension keys are cached in memory (natural key -> surrogate key, loaded once per run).
+  Only cache misses go to MySQL: one batched upsert per dimension, then one SELECT for the new keys.
+- Facts go in with one executemany per batch (mysql-connector turns it into a multi-row
+  INSERT) of STAR_ETL_BATCH_ROWS rows (default 5000).
+
+Natural keys: supplier slug (dim_supplier.supplier_id), a hash of supplier, tariff name, type,
+payment method, contract length and green flag (dim_tariff.tariff_id), admin-district code
+(dim_region.region_code), YYYYMMDD (dim_date.date_key), fuel type, postcode.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+__all__ = ["EtlStats", "date_attributes", "run_etl", "star_row", "supplier_id", "tariff_id"]
+
+JOB = "tariff_star"
+
+_WATERMARK_DDL = """
+    CREATE TABLE IF NOT EXISTS etl_watermark (
+        job VARCHAR(50) PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        last_search_date DATE,
+        rows_loaded BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+_SOURCE_COLUMNS = (
+    "id", "pay_method", "new_supplier_name", "tariff_name", "tariff_type", "fixed_price_length_months",
+    "is_green", "region_code", "region_name", "dno_name", "dno_id", "postcode", "outward_code",
+    "latitude", "longitude", "fuel_type", "search_date", "unit_rate", "standing_charge", "exit_fee",
+    "annual_cost_new", "created_at",
+)
+
+_FACT_INSERT = """
+    INSERT INTO fact_tariff_search (
+        tariff_key, supplier_key, region_key, date_key, fuel_type_key,
+        unit_rate, standing_charge_day, exit_fee, annual_cost_user, created_at
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_SEASONS = {12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Spring",
+            6: "Summer", 7: "Summer", 8: "Summer", 9: "Autumn", 10: "Autumn", 11: "Autumn"}
+
+
+def supplier_id(name: str) -> str:
+    """Stable slug for dim_supplier.supplier_id (VARCHAR(20)); long names keep a hash suffix."""
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "unknown"
+    if len(slug) <= 20:
+        return slug
+    return f"{slug[:11].rstrip('-')}-{hashlib.sha1(slug.encode()).hexdigest()[:8]}"
+
+
+def tariff_id(supplier: str, tariff_name: str, tariff_type: str, pay_method: str,
+              contract_months: int | None, is_green: bool) -> str:
+    """dim_tariff.tariff_id: tariff names are only unique per supplier and terms."""
+    parts = [supplier or "", tariff_name or "", tariff_type or "", pay_method or "",
+             "" if contract_months is None else str(int(contract_months)), "1" if is_green else "0"]
+    return hashlib.sha1("|".join(p.strip().lower() for p in parts).encode()).hexdigest()
+
+
+def date_attributes(d: date) -> tuple:
+    """dim_date row: date_key, full_date, day_of_week, day_of_month, month, month_name, quarter, year, is_weekend, season."""
+    return (
+        int(f"{d:%Y%m%d}"), d, f"{d:%A}", d.day, d.month, f"{d:%B}",
+        (d.month - 1) // 3 + 1, d.year, d.weekday() >= 5, _SEASONS[d.month],
+    )
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+@dataclass(frozen=True)
+class StarRow:
+    """One simple-table row split into dimension natural keys/attributes and measures."""
+
+    source_id: int
+    supplier: tuple  # supplier_id, supplier_name
+    tariff: tuple  # tariff_id, tariff_name, tariff_type, payment_method, contract_length_months, is_green
+    region: tuple  # region_code, region_name, dno_name, dno_id
+    postcode: tuple | None  # postcode, outward_code, latitude, longitude
+    search_date: date
+    fuel_type: str
+    measures: tuple  # unit_rate, standing_charge_day, exit_fee, annual_cost_user, created_at
+
+
+def star_row(row: dict) -> StarRow:
+    supplier = (row.get("new_supplier_name") or "").strip() or "Unknown"
+    pay_method = (row.get("pay_method") or "").strip()[:50]
+    is_green = bool(row.get("is_green"))
+    months = row.get("fixed_price_length_months")
+    postcode = (row.get("postcode") or "").strip().upper()[:10]
+    return StarRow(
+        source_id=int(row["id"]),
+        supplier=(supplier_id(supplier), supplier[:100]),
+        tariff=(
+            tariff_id(supplier, row.get("tariff_name") or "", row.get("tariff_type") or "", pay_method, months, is_green),
+            (row.get("tariff_name") or "")[:150], (row.get("tariff_type") or "")[:50], pay_method, months, is_green,
+        ),
+        region=(
+            ((row.get("region_code") or "").strip() or "UNKNOWN")[:10],
+            (row.get("region_name") or "").strip() or "Unknown",
+            row.get("dno_name") or None,
+            row.get("dno_id") or None,
+        ),
+        postcode=(postcode, (row.get("outward_code") or "").strip().upper()[:4], row.get("latitude"),
+                  row.get("longitude")) if postcode else None,
+        search_date=_as_date(row["search_date"]),
+        fuel_type=(row.get("fuel_type") or "").strip() or "unknown",
+        measures=(row.get("unit_rate"), row.get("standing_charge"), row.get("exit_fee"),
+                  row.get("annual_cost_new"), row.get("created_at")),
+    )
+
+
+class _Dimension:
+    """Natural key -> surrogate key cache over one dimension table, filled by batched upserts."""
+
+    def __init__(self, table: str, key_col: str, columns: tuple[str, ...]) -> None:
+        self.table = table
+        self.key_col = key_col
+        self.columns = columns  # natural key first
+        self.keys: dict = {}
+
+    def load(self, cursor) -> None:
+        cursor.execute(f"SELECT {self.columns[0]}, {self.key_col} FROM {self.table}")
+        self.keys = {natural: key for natural, key in cursor.fetchall()}
+
+    def ensure(self, cursor, rows: dict) -> None:
+        """Insert the rows (natural key -> full row) not cached yet, then cache their keys."""
+        missing = [row for natural, row in rows.items() if natural not in self.keys]
+        if not missing:
+            return
+        cols = ", ".join(self.columns)
+        marks = ", ".join(["%s"] * len(self.columns))
+        cursor.executemany(
+            f"INSERT INTO {self.table} ({cols}) VALUES ({marks}) "
+            f"ON DUPLICATE KEY UPDATE {self.columns[0]} = {self.columns[0]}",
+            missing,
+        )
+        naturals = [row[0] for row in missing]
+        for i in range(0, len(naturals), 1000):
+            chunk = naturals[i:i + 1000]
+            cursor.execute(
+                f"SELECT {self.columns[0]}, {self.key_col} FROM {self.table} "
+                f"WHERE {self.columns[0]} IN ({', '.join(['%s'] * len(chunk))})",
+                tuple(chunk),
+            )
+            self.keys.update({natural: key for natural, key in cursor.fetchall()})
+
+    def __getitem__(self, natural):
+        return self.keys[natural]
+
+
+@dataclass
+class EtlStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    last_id: int = 0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+class _StarLoader:
+    def __init__(self) -> None:
+        self.supplier = _Dimension("dim_supplier", "supplier_key", ("supplier_id", "supplier_name"))
+        self.tariff = _Dimension("dim_tariff", "tariff_key", (
+            "tariff_id", "tariff_name", "tariff_type", "payment_method", "contract_length_months", "is_green"))
+        self.region = _Dimension("dim_region", "region_key", ("region_code", "region_name", "dno_name", "dno_id"))
+        self.fuel = _Dimension("dim_fuel_type", "fuel_type_key", ("fuel_type",))
+        self.postcode = _Dimension("dim_postcode", "postcode_key", (
+            "postcode", "outward_code", "region_key", "latitude", "longitude"))
+        self.dates: set[int] = set()
+
+    def load(self, cursor) -> None:
+        for dim in (self.supplier, self.tariff, self.region, self.fuel, self.postcode):
+            dim.load(cursor)
+        cursor.execute("SELECT date_key FROM dim_date")
+        self.dates = {r[0] for r in cursor.fetchall()}
+
+    def load_batch(self, cursor, rows: list[StarRow]) -> int:
+        self.supplier.ensure(cursor, {r.supplier[0]: r.supplier for r in rows})
+        self.tariff.ensure(cursor, {r.tariff[0]: r.tariff for r in rows})
+        self.region.ensure(cursor, {r.region[0]: r.region for r in rows})
+        self.fuel.ensure(cursor, {r.fuel_type: (r.fuel_type,) for r in rows})
+        self.postcode.ensure(cursor, {
+            r.postcode[0]: (r.postcode[0], r.postcode[1], self.region[r.region[0]], r.postcode[2], r.postcode[3])
+            for r in rows if r.postcode
+        })
+        new_dates = {date_attributes(r.search_date) for r in rows if int(f"{r.search_date:%Y%m%d}") not in self.dates}
+        if new_dates:
+            cursor.executemany(
+                "INSERT IGNORE INTO dim_date (date_key, full_date, day_of_week, day_of_month, month, month_name, "
+                "quarter, year, is_weekend, season) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                sorted(new_dates),
+            )
+            self.dates.update(d[0] for d in new_dates)
+        cursor.executemany(_FACT_INSERT, [
+            (self.tariff[r.tariff[0]], self.supplier[r.supplier[0]], self.region[r.region[0]],
+             int(f"{r.search_date:%Y%m%d}"), self.fuel[r.fuel_type], *r.measures)
+            for r in rows
+        ])
+        return len(rows)
+
+
+def _batch_rows() -> int:
+    try:
+        return max(1, int(os.environ.get("STAR_ETL_BATCH_ROWS", "5000")))
+    except ValueError:
+        return 5000
+
+
+def _lag_s() -> int:
+    try:
+        return max(0, int(os.environ.get("STAR_ETL_LAG_S", "600")))
+    except ValueError:
+        return 600
+
+
+def _settled(rows: list[tuple]) -> list[tuple]:
+    """
+    Leading rows (in id order) older than the lag, without the trailing "recent" flag column;
+    stops at the first recent one.
+    """
+    for i, r in enumerate(rows):
+        if r[-1]:
+            return [r[:-1] for r in rows[:i]]
+    return [r[:-1] for r in rows]
+
+
+def run_etl(
+    conn,
+    batch_rows: int | None = None,
+    max_rows: int | None = None,
+    log: bool = True,
+    lag_s: int | None = None,
+) -> EtlStats:
+    """Load settled simple-table rows above the watermark into the star schema; returns rows loaded and rows/s."""
+    from src.data.create_energy_tariff_database import STAR_SCHEMA_TABLES
+
+    batch_rows = batch_rows or _batch_rows()
+    lag = _lag_s() if lag_s is None else lag_s
+    cursor = conn.cursor()
+    loader = _StarLoader()
+    stats = EtlStats()
+    try:
+        for _name, ddl in STAR_SCHEMA_TABLES:
+            cursor.execute(ddl)
+        cursor.execute(_WATERMARK_DDL)
+        cursor.execute("INSERT IGNORE INTO etl_watermark (job, last_id) VALUES (%s, 0)", (JOB,))
+        conn.commit()
+        cursor.execute("SELECT last_id, last_search_date FROM etl_watermark WHERE job = %s", (JOB,))
+        last_id, last_date = cursor.fetchone()
+        stats.last_id = int(last_id or 0)
+        loader.load(cursor)
+
+        started = time.perf_counter()
+        while max_rows is None or stats.rows < max_rows:
+            limit = batch_rows if max_rows is None else min(batch_rows, max_rows - stats.rows)
+            # ids grow with search_date, so the date bound only skips partitions already loaded.
+            floor = (last_date - timedelta(days=1)) if last_date else date(1970, 1, 1)
+            cursor.execute(
+                f"SELECT {', '.join(_SOURCE_COLUMNS)}, "
+                "COALESCE(created_at > NOW() - INTERVAL %s SECOND, 0) FROM fact_tariff_search_simple "
+                "WHERE search_date >= %s AND id > %s ORDER BY id LIMIT %s",
+                (lag, floor, stats.last_id, limit),
+            )
+            raw = _settled(cursor.fetchall())
+            if not raw:
+                break
+            rows = [star_row(dict(zip(_SOURCE_COLUMNS, r))) for r in raw]
+            try:
+                loader.load_batch(cursor, rows)
+                last_date = max(r.search_date for r in rows)
+                cursor.execute(
+                    "UPDATE etl_watermark SET last_id = %s, last_search_date = %s, rows_loaded = rows_loaded + %s "
+                    "WHERE job = %s",
+                    (rows[-1].source_id, last_date, len(rows), JOB),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            stats.rows += len(rows)
+            stats.batches += 1
+            stats.last_id = rows[-1].source_id
+            stats.seconds = time.perf_counter() - started
+            if log:
+                print(f"[star-etl] batch {stats.batches}: {len(rows)} rows, up to id {stats.last_id} "
+                      f"({stats.rows_per_s:,.0f} rows/s)", flush=True)
+        stats.seconds = time.perf_counter() - started
+    finally:
+        cursor.close()
+    return stats
@@ -0,0 +1,342 @@
+"""
+Monthly partitions, rollups and retention for fact_tariff_search_simple.
+
+The fact table is RANGE COLUMNS-partitioned by search_date, one partition per calendar month
+(p202610 holds October 2026), plus a catch-all pmax. Indexes are per partition, so dropping
+expired months keeps them bounded, and queries that bound search_date only touch the months
+they need. MySQL requires the partition column in every unique key, so the primary key is
+(id, search_date).
+
+run_maintenance() is idempotent (python -m src.tools.tariff_maintenance, e.g. daily from cron):
+1. converts an unpartitioned table (existing installs) and keeps TARIFF_PARTITIONS_AHEAD
+   (default 3) empty future months split off pmax;
+2. rolls detail up into agg_tariff_supplier_monthly (month × DNO region × supplier × fuel) and
+   agg_tariff_region_monthly (month × DNO region × fuel), and rebuilds the month's price
+   histograms (tariff_trends): the current month on every run, and every complete month until
+   it has been rolled up after it ended (rows saved after a mid-month run are only final then);
+3. drops month partitions older than TARIFF_DETAIL_RETENTION_MONTHS (default 12; 0 keeps
+   everything), only once their month is in the rollups.
+plan_maintenance() is the pure part: it turns the current partitions into the SQL to run.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from src.data.tariff_trends import PRICE_HIST_CLEAR, PRICE_HIST_DDL, PRICE_HIST_REBUILD
+
+__all__ = [
+    "FACT_TABLE",
+    "MaintenancePlan",
+    "Partition",
+    "REGION_ROLLUP_TABLE",
+    "SUPPLIER_ROLLUP_TABLE",
+    "final_rollups",
+    "plan_maintenance",
+    "run_maintenance",
+]
+
+FACT_TABLE = "fact_tariff_search_simple"
+SUPPLIER_ROLLUP_TABLE = "agg_tariff_supplier_monthly"
+REGION_ROLLUP_TABLE = "agg_tariff_region_monthly"
+
+ROLLUP_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {SUPPLIER_ROLLUP_TABLE} (
+        month_start DATE NOT NULL,
+        dno_id VARCHAR(20) NOT NULL,
+        region_name VARCHAR(100),
+        new_supplier_name VARCHAR(100) NOT NULL,
+        fuel_type VARCHAR(20) NOT NULL,
+        searches INT NOT NULL,
+        tariff_rows INT NOT NULL,
+        tariffs INT NOT NULL,
+        green_tariffs INT NOT NULL,
+        min_unit_rate DECIMAL(10, 4),
+        avg_unit_rate DECIMAL(10, 4),
+        max_unit_rate DECIMAL(10, 4),
+        avg_standing_charge DECIMAL(10, 4),
+        min_annual_cost_new DECIMAL(10, 2),
+        avg_annual_cost_new DECIMAL(10, 2),
+        rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (month_start, dno_id, new_supplier_name, fuel_type),
+        INDEX idx_supplier_month (new_supplier_name, month_start)
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {REGION_ROLLUP_TABLE} (
+        month_start DATE NOT NULL,
+        dno_id VARCHAR(20) NOT NULL,
+        region_name VARCHAR(100),
+        fuel_type VARCHAR(20) NOT NULL,
+        searches INT NOT NULL,
+        postcodes INT NOT NULL,
+        suppliers INT NOT NULL,
+        tariff_rows INT NOT NULL,
+        min_unit_rate DECIMAL(10, 4),
+        avg_unit_rate DECIMAL(10, 4),
+        avg_standing_charge DECIMAL(10, 4),
+        min_annual_cost_new DECIMAL(10, 2),
+        avg_annual_cost_new DECIMAL(10, 2),
+        first_search DATE,
+        last_search DATE,
+        rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (month_start, dno_id, fuel_type)
+    )
+    """,
+    PRICE_HIST_DDL,
+)
+
+# REPLACE keeps re-running a month (the current one, or after a failed run) idempotent.
+_SUPPLIER_ROLLUP = f"""
+    REPLACE INTO {SUPPLIER_ROLLUP_TABLE} (
+        month_start, dno_id, region_name, new_supplier_name, fuel_type,
+        searches, tariff_rows, tariffs, green_tariffs,
+        min_unit_rate, avg_unit_rate, max_unit_rate, avg_standing_charge,
+        min_annual_cost_new, avg_annual_cost_new
+    )
+    SELECT %s, COALESCE(NULLIF(dno_id, ''), 'Unknown'), MAX(region_name), new_supplier_name, fuel_type,
+           COUNT(DISTINCT postcode, search_date), COUNT(*), COUNT(DISTINCT tariff_name),
+           COUNT(DISTINCT CASE WHEN is_green THEN tariff_name END),
+           MIN(unit_rate), AVG(unit_rate), MAX(unit_rate), AVG(standing_charge),
+           MIN(annual_cost_new), AVG(annual_cost_new)
+    FROM {FACT_TABLE}
+    WHERE search_date >= %s AND search_date < %s
+    GROUP BY COALESCE(NULLIF(dno_id, ''), 'Unknown'), new_supplier_name, fuel_type
+"""
+
+_REGION_ROLLUP = f"""
+    REPLACE INTO {REGION_ROLLUP_TABLE} (
+        month_start, dno_id, region_name, fuel_type,
+        searches, postcodes, suppliers, tariff_rows,
+        min_unit_rate, avg_unit_rate, avg_standing_charge,
+        min_annual_cost_new, avg_annual_cost_new, first_search, last_search
+    )
+    SELECT %s, COALESCE(NULLIF(dno_id, ''), 'Unknown'), MAX(region_name), fuel_type,
+           COUNT(DISTINCT postcode, search_date), COUNT(DISTINCT postcode),
+           COUNT(DISTINCT new_supplier_name), COUNT(*),
+           MIN(unit_rate), AVG(unit_rate), AVG(standing_charge),
+           MIN(annual_cost_new), AVG(annual_cost_new), MIN(search_date), MAX(search_date)
+    FROM {FACT_TABLE}
+    WHERE search_date >= %s AND search_date < %s
+    GROUP BY COALESCE(NULLIF(dno_id, ''), 'Unknown'), fuel_type
+"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.environ.get(name, str(default))))
+    except ValueError:
+        return default
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One partition: name and exclusive upper bound (None for MAXVALUE)."""
+
+    name: str
+    upper: date | None
+
+    @property
+    def month(self) -> date | None:
+        """Calendar month a monthly partition holds (None for the MAXVALUE catch-all)."""
+        return None if self.upper is None else add_months(self.upper, -1)
+
+
+@dataclass
+class MaintenancePlan:
+    statements: list[tuple[str, tuple]] = field(default_factory=list)
+    created: list[date] = field(default_factory=list)
+    rolled_up: list[date] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    converted: bool = False
+
+
+def _partition_defs(months: list[date], maxvalue_name: str = "pmax") -> str:
+    defs = [f"PARTITION {partition_name(m)} VALUES LESS THAN ('{add_months(m, 1).isoformat()}')" for m in months]
+    defs.append(f"PARTITION {maxvalue_name} VALUES LESS THAN (MAXVALUE)")
+    return ",\n        ".join(defs)
+
+
+def plan_maintenance(
+    partitions: list[Partition] | None,
+    rolled_up: set[date],
+    today: date,
+    oldest_search: date | None = None,
+    retention_months: int | None = None,
+    ahead_months: int | None = None,
+) -> MaintenancePlan:
+    """
+    SQL to bring the fact table to the target layout. partitions is None for an unpartitioned
+    table (then oldest_search, the table's MIN(search_date), sets the first partition).
+    rolled_up: months whose rollup is final, i.e. ran after the month ended (see final_rollups).
+    """
+    retention = _env_int("TARIFF_DETAIL_RETENTION_MONTHS", 12) if retention_months is None else retention_months
+    ahead = _env_int("TARIFF_PARTITIONS_AHEAD", 3) if ahead_months is None else ahead_months
+    current = month_start(today)
+    last_wanted = add_months(current, ahead)
+    plan = MaintenancePlan()
+
+    if partitions is None:
+        first = min(month_start(oldest_search), current) if oldest_search else current
+        months = [first]
+        while months[-1] < last_wanted:
+            months.append(add_months(months[-1], 1))
+        plan.statements.append((f"ALTER TABLE {FACT_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, search_date)", ()))
+        plan.statements.append((
+            f"ALTER TABLE {FACT_TABLE} PARTITION BY RANGE COLUMNS(search_date) (\n        {_partition_defs(months)}\n    )",
+            (),
+        ))
+        plan.converted = True
+        plan.created = months
+        partitions = [Partition(partition_name(m), add_months(m, 1)) for m in months] + [Partition("pmax", None)]
+    else:
+        monthly = [p for p in partitions if p.upper is not None]
+        catch_all = next((p for p in partitions if p.upper is None), None)
+        if monthly:
+            nxt = add_months(max(p.month for p in monthly), 1)
+        else:
+            nxt = min(month_start(oldest_search), current) if oldest_search else current
+        new_months: list[date] = []
+        while nxt <= last_wanted:
+            new_months.append(nxt)
+            nxt = add_months(nxt, 1)
+        if new_months:
+            if catch_all is not None:
+                plan.statements.append((
+                    f"ALTER TABLE {FACT_TABLE} REORGANIZE PARTITION {catch_all.name} INTO (\n        "
+                    f"{_partition_defs(new_months, catch_all.name)}\n    )",
+                    (),
+                ))
+            else:
+                defs = ",\n        ".join(
+                    f"PARTITION {partition_name(m)} VALUES LESS THAN ('{add_months(m, 1).isoformat()}')"
+                    for m in new_months
+                )
+                plan.statements.append((f"ALTER TABLE {FACT_TABLE} ADD PARTITION (\n        {defs}\n    )", ()))
+            plan.created = new_months
+            partitions = list(partitions) + [Partition(partition_name(m), add_months(m, 1)) for m in new_months]
+
+    # Rollups: the current month every run, and complete months until one run after they ended.
+    data_months = sorted({p.month for p in partitions if p.month is not None and p.month <= current})
+    for m in data_months:
+        if m == current or m not in rolled_up:
+            params = (m, m, add_months(m, 1))
+            plan.statements.append((_SUPPLIER_ROLLUP, params))
+            plan.statements.append((_REGION_ROLLUP, params))
+            plan.statements.append((PRICE_HIST_CLEAR, (m,)))
+            plan.statements.append((PRICE_HIST_REBUILD, params * 2))
+            plan.rolled_up.append(m)
+
+    # Retention: drop whole months past the window once they are rolled up.
+    if retention > 0:
+        cutoff = add_months(current, -retention)
+        summarised = rolled_up | set(plan.rolled_up)
+        expired = [p.name for p in partitions if p.upper is not None and p.upper <= cutoff and p.month in summarised]
+        if expired:
+            plan.statements.append((f"ALTER TABLE {FACT_TABLE} DROP PARTITION {', '.join(expired)}", ()))
+            plan.dropped = expired
+    return plan
+
+
+def final_rollups(rows) -> set[date]:
+    """
+    Months from (month_start, MIN(rolled_up_at)) rows whose rollup ran on or after the first day
+    of the next month. A month rolled up only while it was current is not final: rows saved after
+    that run are still missing, so it is rolled up again (and its detail kept) until then.
+    """
+    final: set[date] = set()
+    for month, rolled_up_at in rows:
+        if rolled_up_at is None:
+            continue
+        at = rolled_up_at.date() if isinstance(rolled_up_at, datetime) else rolled_up_at
+        if at >= add_months(month, 1):
+            final.add(month)
+    return final
+
+
+def _parse_bound(description: str | None) -> date | None:
+    raw = (description or "").strip().strip("'\"")
+    if not raw or raw.upper() == "MAXVALUE":
+        return None
+    return date.fromisoformat(raw[:10])
+
+
+def read_partitions(cursor) -> list[Partition] | None:
+    """The fact table's partitions in order, or None when it is not partitioned."""
+    cursor.execute(
+        """
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (FACT_TABLE,),
+    )
+    rows = cursor.fetchall()
+    if not rows or rows[0][0] is None:
+        return None
+    return [Partition(str(name), _parse_bound(desc)) for name, desc in rows]
+
+
+# Statements committed together with the one after them, so readers never see the gap between:
+# a month's histogram clear is only visible once its rebuild has run.
+_COMMIT_WITH_NEXT = frozenset({PRICE_HIST_CLEAR})
+
+
+def run_maintenance(conn, today: date | None = None, dry_run: bool = False) -> MaintenancePlan:
+    """
+    Create rollup tables, then plan and (unless dry_run) execute partition/rollup/retention SQL.
+    Each statement is committed on its own, except a histogram clear and rebuild: one transaction.
+    """
+    today = today or date.today()
+    cursor = conn.cursor()
+    try:
+        for ddl in ROLLUP_DDL:
+            if not dry_run:
+                cursor.execute(ddl)
+        partitions = read_partitions(cursor)
+        oldest = None
+        if partitions is None or not any(p.upper is not None for p in partitions):
+            cursor.execute(f"SELECT MIN(search_date) FROM {FACT_TABLE}")
+            oldest = (cursor.fetchone() or (None,))[0]
+        rolled: set[date] = set()
+        try:
+            cursor.execute(
+                f"SELECT month_start, MIN(rolled_up_at) FROM {SUPPLIER_ROLLUP_TABLE} GROUP BY month_start"
+            )
+            rolled = final_rollups(cursor.fetchall())
+        except Exception:
+            if not dry_run:
+                raise  # dry run before the rollup tables exist
+        plan = plan_maintenance(partitions, rolled, today, oldest)
+        for sql, params in plan.statements:
+            summary = " ".join(sql.split())[:100]
+            month = f" [{params[0]:%Y-%m}]" if params else ""
+            print(f"[tariff-maintenance] {'(dry run) ' if dry_run else ''}{summary}{month}", flush=True)
+            if not dry_run:
+                try:
+                    cursor.execute(sql, params)
+                except Exception:
+                    conn.rollback()  # e.g. a histogram rebuild after its clear: keep the old counts
+                    raise
+                if sql not in _COMMIT_WITH_NEXT:
+                    conn.commit()
+    finally:
+        cursor.close()
+    return plan
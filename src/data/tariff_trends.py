@@ -0,0 +1,194 @@
+"""
+Tariff price history (/api/tariff-trends): monthly median unit rate and standing charge by DNO
+region, supplier and fuel type.
+
+Medians cannot be summed like the rollups in tariff_partitions, so prices are kept as
+histograms. agg_tariff_price_hist holds one row per (month, dno_id, supplier, fuel_type, metric,
+bucket), where bucket = round(value / BUCKET) and metric is "ur" (unit rate, p/kWh) or "sc"
+(standing charge, p/day). Histograms merge by adding counts, so region-only or supplier-only
+medians are as exact as the full grouping (to BUCKET).
+
+- Ingest: Tariff.save()/save_many() call record_ingest() after each save, which adds the new
+  rows' counts. Trends include a scrape as soon as it is saved.
+- Maintenance: src.tools.tariff_maintenance rebuilds a month from the detail partitions whenever
+  it rolls that month up (the current month on every run). This backfills history and corrects
+  any missed ingest, and the buckets outlive the detail retention. The clear and rebuild are one
+  transaction, so trends never see the month empty.
+- Queries read at most months × groups × buckets rows through the month-first primary key, so
+  their cost does not grow with the number of scrapes stored.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
+
+__all__ = [
+    "BUCKET",
+    "PRICE_HIST_TABLE",
+    "hist_counts",
+    "query_trends",
+    "record_ingest",
+    "weighted_median",
+]
+
+PRICE_HIST_TABLE = "agg_tariff_price_hist"
+BUCKET = Decimal("0.05")
+_METRICS = {"ur": "unit_rate", "sc": "standing_charge"}
+GROUPS = {
+    "region": ("dno_id",),
+    "supplier": ("new_supplier_name",),
+    "region_supplier": ("dno_id", "new_supplier_name"),
+}
+
+PRICE_HIST_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {PRICE_HIST_TABLE} (
+        month_start DATE NOT NULL,
+        dno_id VARCHAR(20) NOT NULL,
+        new_supplier_name VARCHAR(100) NOT NULL,
+        fuel_type VARCHAR(20) NOT NULL,
+        metric CHAR(2) NOT NULL,
+        bucket INT NOT NULL,
+        n INT NOT NULL,
+        PRIMARY KEY (month_start, dno_id, new_supplier_name, fuel_type, metric, bucket)
+    )
+"""
+
+# Rebuild one month from the detail table: (month, month, next month) per metric.
+PRICE_HIST_CLEAR = f"DELETE FROM {PRICE_HIST_TABLE} WHERE month_start = %s"
+PRICE_HIST_REBUILD = f"""
+    REPLACE INTO {PRICE_HIST_TABLE} (month_start, dno_id, new_supplier_name, fuel_type, metric, bucket, n)
+    SELECT %s, COALESCE(NULLIF(dno_id, ''), 'Unknown'), new_supplier_name, fuel_type, 'ur',
+           ROUND(unit_rate / {BUCKET}), COUNT(*)
+    FROM fact_tariff_search_simple
+    WHERE search_date >= %s AND search_date < %s AND unit_rate IS NOT NULL
+    GROUP BY COALESCE(NULLIF(dno_id, ''), 'Unknown'), new_supplier_name, fuel_type, ROUND(unit_rate / {BUCKET})
+    UNION ALL
+    SELECT %s, COALESCE(NULLIF(dno_id, ''), 'Unknown'), new_supplier_name, fuel_type, 'sc',
+           ROUND(standing_charge / {BUCKET}), COUNT(*)
+    FROM fact_tariff_search_simple
+    WHERE search_date >= %s AND search_date < %s AND standing_charge IS NOT NULL
+    GROUP BY COALESCE(NULLIF(dno_id, ''), 'Unknown'), new_supplier_name, fuel_type, ROUND(standing_charge / {BUCKET})
+"""
+
+# Set once PRICE_HIST_DDL has run in this process, so saves do not repeat the DDL round trip.
+_table_ensured = False
+
+_INGEST = f"""
+    INSERT INTO {PRICE_HIST_TABLE} (month_start, dno_id, new_supplier_name, fuel_type, metric, bucket, n)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE n = n + VALUES(n)
+"""
+
+
+def _bucket(value) -> int:
+    # Half away from zero on the stored DECIMAL(10, 4), like MySQL's ROUND() in the rebuild.
+    stored = Decimal(str(value)).quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+    return int((stored / BUCKET).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def hist_counts(rows: Iterable[tuple]) -> Counter:
+    """
+    rows: (search_date, dno_id, supplier, fuel_type, unit_rate, standing_charge).
+    Returns Counter of (month_start, dno_id, supplier, fuel_type, metric, bucket) -> n.
+    """
+    counts: Counter = Counter()
+    for search_date, dno_id, supplier, fuel_type, unit_rate, standing_charge in rows:
+        day = search_date.date() if isinstance(search_date, datetime) else search_date
+        key = (day.replace(day=1), dno_id or "Unknown", supplier or "", fuel_type or "")
+        for metric, value in (("ur", unit_rate), ("sc", standing_charge)):
+            if value is not None:
+                counts[(*key, metric, _bucket(value))] += 1
+    return counts
+
+
+def record_ingest(conn, rows: Iterable[tuple]) -> int:
+    """
+    Add freshly saved rows to the histograms (one executemany, committed). Returns rows written.
+    The table is created on the first call in the process (maintenance also creates it).
+    """
+    global _table_ensured
+    counts = hist_counts(rows)
+    if not counts:
+        return 0
+    cursor = conn.cursor()
+    try:
+        if not _table_ensured:
+            cursor.execute(PRICE_HIST_DDL)
+            _table_ensured = True
+        cursor.executemany(_INGEST, [(*key, n) for key, n in sorted(counts.items())])
+        conn.commit()
+    finally:
+        cursor.close()
+    return len(counts)
+
+
+def weighted_median(buckets: list[tuple[int, int]]) -> float | None:
+    """Median of a histogram [(bucket, count)]; the mean of the two middle values for even totals."""
+    items = sorted((b, n) for b, n in buckets if n > 0)
+    total = sum(n for _b, n in items)
+    if total == 0:
+        return None
+    lo_rank, hi_rank = (total - 1) // 2, total // 2
+    lo = hi = None
+    seen = 0
+    for bucket, n in items:
+        if lo is None and lo_rank < seen + n:
+            lo = bucket
+        if hi_rank < seen + n:
+            hi = bucket
+            break
+        seen += n
+    return round(float((Decimal(lo) + Decimal(hi)) * BUCKET / 2), 4)
+
+
+def _month_floor(months: int, today: date) -> date:
+    y, m = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+    return date(y, m + 1, 1)
+
+
+def query_trends(
+    cursor,
+    months: int = 12,
+    group_by: str = "region_supplier",
+    dno_id: str | None = None,
+    supplier: str | None = None,
+    fuel_type: str | None = None,
+    today: date | None = None,
+) -> list[dict]:
+    """
+    Monthly medians for the last `months` months (current month included), one row per month and
+    group ("region", "supplier" or "region_supplier", always split by fuel type).
+    """
+    group_cols = GROUPS[group_by]
+    where = ["month_start >= %s"]
+    params: list = [_month_floor(max(1, months), today or date.today())]
+    for col, value in (("dno_id", dno_id), ("new_supplier_name", supplier), ("fuel_type", fuel_type)):
+        if value:
+            where.append(f"{col} = %s")
+            params.append(value)
+    cols = ", ".join(("month_start", *group_cols, "fuel_type"))
+    cursor.execute(
+        f"SELECT {cols}, metric, bucket, SUM(n) FROM {PRICE_HIST_TABLE} "
+        f"WHERE {' AND '.join(where)} GROUP BY {cols}, metric, bucket",
+        tuple(params),
+    )
+    series: dict[tuple, dict[str, list]] = {}
+    for row in cursor.fetchall():
+        *key, metric, bucket, n = row
+        series.setdefault(tuple(key), {"ur": [], "sc": []})[metric].append((int(bucket), int(n)))
+
+    out: list[dict] = []
+    for key in sorted(series, key=lambda k: tuple(str(v) for v in k)):
+        hist = series[key]
+        month, *groups, fuel = key
+        item = {"month": f"{month:%Y-%m}"}
+        item.update({("supplier" if c == "new_supplier_name" else c): g for c, g in zip(group_cols, groups)})
+        item["fuel_type"] = fuel
+        item["unit_rate_median"] = weighted_median(hist["ur"])
+        item["standing_charge_median"] = weighted_median(hist["sc"])
+        item["samples"] = sum(n for _b, n in hist["ur"])
+        out.append(item)
+    return out
@@ -0,0 +1,58 @@
+"""
+Shared multiprocessing context for child processes started by the web app.
+
+Scrape jobs and the optimiser's process pool both fork from one forkserver. The forkserver is a
+clean, single-threaded process (forking a threaded gunicorn worker is unsafe), started once per
+worker, that imports FORKSERVER_PRELOAD up front. Each child then starts with numpy, pandas, the
+optimiser and the scraper stack (camoufox, lxml, mysql.connector) already imported, where a fresh
+`python -m src.web.run_scrape` would import all of them on every job.
+
+multiprocessing keeps one forkserver per process, so the preload list is set here, before either
+user starts it. Modules that fail to import (e.g. camoufox missing in a dev checkout) are skipped
+by the forkserver itself. Platforms without forkserver get the spawn context.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from multiprocessing.context import BaseContext
+
+__all__ = ["FORKSERVER_PRELOAD", "get_context", "warm"]
+
+FORKSERVER_PRELOAD = [
+    "numpy",
+    "pandas",
+    "src.models.sizing_grid",
+    "src.web.run_scrape",
+    "src.api.energyScraping.ScrapeTariff",
+    "mysql.connector",
+]
+
+_lock = threading.Lock()
+_context: BaseContext | None = None
+
+
+def get_context() -> BaseContext:
+    """forkserver context with FORKSERVER_PRELOAD set (spawn where forkserver is unavailable)."""
+    global _context
+    with _lock:
+        if _context is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+            else:
+                ctx = multiprocessing.get_context("spawn")
+            _context = ctx
+        return _context
+
+
+def warm() -> bool:
+    """Start the forkserver now (it imports the preload list) so the first child does not wait. False under spawn."""
+    ctx = get_context()
+    if ctx.get_start_method() != "forkserver":
+        return False
+    from multiprocessing import forkserver
+
+    forkserver.ensure_running()
+    return True
@@ -0,0 +1,240 @@
+"""
+Lightweight timing spans and counters for the web app, optimiser, weather and tariff code.
+
+Spans feed per-stage latency histograms (exposed at /metrics in Prometheus text format) and,
+while a request is active, a per-request list used for the Server-Timing response header.
+No third-party client library: everything is kept in-process behind a single lock.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "COUNT_BUCKETS",
+    "span",
+    "timed",
+    "observe",
+    "inc",
+    "record_cache",
+    "start_request",
+    "finish_request",
+    "server_timing_header",
+    "render_prometheus",
+    "reset",
+]
+
+# Latency buckets (seconds): sub-ms DB hits through multi-minute scrapes.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0, 600.0)
+# Count buckets for "evaluations per request" style histograms.
+COUNT_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+_PREFIX = "powerplan_"
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+
+
+_lock = threading.Lock()
+# name -> labels -> histogram / counter value
+_histograms: dict[str, dict[LabelKey, _Histogram]] = {}
+_counters: dict[str, dict[LabelKey, float]] = {}
+_help: dict[str, str] = {}
+
+# Spans recorded during the current request: list of (name, seconds). None outside a request.
+_request_spans: ContextVar[list[tuple[str, float]] | None] = ContextVar("powerplan_request_spans", default=None)
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def observe(
+    name: str,
+    value: float,
+    *,
+    buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    help_text: str = "",
+    **labels: Any,
+) -> None:
+    """Record one observation into histogram `name` (created on first use)."""
+    key = _label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = _Histogram(buckets)
+        hist.observe(float(value))
+        if help_text and name not in _help:
+            _help[name] = help_text
+
+
+def inc(name: str, value: float = 1.0, *, help_text: str = "", **labels: Any) -> None:
+    """Increment counter `name` by `value`."""
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + float(value)
+        if help_text and name not in _help:
+            _help[name] = help_text
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; hit ratio is reported per cache at /metrics."""
+    inc(
+        "cache_requests_total",
+        cache=cache,
+        result="hit" if hit else "miss",
+        help_text="Cache lookups by cache name and result.",
+    )
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a block as stage `name`. Feeds the stage latency histogram and, inside a request,
+    the Server-Timing header. Exceptions propagate; the span is still recorded.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_duration_seconds", elapsed, stage=name, help_text="Wall time per instrumented stage.")
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of span()."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_request() -> None:
+    """Begin collecting spans for the current request context."""
+    _request_spans.set([])
+
+
+def finish_request() -> list[tuple[str, float]]:
+    """Stop collecting and return the spans recorded for this request."""
+    spans = _request_spans.get() or []
+    _request_spans.set(None)
+    return spans
+
+
+def server_timing_header(spans: list[tuple[str, float]], total_s: float | None = None) -> str:
+    """
+    Build a Server-Timing header value. Repeated stage names are summed and reported once,
+    in first-seen order; durations are milliseconds.
+    """
+    totals: dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000.0:.1f}" for name, seconds in totals.items()]
+    if total_s is not None:
+        parts.append(f"total;dur={total_s * 1000.0:.1f}")
+    return ", ".join(parts)
+
+
+def _fmt_labels(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in items
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _fmt_num(v: float) -> str:
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def render_prometheus() -> str:
+    """Render all metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    with _lock:
+        for name in sorted(_counters):
+            full = _PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {full} {_help[name]}")
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(_counters[name].items()):
+                lines.append(f"{full}{_fmt_labels(key)} {_fmt_num(value)}")
+
+        # Hit ratio per cache, derived from cache_requests_total (convenience for dashboards).
+        cache_series = _counters.get("cache_requests_total", {})
+        hits: dict[str, float] = {}
+        totals: dict[str, float] = {}
+        for key, value in cache_series.items():
+            labels = dict(key)
+            cache = labels.get("cache", "")
+            totals[cache] = totals.get(cache, 0.0) + value
+            if labels.get("result") == "hit":
+                hits[cache] = hits.get(cache, 0.0) + value
+        if totals:
+            full = _PREFIX + "cache_hit_ratio"
+            lines.append(f"# HELP {full} Fraction of cache lookups served from cache.")
+            lines.append(f"# TYPE {full} gauge")
+            for cache in sorted(totals):
+                ratio = hits.get(cache, 0.0) / totals[cache] if totals[cache] else 0.0
+                lines.append(f'{full}{{cache="{cache}"}} {ratio:.4f}')
+
+        for name in sorted(_histograms):
+            full = _PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {full} {_help[name]}")
+            lines.append(f"# TYPE {full} histogram")
+            for key, hist in sorted(_histograms[name].items()):
+                cumulative = 0
+                for upper, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{full}_bucket{_fmt_labels(key, (('le', _fmt_num(upper)),))} {cumulative}")
+                lines.append(f"{full}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {hist.count}")
+                lines.append(f"{full}_sum{_fmt_labels(key)} {hist.total:.6f}")
+                lines.append(f"{full}_count{_fmt_labels(key)} {hist.count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clear all recorded metrics (tests)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _help.clear()
@@ -6,19 +6,27 @@ Energy balancing: location (lat/lon) + solar/wind capacity + generation-type par
 from __future__ import annotations
 
 import calendar
+import math
 from datetime import datetime, timedelta
 from typing import Any, Literal
 
+import numpy as np
 import pandas as pd
 
+from src.metrics import COUNT_BUCKETS, observe, record_cache, span
+
 __all__ = [
     "get_flux_daily",
     "get_flux_monthly_last_year",
+    "get_flux_monthly_years",
+    "get_flux_and_temperature_last_year",
     "get_generation",
     "get_optimised_system",
     "optimize_system_capacity",
     "evaluate_fixed_capacities",
     "demand_after_insulation_and_heat_pump",
+    "monthly_demand_profile",
+    "adjust_measured_monthly_demand",
     "DEFAULT_PRICING",
 ]
 
@@ -101,6 +109,76 @@ def demand_after_insulation_and_heat_pump(
     }
 
 
+def _typical_monthly_profile_weights() -> tuple[list[float], list[float]]:
+    """
+    Return (non_heating_weights, heating_weights) for 12 months.
+
+    - non_heating: fairly flat with mild winter uplift
+    - heating: winter-peaked (captures typical UK space-heating seasonality)
+
+    Both arrays are normalized so each sums to 1.0.
+    """
+    # winter_factor peaks in January (month 0) and bottoms in July (month 6)
+    winter_factor = [0.5 + 0.5 * math.cos(2.0 * math.pi * (m / 12.0)) for m in range(12)]
+
+    # Sharper winter peak for the heating component.
+    heating_raw = [0.05 + 0.95 * (wf**1.5) for wf in winter_factor]
+    non_heating_raw = [0.08 + 0.12 * wf for wf in winter_factor]
+
+    heating_sum = sum(heating_raw) or 1.0
+    non_heating_sum = sum(non_heating_raw) or 1.0
+
+    heating_w = [x / heating_sum for x in heating_raw]
+    non_heating_w = [x / non_heating_sum for x in non_heating_raw]
+    return non_heating_w, heating_w
+
+
+def monthly_demand_profile(
+    annual_consumption_kwh: float,
+    heating_fraction: float,
+    insulation_r_value: float = 0.0,
+    heat_pump_cop: float = 1.0,
+) -> list[float]:
+    """
+    Seasonal monthly electricity demand (12 values, kWh) after insulation and heat pump:
+    non-heating load fairly flat, heating load winter-peaked.
+    """
+    demand_adj = demand_after_insulation_and_heat_pump(
+        annual_consumption_kwh, heating_fraction, insulation_r_value, heat_pump_cop,
+    )
+    non_heating_weights, heating_weights = _typical_monthly_profile_weights()
+
+    # Split the *optimiser* electricity demand into non-heating and heating components.
+    non_heating_electricity_kwh = annual_consumption_kwh * (1.0 - heating_fraction)
+    heating_after_insulation_kwh = demand_adj["heating_demand_after_insulation_kwh"]
+    cop = max(1.0, float(heat_pump_cop))
+    heating_electricity_kwh = heating_after_insulation_kwh / cop
+
+    return [
+        (non_heating_electricity_kwh * non_heating_weights[i]) + (heating_electricity_kwh * heating_weights[i])
+        for i in range(12)
+    ]
+
+
+def adjust_measured_monthly_demand(
+    measured_monthly_kwh: list[float],
+    heating_fraction: float,
+    insulation_r_value: float = 0.0,
+    heat_pump_cop: float = 1.0,
+) -> list[float]:
+    """
+    Apply insulation / heat pump to measured monthly demand (e.g. from a smart-meter upload):
+    each month is scaled by the ratio monthly_demand_profile gives for the same annual total with
+    and without the upgrades, so winter months carry most of the change. Identity at R 0 / COP 1.
+    """
+    annual = float(sum(measured_monthly_kwh))
+    if annual <= 0:
+        return [float(x) for x in measured_monthly_kwh]
+    before = monthly_demand_profile(annual, heating_fraction)
+    after = monthly_demand_profile(annual, heating_fraction, insulation_r_value, heat_pump_cop)
+    return [float(m) * (a / b if b > 0 else 1.0) for m, a, b in zip(measured_monthly_kwh, after, before)]
+
+
 def _wind_power_curve(
     v: float,
     v_cut_in: float,
@@ -171,6 +249,34 @@ def get_flux_monthly_last_year(lat: float, lon: float) -> pd.DataFrame:
     return monthly
 
 
+def get_flux_monthly_years(lat: float, lon: float, n_years: int = 10) -> pd.DataFrame:
+    """
+    Monthly flux for the last `n_years` complete calendar years, from the persistent weather store.
+    Returns DataFrame indexed by (year, month) with columns ghi_mj_per_m2, wind_speed_10m_max,
+    days_in_month. Used by optimisation when flux_source='multi_year'.
+    """
+    from src.api.weather_store import get_monthly_flux_years, last_complete_years
+
+    return get_monthly_flux_years(lat, lon, last_complete_years(n_years))
+
+
+def get_flux_and_temperature_last_year(lat: float, lon: float) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Last calendar year's monthly flux, daily mean temperature (°C) and the month index (0–11) of
+    each day, all from one persistent weather store entry (at most one archive call). Feeds the
+    degree-day heating model (src.models.heating_demand) without a separate temperature fetch.
+    """
+    from src.api.weather_store import get_daily_temperature_years, get_monthly_flux_years, last_complete_years
+
+    year = last_complete_years(1)[0]
+    # The temperature read fetches the whole year (flux included) when missing; the flux read is then a store hit.
+    t_mean = np.asarray(get_daily_temperature_years(lat, lon, [year])[year], dtype=float)
+    flux = get_monthly_flux_years(lat, lon, [year]).loc[year]
+    days = [calendar.monthrange(year, m)[1] for m in range(1, 13)]
+    month_of_day = np.repeat(np.arange(12), days)[: len(t_mean)]
+    return flux, t_mean[: len(month_of_day)], month_of_day
+
+
 def _daily_solar_kwh(
     ghi_mj_per_m2: float,
     capacity_kw: float,
@@ -442,7 +548,7 @@ def optimize_system_capacity(
     wind_max_kw: float = 10.0,
     step_kw: float = 0.5,
     optimize_over_years: float = 5.0,
-    flux_frequency: Literal["daily", "monthly"] | None = None,
+    flux_frequency: Literal["daily", "monthly", "multi_year"] | None = None,
     min_demand_met_from_gen_pct: float = 50.0,
     min_solar_kw: float = 0.0,
     min_wind_kw: float = 0.5,
@@ -452,10 +558,16 @@ def optimize_system_capacity(
     battery_max_kwh: float = 0.0,
     battery_min_kwh: float = 0.0,
     battery_step_kwh: float = 1.0,
+    objective: Literal["total_cost", "npv"] = "total_cost",
+    lifetime_params: dict[str, Any] | None = None,
+    workers: int | None = None,
+    session_id: str | None = None,
 ) -> dict[str, Any]:
     """
     Find solar/wind/battery sizing that minimises total cost over `optimize_over_years`.
-    Flux can be daily (short period, then annualised) or monthly (12 rows from last year, no scaling).
+    Flux can be daily (short period, then annualised), monthly (12 rows from last year, no scaling)
+    or multi_year (rows indexed by (year, month)); with multi_year every candidate is costed against
+    every year and the mean total cost is minimised.
     Demand is annual_consumption_kwh.
     min_demand_met_from_gen_pct: require at least this % of demand from own generation (0–100);
         avoids choosing 0 kW when grid-only is cheapest.
@@ -463,20 +575,53 @@ def optimize_system_capacity(
     battery_type_params: tier params dict (round_trip_efficiency, depth_of_discharge,
         cycles_per_day) — when None or battery_max_kwh<=0, battery sweep is skipped.
     battery_max_kwh, battery_min_kwh, battery_step_kwh: usable battery size search bounds.
+    objective: 'total_cost' (capex + annual net opex × years, the default) or 'npv' (discounted
+        lifetime cost with degradation, price escalation and replacements over the same horizon;
+        see src.models.lifetime_financials). lifetime_params overrides its DEFAULT_LIFETIME_PARAMS
+        and is also used for the discounted figures reported for the chosen sizing.
+    workers: process-pool size for large sweeps (None = OPTIMISER_WORKERS, 0 = serial); see
+        src.models.parallel_sweep. The result is the same either way.
+    session_id: keep this session's evaluated energy tensors (src.models.warm_start) so a repeat
+        call with new prices re-scores without re-evaluating, and new bounds evaluate only the
+        new cells. Takes precedence over the process pool; the result is the same.
 
     Returns dict with optimal_solar_kw, optimal_wind_kw, optimal_battery_kwh,
     annual_demand_kwh, annual_generation_kwh, demand_met_from_generation_pct, capex
     (and component capex), annual_import_kwh, annual_export_kwh, annual_net_opex,
-    financials_0/5/10_year, and monthly_balance (DataFrame of solar/wind/demand/
-    import/export by month when flux is monthly; None otherwise).
+    financials_0/5/10_year (with discounted_total), lifetime_financials, and monthly_balance (DataFrame of solar/wind/demand/
+    import/export by month when flux is monthly or multi_year (mean year); None otherwise).
+    For multi_year flux, annual figures are means across years and weather_years holds the
+    years used plus mean/P10/P90 total cost and net opex for the chosen sizing.
     """
+    from src.models.lifetime_financials import lifetime_cashflows, merge_lifetime_params
+    from src.models.parallel_sweep import parallel_argmin
+    from src.models.warm_start import cached_grid
+    from src.models.sizing_grid import (
+        candidate_monthly_balance,
+        monthly_yields,
+        score_candidates,
+        solar_yield_per_kw,
+        sweep_values,
+        wind_yield_per_kw,
+    )
+
+    if objective not in ("total_cost", "npv"):
+        raise ValueError("objective must be 'total_cost' or 'npv'")
+    lifetime_params = merge_lifetime_params(lifetime_params)
     if flux_frequency is None:
-        flux_frequency = (
-            "monthly"
-            if len(flux) == 12 and "days_in_month" in flux.columns
-            else "daily"
-        )
-    if flux_frequency == "monthly":
+        if isinstance(flux.index, pd.MultiIndex):
+            flux_frequency = "multi_year"
+        else:
+            flux_frequency = (
+                "monthly"
+                if len(flux) == 12 and "days_in_month" in flux.columns
+                else "daily"
+            )
+    if flux_frequency == "multi_year":
+        if not isinstance(flux.index, pd.MultiIndex) or "days_in_month" not in flux.columns or len(flux) % 12 or not len(flux):
+            raise ValueError("multi-year flux must be indexed by (year, month) with 12 months per year and column 'days_in_month'")
+        period_days = 365
+    elif flux_frequency == "monthly":
         if len(flux) != 12 or "days_in_month" not in flux.columns:
             raise ValueError("monthly flux must have 12 rows and column 'days_in_month'")
         period_days = 365
@@ -497,15 +642,6 @@ def optimize_system_capacity(
     else:
         days_schedule = [30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 35]
 
-    def annual_gen(solar_kw: float, wind_kw: float) -> tuple[float, float]:
-        if flux_frequency == "monthly":
-            return _annual_generation_from_flux_monthly(
-                flux, solar_kw, wind_kw, solar_type_params, wind_type_params
-            )
-        return _annual_generation_from_flux(
-            flux, solar_kw, wind_kw, solar_type_params, wind_type_params
-        )
-
     def annual_balance_with_battery(
         solar_kw: float, wind_kw: float, battery_kwh: float
     ) -> tuple[float, float, float, float, float]:
@@ -536,7 +672,28 @@ def optimize_system_capacity(
     if bat_max < bat_min:
         bat_max = bat_min
 
-    best_total_cost: float = float("inf")
+    # Per-kW yields as (years × 12) arrays: one row for a single year (monthly or annualised daily
+    # flux), one row per year for multi_year. Every candidate is evaluated against every row at once.
+    if flux_frequency in ("multi_year", "monthly"):
+        weather_years, solar_per_kw, wind_per_kw, days_grid = monthly_yields(
+            flux, solar_type_params, wind_type_params
+        )
+        demand_grid = np.array(demand_schedule, dtype=float)
+    else:
+        # Daily flux: annualise, then spread evenly over the 12 buckets used by _battery_adjusted_annual_balance.
+        weather_years = []
+        annualise = 365.0 / period_days
+        annual_solar_per_kw = float(solar_yield_per_kw(flux["ghi_mj_per_m2"].to_numpy(dtype=float), solar_type_params).sum()) * annualise
+        annual_wind_per_kw = float(wind_yield_per_kw(flux["wind_speed_10m_max"].to_numpy(dtype=float), wind_type_params).sum()) * annualise
+        days_grid = np.array([days_schedule], dtype=float)
+        solar_per_kw = np.full((1, 12), annual_solar_per_kw / 12.0)
+        wind_per_kw = np.full((1, 12), annual_wind_per_kw / 12.0)
+        demand_grid = np.full(12, annual_consumption_kwh / 12.0)
+
+    solar_kws = sweep_values(min_solar_kw, solar_max_kw, step_kw)
+    wind_kws = sweep_values(min_wind_kw, wind_max_kw, step_kw)
+    battery_kwhs = sweep_values(bat_min, bat_max, bat_step)
+
     best_solar = 0.0
     best_wind = 0.0
     best_battery = 0.0
@@ -545,53 +702,85 @@ def optimize_system_capacity(
     best_annual_gen = 0.0
     best_annual_solar = 0.0
     best_annual_wind = 0.0
+    best_index: tuple[int, int, int] | None = None
+
+    costs = {
+        "annual_consumption_kwh": annual_consumption_kwh,
+        "min_demand_met_from_gen_pct": min_demand_met_from_gen_pct,
+        "solar_capex_per_kw": solar_capex_per_kw,
+        "wind_capex_per_kw": wind_capex_per_kw,
+        "battery_capex_per_kwh": battery_capex_per_kwh,
+        "grid_price_per_kwh": grid_price_per_kwh,
+        "export_price_per_kwh": export_price,
+        "optimize_over_years": optimize_over_years,
+        "objective": objective,
+        "lifetime_params": lifetime_params,
+    }
+    with span("optimiser.sweep"):
+        # Large sweeps go to the process pool (when enabled), which returns only the winning
+        # index; the winner is then re-scored here so the per-year figures below come from the
+        # same code path as a serial sweep.
+        warm_grid = no_battery_grid = None
+        partitioned = None
+        if session_id:
+            warm_grid, no_battery_grid, warm_info = cached_grid(
+                session_id, solar_per_kw, wind_per_kw, demand_grid, days_grid,
+                solar_kws, wind_kws, battery_kwhs, battery_type_params,
+                with_no_battery=objective == "npv" and bool(battery_kwhs.size) and float(battery_kwhs.max()) > 0,
+            )
+            record_cache("optimiser_session", warm_info["warm"] and warm_info["cells_evaluated"] == 0)
+        else:
+            partitioned = parallel_argmin(
+                solar_per_kw, wind_per_kw, demand_grid, days_grid,
+                solar_kws, wind_kws, battery_kwhs, battery_type_params, costs, workers=workers,
+            )
+        if partitioned is not None:
+            winner, evaluations = partitioned
+            # No feasible candidate anywhere: any single cell re-scores as infeasible.
+            i_s, i_w, i_b = winner if winner is not None else (0, 0, 0)
+            solar_kws = solar_kws[[i_s]]
+            wind_kws = wind_kws[[i_w]]
+            battery_kwhs = battery_kwhs[[i_b]]
+        scored = score_candidates(
+            solar_per_kw, wind_per_kw, demand_grid, days_grid,
+            solar_kws, wind_kws, battery_kwhs, battery_type_params, **costs,
+            grid=warm_grid, no_battery_grid=no_battery_grid,
+        )
+        grid = scored["grid"]
+        annual_gen_grid = scored["annual_gen_grid"]
+        net_opex_grid = scored["net_opex_grid"]
+        total_cost_grid = scored["total_cost_grid"]
+        objective_grid = scored["objective_grid"]
+        if partitioned is None:
+            evaluations = scored["evaluations"]
+        if objective_grid.size and np.isfinite(objective_grid).any():
+            best_index = tuple(
+                int(i) for i in np.unravel_index(int(np.argmin(objective_grid)), objective_grid.shape)
+            )
+
+    if best_index is not None:
+        i_s, i_w, i_b = best_index
+        best_solar = float(solar_kws[i_s])
+        best_wind = float(wind_kws[i_w])
+        best_battery = float(battery_kwhs[i_b])
+        if flux_frequency == "multi_year":
+            best_annual_solar = float(grid["solar_kwh"][:, i_s].mean())
+            best_annual_wind = float(grid["wind_kwh"][:, i_w].mean())
+            best_annual_gen = best_annual_solar + best_annual_wind
+            best_annual_import = float(grid["import_kwh"][:, i_s, i_w, i_b].mean())
+            best_annual_export = float(grid["export_kwh"][:, i_s, i_w, i_b].mean())
+        else:
+            # Single year: report the chosen point through the scalar model (same figures as before).
+            best_annual_solar, best_annual_wind, best_annual_gen, best_annual_import, best_annual_export = (
+                annual_balance_with_battery(best_solar, best_wind, best_battery)
+            )
 
-    solar_kw = min_solar_kw
-    while solar_kw <= solar_max_kw:
-        wind_kw = min_wind_kw
-        while wind_kw <= wind_max_kw:
-            total_annual_gen_only = sum(annual_gen(solar_kw, wind_kw))
-            demand_met_pct = (total_annual_gen_only / annual_consumption_kwh * 100.0) if annual_consumption_kwh > 0 else 0.0
-            if min_demand_met_from_gen_pct > 0 and demand_met_pct < min_demand_met_from_gen_pct:
-                wind_kw += step_kw
-                if wind_kw > wind_max_kw:
-                    break
-                continue
-            battery_kwh = bat_min
-            while battery_kwh <= bat_max:
-                annual_solar, annual_wind, total_annual_gen, annual_import, annual_export = (
-                    annual_balance_with_battery(solar_kw, wind_kw, battery_kwh)
-                )
-                capex = (
-                    solar_kw * solar_capex_per_kw
-                    + wind_kw * wind_capex_per_kw
-                    + battery_kwh * battery_capex_per_kwh
-                )
-                annual_opex_import = annual_import * grid_price_per_kwh
-                annual_opex_export_revenue = annual_export * export_price
-                annual_net_opex = annual_opex_import - annual_opex_export_revenue
-                total_cost = capex + annual_net_opex * optimize_over_years
-                if total_cost < best_total_cost:
-                    best_total_cost = total_cost
-                    best_solar = solar_kw
-                    best_wind = wind_kw
-                    best_battery = battery_kwh
-                    best_annual_import = annual_import
-                    best_annual_export = annual_export
-                    best_annual_gen = total_annual_gen
-                    best_annual_solar = annual_solar
-                    best_annual_wind = annual_wind
-                if bat_max <= 0:
-                    break
-                battery_kwh += bat_step
-                if battery_kwh > bat_max:
-                    break
-            wind_kw += step_kw
-            if wind_kw > wind_max_kw:
-                break
-        solar_kw += step_kw
-        if solar_kw > solar_max_kw:
-            break
+    observe(
+        "optimiser_evaluations",
+        evaluations,
+        buckets=COUNT_BUCKETS,
+        help_text="Candidate (solar, wind, battery) evaluations per optimisation run.",
+    )
 
     solar_capex = best_solar * solar_capex_per_kw
     wind_capex = best_wind * wind_capex_per_kw
@@ -621,8 +810,16 @@ def optimize_system_capacity(
 
     # Battery payback: compare annual opex with vs without battery at fixed solar/wind
     payback_battery_years: float | None = None
-    if battery_capex > 0 and best_battery > 0:
-        if flux_frequency == "monthly":
+    imp_no_bat, exp_no_bat = best_annual_import, best_annual_export
+    if best_battery > 0:
+        if flux_frequency == "multi_year":
+            no_bat = candidate_monthly_balance(
+                solar_per_kw, wind_per_kw, demand_grid, days_grid,
+                best_solar, best_wind, 0.0, battery_type_params,
+            )
+            imp_no_bat = float(no_bat["import_kwh"].sum(axis=1).mean())
+            exp_no_bat = float(no_bat["export_kwh"].sum(axis=1).mean())
+        elif flux_frequency == "monthly":
             ms, mw = _monthly_generation_breakdown(
                 flux, best_solar, best_wind, solar_type_params, wind_type_params
             )
@@ -634,6 +831,7 @@ def optimize_system_capacity(
                 best_annual_solar, best_annual_wind, annual_consumption_kwh,
                 0.0, battery_type_params,
             )
+    if battery_capex > 0 and best_battery > 0:
         opex_no_bat = imp_no_bat * grid_price_per_kwh - exp_no_bat * export_price
         annual_battery_savings = opex_no_bat - annual_net_opex
         if annual_battery_savings > 0:
@@ -659,6 +857,58 @@ def optimize_system_capacity(
             "import_kwh": [round(monthly_import_b[i], 1) for i in range(12)],
             "export_kwh": [round(monthly_export_b[i], 1) for i in range(12)],
         })
+    elif flux_frequency == "multi_year":
+        mean_year = {
+            k: v.mean(axis=0)
+            for k, v in candidate_monthly_balance(
+                solar_per_kw, wind_per_kw, demand_grid, days_grid,
+                best_solar, best_wind, best_battery, battery_type_params,
+            ).items()
+        }
+        monthly_balance = pd.DataFrame({
+            "month": MONTH_LABELS,
+            "solar_kwh": [round(float(x), 1) for x in mean_year["solar_kwh"]],
+            "wind_kwh": [round(float(x), 1) for x in mean_year["wind_kwh"]],
+            "total_gen_kwh": [round(float(mean_year["solar_kwh"][i] + mean_year["wind_kwh"][i]), 1) for i in range(12)],
+            "demand_kwh": [round(demand_schedule[i], 1) for i in range(12)],
+            "import_kwh": [round(float(x), 1) for x in mean_year["import_kwh"]],
+            "export_kwh": [round(float(x), 1) for x in mean_year["export_kwh"]],
+        })
+
+    # Spread across weather years for the chosen sizing (multi_year only).
+    weather_years_summary: dict[str, Any] | None = None
+    if flux_frequency == "multi_year" and best_index is not None:
+        i_s, i_w, i_b = best_index
+        per_year_cost = total_cost_grid[:, i_s, i_w, i_b]
+        per_year_opex = net_opex_grid[:, i_s, i_w, i_b]
+        weather_years_summary = {
+            "years": weather_years,
+            "total_cost_mean": round(float(per_year_cost.mean()), 2),
+            "total_cost_p10": round(float(np.percentile(per_year_cost, 10)), 2),
+            "total_cost_p90": round(float(np.percentile(per_year_cost, 90)), 2),
+            "annual_net_opex_p10": round(float(np.percentile(per_year_opex, 10)), 2),
+            "annual_net_opex_p90": round(float(np.percentile(per_year_opex, 90)), 2),
+            "annual_generation_kwh_by_year": [round(float(x), 1) for x in annual_gen_grid[:, i_s, i_w]],
+        }
+
+    # Discounted lifetime view of the chosen sizing (year-by-year, for the financials below).
+    lifetime_horizon = max(10, int(math.ceil(optimize_over_years)))
+    lifetime = lifetime_cashflows(
+        solar_kwh=best_annual_solar,
+        wind_kwh=best_annual_wind,
+        import_kwh=best_annual_import,
+        export_kwh=best_annual_export,
+        solar_capex=solar_capex,
+        wind_capex=wind_capex,
+        battery_capex=battery_capex,
+        grid_price_per_kwh=grid_price_per_kwh,
+        export_price_per_kwh=export_price,
+        battery_import_saving_kwh=imp_no_bat - best_annual_import,
+        battery_export_reduction_kwh=exp_no_bat - best_annual_export,
+        horizon_years=lifetime_horizon,
+        params=lifetime_params,
+    )
+    discounted_by_year = [capex] + [float(x) for x in lifetime["cumulative_discounted_cost"]]
 
     def _financials(n_years: float) -> dict[str, float]:
         opex_total = annual_net_opex * n_years
@@ -666,6 +916,7 @@ def optimize_system_capacity(
             "capex": round(capex, 2),
             "opex_total": round(opex_total, 2),
             "total": round(capex + opex_total, 2),
+            "discounted_total": round(discounted_by_year[int(n_years)], 2),
         }
 
     return {
@@ -691,8 +942,18 @@ def optimize_system_capacity(
         "financials_0_year": _financials(0),
         "financials_5_year": _financials(5),
         "financials_10_year": _financials(10),
+        "lifetime_financials": {
+            "objective": objective,
+            "horizon_years": lifetime_horizon,
+            "params": lifetime_params,
+            "npv_cost": round(float(lifetime["npv_cost"]), 2),
+            "cumulative_cost": [round(float(x), 2) for x in lifetime["cumulative_cost"]],
+            "cumulative_discounted_cost": [round(x, 2) for x in discounted_by_year[1:]],
+            "annual_cashflow": [round(float(x), 2) for x in lifetime["cashflow"]],
+        },
         "period_days": period_days,
         "monthly_balance": monthly_balance,
+        "weather_years": weather_years_summary,
     }
 
 
@@ -714,22 +975,33 @@ def evaluate_fixed_capacities(
     battery_kwh: float = 0.0,
     battery_type_params: dict[str, Any] | None = None,
     battery_capex_per_kwh: float = DEFAULT_PRICING["battery_capex_per_kwh"],
+    flux: pd.DataFrame | None = None,
+    monthly_demand_kwh: list[float] | None = None,
 ) -> dict[str, float]:
     """
     Annual import/export and capex for fixed solar/wind/battery sizes (no optimisation).
     Uses the same demand model as get_optimised_system and weather flux for generation.
+
+    flux: monthly flux already fetched (e.g. shared by several scenarios); skips the weather call.
+    monthly_demand_kwh: 12 monthly electricity values (e.g. from the degree-day heating model)
+    used instead of spreading the annual insulation / heat pump demand evenly.
     """
-    demand_adj = demand_after_insulation_and_heat_pump(
-        annual_consumption_kwh,
-        heating_fraction,
-        insulation_r_value,
-        heat_pump_cop,
-    )
-    demand_for_optimisation = float(demand_adj["electricity_demand_for_optimisation_kwh"])
+    if monthly_demand_kwh is not None:
+        demand_for_optimisation = float(sum(monthly_demand_kwh))
+    else:
+        demand_adj = demand_after_insulation_and_heat_pump(
+            annual_consumption_kwh,
+            heating_fraction,
+            insulation_r_value,
+            heat_pump_cop,
+        )
+        demand_for_optimisation = float(demand_adj["electricity_demand_for_optimisation_kwh"])
 
-    if flux_source == "last_year_monthly":
-        flux = get_flux_monthly_last_year(latitude, longitude)
+    if flux is not None:
         flux_frequency: Literal["daily", "monthly"] = "monthly"
+    elif flux_source == "last_year_monthly":
+        flux = get_flux_monthly_last_year(latitude, longitude)
+        flux_frequency = "monthly"
     else:
         if start_date is None or end_date is None:
             start_date = datetime.utcnow().date().isoformat()
@@ -747,7 +1019,10 @@ def evaluate_fixed_capacities(
         annual_solar = sum(ms)
         annual_wind = sum(mw)
         days_schedule = [int(flux.loc[m, "days_in_month"]) for m in flux.index]
-        demand_schedule = [demand_for_optimisation / 12.0] * 12
+        if monthly_demand_kwh is not None:
+            demand_schedule = [float(x) for x in monthly_demand_kwh]
+        else:
+            demand_schedule = [demand_for_optimisation / 12.0] * 12
         _, _, annual_import, annual_export = _battery_adjusted_monthly_balance(
             ms, mw, demand_schedule, days_schedule, bk, battery_type_params,
         )
@@ -765,6 +1040,8 @@ def evaluate_fixed_capacities(
     capex = sk * solar_capex_per_kw + wk * wind_capex_per_kw + bk * bat_capex_per_kwh
     return {
         "annual_demand_kwh": round(demand_for_optimisation, 1),
+        "annual_solar_kwh": round(annual_solar, 1),
+        "annual_wind_kwh": round(annual_wind, 1),
         "annual_import_kwh": round(annual_import, 1),
         "annual_export_kwh": round(annual_export, 1),
         "annual_generation_kwh": round(total_gen, 1),
@@ -772,6 +1049,9 @@ def evaluate_fixed_capacities(
         "wind_kw": round(wk, 2),
         "battery_kwh": round(bk, 2),
         "capex_gbp": round(capex, 2),
+        "solar_capex_gbp": round(sk * solar_capex_per_kw, 2),
+        "wind_capex_gbp": round(wk * wind_capex_per_kw, 2),
+        "battery_capex_gbp": round(bk * bat_capex_per_kwh, 2),
         "insulation_r_value": float(insulation_r_value),
     }
 
@@ -789,7 +1069,7 @@ def get_optimised_system(
     optimize_over_years: float = 5.0,
     start_date: str | None = None,
     end_date: str | None = None,
-    flux_source: Literal["forecast", "last_year_monthly"] = "last_year_monthly",
+    flux_source: Literal["forecast", "last_year_monthly", "multi_year"] = "last_year_monthly",
     min_demand_met_from_gen_pct: float = 50.0,
     min_solar_kw: float = 0.0,
     min_wind_kw: float = 0.5,
@@ -800,6 +1080,12 @@ def get_optimised_system(
     battery_max_kwh: float = 0.0,
     battery_min_kwh: float = 0.0,
     battery_step_kwh: float = 1.0,
+    flux: pd.DataFrame | None = None,
+    flux_years: int = 10,
+    objective: Literal["total_cost", "npv"] = "total_cost",
+    lifetime_params: dict[str, Any] | None = None,
+    measured_monthly_demand_kwh: list[float] | None = None,
+    session_id: str | None = None,
 ) -> dict[str, Any]:
     """
     Size and price a solar/wind/battery system for a location and annual demand.
@@ -816,13 +1102,22 @@ def get_optimised_system(
         optimize_over_years: minimise total cost over this many years (e.g. 5)
         start_date, end_date: used only when flux_source='forecast' (default: next 7 days)
         flux_source: 'last_year_monthly' = use Historical API last year aggregated by month (default);
-                     'forecast' = use short daily forecast and annualise
+                     'forecast' = use short daily forecast and annualise;
+                     'multi_year' = last `flux_years` archive years (persistent store), sized on the
+                     mean cost across years with P10/P90 reported in weather_years
         min_demand_met_from_gen_pct: require at least this % of demand from solar/wind (default 50);
              set to 0 to allow 0 kW (grid-only) if cheapest.
         min_solar_kw, min_wind_kw: only consider solutions with at least this much solar/wind (default min_wind_kw=0.5).
         heating_fraction: share of annual_consumption that is space heating (0–1, default 0.6).
         insulation_r_value: insulation R-value in m²·K/W; 0 = no extra insulation (default).
         heat_pump_cop: heat pump COP; 1.0 = electric heating (default), 2.5–3.5 for ASHP (e.g. from HEAT_PUMP_TIERS).
+        flux: optional pre-fetched flux for flux_source (e.g. from get_flux_monthly_last_year run
+              concurrently with other request I/O); fetched here when None.
+        objective, lifetime_params: sizing objective and lifetime finance overrides, passed to
+              optimize_system_capacity ('total_cost' default, or discounted 'npv').
+        measured_monthly_demand_kwh: optional 12 measured monthly totals (smart-meter upload) used
+              as the seasonal demand shape instead of the synthetic heating/non-heating profile.
+        session_id: optional client session for the optimiser warm start (see optimize_system_capacity).
 
     Returns:
         Dict with optimal_solar_kw, optimal_wind_kw, annual_demand_kwh (demand used for sizing),
@@ -837,54 +1132,32 @@ def get_optimised_system(
     )
     demand_for_optimisation = demand_adj["electricity_demand_for_optimisation_kwh"]
 
-    def _typical_monthly_profile_weights() -> tuple[list[float], list[float]]:
-        """
-        Return (non_heating_weights, heating_weights) for 12 months.
-
-        - non_heating: fairly flat with mild winter uplift
-        - heating: winter-peaked (captures typical UK space-heating seasonality)
-
-        Both arrays are normalized so each sums to 1.0.
-        """
-        import math
-
-        # winter_factor peaks in January (month 0) and bottoms in July (month 6)
-        winter_factor = [0.5 + 0.5 * math.cos(2.0 * math.pi * (m / 12.0)) for m in range(12)]
-
-        # Sharper winter peak for the heating component.
-        heating_raw = [0.05 + 0.95 * (wf**1.5) for wf in winter_factor]
-        non_heating_raw = [0.08 + 0.12 * wf for wf in winter_factor]
-
-        heating_sum = sum(heating_raw) or 1.0
-        non_heating_sum = sum(non_heating_raw) or 1.0
-
-        heating_w = [x / heating_sum for x in heating_raw]
-        non_heating_w = [x / non_heating_sum for x in non_heating_raw]
-        return non_heating_w, heating_w
-
-    non_heating_weights, heating_weights = _typical_monthly_profile_weights()
-
-    # Split the *optimiser* electricity demand into non-heating and heating components.
-    non_heating_electricity_kwh = annual_consumption_kwh * (1.0 - heating_fraction)
-    heating_after_insulation_kwh = demand_adj["heating_demand_after_insulation_kwh"]
-    cop = max(1.0, float(heat_pump_cop))
-    heating_electricity_kwh = heating_after_insulation_kwh / cop
-
-    # Build a seasonal monthly electricity demand profile for monthly import/export display.
-    monthly_demand_kwh = [
-        (non_heating_electricity_kwh * non_heating_weights[i]) + (heating_electricity_kwh * heating_weights[i])
-        for i in range(12)
-    ]
-    if flux_source == "last_year_monthly":
-        flux = get_flux_monthly_last_year(latitude, longitude)
-        flux_frequency = "monthly"
+    if measured_monthly_demand_kwh is not None and len(measured_monthly_demand_kwh) == 12:
+        monthly_demand_kwh = adjust_measured_monthly_demand(
+            measured_monthly_demand_kwh, heating_fraction, insulation_r_value, heat_pump_cop,
+        )
     else:
-        # Forecast path: use future dates and forecast API (use_archive=False)
-        if start_date is None or end_date is None:
-            start_date = datetime.utcnow().date().isoformat()
-            end_date = (datetime.utcnow().date() + timedelta(days=6)).isoformat()
-        flux = get_flux_daily(latitude, longitude, start_date, end_date, use_archive=False)
-        flux_frequency = "daily"
+        monthly_demand_kwh = monthly_demand_profile(
+            annual_consumption_kwh, heating_fraction, insulation_r_value, heat_pump_cop,
+        )
+    with span("optimiser.flux"):
+        if flux_source == "last_year_monthly":
+            if flux is None:
+                flux = get_flux_monthly_last_year(latitude, longitude)
+            flux_frequency = "monthly"
+        elif flux_source == "multi_year":
+            if flux is None:
+                flux = get_flux_monthly_years(latitude, longitude, flux_years)
+            flux_frequency = "multi_year"
+        elif flux is not None:
+            flux_frequency = "daily"
+        else:
+            # Forecast path: use future dates and forecast API (use_archive=False)
+            if start_date is None or end_date is None:
+                start_date = datetime.utcnow().date().isoformat()
+                end_date = (datetime.utcnow().date() + timedelta(days=6)).isoformat()
+            flux = get_flux_daily(latitude, longitude, start_date, end_date, use_archive=False)
+            flux_frequency = "daily"
     pr = {**DEFAULT_PRICING, **(pricing or {})}
     # If neither solar nor wind is allowed, the only feasible point is 0 kW / 0 kW; relax the
     # default min-% self-gen constraint so grid-only scoring still runs.
@@ -908,7 +1181,7 @@ def get_optimised_system(
         min_demand_met_from_gen_pct=_min_met_pct,
         min_solar_kw=min_solar_kw,
         min_wind_kw=min_wind_kw,
-        monthly_demand_kwh=monthly_demand_kwh if flux_frequency == "monthly" else None,
+        monthly_demand_kwh=monthly_demand_kwh if flux_frequency in ("monthly", "multi_year") else None,
         battery_type_params=battery_type_params,
         battery_capex_per_kwh=float(
             (battery_type_params or {}).get(
@@ -918,6 +1191,9 @@ def get_optimised_system(
         battery_max_kwh=battery_max_kwh,
         battery_min_kwh=battery_min_kwh,
         battery_step_kwh=battery_step_kwh,
+        objective=objective,
+        lifetime_params=lifetime_params,
+        session_id=session_id,
     )
     result["flux_source"] = flux_source
     result["flux_period_days"] = result.pop("period_days")
@@ -0,0 +1,119 @@
+"""
+Weather-driven heating demand: heating degree days and a temperature-dependent heat-pump COP.
+
+The profile model (energy_balancing.monthly_demand_profile) spreads heating over a fixed cosine
+winter shape and divides by one COP. Here the space-heating energy follows the location's own
+daily mean temperatures instead:
+
+- heat demand on day d is proportional to its heating degree days, max(0, base − T_mean);
+- the year's total heat is the stated annual_consumption × heating_fraction, less insulation
+  (the same _insulation_reduction the profile model uses), so the two models agree on the total
+  and differ only in when heat is needed and what each kWh costs in electricity;
+- a heat pump's COP falls as it gets colder: a Carnot curve for the flow temperature, scaled so it
+  equals the rated COP at the rating temperature (A7 by default) and clipped to [cop_min, cop_max].
+  A COP of 1 is resistive heating and stays 1 at every temperature.
+
+Every function is vectorised: one (days,) temperature array serves any number of
+insulation/heat-pump scenarios, returned as (scenarios, days) / (scenarios, 12) arrays.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+__all__ = [
+    "HDD_BASE_C",
+    "heat_pump_cop_curve",
+    "heating_degree_days",
+    "weather_driven_demand",
+]
+
+HDD_BASE_C = 15.5  # UK degree-day base temperature (°C)
+_KELVIN = 273.15
+
+
+def heating_degree_days(t_mean_c: Any, base_c: float = HDD_BASE_C) -> np.ndarray:
+    """Heating degree days per day from daily mean temperatures (°C); same shape as the input."""
+    return np.maximum(float(base_c) - np.asarray(t_mean_c, dtype=float), 0.0)
+
+
+def heat_pump_cop_curve(
+    t_outdoor_c: Any,
+    rated_cop: Any,
+    rated_at_c: float = 7.0,
+    flow_temp_c: float = 45.0,
+    cop_min: float = 1.0,
+    cop_max: float = 6.0,
+) -> np.ndarray:
+    """
+    COP at each outdoor temperature for each rated COP: shape rated_cop.shape + t_outdoor_c.shape.
+    Rated COPs at or below 1 are treated as resistive heating (COP 1 throughout).
+    """
+    t = np.asarray(t_outdoor_c, dtype=float)
+    rated = np.asarray(rated_cop, dtype=float)
+    flow_k = float(flow_temp_c) + _KELVIN
+
+    def carnot(temp: Any) -> np.ndarray:
+        # A lift under 1 K is clipped by cop_max anyway; keep the denominator finite.
+        return flow_k / np.maximum(float(flow_temp_c) - np.asarray(temp, dtype=float), 1.0)
+
+    scale = rated / carnot(rated_at_c)
+    cop = np.clip(scale[..., None] * carnot(t).ravel(), cop_min, cop_max).reshape(rated.shape + t.shape)
+    return np.where((rated <= 1.0).reshape(rated.shape + (1,) * t.ndim), 1.0, cop)
+
+
+def weather_driven_demand(
+    t_mean_daily_c: Any,
+    month_of_day: Any,
+    annual_consumption_kwh: float,
+    heating_fraction: float,
+    insulation_r_values: Any,
+    heat_pump_cops: Any,
+    base_c: float = HDD_BASE_C,
+) -> dict[str, np.ndarray]:
+    """
+    Electricity demand for each (insulation, heat pump) scenario against one year of weather.
+
+    t_mean_daily_c: (days,) daily mean temperature; month_of_day: (days,) month index 0–11.
+    insulation_r_values / heat_pump_cops: (scenarios,) — scalars broadcast.
+
+    Returns: hdd (days,), heat_demand_kwh (S,), heating_electricity_daily_kwh (S, days),
+    monthly_electricity_kwh (S, 12), annual_electricity_kwh (S,), seasonal_cop (S,).
+    With no heating degree days at all, heat follows the profile model's monthly heating weights.
+    """
+    from src.models.energy_balancing import _insulation_reduction, _typical_monthly_profile_weights
+
+    t = np.asarray(t_mean_daily_c, dtype=float)
+    months = np.asarray(month_of_day, dtype=int)
+    r_values, cops = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(insulation_r_values, dtype=float)),
+        np.atleast_1d(np.asarray(heat_pump_cops, dtype=float)),
+    )
+    non_heating_w, heating_w = (np.asarray(w) for w in _typical_monthly_profile_weights())
+    days_per_month = np.bincount(months, minlength=12).astype(float)
+
+    hdd = heating_degree_days(t, base_c)
+    if hdd.sum() > 0:
+        share = hdd / hdd.sum()
+    else:
+        share = heating_w[months] / np.maximum(days_per_month[months], 1.0)
+
+    reduction = np.array([_insulation_reduction(float(r)) for r in r_values])
+    heat = float(annual_consumption_kwh) * float(heating_fraction) * (1.0 - reduction)
+    cop = heat_pump_cop_curve(t, np.maximum(cops, 1.0))
+    heating_daily = heat[:, None] * share[None, :] / cop
+    heating_monthly = np.stack([np.bincount(months, weights=row, minlength=12) for row in heating_daily])
+
+    non_heating = float(annual_consumption_kwh) * (1.0 - float(heating_fraction))
+    monthly = heating_monthly + non_heating * non_heating_w[None, :]
+    heating_electricity = heating_daily.sum(axis=1)
+    return {
+        "hdd": hdd,
+        "heat_demand_kwh": heat,
+        "heating_electricity_daily_kwh": heating_daily,
+        "monthly_electricity_kwh": monthly,
+        "annual_electricity_kwh": monthly.sum(axis=1),
+        "seasonal_cop": np.divide(heat, heating_electricity, out=np.ones_like(heat), where=heating_electricity > 0),
+    }
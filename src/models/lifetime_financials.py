@@ -0,0 +1,259 @@
+"""
+Lifetime cash flows for a solar/wind/battery system: discounting, degradation, price escalation
+and component replacement.
+
+The simple financials elsewhere are `capex + annual_net_opex × years`. This engine builds the
+year-by-year cash flow instead, for any number of scenarios at once: inputs are arrays of
+first-year figures (one entry per scenario or per optimiser candidate), the per-year factors are a
+(years,) axis, and every output is one broadcast NumPy expression of shape (..., years).
+
+Per year t = 1..T (cash flows at year end, discounted by (1 + r)^t; capex at t = 0):
+- generation falls by the solar/wind degradation rates; the lost kWh are taken from export and
+  import in the first-year export/generation ratio (export can never go negative);
+- the battery's first-year import/export shift fades with capacity and recovers on replacement;
+- import, standing and export prices escalate at their own annual rates;
+- components are re-bought at the end of every `*_replacement_years` at `*_replacement_frac` of
+  their capex (solar: inverter swap; wind: major service; battery: new pack), so year-k figures do
+  not depend on the horizon.
+
+Rates are nominal. Parameter dicts are merged over DEFAULT_LIFETIME_PARAMS.
+
+Every term is linear in the first-year figures, so npv_cost() contracts the year axis into a
+handful of discounted weights first and never materialises (..., years) arrays — that is the form
+the optimiser uses over its (weather years × solar × wind × battery) candidate grid.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+
+__all__ = [
+    "DEFAULT_LIFETIME_PARAMS",
+    "lifetime_cashflows",
+    "merge_lifetime_params",
+    "npv_cost",
+    "year_factors",
+]
+
+# Illustrative UK defaults — not advice. 3.5% is the HM Treasury Green Book discount rate; panel
+# and small-turbine degradation from typical warranty / fleet studies; LFP packs ~2%/yr fade.
+DEFAULT_LIFETIME_PARAMS: dict[str, float] = {
+    "discount_rate": 0.035,
+    "grid_price_escalation": 0.03,
+    "standing_charge_escalation": 0.03,
+    "export_price_escalation": 0.0,
+    "solar_degradation": 0.005,
+    "wind_degradation": 0.016,
+    "battery_degradation": 0.02,
+    "solar_replacement_years": 12,
+    "solar_replacement_frac": 0.10,
+    "wind_replacement_years": 10,
+    "wind_replacement_frac": 0.15,
+    "battery_replacement_years": 12,
+    "battery_replacement_frac": 0.70,
+}
+
+MAX_HORIZON_YEARS = 50
+
+
+def merge_lifetime_params(params: dict[str, Any] | None) -> dict[str, float]:
+    """DEFAULT_LIFETIME_PARAMS overridden by params; unknown keys raise ValueError."""
+    params = params or {}
+    unknown = set(params) - set(DEFAULT_LIFETIME_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown lifetime parameters: {sorted(unknown)}")
+    return {k: float(params.get(k, v)) for k, v in DEFAULT_LIFETIME_PARAMS.items()}
+
+
+def year_factors(horizon_years: int, params: dict[str, Any] | None = None) -> dict[str, np.ndarray]:
+    """
+    Per-year multipliers, each shaped (horizon_years,), for years 1..horizon_years:
+    discount, grid/standing/export price indices, solar/wind output, battery capacity and
+    0/1 replacement indicators per component.
+    """
+    p = merge_lifetime_params(params)
+    n = max(0, min(MAX_HORIZON_YEARS, int(horizon_years)))
+    t = np.arange(1, n + 1, dtype=float)
+    age = t - 1.0  # years of wear at the start of year t
+
+    def _replaced(life: float) -> np.ndarray:
+        if life <= 0:
+            return np.zeros(n)
+        return ((t % life) == 0).astype(float)
+
+    battery_life = p["battery_replacement_years"]
+    battery_age = age % battery_life if battery_life > 0 else age
+    return {
+        "years": t,
+        "discount": (1.0 + p["discount_rate"]) ** -t,
+        "grid_price": (1.0 + p["grid_price_escalation"]) ** age,
+        "standing_charge": (1.0 + p["standing_charge_escalation"]) ** age,
+        "export_price": (1.0 + p["export_price_escalation"]) ** age,
+        "solar_output": (1.0 - p["solar_degradation"]) ** age,
+        "wind_output": (1.0 - p["wind_degradation"]) ** age,
+        "battery_capacity": (1.0 - p["battery_degradation"]) ** battery_age,
+        "solar_replacement": _replaced(p["solar_replacement_years"]),
+        "wind_replacement": _replaced(p["wind_replacement_years"]),
+        "battery_replacement": _replaced(battery_life),
+    }
+
+
+def lifetime_cashflows(
+    *,
+    solar_kwh: Any,
+    wind_kwh: Any,
+    import_kwh: Any,
+    export_kwh: Any,
+    solar_capex: Any,
+    wind_capex: Any,
+    battery_capex: Any,
+    grid_price_per_kwh: float,
+    export_price_per_kwh: float,
+    standing_charge_per_year: float = 0.0,
+    battery_import_saving_kwh: Any = 0.0,
+    battery_export_reduction_kwh: Any = 0.0,
+    horizon_years: float = 10,
+    params: dict[str, Any] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Year-by-year costs for every scenario in one pass.
+
+    All kWh and capex inputs are first-year figures broadcastable to a common scenario shape (...).
+    battery_import_saving_kwh / battery_export_reduction_kwh: how much the battery lowers import and
+    export versus the same generation without it (0 when there is no battery); that shift fades
+    with battery capacity.
+
+    Returns arrays shaped (..., T) — import_kwh, export_kwh, energy_cost, replacement_cost,
+    cashflow (energy + standing + replacements), cumulative_cost (capex + cumulative cash flow,
+    undiscounted) and cumulative_discounted_cost — plus capex and npv_cost shaped (...) and the
+    year factors used. Costs are positive; export revenue is a negative cost.
+    """
+    p = merge_lifetime_params(params)
+    f = year_factors(int(math.ceil(max(0.0, float(horizon_years)))), p)
+    solar = np.asarray(solar_kwh, dtype=float)[..., None]
+    wind = np.asarray(wind_kwh, dtype=float)[..., None]
+    imp = np.asarray(import_kwh, dtype=float)[..., None]
+    exp = np.asarray(export_kwh, dtype=float)[..., None]
+    c_solar = np.asarray(solar_capex, dtype=float)
+    c_wind = np.asarray(wind_capex, dtype=float)
+    c_battery = np.asarray(battery_capex, dtype=float)
+
+    gen = solar + wind
+    export_share = np.divide(exp, gen, out=np.zeros(np.broadcast(exp, gen).shape), where=gen > 0)
+    lost = solar * (1.0 - f["solar_output"]) + wind * (1.0 - f["wind_output"])
+    fade = 1.0 - f["battery_capacity"]
+    import_t = (
+        imp + lost * (1.0 - export_share)
+        + np.asarray(battery_import_saving_kwh, dtype=float)[..., None] * fade
+    )
+    export_t = np.maximum(
+        exp - lost * export_share
+        + np.asarray(battery_export_reduction_kwh, dtype=float)[..., None] * fade,
+        0.0,
+    )
+
+    energy_cost = (
+        import_t * (float(grid_price_per_kwh) * f["grid_price"])
+        - export_t * (float(export_price_per_kwh) * f["export_price"])
+    )
+    replacement_cost = (
+        c_solar[..., None] * (p["solar_replacement_frac"] * f["solar_replacement"])
+        + c_wind[..., None] * (p["wind_replacement_frac"] * f["wind_replacement"])
+        + c_battery[..., None] * (p["battery_replacement_frac"] * f["battery_replacement"])
+    )
+    cashflow = energy_cost + float(standing_charge_per_year) * f["standing_charge"] + replacement_cost
+    capex = c_solar + c_wind + c_battery
+    cumulative = capex[..., None] + np.cumsum(cashflow, axis=-1)
+    cumulative_discounted = capex[..., None] + np.cumsum(cashflow * f["discount"], axis=-1)
+    npv = cumulative_discounted[..., -1] if cashflow.shape[-1] else np.broadcast_to(capex, cashflow.shape[:-1]).copy()
+    return {
+        "factors": f,
+        "capex": np.broadcast_to(capex, cashflow.shape[:-1]),
+        "import_kwh": import_t,
+        "export_kwh": export_t,
+        "energy_cost": energy_cost,
+        "replacement_cost": replacement_cost,
+        "cashflow": cashflow,
+        "cumulative_cost": cumulative,
+        "cumulative_discounted_cost": cumulative_discounted,
+        "npv_cost": npv,
+    }
+
+
+def npv_cost(
+    *,
+    solar_kwh: Any,
+    wind_kwh: Any,
+    import_kwh: Any,
+    export_kwh: Any,
+    solar_capex: Any,
+    wind_capex: Any,
+    battery_capex: Any,
+    grid_price_per_kwh: float,
+    export_price_per_kwh: float,
+    standing_charge_per_year: float = 0.0,
+    battery_import_saving_kwh: Any = 0.0,
+    battery_export_reduction_kwh: Any = 0.0,
+    horizon_years: float = 10,
+    params: dict[str, Any] | None = None,
+) -> np.ndarray:
+    """
+    Same as lifetime_cashflows(...)["npv_cost"], shaped (...), without the year axis (except for
+    scenarios whose yearly export can go negative and is clipped at zero there).
+    """
+    p = merge_lifetime_params(params)
+    f = year_factors(int(math.ceil(max(0.0, float(horizon_years)))), p)
+    d = f["discount"]
+    g = float(grid_price_per_kwh) * f["grid_price"] * d
+    e = float(export_price_per_kwh) * f["export_price"] * d
+    solar_loss = 1.0 - f["solar_output"]
+    wind_loss = 1.0 - f["wind_output"]
+    fade = 1.0 - f["battery_capacity"]
+
+    solar = np.asarray(solar_kwh, dtype=float)
+    wind = np.asarray(wind_kwh, dtype=float)
+    exp = np.asarray(export_kwh, dtype=float)
+    gen = solar + wind
+    export_share = np.divide(exp, gen, out=np.zeros(np.broadcast(exp, gen).shape), where=gen > 0)
+    # Discounted, price-weighted kWh lost to degradation (before the import/export split).
+    lost_g = solar * float(g @ solar_loss) + wind * float(g @ wind_loss)
+    lost_e = solar * float(e @ solar_loss) + wind * float(e @ wind_loss)
+    export_shift = np.asarray(battery_export_reduction_kwh, dtype=float)
+    energy = (
+        np.asarray(import_kwh, dtype=float) * g.sum() + lost_g * (1.0 - export_share)
+        + np.asarray(battery_import_saving_kwh, dtype=float) * float(g @ fade)
+        - exp * e.sum() + lost_e * export_share
+        - export_shift * float(e @ fade)
+    )
+    if len(d):
+        # lifetime_cashflows clips each year's export at zero; the sums above do not. A lower bound
+        # on every year's export finds the scenarios where the clip can bind, and only those get the
+        # year axis: taking off e_t × max(-export_t, 0) turns the sum into the clipped one.
+        lowest = (
+            exp - (solar * solar_loss.max() + wind * wind_loss.max()) * export_share
+            + np.minimum(export_shift * fade.min(), export_shift * fade.max())
+        )
+        energy = np.array(energy, dtype=float)
+        clipped = np.broadcast_to(lowest < 0, energy.shape)
+        if clipped.any():
+            def pick(a):
+                return np.broadcast_to(a, energy.shape)[clipped][:, None]
+
+            export_t = (
+                pick(exp) - (pick(solar) * solar_loss + pick(wind) * wind_loss) * pick(export_share)
+                + pick(export_shift) * fade
+            )
+            energy[clipped] -= np.maximum(-export_t, 0.0) @ e
+    c_solar = np.asarray(solar_capex, dtype=float)
+    c_wind = np.asarray(wind_capex, dtype=float)
+    c_battery = np.asarray(battery_capex, dtype=float)
+    replacements = (
+        c_solar * (p["solar_replacement_frac"] * float(d @ f["solar_replacement"]))
+        + c_wind * (p["wind_replacement_frac"] * float(d @ f["wind_replacement"]))
+        + c_battery * (p["battery_replacement_frac"] * float(d @ f["battery_replacement"]))
+    )
+    standing = float(standing_charge_per_year) * float(d @ f["standing_charge"])
+    return c_solar + c_wind + c_battery + energy + standing + replacements
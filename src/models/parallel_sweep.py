@@ -0,0 +1,196 @@
+"""
+Process-pool backend for large optimiser sweeps.
+
+score_candidates() scores every (solar, wind, battery) cell independently, so the solar × wind
+grid can be cut into slabs along its longer axis, each slab scored in a worker process, and the
+partial optima merged. Only small things are pickled per task (slab bounds, tier params, prices);
+the per-kW yields, demand, days and candidate sizes are packed once into a shared-memory block
+that every worker reads from. Ties resolve to the lowest flat index, as np.argmin does on the
+full grid, so the result is the serial sweep's.
+
+The pool is persistent (started on first use, reused by later requests in the same process) and
+uses the shared forkserver (src.forkserver) where available: forking a threaded gunicorn worker is unsafe.
+
+Off by default. OPTIMISER_WORKERS sets the pool size (0 = serial); sweeps with fewer than
+OPTIMISER_PARALLEL_MIN_CELLS candidate × weather-year cells stay serial, where the pool overhead
+would dominate.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+__all__ = [
+    "optimiser_workers",
+    "parallel_min_cells",
+    "parallel_argmin",
+    "shutdown_pool",
+]
+
+_ARRAY_KEYS = ("solar_per_kw", "wind_per_kw", "demand", "days", "solar_kws", "wind_kws", "battery_kwhs")
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def optimiser_workers() -> int:
+    """Pool size from OPTIMISER_WORKERS (0 or unset = serial)."""
+    try:
+        return max(0, int(os.environ.get("OPTIMISER_WORKERS", "0")))
+    except ValueError:
+        return 0
+
+
+def parallel_min_cells() -> int:
+    try:
+        return max(0, int(float(os.environ.get("OPTIMISER_PARALLEL_MIN_CELLS", "2000000"))))
+    except ValueError:
+        return 2_000_000
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            from src.forkserver import get_context
+
+            ctx = get_context()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _pool_size = workers
+            print(f"[optimiser] started process pool with {workers} workers ({ctx.get_start_method()})", flush=True)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the persistent pool (tests, graceful shutdown)."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_size = 0
+
+
+def _pack(arrays: dict[str, np.ndarray]) -> tuple[shared_memory.SharedMemory, list[tuple[str, int, tuple[int, ...]]]]:
+    """Copy float64 arrays into one shared block; returns the block and (key, offset, shape) layout."""
+    layout: list[tuple[str, int, tuple[int, ...]]] = []
+    offset = 0
+    for key in _ARRAY_KEYS:
+        layout.append((key, offset, arrays[key].shape))
+        offset += arrays[key].size
+    shm = shared_memory.SharedMemory(create=True, size=max(8, offset * 8))
+    flat = np.ndarray((offset,), dtype=np.float64, buffer=shm.buf)
+    for key, start, shape in layout:
+        flat[start:start + int(np.prod(shape))] = arrays[key].ravel()
+    return shm, layout
+
+
+def _score_slab(
+    shm_name: str,
+    layout: list[tuple[str, int, tuple[int, ...]]],
+    axis: int,
+    start: int,
+    stop: int,
+    battery_params: dict[str, Any] | None,
+    costs: dict[str, Any],
+) -> tuple[float, tuple[int, int, int], int]:
+    """Worker: score solar (axis 0) or wind (axis 1) indices [start, stop); returns (best, global index, evaluations)."""
+    from src.models.sizing_grid import score_candidates
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # The inputs are small next to the (years × slab × wind × 12) work arrays: copy them out so
+        # no view outlives the mapping.
+        size = sum(int(np.prod(shape)) for _, _, shape in layout)
+        flat = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+        a = {key: flat[off:off + int(np.prod(shape))].reshape(shape).copy() for key, off, shape in layout}
+        del flat
+    finally:
+        shm.close()
+
+    solar_kws = a["solar_kws"][start:stop] if axis == 0 else a["solar_kws"]
+    wind_kws = a["wind_kws"][start:stop] if axis == 1 else a["wind_kws"]
+    scored = score_candidates(
+        a["solar_per_kw"], a["wind_per_kw"], a["demand"], a["days"],
+        solar_kws, wind_kws, a["battery_kwhs"], battery_params, **costs,
+    )
+    objective_grid = scored["objective_grid"]
+    flat_index = int(np.argmin(objective_grid))
+    best = float(objective_grid.ravel()[flat_index])
+    i_s, i_w, i_b = (int(i) for i in np.unravel_index(flat_index, objective_grid.shape))
+    if axis == 0:
+        i_s += start
+    else:
+        i_w += start
+    return best, (i_s, i_w, i_b), scored["evaluations"]
+
+
+def parallel_argmin(
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    solar_kws: np.ndarray,
+    wind_kws: np.ndarray,
+    battery_kwhs: np.ndarray,
+    battery_params: dict[str, Any] | None,
+    costs: dict[str, Any],
+    workers: int | None = None,
+) -> tuple[tuple[int, int, int] | None, int] | None:
+    """
+    Best (solar, wind, battery) index over the full sweep, scored across the process pool, and
+    the number of feasible evaluations. costs: score_candidates' keyword arguments. Returns None
+    when the sweep should run serially (pool disabled, sweep too small, or the pool failed); the
+    index is None when no candidate is feasible.
+    """
+    workers = optimiser_workers() if workers is None else max(0, int(workers))
+    n_years = np.atleast_2d(solar_per_kw).shape[0]
+    cells = n_years * len(solar_kws) * len(wind_kws) * max(1, len(battery_kwhs))
+    axis = 0 if len(solar_kws) >= len(wind_kws) else 1
+    n_axis = len(solar_kws) if axis == 0 else len(wind_kws)
+    n_slabs = min(workers, n_axis)
+    if n_slabs < 2 or cells < parallel_min_cells():
+        return None
+
+    arrays = {
+        "solar_per_kw": np.atleast_2d(np.asarray(solar_per_kw, dtype=float)),
+        "wind_per_kw": np.atleast_2d(np.asarray(wind_per_kw, dtype=float)),
+        "demand": np.asarray(demand, dtype=float),
+        "days": np.atleast_2d(np.asarray(days, dtype=float)),
+        "solar_kws": np.asarray(solar_kws, dtype=float),
+        "wind_kws": np.asarray(wind_kws, dtype=float),
+        "battery_kwhs": np.asarray(battery_kwhs, dtype=float),
+    }
+    bounds = np.linspace(0, n_axis, n_slabs + 1).round().astype(int)
+    shm, layout = _pack(arrays)
+    try:
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_score_slab, shm.name, layout, axis, int(lo), int(hi), battery_params, costs)
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+        partials = [f.result() for f in futures]
+    except Exception as e:
+        print(f"[optimiser] process pool failed, sweeping serially: {e}", flush=True)
+        shutdown_pool()
+        return None
+    finally:
+        shm.close()
+        shm.unlink()
+
+    evaluations = sum(p[2] for p in partials)
+    finite = [p for p in partials if np.isfinite(p[0])]
+    if not finite:
+        return None, evaluations
+    shape = (len(solar_kws), len(wind_kws), len(battery_kwhs))
+    best = min(finite, key=lambda p: (p[0], np.ravel_multi_index(p[1], shape)))
+    return best[1], evaluations
@@ -0,0 +1,417 @@
+"""
+Precomputed recommendation atlas for /api/recommend.
+
+Most visits use the default scenario (the optimiser page's default heating, insulation, heat pump,
+export price, horizon and search bounds) with a usage near the typical 2,700–4,200 kWh. For those,
+the sizing answer depends only on location, tier combination, annual usage and the reference grid
+price, so it can be computed offline (python -m src.tools.build_recommend_atlas) and looked up.
+
+The atlas is one compressed .npz (RECOMMEND_ATLAS_PATH, default output/cache/recommend_atlas.npz):
+    outwards       [n]                   outward codes, sorted
+    centroids      [n, 2]  float32       mean lat/lon of each outward code's postcodes
+    flux           [n, 12, 2] float32    last-year monthly GHI (MJ/m²) and mean max wind (m/s) at the centroid
+    sizing         [n, combos, usage, price, 3] uint16   optimal solar kW, wind kW, battery kWh × 10
+                                                         (UNBUILT where not yet computed)
+    usage_grid, price_grid_p, combos, meta (JSON: version, built_at, flux_year, scenario)
+
+Only the optimal sizing is stored, not the costed result. On a hit the endpoint uses the stored
+flux (no weather fetch) and runs the optimiser over the small box spanned by the sizing at the
+grid points around the request's usage and price, a single evaluation when those agree. The
+response is therefore costed exactly for the request's own usage, tariffs and price. Anything off the
+grid or outside the scenario falls back to live optimisation.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+__all__ = [
+    "AtlasHit",
+    "DEFAULT_COMBOS",
+    "DEFAULT_PRICE_GRID_P",
+    "DEFAULT_USAGE_GRID",
+    "RecommendAtlas",
+    "Scenario",
+    "atlas_enabled",
+    "default_atlas_path",
+    "get_default_atlas",
+    "optimise_sizing",
+    "save_atlas",
+]
+
+ATLAS_VERSION = 1
+UNBUILT = np.iinfo(np.uint16).max
+SIZE_SCALE = 10.0  # sizes are stored in tenths (the optimiser steps by 0.5 kW / 1 kWh)
+
+DEFAULT_USAGE_GRID = tuple(range(1500, 8001, 250))  # kWh/year
+DEFAULT_PRICE_GRID_P = (15.0, 18.0, 21.0, 24.0, 27.0, 30.0, 33.0, 36.0)  # reference unit rate, p/kWh
+# solar/wind/battery tiers; the first is the optimiser page's default.
+DEFAULT_COMBOS = (
+    "budget/budget/none",
+    "budget/none/none",
+    "mid/budget/none",
+    "mid/none/none",
+    "budget/budget/budget",
+)
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Non-axis inputs the atlas was built for (defaults: the optimiser page's defaults)."""
+
+    heating_fraction: float = 0.6
+    insulation_r_value: float = 2.5
+    heat_pump_cop: float = 3.0
+    export_price_per_kwh: float = 0.05
+    optimize_over_years: float = 5.0
+    solar_max_kw: float = 20.0
+    wind_max_kw: float = 10.0
+    min_solar_kw: float = 1.5
+    min_wind_kw: float = 0.5
+    battery_max_kwh: float = 15.0
+    battery_min_kwh: float = 0.0
+    battery_step_kwh: float = 1.0
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> "Scenario":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: float(v) for k, v in raw.items() if k in names})
+
+    def bounds(self, combo: str) -> dict[str, float]:
+        """Search bounds for a tier combination, with "none" tiers zeroed as /api/recommend does."""
+        solar_tier, wind_tier, battery_tier = combo.split("/")
+        out = {
+            "solar_max_kw": self.solar_max_kw,
+            "wind_max_kw": self.wind_max_kw,
+            "min_solar_kw": self.min_solar_kw,
+            "min_wind_kw": self.min_wind_kw,
+            "battery_max_kwh": self.battery_max_kwh,
+            "battery_min_kwh": self.battery_min_kwh,
+        }
+        if solar_tier == "none":
+            out["solar_max_kw"] = out["min_solar_kw"] = 0.0
+        if wind_tier == "none":
+            out["wind_max_kw"] = out["min_wind_kw"] = 0.0
+        if battery_tier == "none":
+            out["battery_max_kwh"] = out["battery_min_kwh"] = 0.0
+        return out
+
+    def matches(self, other: "Scenario", combo: str) -> bool:
+        """Same inputs as far as the optimiser can tell (bounds compared after "none" zeroing)."""
+        mine, theirs = asdict(self), asdict(other)
+        mine.update(self.bounds(combo))
+        theirs.update(other.bounds(combo))
+        if combo.endswith("/none"):
+            mine.pop("battery_step_kwh")
+            theirs.pop("battery_step_kwh")
+        return all(math.isclose(mine[k], theirs[k], rel_tol=1e-6, abs_tol=1e-9) for k in mine)
+
+
+@dataclass
+class AtlasHit:
+    """Sizing box for a request: (lo, hi) per technology; exact when every surrounding grid point agrees."""
+
+    outward_code: str
+    solar_kw: tuple[float, float]
+    wind_kw: tuple[float, float]
+    battery_kwh: tuple[float, float]
+    exact: bool
+    built_at: str
+
+    def bounds(self) -> dict[str, float]:
+        """Optimiser bounds pinned to the box."""
+        return {
+            "min_solar_kw": self.solar_kw[0],
+            "solar_max_kw": self.solar_kw[1],
+            "min_wind_kw": self.wind_kw[0],
+            "wind_max_kw": self.wind_kw[1],
+            "battery_min_kwh": self.battery_kwh[0],
+            "battery_max_kwh": self.battery_kwh[1],
+        }
+
+
+def _bracket(grid: np.ndarray, value: float) -> tuple[int, int] | None:
+    """Indices of the grid points either side of value (the same index twice on a grid point)."""
+    if not (grid[0] - 1e-9 <= value <= grid[-1] + 1e-9):
+        return None
+    hi = int(np.searchsorted(grid, value - 1e-9))
+    if math.isclose(float(grid[hi]), value, rel_tol=0, abs_tol=1e-6):
+        return hi, hi
+    return hi - 1, hi
+
+
+class RecommendAtlas:
+    """In-memory atlas, loaded from or saved to one .npz file."""
+
+    def __init__(
+        self,
+        outwards: list[str],
+        centroids: np.ndarray,
+        flux: np.ndarray,
+        sizing: np.ndarray,
+        *,
+        usage_grid: tuple[float, ...] = DEFAULT_USAGE_GRID,
+        price_grid_p: tuple[float, ...] = DEFAULT_PRICE_GRID_P,
+        combos: tuple[str, ...] = DEFAULT_COMBOS,
+        scenario: Scenario | None = None,
+        flux_year: int | None = None,
+        built_at: str | None = None,
+    ):
+        self.outwards = list(outwards)
+        self.centroids = np.asarray(centroids, dtype=np.float32).reshape(len(self.outwards), 2)
+        self.flux = np.asarray(flux, dtype=np.float32).reshape(len(self.outwards), 12, 2)
+        self.usage_grid = np.asarray(usage_grid, dtype=float)
+        self.price_grid_p = np.asarray(price_grid_p, dtype=float)
+        self.combos = tuple(combos)
+        self.sizing = np.asarray(sizing, dtype=np.uint16).reshape(
+            len(self.outwards), len(self.combos), len(self.usage_grid), len(self.price_grid_p), 3
+        )
+        self.scenario = scenario or Scenario()
+        self.flux_year = int(flux_year if flux_year is not None else date.today().year - 1)
+        self.built_at = built_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._index = {code: i for i, code in enumerate(self.outwards)}
+
+    @classmethod
+    def empty(cls, outwards: list[str], **kwargs: Any) -> "RecommendAtlas":
+        n = len(outwards)
+        combos = kwargs.get("combos", DEFAULT_COMBOS)
+        usage = kwargs.get("usage_grid", DEFAULT_USAGE_GRID)
+        price = kwargs.get("price_grid_p", DEFAULT_PRICE_GRID_P)
+        sizing = np.full((n, len(combos), len(usage), len(price), 3), UNBUILT, dtype=np.uint16)
+        return cls(outwards, np.zeros((n, 2)), np.zeros((n, 12, 2)), sizing, **kwargs)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> "RecommendAtlas":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("version") != ATLAS_VERSION:
+                raise ValueError(f"{path}: atlas version {meta.get('version')}, expected {ATLAS_VERSION}")
+            return cls(
+                [str(s) for s in z["outwards"]],
+                z["centroids"],
+                z["flux"],
+                z["sizing"],
+                usage_grid=tuple(float(v) for v in z["usage_grid"]),
+                price_grid_p=tuple(float(v) for v in z["price_grid_p"]),
+                combos=tuple(str(c) for c in z["combos"]),
+                scenario=Scenario.from_dict(meta.get("scenario") or {}),
+                flux_year=meta.get("flux_year"),
+                built_at=meta.get("built_at"),
+            )
+
+    def same_layout(self, other: "RecommendAtlas") -> bool:
+        """True when other's cells can be copied into this atlas (same grids, combos, scenario, flux year)."""
+        return (
+            self.combos == other.combos
+            and np.array_equal(self.usage_grid, other.usage_grid)
+            and np.array_equal(self.price_grid_p, other.price_grid_p)
+            and self.scenario == other.scenario
+            and self.flux_year == other.flux_year
+        )
+
+    def has(self, outward_code: str) -> bool:
+        i = self._index.get(outward_code)
+        return i is not None and not (self.sizing[i] == UNBUILT).any()
+
+    def set_outward(self, outward_code: str, centroid: tuple[float, float], flux: Any, sizing: np.ndarray) -> None:
+        """Store one outward code: centroid (lat, lon), flux [12, 2] and sizing [combos, usage, price, 3] in kW/kWh."""
+        i = self._index[outward_code]
+        self.centroids[i] = centroid
+        self.flux[i] = np.asarray(flux, dtype=np.float32).reshape(12, 2)
+        scaled = np.rint(np.asarray(sizing, dtype=float) * SIZE_SCALE)
+        self.sizing[i] = np.clip(scaled, 0, UNBUILT - 1).astype(np.uint16)
+
+    def copy_outward(self, other: "RecommendAtlas", outward_code: str) -> None:
+        i, j = self._index[outward_code], other._index[outward_code]
+        self.centroids[i] = other.centroids[j]
+        self.flux[i] = other.flux[j]
+        self.sizing[i] = other.sizing[j]
+
+    def flux_frame(self, outward_code: str):
+        """Stored flux as the DataFrame get_flux_monthly_last_year returns, or None if not in the atlas."""
+        import calendar
+
+        import pandas as pd
+
+        i = self._index.get(outward_code)
+        if i is None:
+            return None
+        return pd.DataFrame(
+            {
+                "ghi_mj_per_m2": self.flux[i, :, 0].astype(float),
+                "wind_speed_10m_max": self.flux[i, :, 1].astype(float),
+                "days_in_month": [calendar.monthrange(self.flux_year, m)[1] for m in range(1, 13)],
+            },
+            index=pd.Index(range(1, 13), name="month"),
+        )
+
+    def lookup(self, outward_code: str, combo: str, annual_kwh: float, grid_price_p: float) -> AtlasHit | None:
+        """
+        Sizing box for (outward, combo) at annual_kwh and reference price grid_price_p (p/kWh), from
+        the up to four grid points around it. None when off the grid or any of those points is unbuilt.
+        """
+        i = self._index.get(outward_code)
+        if i is None or combo not in self.combos:
+            return None
+        usage = _bracket(self.usage_grid, float(annual_kwh))
+        price = _bracket(self.price_grid_p, float(grid_price_p))
+        if usage is None or price is None:
+            return None
+        c = self.combos.index(combo)
+        corners = self.sizing[i, c][np.ix_(sorted(set(usage)), sorted(set(price)))].reshape(-1, 3)
+        if (corners == UNBUILT).any():
+            return None
+        lo, hi = corners.min(axis=0) / SIZE_SCALE, corners.max(axis=0) / SIZE_SCALE
+        return AtlasHit(
+            outward_code=outward_code,
+            solar_kw=(float(lo[0]), float(hi[0])),
+            wind_kw=(float(lo[1]), float(hi[1])),
+            battery_kwh=(float(lo[2]), float(hi[2])),
+            exact=bool((lo == hi).all()),
+            built_at=self.built_at,
+        )
+
+    def age_s(self, now: float | None = None) -> float:
+        try:
+            built = datetime.fromisoformat(self.built_at).timestamp()
+        except ValueError:
+            return float("inf")
+        return (time.time() if now is None else now) - built
+
+
+def optimise_sizing(
+    flux,
+    latitude: float,
+    longitude: float,
+    scenario: Scenario,
+    combos: tuple[str, ...] = DEFAULT_COMBOS,
+    usage_grid: tuple[float, ...] = DEFAULT_USAGE_GRID,
+    price_grid_p: tuple[float, ...] = DEFAULT_PRICE_GRID_P,
+) -> np.ndarray:
+    """
+    Optimal sizing [combos, usage, price, 3] (solar kW, wind kW, battery kWh) at one location.
+    Each cell goes through recommend_tariff with a single flat tariff at the grid price, the same
+    path /api/recommend takes, so the reference price and capex are derived identically.
+    """
+    from src.data.energy_tiers import BATTERY_TIERS, SOLAR_TIERS, WIND_TIERS
+    from src.models.tariff_recommendation import recommend_tariff
+
+    out = np.zeros((len(combos), len(usage_grid), len(price_grid_p), 3))
+    for c, combo in enumerate(combos):
+        solar_tier, wind_tier, battery_tier = combo.split("/")
+        bounds = scenario.bounds(combo)
+        for u, annual_kwh in enumerate(usage_grid):
+            for p, price_p in enumerate(price_grid_p):
+                rec = recommend_tariff(
+                    [{"unit_rate": float(price_p), "standing_charge_day": 0.0}],
+                    latitude,
+                    longitude,
+                    float(annual_kwh),
+                    SOLAR_TIERS[solar_tier],
+                    WIND_TIERS[wind_tier],
+                    export_price_per_kwh=scenario.export_price_per_kwh,
+                    optimize_over_years=scenario.optimize_over_years,
+                    heating_fraction=scenario.heating_fraction,
+                    insulation_r_value=scenario.insulation_r_value,
+                    heat_pump_cop=scenario.heat_pump_cop,
+                    battery_type_params=BATTERY_TIERS[battery_tier] if battery_tier != "none" else None,
+                    battery_step_kwh=scenario.battery_step_kwh,
+                    flux=flux,
+                    **bounds,
+                )
+                opt = rec["optimisation_result"]
+                out[c, u, p] = (
+                    opt["optimal_solar_kw"],
+                    opt["optimal_wind_kw"],
+                    opt.get("optimal_battery_kwh", 0.0),
+                )
+    return out
+
+
+def save_atlas(atlas: RecommendAtlas, path: str | os.PathLike[str]) -> None:
+    """Write the atlas atomically (tmp file + os.replace) so a serving process never reads half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "version": ATLAS_VERSION,
+        "built_at": atlas.built_at,
+        "flux_year": atlas.flux_year,
+        "scenario": asdict(atlas.scenario),
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            outwards=np.asarray(atlas.outwards, dtype=str),
+            centroids=atlas.centroids,
+            flux=atlas.flux,
+            sizing=atlas.sizing,
+            usage_grid=atlas.usage_grid,
+            price_grid_p=atlas.price_grid_p,
+            combos=np.asarray(atlas.combos, dtype=str),
+            meta=np.asarray(json.dumps(meta)),
+        )
+    os.replace(tmp, path)
+
+
+def default_atlas_path() -> Path:
+    """RECOMMEND_ATLAS_PATH, or output/cache/recommend_atlas.npz under the project root."""
+    raw = (os.environ.get("RECOMMEND_ATLAS_PATH") or "").strip()
+    return Path(raw) if raw else _PROJECT_ROOT / "output" / "cache" / "recommend_atlas.npz"
+
+
+def atlas_enabled() -> bool:
+    raw = (os.environ.get("RECOMMEND_ATLAS_ENABLED") or "").strip().lower()
+    return not raw or raw in ("1", "true", "yes", "on")
+
+
+def _max_age_s() -> float:
+    try:
+        return float(os.environ.get("RECOMMEND_ATLAS_MAX_AGE_DAYS", "120")) * 86400.0
+    except ValueError:
+        return 120 * 86400.0
+
+
+_default_atlas: RecommendAtlas | None = None
+_default_mtime: float | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_atlas() -> RecommendAtlas | None:
+    """
+    Shared atlas for this process, reloaded when the file changes (a rebuild needs no restart).
+    None when disabled, missing, unreadable, older than RECOMMEND_ATLAS_MAX_AGE_DAYS or built on a
+    weather year other than last year.
+    """
+    global _default_atlas, _default_mtime
+    if not atlas_enabled():
+        return None
+    path = default_atlas_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    with _default_lock:
+        if mtime != _default_mtime:
+            try:
+                _default_atlas = RecommendAtlas.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[recommend-atlas] could not load {path}: {e}", flush=True)
+                _default_atlas = None
+            _default_mtime = mtime
+        atlas = _default_atlas
+    if atlas is None or atlas.age_s() > _max_age_s() or atlas.flux_year != date.today().year - 1:
+        return None
+    return atlas
@@ -0,0 +1,238 @@
+"""
+Monte Carlo sensitivity of payback and total cost for a chosen solar/wind/battery sizing.
+
+Grid price, export price, capex per kW(h) and the weather year are sampled from configurable
+distributions; every draw is costed in one vectorised NumPy pass against the sizing's per-year
+import/export (same balance model as the optimiser, via src.models.sizing_grid), and the result is
+reported as percentile bands. Thousands of draws take a few milliseconds.
+
+Distribution specs (per sampled quantity) are dicts with "dist" and either absolute parameters or
+fractions of the base value (the *_frac keys), e.g.
+    {"dist": "normal", "sd_frac": 0.15}              mean = base, sd = 15% of base
+    {"dist": "uniform", "low": 0.02, "high": 0.15}   absolute bounds
+    {"dist": "triangular", "low_frac": 0.85, "mode_frac": 1.0, "high_frac": 1.25}
+    {"dist": "lognormal", "sigma": 0.2}              median = base
+    {"dist": "fixed"}
+Samples are clipped at zero.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import span
+from src.models.energy_balancing import DEFAULT_PRICING
+from src.models.sizing_grid import candidate_monthly_balance, monthly_yields
+
+__all__ = [
+    "DEFAULT_DISTRIBUTIONS",
+    "DEFAULT_PERCENTILES",
+    "SAMPLED_QUANTITIES",
+    "run_sensitivity",
+    "sample_distribution",
+    "validate_distributions",
+]
+
+SAMPLED_QUANTITIES = (
+    "grid_price_per_kwh",
+    "export_price_per_kwh",
+    "solar_capex_per_kw",
+    "wind_capex_per_kw",
+    "battery_capex_per_kwh",
+)
+
+# Spread around the user's own figures: retail unit rates move ±15% year to year, export rates are
+# skewed downwards, install quotes vary more for wind than for solar.
+DEFAULT_DISTRIBUTIONS: dict[str, dict[str, Any]] = {
+    "grid_price_per_kwh": {"dist": "normal", "sd_frac": 0.15},
+    "export_price_per_kwh": {"dist": "triangular", "low_frac": 0.5, "mode_frac": 1.0, "high_frac": 1.2},
+    "solar_capex_per_kw": {"dist": "triangular", "low_frac": 0.85, "mode_frac": 1.0, "high_frac": 1.25},
+    "wind_capex_per_kw": {"dist": "triangular", "low_frac": 0.8, "mode_frac": 1.0, "high_frac": 1.4},
+    "battery_capex_per_kwh": {"dist": "triangular", "low_frac": 0.85, "mode_frac": 1.0, "high_frac": 1.2},
+}
+
+DEFAULT_PERCENTILES = (5, 10, 50, 90, 95)
+MAX_DRAWS = 100_000
+
+
+_DISTS = ("fixed", "normal", "uniform", "triangular", "lognormal")
+_SPEC_PARAMS = ("value", "mean", "sd", "low", "high", "mode", "median", "sigma")
+
+
+def validate_distributions(distributions: Any) -> dict[str, dict[str, Any]]:
+    """
+    Check user-supplied distribution overrides (quantity → spec dict) before sampling.
+    Raises ValueError for anything that is not an object of spec objects with numeric parameters.
+    """
+    if distributions is None:
+        return {}
+    if not isinstance(distributions, dict):
+        raise ValueError("distributions must be an object keyed by quantity")
+    unknown = set(distributions) - set(SAMPLED_QUANTITIES)
+    if unknown:
+        raise ValueError(f"unknown sampled quantities: {sorted(unknown)}")
+    for quantity, spec in distributions.items():
+        if spec is None:
+            continue
+        if not isinstance(spec, dict):
+            raise ValueError(f"distribution for {quantity} must be an object with a 'dist' key")
+        dist = str(spec.get("dist", "fixed")).lower()
+        if dist not in _DISTS:
+            raise ValueError(f"unknown distribution {dist!r} for {quantity}")
+        for key in _SPEC_PARAMS + tuple(f"{k}_frac" for k in _SPEC_PARAMS):
+            value = spec.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"distribution for {quantity}: {key} must be a number")
+    return distributions
+
+
+def _param(spec: dict[str, Any], name: str, base: float, default_frac: float) -> float:
+    if name in spec:
+        return float(spec[name])
+    return base * float(spec.get(f"{name}_frac", default_frac))
+
+
+def sample_distribution(spec: dict[str, Any] | None, base: float, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw n samples for one quantity (see module docstring for spec format)."""
+    spec = spec or {"dist": "fixed"}
+    dist = str(spec.get("dist", "fixed")).lower()
+    if dist == "fixed":
+        out = np.full(n, float(spec.get("value", base)))
+    elif dist == "normal":
+        out = rng.normal(_param(spec, "mean", base, 1.0), _param(spec, "sd", base, 0.0), n)
+    elif dist == "uniform":
+        out = rng.uniform(_param(spec, "low", base, 1.0), _param(spec, "high", base, 1.0), n)
+    elif dist == "triangular":
+        low = _param(spec, "low", base, 1.0)
+        high = _param(spec, "high", base, 1.0)
+        mode = min(max(_param(spec, "mode", base, 1.0), low), high)
+        out = np.full(n, low) if high <= low else rng.triangular(low, mode, high, n)
+    elif dist == "lognormal":
+        median = _param(spec, "median", base, 1.0)
+        out = median * rng.lognormal(0.0, float(spec.get("sigma", 0.0)), n)
+    else:
+        raise ValueError(f"unknown distribution {dist!r}")
+    return np.maximum(out, 0.0)
+
+
+def _bands(values: np.ndarray, percentiles: tuple[float, ...]) -> dict[str, Any]:
+    """Percentile bands; 'nearest' keeps infinities (never pays back) as real draws, reported as None."""
+    finite = values[np.isfinite(values)]
+    out: dict[str, Any] = {}
+    for p in percentiles:
+        v = float(np.percentile(values, p, method="nearest"))
+        out[f"p{p:g}"] = round(v, 2) if np.isfinite(v) else None
+    out["mean"] = round(float(finite.mean()), 2) if len(finite) == len(values) and len(values) else None
+    return out
+
+
+def run_sensitivity(
+    flux: pd.DataFrame,
+    solar_kw: float,
+    wind_kw: float,
+    battery_kwh: float,
+    monthly_demand_kwh: list[float],
+    solar_type_params: dict[str, Any],
+    wind_type_params: dict[str, Any],
+    *,
+    battery_type_params: dict[str, Any] | None = None,
+    grid_price_per_kwh: float = DEFAULT_PRICING["grid_price_per_kwh"],
+    export_price_per_kwh: float = DEFAULT_PRICING["export_price_per_kwh"],
+    solar_capex_per_kw: float | None = None,
+    wind_capex_per_kw: float | None = None,
+    battery_capex_per_kwh: float | None = None,
+    horizon_years: float = 10.0,
+    distributions: dict[str, dict[str, Any]] | None = None,
+    n_draws: int = 5000,
+    seed: int | None = None,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+) -> dict[str, Any]:
+    """
+    Percentile bands for payback (system, solar, wind) and total cost over `horizon_years`.
+
+    flux: monthly (12 rows) or multi-year ((year, month) index) flux; each draw picks one year
+    uniformly. distributions: per-quantity overrides merged over DEFAULT_DISTRIBUTIONS
+    (keys from SAMPLED_QUANTITIES). Payback is capex / annual saving against grid-only supply;
+    draws that never pay back count as infinite (reported as None in the bands).
+    """
+    n = max(1, min(MAX_DRAWS, int(n_draws)))
+    rng = np.random.default_rng(seed)
+    base = {
+        "grid_price_per_kwh": float(grid_price_per_kwh),
+        "export_price_per_kwh": float(export_price_per_kwh),
+        "solar_capex_per_kw": float(
+            solar_capex_per_kw if solar_capex_per_kw is not None
+            else solar_type_params.get("solar_capex_per_kw", DEFAULT_PRICING["solar_capex_per_kw"])
+        ),
+        "wind_capex_per_kw": float(
+            wind_capex_per_kw if wind_capex_per_kw is not None
+            else wind_type_params.get("wind_capex_per_kw", DEFAULT_PRICING["wind_capex_per_kw"])
+        ),
+        "battery_capex_per_kwh": float(
+            battery_capex_per_kwh if battery_capex_per_kwh is not None
+            else (battery_type_params or {}).get("battery_capex_per_kwh", DEFAULT_PRICING["battery_capex_per_kwh"])
+        ),
+    }
+    specs = {**DEFAULT_DISTRIBUTIONS, **validate_distributions(distributions)}
+
+    with span("sensitivity.run"):
+        years, solar_per_kw, wind_per_kw, days = monthly_yields(flux, solar_type_params, wind_type_params)
+        per_year = candidate_monthly_balance(
+            solar_per_kw, wind_per_kw, np.asarray(monthly_demand_kwh, dtype=float), days,
+            float(solar_kw), float(wind_kw), float(battery_kwh), battery_type_params,
+        )
+        solar_y = per_year["solar_kwh"].sum(axis=1)
+        wind_y = per_year["wind_kwh"].sum(axis=1)
+        import_y = per_year["import_kwh"].sum(axis=1)
+        export_y = per_year["export_kwh"].sum(axis=1)
+        demand = float(np.sum(monthly_demand_kwh))
+
+        year_idx = rng.integers(0, len(solar_y), n)
+        draws = {q: sample_distribution(specs.get(q), base[q], n, rng) for q in SAMPLED_QUANTITIES}
+        g = draws["grid_price_per_kwh"]
+        e = draws["export_price_per_kwh"]
+        solar = solar_y[year_idx]
+        wind = wind_y[year_idx]
+        imp = import_y[year_idx]
+        exp = export_y[year_idx]
+
+        solar_capex = float(solar_kw) * draws["solar_capex_per_kw"]
+        wind_capex = float(wind_kw) * draws["wind_capex_per_kw"]
+        capex = solar_capex + wind_capex + float(battery_kwh) * draws["battery_capex_per_kwh"]
+        net_opex = imp * g - exp * e
+        total_cost = capex + net_opex * float(horizon_years)
+        savings = demand * g - net_opex
+
+        # Per-technology split, as in optimize_system_capacity's payback figures.
+        gen = solar + wind
+        safe_gen = np.where(gen > 0, gen, 1.0)
+        solar_share = np.where(gen > 0, solar / safe_gen, 0.0)
+        wind_share = np.where(gen > 0, wind / safe_gen, 0.0)
+        used_on_site = np.minimum(gen, demand)
+        solar_savings = used_on_site * solar_share * g + exp * solar_share * e
+        wind_savings = used_on_site * wind_share * g + exp * wind_share * e
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payback = np.where(savings > 0, capex / savings, np.inf)
+            payback_solar = np.where(solar_savings > 0, solar_capex / solar_savings, np.inf)
+            payback_wind = np.where(wind_savings > 0, wind_capex / wind_savings, np.inf)
+
+        result = {
+            "n_draws": n,
+            "horizon_years": float(horizon_years),
+            "weather_years": years,
+            "base": {k: round(v, 4) for k, v in base.items()},
+            "distributions": {q: specs.get(q) for q in SAMPLED_QUANTITIES},
+            "total_cost_gbp": _bands(total_cost, percentiles),
+            "annual_net_opex_gbp": _bands(net_opex, percentiles),
+            "payback_years": _bands(payback, percentiles),
+            "prob_payback_within_horizon": round(float(np.mean(payback <= float(horizon_years))), 4),
+        }
+        if float(solar_kw) > 0:
+            result["payback_solar_years"] = _bands(payback_solar, percentiles)
+        if float(wind_kw) > 0:
+            result["payback_wind_years"] = _bands(payback_wind, percentiles)
+    return result
@@ -0,0 +1,311 @@
+"""
+Vectorised solar × wind × battery sweep for the optimiser.
+
+Generation is linear in capacity, so each weather year is reduced once to per-kW monthly yields
+(years × 12). Every candidate in the sweep is then evaluated against every year by broadcasting:
+(years × solar × wind × 12) arrays for generation and the intraday-mismatch balance, with one
+pass over battery sizes for the storage shift. The model is the same as
+energy_balancing._battery_adjusted_monthly_balance; it is only evaluated in bulk.
+
+score_candidates() turns a sweep into the optimiser's objective. Every cell is scored on its own,
+so any rectangular slice of the solar × wind grid can be scored independently (see
+src.models.parallel_sweep) and the partial optima merged.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.models.energy_balancing import INTRADAY_MISMATCH_SOLAR, INTRADAY_MISMATCH_WIND
+
+__all__ = [
+    "sweep_values",
+    "solar_yield_per_kw",
+    "wind_yield_per_kw",
+    "monthly_yields",
+    "evaluate_grid",
+    "score_candidates",
+    "candidate_monthly_balance",
+]
+
+
+def sweep_values(start: float, stop: float, step: float) -> np.ndarray:
+    """
+    Candidate sizes start, start+step, ... <= stop, accumulated exactly as the optimiser's loops
+    do (repeated float addition), so grid points match the historical sweep bit-for-bit.
+    """
+    values: list[float] = []
+    v = float(start)
+    if step <= 0:
+        return np.array([v] if v <= stop else [], dtype=float)
+    while v <= stop:
+        values.append(v)
+        v += step
+    return np.array(values, dtype=float)
+
+
+def solar_yield_per_kw(ghi_mj_per_m2: np.ndarray, solar_type_params: dict[str, Any]) -> np.ndarray:
+    """kWh per kWp for each GHI sum (MJ/m²); NaN/negative → 0, J/m² sums (> 1e6) rescaled to MJ."""
+    ghi = np.nan_to_num(np.asarray(ghi_mj_per_m2, dtype=float), nan=0.0)
+    ghi = np.where(ghi > 1e6, ghi / 1e6, ghi)
+    ghi = np.where(ghi > 0, ghi, 0.0)
+    losses = solar_type_params.get("system_losses", 0.14)
+    inv_eff = solar_type_params.get("inverter_efficiency", 0.96)
+    pdc0 = solar_type_params.get("pdc0_per_kwp", 1000.0)
+    return (ghi / 3.6) * (pdc0 / 1000.0) * (1.0 - losses) * inv_eff
+
+
+def wind_yield_per_kw(
+    wind_speed_mps: np.ndarray,
+    wind_type_params: dict[str, Any],
+    days: np.ndarray | float = 1.0,
+) -> np.ndarray:
+    """kWh per kW of turbine for each (mean daily max) wind speed, × days; NaN/negative → 0 m/s."""
+    v = np.nan_to_num(np.asarray(wind_speed_mps, dtype=float), nan=0.0)
+    v = np.where(v < 0, 0.0, v)
+    v_ci = wind_type_params["v_cut_in"]
+    v_r = wind_type_params["v_rated"]
+    v_co = wind_type_params["v_cut_out"]
+    k = wind_type_params["power_exponent"]
+    ramp = np.clip((v - v_ci) / (v_r - v_ci), 0.0, 1.0) ** k
+    cf = np.where((v < v_ci) | (v >= v_co), 0.0, np.where(v >= v_r, 1.0, ramp))
+    return cf * 24.0 * np.asarray(days, dtype=float)
+
+
+def monthly_yields(
+    flux: pd.DataFrame,
+    solar_type_params: dict[str, Any],
+    wind_type_params: dict[str, Any],
+) -> tuple[list[int], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Monthly flux (12 rows) or multi-year flux (indexed by (year, month)) → (years, solar_per_kw,
+    wind_per_kw, days), each array (years × 12). `years` is empty for a single unlabelled year.
+    """
+    days = flux["days_in_month"].to_numpy(dtype=float).reshape(-1, 12)
+    solar_per_kw = solar_yield_per_kw(flux["ghi_mj_per_m2"].to_numpy(dtype=float).reshape(-1, 12), solar_type_params)
+    wind_per_kw = wind_yield_per_kw(
+        flux["wind_speed_10m_max"].to_numpy(dtype=float).reshape(-1, 12), wind_type_params, days
+    )
+    years = [int(y) for y in flux.index.get_level_values(0).unique()] if isinstance(flux.index, pd.MultiIndex) else []
+    return years, solar_per_kw, wind_per_kw, days
+
+
+def _battery_terms(battery_params: dict[str, Any] | None) -> tuple[float, float, float]:
+    bp = battery_params or {}
+    return (
+        float(bp.get("round_trip_efficiency", 0.0)),
+        float(bp.get("depth_of_discharge", 0.0)),
+        float(bp.get("cycles_per_day", 0.0)),
+    )
+
+
+def _pre_battery_balance(
+    solar: np.ndarray,
+    wind: np.ndarray,
+    demand: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Realistic (import, export) before storage: net monthly imbalance + intraday mismatch pair."""
+    solar = np.maximum(solar, 0.0)
+    wind = np.maximum(wind, 0.0)
+    gen = np.maximum(solar + wind, 0.0)
+    demand = np.maximum(demand, 0.0)
+    net_export = np.maximum(gen - demand, 0.0)
+    net_import = np.maximum(demand - gen, 0.0)
+    matched = np.minimum(gen, demand)
+    safe_gen = np.where(gen > 0, gen, 1.0)
+    intraday_factor = np.where(
+        gen > 0,
+        INTRADAY_MISMATCH_SOLAR * (solar / safe_gen) + INTRADAY_MISMATCH_WIND * (wind / safe_gen),
+        0.0,
+    )
+    pair = matched * intraday_factor
+    return net_import + pair, net_export + pair
+
+
+def _apply_battery(
+    realistic_import: np.ndarray,
+    realistic_export: np.ndarray,
+    battery_kwh: float,
+    days: np.ndarray,
+    eta: float,
+    dod: float,
+    cycles_per_day: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Shift export to import through a battery of battery_kwh; `days` broadcasts against the month axis."""
+    if not (battery_kwh > 0 and eta > 0 and dod > 0 and cycles_per_day > 0):
+        return realistic_import, realistic_export
+    throughput = battery_kwh * dod * cycles_per_day * days
+    shift = np.minimum(np.minimum(realistic_import, realistic_export * eta), throughput)
+    new_import = np.maximum(realistic_import - shift, 0.0)
+    new_export = np.maximum(realistic_export - shift / eta, 0.0)
+    return new_import, new_export
+
+
+def evaluate_grid(
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    solar_kws: np.ndarray,
+    wind_kws: np.ndarray,
+    battery_kwhs: np.ndarray,
+    battery_params: dict[str, Any] | None,
+) -> dict[str, np.ndarray]:
+    """
+    Annual totals for every (year, solar, wind, battery) candidate.
+
+    solar_per_kw, wind_per_kw, days: (years, 12). demand: (12,) or (years, 12).
+    Returns solar_kwh (Y, S), wind_kwh (Y, W), import_kwh and export_kwh (Y, S, W, B).
+    """
+    solar_per_kw = np.atleast_2d(np.asarray(solar_per_kw, dtype=float))
+    wind_per_kw = np.atleast_2d(np.asarray(wind_per_kw, dtype=float))
+    days = np.atleast_2d(np.asarray(days, dtype=float))
+    demand = np.asarray(demand, dtype=float)
+    if demand.ndim == 1:
+        demand = demand[None, :]
+
+    # (Y, S, 1, 12) and (Y, 1, W, 12)
+    solar = solar_kws[None, :, None, None] * solar_per_kw[:, None, None, :]
+    wind = wind_kws[None, None, :, None] * wind_per_kw[:, None, None, :]
+    realistic_import, realistic_export = _pre_battery_balance(solar, wind, demand[:, None, None, :])
+
+    eta, dod, cycles = _battery_terms(battery_params)
+    days_b = days[:, None, None, :]
+    n_years = solar_per_kw.shape[0]
+    shape = (n_years, len(solar_kws), len(wind_kws), len(battery_kwhs))
+    import_kwh = np.empty(shape)
+    export_kwh = np.empty(shape)
+    for j, battery_kwh in enumerate(battery_kwhs):
+        imp, exp = _apply_battery(realistic_import, realistic_export, float(battery_kwh), days_b, eta, dod, cycles)
+        import_kwh[..., j] = imp.sum(axis=-1)
+        export_kwh[..., j] = exp.sum(axis=-1)
+
+    return {
+        "solar_kwh": solar_kws[None, :] * solar_per_kw.sum(axis=1)[:, None],
+        "wind_kwh": wind_kws[None, :] * wind_per_kw.sum(axis=1)[:, None],
+        "import_kwh": import_kwh,
+        "export_kwh": export_kwh,
+    }
+
+
+def score_candidates(
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    solar_kws: np.ndarray,
+    wind_kws: np.ndarray,
+    battery_kwhs: np.ndarray,
+    battery_params: dict[str, Any] | None,
+    *,
+    annual_consumption_kwh: float,
+    min_demand_met_from_gen_pct: float,
+    solar_capex_per_kw: float,
+    wind_capex_per_kw: float,
+    battery_capex_per_kwh: float,
+    grid_price_per_kwh: float,
+    export_price_per_kwh: float,
+    optimize_over_years: float,
+    objective: str = "total_cost",
+    lifetime_params: dict[str, Any] | None = None,
+    grid: dict[str, np.ndarray] | None = None,
+    no_battery_grid: dict[str, np.ndarray] | None = None,
+) -> dict[str, Any]:
+    """
+    Evaluate the sweep and score every candidate as optimize_system_capacity does.
+    grid / no_battery_grid: evaluate_grid output already at hand for these sizes (and at battery 0,
+    for the NPV objective), e.g. from the session warm start; evaluated here when None.
+
+    Returns grid (evaluate_grid output), annual_gen_grid (Y, S, W), net_opex_grid and
+    total_cost_grid (Y, S, W, B), objective_grid (S, W, B; mean cost over years, inf where the
+    generation share is below min_demand_met_from_gen_pct) and evaluations (feasible candidates).
+    """
+    from src.models.lifetime_financials import npv_cost
+
+    if grid is None:
+        grid = evaluate_grid(
+            solar_per_kw, wind_per_kw, demand, days,
+            solar_kws, wind_kws, battery_kwhs, battery_params,
+        )
+    # (years, solar, wind): generation-only share of demand decides feasibility (mean year).
+    annual_gen_grid = grid["solar_kwh"][:, :, None] + grid["wind_kwh"][:, None, :]
+    mean_gen = annual_gen_grid.mean(axis=0)
+    if annual_consumption_kwh > 0:
+        demand_met_grid = mean_gen / annual_consumption_kwh * 100.0
+    else:
+        demand_met_grid = np.zeros_like(mean_gen)
+    if min_demand_met_from_gen_pct > 0:
+        feasible = demand_met_grid >= min_demand_met_from_gen_pct
+    else:
+        feasible = np.ones_like(mean_gen, dtype=bool)
+    capex_grid = (
+        solar_kws[:, None, None] * solar_capex_per_kw
+        + wind_kws[None, :, None] * wind_capex_per_kw
+        + battery_kwhs[None, None, :] * battery_capex_per_kwh
+    )
+    net_opex_grid = grid["import_kwh"] * grid_price_per_kwh - grid["export_kwh"] * export_price_per_kwh
+    total_cost_grid = capex_grid[None, ...] + net_opex_grid * optimize_over_years
+    if objective == "npv":
+        # Battery's import/export shift against the same generation without one (fades with age).
+        if battery_kwhs.size and float(battery_kwhs.max()) > 0:
+            no_battery = no_battery_grid or evaluate_grid(
+                solar_per_kw, wind_per_kw, demand, days,
+                solar_kws, wind_kws, np.zeros(1), battery_params,
+            )
+            import_saving = no_battery["import_kwh"] - grid["import_kwh"]
+            export_reduction = no_battery["export_kwh"] - grid["export_kwh"]
+        else:
+            import_saving = export_reduction = 0.0
+        total_cost_grid = npv_cost(
+            solar_kwh=grid["solar_kwh"][:, :, None, None],
+            wind_kwh=grid["wind_kwh"][:, None, :, None],
+            import_kwh=grid["import_kwh"],
+            export_kwh=grid["export_kwh"],
+            solar_capex=(solar_kws * solar_capex_per_kw)[:, None, None],
+            wind_capex=(wind_kws * wind_capex_per_kw)[None, :, None],
+            battery_capex=(battery_kwhs * battery_capex_per_kwh)[None, None, :],
+            grid_price_per_kwh=grid_price_per_kwh,
+            export_price_per_kwh=export_price_per_kwh,
+            battery_import_saving_kwh=import_saving,
+            battery_export_reduction_kwh=export_reduction,
+            horizon_years=optimize_over_years,
+            params=lifetime_params,
+        )
+    # Objective: mean total cost across weather years (the single year itself otherwise).
+    objective_grid = np.where(feasible[:, :, None], total_cost_grid.mean(axis=0), np.inf)
+    return {
+        "grid": grid,
+        "annual_gen_grid": annual_gen_grid,
+        "net_opex_grid": net_opex_grid,
+        "total_cost_grid": total_cost_grid,
+        "objective_grid": objective_grid,
+        "evaluations": int(feasible.sum()) * len(battery_kwhs),
+    }
+
+
+def candidate_monthly_balance(
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    solar_kw: float,
+    wind_kw: float,
+    battery_kwh: float,
+    battery_params: dict[str, Any] | None,
+) -> dict[str, np.ndarray]:
+    """Per-year monthly solar, wind, import and export (each (Y, 12)) for one sizing."""
+    solar = solar_kw * np.atleast_2d(np.asarray(solar_per_kw, dtype=float))
+    wind = wind_kw * np.atleast_2d(np.asarray(wind_per_kw, dtype=float))
+    demand = np.asarray(demand, dtype=float)
+    if demand.ndim == 1:
+        demand = np.broadcast_to(demand, solar.shape)
+    realistic_import, realistic_export = _pre_battery_balance(solar, wind, demand)
+    eta, dod, cycles = _battery_terms(battery_params)
+    imp, exp = _apply_battery(
+        realistic_import, realistic_export, battery_kwh,
+        np.atleast_2d(np.asarray(days, dtype=float)), eta, dod, cycles,
+    )
+    return {"solar_kwh": solar, "wind_kwh": wind, "import_kwh": imp, "export_kwh": exp}
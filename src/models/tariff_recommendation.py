@@ -2,16 +2,19 @@
 Tariff recommendation: combine energy balancing optimisation with scraped tariff data.
 Runs optimisation once for the user's location and demand, then scores each tariff by
 total cost (capex + import cost − export revenue + standing charge) over the chosen horizon.
+When any tariff is time-of-use (rate windows or half-hourly rates), every tariff is instead costed
+on a half-hourly year with a price-aware battery (src.models.time_of_use).
 """
 
 from __future__ import annotations
 
 from typing import Any, Literal
 
-from src.models.energy_balancing import get_optimised_system, DEFAULT_PRICING
+from src.metrics import span
 
 __all__ = [
     "recommend_tariff",
+    "reference_grid_price",
     "tariff_to_pricing_dict",
     "coerce_unit_rate_pence_per_kwh",
     "coerce_standing_charge_pence_per_day",
@@ -25,9 +28,12 @@ def coerce_unit_rate_pence_per_kwh(raw: float) -> float:
     v = float(raw or 0)
     if v <= 0:
         return 0.0
-    if v < 2.0:
-        return v * 100.0
-    return v
+    return v * _unit_rate_scale(v)
+
+
+def _unit_rate_scale(headline: float) -> float:
+    """100 when a positive headline unit rate below 2 looks like £/kWh, else 1 (already pence)."""
+    return 100.0 if 0 < headline < 2.0 else 1.0
 
 
 def coerce_standing_charge_pence_per_day(raw: float) -> float:
@@ -48,28 +54,135 @@ def tariff_to_pricing_dict(tariff: Any) -> dict[str, Any]:
     Handles both src.api.energyScraping.Tariff dataclass and plain dicts.
     """
     if hasattr(tariff, "unit_rate"):
-        return {
-            "unit_rate_p_per_kwh": coerce_unit_rate_pence_per_kwh(float(tariff.unit_rate)),
+        ur = float(tariff.unit_rate or 0)
+        out = {
+            "unit_rate_p_per_kwh": coerce_unit_rate_pence_per_kwh(ur),
             "standing_charge_p_per_day": coerce_standing_charge_pence_per_day(float(tariff.standing_charge_day)),
             "supplier_name": getattr(tariff, "new_supplier_name", "") or getattr(tariff, "supplier_name", ""),
             "tariff_name": getattr(tariff, "tariff_name", "") or "",
             "is_green": bool(getattr(tariff, "is_green", False)),
             "annual_cost_new": float(getattr(tariff, "annual_cost_new", 0)),
+            "tariff_type": "flat",
         }
+        _add_time_of_use(out, {k: getattr(tariff, k, None) for k in _TOU_KEYS}, ur)
+        return out
     if isinstance(tariff, dict):
         ur = float(tariff.get("unit_rate", tariff.get("unit_rate_p_per_kwh", 0)))
         sc = float(tariff.get("standing_charge_day", tariff.get("standing_charge_p_per_day", 0)))
-        return {
+        out = {
             "unit_rate_p_per_kwh": coerce_unit_rate_pence_per_kwh(ur),
             "standing_charge_p_per_day": coerce_standing_charge_pence_per_day(sc),
             "supplier_name": str(tariff.get("new_supplier_name", tariff.get("supplier_name", ""))),
             "tariff_name": str(tariff.get("tariff_name", "")),
             "is_green": bool(tariff.get("is_green", False)),
             "annual_cost_new": float(tariff.get("annual_cost_new", 0)),
+            "tariff_type": "flat",
         }
+        _add_time_of_use(out, tariff, ur)
+        return out
     raise TypeError("tariff must be a Tariff-like object or dict with unit_rate and standing_charge_day")
 
 
+_TOU_KEYS = ("rate_windows", "half_hourly_rates", "export_rates")
+
+
+def _add_time_of_use(out: dict[str, Any], tariff: dict[str, Any], headline: float) -> None:
+    """
+    Time-of-use keys on a tariff dict: rate_windows ([{start, end, unit_rate}] over the base unit
+    rate, e.g. Economy 7 / Go), half_hourly_rates (48 daily or one per half-hour, e.g. Agile) and
+    export_rates (same forms as half_hourly_rates). Rates are p/kWh; half-hourly values are used
+    as given (Agile can go negative). Window rates take the tariff's unit scale, decided once from
+    the headline rate (or the dearest window without one), so a 1.5p or -0.5p window stays pence.
+    """
+    from src.models.time_of_use import SLOTS_PER_DAY, rate_schedule
+
+    windows = tariff.get("rate_windows") or None
+    half_hourly = tariff.get("half_hourly_rates") or None
+    if windows or half_hourly:
+        window_rates = [float(w.get("unit_rate", w.get("rate", 0)) or 0) for w in windows or []]
+        scale = _unit_rate_scale(headline if headline > 0 else max(window_rates, default=0.0))
+        windows = [{**w, "unit_rate": r * scale} for w, r in zip(windows or [], window_rates)]
+        rates = rate_schedule(out["unit_rate_p_per_kwh"], windows, half_hourly)
+        out["import_rates_p_per_kwh"] = [float(x) for x in rates]
+        out["tariff_type"] = "agile" if len(rates) > SLOTS_PER_DAY else "time_of_use"
+        if out["unit_rate_p_per_kwh"] <= 0:
+            out["unit_rate_p_per_kwh"] = round(float(rates.mean()), 3)
+    if tariff.get("export_rates"):
+        out["export_rates_p_per_kwh"] = [float(x) for x in tariff["export_rates"]]
+
+
+def reference_grid_price(pricing_dicts: list[dict[str, Any]]) -> float:
+    """
+    Reference grid price (£/kWh) for the single optimisation run: the first positive tariff unit
+    rate. If scraped data is missing and every unit_rate is 0, the optimiser could pick solar=0, so
+    the default grid price is used instead.
+    """
+    from src.models.energy_balancing import DEFAULT_PRICING
+
+    unit_rate_candidates_p = [p.get("unit_rate_p_per_kwh", 0) for p in pricing_dicts if float(p.get("unit_rate_p_per_kwh", 0) or 0) > 0]
+    unit_rate_ref_p = unit_rate_candidates_p[0] if unit_rate_candidates_p else (pricing_dicts[0].get("unit_rate_p_per_kwh", 0) if pricing_dicts else 0) or 0
+    grid_price_ref = float(unit_rate_ref_p) / 100.0  # p -> £
+    if grid_price_ref <= 0:
+        grid_price_ref = float(DEFAULT_PRICING.get("grid_price_per_kwh", 0.25))
+    return grid_price_ref
+
+
+def _public_tariff(p: dict[str, Any]) -> dict[str, Any]:
+    """Pricing dict for responses: per-slot series longer than a day are summarised, not echoed."""
+    out = dict(p)
+    for key in ("import_rates_p_per_kwh", "export_rates_p_per_kwh"):
+        rates = out.get(key)
+        if rates is not None and len(rates) > 48:
+            del out[key]
+            prefix = key.replace("_rates_p_per_kwh", "")
+            out[f"{prefix}_rate_slots"] = len(rates)
+            out[f"{prefix}_rate_min_p_per_kwh"] = round(min(rates), 3)
+            out[f"{prefix}_rate_max_p_per_kwh"] = round(max(rates), 3)
+    return out
+
+
+def _score_half_hourly(
+    pricing_dicts: list[dict[str, Any]],
+    optimisation_result: dict[str, Any],
+    export_price_per_kwh: float,
+    battery_type_params: dict[str, Any] | None,
+    demand_half_hourly_kwh: Any = None,
+) -> dict[str, Any]:
+    """
+    All tariffs against one half-hourly year of the optimised system (see time_of_use.score_tariffs).
+    A measured half-hourly demand year keeps its shape, scaled to the optimiser's annual demand.
+    """
+    import numpy as np
+
+    from src.models.time_of_use import half_hourly_profile, score_tariffs
+
+    mb = optimisation_result.get("monthly_balance")
+    if mb is not None and len(mb) == 12:
+        solar = [float(x) for x in mb["solar_kwh"]]
+        wind = [float(x) for x in mb["wind_kwh"]]
+        demand = [float(x) for x in mb["demand_kwh"]]
+    else:
+        solar = [float(optimisation_result.get("annual_solar_generation_kwh", 0.0)) / 12.0] * 12
+        wind = [float(optimisation_result.get("annual_wind_generation_kwh", 0.0)) / 12.0] * 12
+        demand = [float(optimisation_result["annual_demand_kwh"]) / 12.0] * 12
+    measured = None
+    if demand_half_hourly_kwh is not None:
+        measured = np.asarray(demand_half_hourly_kwh, dtype=float)
+        total = float(measured.sum())
+        if total > 0:
+            measured = measured * (float(optimisation_result["annual_demand_kwh"]) / total)
+    profile = half_hourly_profile(solar, wind, demand, demand_half_hourly_kwh=measured)
+    flat_export = [export_price_per_kwh * 100.0]
+    return score_tariffs(
+        profile,
+        [p.get("import_rates_p_per_kwh") or [p["unit_rate_p_per_kwh"]] for p in pricing_dicts],
+        [p.get("export_rates_p_per_kwh") or flat_export for p in pricing_dicts],
+        [p["standing_charge_p_per_day"] for p in pricing_dicts],
+        float(optimisation_result.get("optimal_battery_kwh", 0.0)),
+        battery_type_params,
+    )
+
+
 def recommend_tariff(
     tariffs: list[Any],
     latitude: float,
@@ -80,7 +193,7 @@ def recommend_tariff(
     *,
     export_price_per_kwh: float = 0.05,
     optimize_over_years: float = 5.0,
-    flux_source: Literal["forecast", "last_year_monthly"] = "last_year_monthly",
+    flux_source: Literal["forecast", "last_year_monthly", "multi_year"] = "last_year_monthly",
     heating_fraction: float = 0.6,
     insulation_r_value: float = 0.0,
     heat_pump_cop: float = 1.0,
@@ -93,6 +206,13 @@ def recommend_tariff(
     battery_min_kwh: float = 0.0,
     battery_step_kwh: float = 1.0,
     prefer_green: bool = False,
+    flux: Any = None,
+    flux_years: int = 10,
+    objective: str = "total_cost",
+    lifetime_params: dict[str, Any] | None = None,
+    measured_monthly_demand_kwh: list[float] | None = None,
+    demand_half_hourly_kwh: Any = None,
+    session_id: str | None = None,
 ) -> dict[str, Any]:
     """
     Recommend a tariff based on scraped options and optimal solar/wind sizing.
@@ -104,22 +224,30 @@ def recommend_tariff(
 
     Args:
         tariffs: List of Tariff objects (from scraping) or dicts with unit_rate (p/kWh),
-                standing_charge_day (p/day), and optionally new_supplier_name, tariff_name, is_green.
+                standing_charge_day (p/day), and optionally new_supplier_name, tariff_name, is_green,
+                rate_windows / half_hourly_rates / export_rates (time-of-use; see _add_time_of_use).
         latitude, longitude: location (e.g. from postcode lookup or first tariff).
         annual_consumption_kwh: annual electricity demand (e.g. from user or first tariff's annual_electricity_kwh).
         solar_type_params, wind_type_params: from src.data.energy_tiers (SOLAR_TIERS, WIND_TIERS).
         export_price_per_kwh: export tariff in £/kWh (scraped data often omits this; default 5p).
         optimize_over_years: cost horizon in years (default 5).
-        flux_source: 'last_year_monthly' or 'forecast' for weather data.
+        flux_source: 'last_year_monthly', 'forecast' or 'multi_year' (last `flux_years` archive years) for weather data.
         heating_fraction, insulation_r_value, heat_pump_cop: demand adjustment for optimisation.
         solar_max_kw, wind_max_kw, min_solar_kw, min_wind_kw: optimisation search bounds.
         prefer_green: if True, among similar-cost tariffs prefer is_green (within 2% of best).
+        flux: optional pre-fetched weather flux for flux_source, passed through to get_optimised_system.
+        objective, lifetime_params: sizing objective ('total_cost' or discounted 'npv') and lifetime
+                finance overrides, passed through to get_optimised_system.
+        measured_monthly_demand_kwh, demand_half_hourly_kwh: measured demand (smart-meter upload):
+                monthly totals for the optimiser and a 365×48 year for half-hourly tariff costing.
+        session_id: client session for the optimiser warm start, passed through to get_optimised_system.
 
     Returns:
         Dict with:
           optimisation_result: full result from get_optimised_system.
           recommended_tariff: best tariff (normalized dict with supplier_name, tariff_name, unit_rate, etc.).
-          ranking: list of dicts { tariff, total_cost_gbp, opex_per_year_gbp, rank } sorted by total cost.
+          ranking: list of dicts { tariff, total_cost_gbp, opex_per_year_gbp, rank } sorted by total cost
+                   (half-hourly costing adds annual_import_kwh / annual_export_kwh per tariff).
           annual_import_kwh, annual_export_kwh, capex: from optimisation.
     """
     if not tariffs:
@@ -133,6 +261,9 @@ def recommend_tariff(
             "error": "No tariffs provided",
         }
 
+    # Deferred: energy_balancing pulls in pandas, which the web app only needs once a request optimises.
+    from src.models.energy_balancing import get_optimised_system, DEFAULT_PRICING
+
     # Normalize all tariffs to pricing dicts
     pricing_dicts = []
     for t in tariffs:
@@ -151,13 +282,7 @@ def recommend_tariff(
             "error": "No valid tariff data could be extracted",
         }
 
-    # Use a tariff unit rate as reference grid price for the single optimisation run.
-    # If scraped data is missing and unit_rate is 0 for the first tariff, the optimiser can pick solar=0.
-    unit_rate_candidates_p = [p.get("unit_rate_p_per_kwh", 0) for p in pricing_dicts if float(p.get("unit_rate_p_per_kwh", 0) or 0) > 0]
-    unit_rate_ref_p = unit_rate_candidates_p[0] if unit_rate_candidates_p else pricing_dicts[0].get("unit_rate_p_per_kwh", 0) or 0
-    grid_price_ref = float(unit_rate_ref_p) / 100.0  # p -> £
-    if grid_price_ref <= 0:
-        grid_price_ref = float(DEFAULT_PRICING.get("grid_price_per_kwh", 0.25))
+    grid_price_ref = reference_grid_price(pricing_dicts)
 
     solar_capex = float(
         solar_type_params.get("solar_capex_per_kw", DEFAULT_PRICING["solar_capex_per_kw"])
@@ -171,33 +296,40 @@ def recommend_tariff(
         )
     )
 
-    optimisation_result = get_optimised_system(
-        latitude,
-        longitude,
-        annual_consumption_kwh,
-        solar_type_params,
-        wind_type_params,
-        pricing={
-            "grid_price_per_kwh": grid_price_ref,
-            "export_price_per_kwh": export_price_per_kwh,
-            "solar_capex_per_kw": solar_capex,
-            "wind_capex_per_kw": wind_capex,
-            "battery_capex_per_kwh": battery_capex,
-        },
-        solar_max_kw=solar_max_kw,
-        wind_max_kw=wind_max_kw,
-        optimize_over_years=optimize_over_years,
-        flux_source=flux_source,
-        min_solar_kw=min_solar_kw,
-        min_wind_kw=min_wind_kw,
-        heating_fraction=heating_fraction,
-        insulation_r_value=insulation_r_value,
-        heat_pump_cop=heat_pump_cop,
-        battery_type_params=battery_type_params,
-        battery_max_kwh=battery_max_kwh,
-        battery_min_kwh=battery_min_kwh,
-        battery_step_kwh=battery_step_kwh,
-    )
+    with span("tariff.optimise"):
+        optimisation_result = get_optimised_system(
+            latitude,
+            longitude,
+            annual_consumption_kwh,
+            solar_type_params,
+            wind_type_params,
+            pricing={
+                "grid_price_per_kwh": grid_price_ref,
+                "export_price_per_kwh": export_price_per_kwh,
+                "solar_capex_per_kw": solar_capex,
+                "wind_capex_per_kw": wind_capex,
+                "battery_capex_per_kwh": battery_capex,
+            },
+            solar_max_kw=solar_max_kw,
+            wind_max_kw=wind_max_kw,
+            optimize_over_years=optimize_over_years,
+            flux_source=flux_source,
+            min_solar_kw=min_solar_kw,
+            min_wind_kw=min_wind_kw,
+            heating_fraction=heating_fraction,
+            insulation_r_value=insulation_r_value,
+            heat_pump_cop=heat_pump_cop,
+            battery_type_params=battery_type_params,
+            battery_max_kwh=battery_max_kwh,
+            battery_min_kwh=battery_min_kwh,
+            battery_step_kwh=battery_step_kwh,
+            flux=flux,
+            flux_years=flux_years,
+            objective=objective,
+            lifetime_params=lifetime_params,
+            measured_monthly_demand_kwh=measured_monthly_demand_kwh,
+            session_id=session_id,
+        )
 
     capex = optimisation_result["capex"]
     annual_import_kwh = optimisation_result["annual_import_kwh"]
@@ -223,16 +355,33 @@ def recommend_tariff(
             - annual_export_kwh * export_price_per_kwh
         )
 
-    scored = []
-    for p in pricing_dicts:
-        total = total_cost_gbp(p)
-        opex = opex_per_year_gbp(p)
-        scored.append({
-            "tariff": p,
-            "total_cost_gbp": round(total, 2),
-            "opex_per_year_gbp": round(opex, 2),
-        })
-    scored.sort(key=lambda x: x["total_cost_gbp"])
+    with span("tariff.score"):
+        scored = []
+        if any(p.get("tariff_type", "flat") != "flat" for p in pricing_dicts):
+            hh = _score_half_hourly(
+                pricing_dicts, optimisation_result, export_price_per_kwh, battery_type_params,
+                demand_half_hourly_kwh,
+            )
+            for i, p in enumerate(pricing_dicts):
+                opex = float(hh["annual_cost_gbp"][i])
+                scored.append({
+                    "tariff": _public_tariff(p),
+                    "total_cost_gbp": round(capex + opex * optimize_over_years, 2),
+                    "opex_per_year_gbp": round(opex, 2),
+                    "annual_import_kwh": round(float(hh["import_kwh"][i]), 1),
+                    "annual_export_kwh": round(float(hh["export_kwh"][i]), 1),
+                    "costing": "half_hourly",
+                })
+        else:
+            for p in pricing_dicts:
+                total = total_cost_gbp(p)
+                opex = opex_per_year_gbp(p)
+                scored.append({
+                    "tariff": p,
+                    "total_cost_gbp": round(total, 2),
+                    "opex_per_year_gbp": round(opex, 2),
+                })
+        scored.sort(key=lambda x: x["total_cost_gbp"])
 
     best_total = scored[0]["total_cost_gbp"] if scored else 0.0
     threshold_similar = best_total * 0.02  # 2% tolerance for "similar cost"
@@ -0,0 +1,221 @@
+"""
+Half-hourly costing for time-of-use tariffs (Economy 7, Octopus Go, Agile and plain flat rates).
+
+A tariff's import (and optionally export) price is a vector of half-hourly rates in p/kWh: either
+48 values repeated every day, or one value per half-hour of the year (Agile-style; shorter series
+are repeated to fill the year). Windowed tariffs are given as a base unit rate plus
+[{"start": "00:30", "end": "07:30", "unit_rate": 9.5}, ...] and expanded to 48 slots.
+
+The energy profile is a (days × 48) year built from the monthly balance: demand follows a typical
+domestic load shape (or a measured half-hourly profile), solar a daylight bell that widens with
+day length, wind is flat. Every tariff is costed against that year in one vectorised pass over a
+(tariffs × days × 48) array, including a price-aware battery:
+
+- surplus generation is stored and delivered to the most expensive deficit slots, when the import
+  price there beats the export revenue given up (export rate / round-trip efficiency);
+- spare daily throughput then arbitrages the grid: charge in the cheapest slots, discharge where
+  price × efficiency exceeds the average charge price.
+Each day is one charge/discharge cycle of up to capacity × DoD × cycles/day at the load side,
+without intra-day ordering (the same daily-cycle simplification the monthly model uses).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+__all__ = [
+    "SLOTS_PER_DAY",
+    "dispatch_battery",
+    "half_hourly_profile",
+    "rate_schedule",
+    "score_tariffs",
+]
+
+SLOTS_PER_DAY = 48
+
+# Typical UK domestic weekday load by hour (relative; Elexon profile class 1 shape, rounded).
+_DEMAND_SHAPE_HOURLY = [
+    0.55, 0.45, 0.40, 0.38, 0.38, 0.42, 0.65, 0.95, 1.00, 0.90, 0.85, 0.85,
+    0.88, 0.85, 0.82, 0.88, 1.05, 1.45, 1.65, 1.55, 1.35, 1.15, 0.95, 0.72,
+]
+# Approximate daylight hours by month at ~52°N (mid-England).
+_DAY_LENGTH_HOURS = [8.0, 9.9, 11.8, 13.8, 15.6, 16.6, 16.1, 14.5, 12.5, 10.5, 8.6, 7.6]
+_DEFAULT_DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _slot(hhmm: str) -> int:
+    hours, _, minutes = str(hhmm).strip().partition(":")
+    return (int(hours) % 24) * 2 + (1 if int(minutes or 0) >= 30 else 0)
+
+
+def rate_schedule(
+    unit_rate_p_per_kwh: float,
+    rate_windows: list[dict[str, Any]] | None = None,
+    half_hourly_rates: list[float] | None = None,
+) -> np.ndarray:
+    """
+    Import rates in p/kWh as a (48,) daily pattern or a longer per-slot series.
+
+    half_hourly_rates wins when given; otherwise rate_windows ("start" inclusive, "end" exclusive,
+    may wrap midnight) override unit_rate_p_per_kwh inside each window.
+    """
+    if half_hourly_rates is not None and len(half_hourly_rates):
+        return np.asarray(half_hourly_rates, dtype=float)
+    rates = np.full(SLOTS_PER_DAY, float(unit_rate_p_per_kwh))
+    for w in rate_windows or []:
+        start, end = _slot(w["start"]), _slot(w["end"])
+        rate = float(w.get("unit_rate", w.get("rate")))
+        if start < end:
+            rates[start:end] = rate
+        else:
+            rates[start:] = rate
+            rates[:end] = rate
+    return rates
+
+
+def _year_of_slots(rates: Any, n_days: int) -> np.ndarray:
+    """(n_days, 48) from a daily pattern or a per-slot series (repeated or truncated to the year)."""
+    r = np.asarray(rates, dtype=float).ravel()
+    if r.size == SLOTS_PER_DAY:
+        return np.broadcast_to(r, (n_days, SLOTS_PER_DAY))
+    return np.resize(r, n_days * SLOTS_PER_DAY).reshape(n_days, SLOTS_PER_DAY)
+
+
+def half_hourly_profile(
+    monthly_solar_kwh: list[float],
+    monthly_wind_kwh: list[float],
+    monthly_demand_kwh: list[float],
+    days_in_month: list[int] | None = None,
+    demand_half_hourly_kwh: Any = None,
+) -> dict[str, np.ndarray]:
+    """
+    A year of half-hourly solar, wind and demand (kWh, each (days, 48)) whose monthly totals
+    match the inputs. demand_half_hourly_kwh: optional measured (days × 48) or flat per-slot demand
+    used instead of the synthetic load shape (resized to the year).
+    """
+    days = list(days_in_month or _DEFAULT_DAYS_IN_MONTH)
+    month_of_day = np.repeat(np.arange(12), days)
+    n_days = len(month_of_day)
+    days_of_day = np.asarray(days, dtype=float)[month_of_day]
+
+    def per_day(monthly: list[float]) -> np.ndarray:
+        return np.asarray(monthly, dtype=float)[month_of_day] / days_of_day
+
+    t = (np.arange(SLOTS_PER_DAY) + 0.5) / 2.0  # slot mid-points, hours
+    half_day = np.asarray(_DAY_LENGTH_HOURS)[:, None] / 2.0
+    from_noon = t[None, :] - 12.0
+    bell = np.where(np.abs(from_noon) < half_day, np.cos(np.pi * from_noon / (2.0 * half_day)), 0.0)
+    solar_shape = bell / bell.sum(axis=1, keepdims=True)
+    demand_shape = np.repeat(np.asarray(_DEMAND_SHAPE_HOURLY, dtype=float), 2)
+    demand_shape /= demand_shape.sum()
+
+    if demand_half_hourly_kwh is not None:
+        demand = _year_of_slots(demand_half_hourly_kwh, n_days).astype(float)
+    else:
+        demand = per_day(monthly_demand_kwh)[:, None] * demand_shape[None, :]
+    return {
+        "solar_kwh": per_day(monthly_solar_kwh)[:, None] * solar_shape[month_of_day],
+        "wind_kwh": np.repeat(per_day(monthly_wind_kwh)[:, None] / SLOTS_PER_DAY, SLOTS_PER_DAY, axis=1),
+        "demand_kwh": demand,
+    }
+
+
+def _fill_highest_first(qty: np.ndarray, order: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Allocate `total` (...,) across slots (..., 48) in `order` (most expensive first), at most qty per slot."""
+    q_sorted = np.take_along_axis(qty, order, axis=-1)
+    before = np.cumsum(q_sorted, axis=-1) - q_sorted
+    alloc_sorted = np.clip(total[..., None] - before, 0.0, q_sorted)
+    alloc = np.empty_like(alloc_sorted)
+    np.put_along_axis(alloc, order, alloc_sorted, axis=-1)
+    return alloc
+
+
+def dispatch_battery(
+    import_kwh: np.ndarray,
+    export_kwh: np.ndarray,
+    import_price: np.ndarray,
+    export_price: np.ndarray,
+    battery_kwh: float,
+    battery_params: dict[str, Any] | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Price-aware daily battery dispatch (see module docstring). All arrays broadcast to
+    (..., days, 48); prices in any consistent unit. Returns adjusted (import_kwh, export_kwh).
+    """
+    bp = battery_params or {}
+    eta = float(bp.get("round_trip_efficiency", 0.0))
+    daily_kwh = float(battery_kwh) * float(bp.get("depth_of_discharge", 0.0)) * float(bp.get("cycles_per_day", 0.0))
+    shape = np.broadcast_shapes(import_kwh.shape, export_kwh.shape, import_price.shape, export_price.shape)
+    imp = np.broadcast_to(import_kwh, shape).astype(float)
+    exp = np.broadcast_to(export_kwh, shape).astype(float)
+    if battery_kwh <= 0 or eta <= 0 or daily_kwh <= 0:
+        return imp, exp
+    p_imp = np.broadcast_to(import_price, shape)
+    p_exp = np.broadcast_to(export_price, shape)
+    # Per-slot power limit at the load side; home batteries are typically ~0.5C.
+    slot_kwh = float(bp.get("power_kw", 0.5 * float(battery_kwh))) * 0.5
+    # One sort of the import prices serves every ranking below.
+    ascending = np.argsort(p_imp, axis=-1, kind="stable")
+    descending = ascending[..., ::-1]
+
+    # 1) Store surplus; deliver it where import beats the export revenue it gives up.
+    surplus = exp.sum(axis=-1)
+    safe_surplus = np.where(surplus > 0, surplus, 1.0)
+    surplus_value = np.where(surplus > 0, (exp * p_exp).sum(axis=-1) / safe_surplus, 0.0)
+    worth_it = p_imp > (surplus_value / eta)[..., None]
+    headroom = np.minimum(imp, slot_kwh) * worth_it
+    from_surplus = _fill_highest_first(headroom, descending, np.minimum(surplus * eta, daily_kwh))
+    used = from_surplus.sum(axis=-1)
+    imp = imp - from_surplus
+    exp = exp * (1.0 - (used / eta) / safe_surplus)[..., None]
+
+    # 2) Grid arbitrage with what is left of the daily cycle.
+    remaining = daily_kwh - used
+    n_charge = np.clip(np.ceil(remaining / eta / slot_kwh), 1, SLOTS_PER_DAY).astype(int)
+    cheapest = np.take_along_axis(p_imp, ascending, axis=-1)
+    charge_price = np.take_along_axis(np.cumsum(cheapest, axis=-1), n_charge[..., None] - 1, axis=-1)[..., 0] / n_charge
+    charge_slots = np.empty(shape, dtype=bool)
+    np.put_along_axis(charge_slots, ascending, np.arange(SLOTS_PER_DAY) < n_charge[..., None], axis=-1)
+    profitable = (p_imp * eta > charge_price[..., None]) & ~charge_slots
+    headroom = np.minimum(imp, slot_kwh - from_surplus) * profitable
+    from_grid = _fill_highest_first(headroom, descending, remaining)
+    imp = imp - from_grid + charge_slots * (from_grid.sum(axis=-1) / eta / n_charge)[..., None]
+    return imp, np.maximum(exp, 0.0)
+
+
+def score_tariffs(
+    profile: dict[str, np.ndarray],
+    import_rates_p_per_kwh: list[Any],
+    export_rates_p_per_kwh: list[Any],
+    standing_charge_p_per_day: list[float],
+    battery_kwh: float = 0.0,
+    battery_params: dict[str, Any] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Annual cost of every tariff against one half-hourly year, battery dispatched per tariff.
+
+    import/export rates: one entry per tariff, each a (48,) daily pattern or per-slot series
+    (p/kWh); standing charges in p/day. Returns (tariffs,) arrays in £: import_kwh, export_kwh,
+    import_cost_gbp, export_revenue_gbp, standing_gbp, annual_cost_gbp.
+    """
+    gen = profile["solar_kwh"] + profile["wind_kwh"]
+    net = profile["demand_kwh"] - gen
+    n_days = net.shape[0]
+    p_imp = np.stack([_year_of_slots(r, n_days) for r in import_rates_p_per_kwh]) / 100.0
+    p_exp = np.stack([_year_of_slots(r, n_days) for r in export_rates_p_per_kwh]) / 100.0
+    imp, exp = dispatch_battery(
+        np.maximum(net, 0.0)[None], np.maximum(-net, 0.0)[None], p_imp, p_exp, battery_kwh, battery_params,
+    )
+    import_cost = (imp * p_imp).sum(axis=(-2, -1))
+    export_revenue = (exp * p_exp).sum(axis=(-2, -1))
+    standing = np.asarray(standing_charge_p_per_day, dtype=float) / 100.0 * n_days
+    return {
+        "import_kwh": imp.sum(axis=(-2, -1)),
+        "export_kwh": exp.sum(axis=(-2, -1)),
+        "import_cost_gbp": import_cost,
+        "export_revenue_gbp": export_revenue,
+        "standing_gbp": standing,
+        "annual_cost_gbp": import_cost - export_revenue + standing,
+    }
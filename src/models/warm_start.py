@@ -0,0 +1,277 @@
+"""
+Session-scoped warm start for the optimiser sweep.
+
+On the optimiser page most edits are prices (export price, years, tariff, capex) or bounds (max
+solar/wind/battery). Neither changes the physics: a candidate's annual import/export depends only
+on the weather yields, the demand schedule, its (solar, wind, battery) size and the battery's
+efficiency terms. So each browser session keeps the evaluated energy tensors for its current
+location and demand:
+
+- price-only changes re-score the cached tensors (score_candidates without evaluate_grid);
+- bound changes evaluate only the cells not seen before — new solar rows, new wind columns and
+  new battery slices — and append them to the cache;
+- anything that changes the physics (location, weather years, demand, tiers, battery efficiency)
+  starts a fresh state for that session.
+
+Cached cells are evaluated by the same evaluate_grid as a cold sweep, so results are identical.
+States live in memory per process (OPTIMISER_SESSION_MAX sessions, OPTIMISER_SESSION_TTL_S idle
+expiry) and are capped at OPTIMISER_SESSION_MAX_CELLS cells; past that the state restarts from the
+current request's grid. Session ids come from the client, so all states together are also held to
+OPTIMISER_SESSION_TOTAL_CELLS, evicting the least recently used sessions.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+__all__ = ["cached_grid", "clear_sessions"]
+
+
+class _SessionStore:
+    """
+    Thread-safe LRU of session id -> sweep state, with an idle TTL. Bounded by session count and by
+    the total cached cells across sessions (least recently used states are evicted first).
+    """
+
+    def __init__(self, maxsize: int, ttl_s: float, max_total_cells: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.max_total_cells = max_total_cells
+        self._data: OrderedDict[str, tuple[float, dict[str, Any], int]] = OrderedDict()
+        self._cells = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_s:
+                self._pop(key)
+                return None
+            self._data[key] = (time.monotonic(), entry[1], entry[2])
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        cells = _state_cells(value)
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic(), value, cells)
+            self._cells += cells
+            while len(self._data) > 1 and (len(self._data) > self.maxsize or self._cells > self.max_total_cells):
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._cells -= entry[2]
+
+    @property
+    def total_cells(self) -> int:
+        with self._lock:
+            return self._cells
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._cells = 0
+
+
+def _state_cells(state: dict[str, Any]) -> int:
+    return int(state["import_kwh"].size)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+_store = _SessionStore(
+    maxsize=max(1, int(_env_number("OPTIMISER_SESSION_MAX", 500))),
+    ttl_s=_env_number("OPTIMISER_SESSION_TTL_S", 1800),
+    # Each cell holds an import and an export float64: 20M cells is ~320 MB per process.
+    max_total_cells=_env_number("OPTIMISER_SESSION_TOTAL_CELLS", 20_000_000),
+)
+_session_locks: dict[str, threading.Lock] = {}
+_session_locks_guard = threading.Lock()
+
+
+def clear_sessions() -> None:
+    """Drop every cached state (tests)."""
+    _store.clear()
+
+
+def _session_lock(session_id: str) -> threading.Lock:
+    with _session_locks_guard:
+        if len(_session_locks) > 4 * _store.maxsize:
+            _session_locks.clear()
+        return _session_locks.setdefault(session_id, threading.Lock())
+
+
+def _fingerprint(
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    battery_params: dict[str, Any] | None,
+) -> str:
+    """Hash of everything that determines a cell's energy figures (not prices or capex)."""
+    from src.models.sizing_grid import _battery_terms
+
+    h = hashlib.sha1()
+    for a in (solar_per_kw, wind_per_kw, demand, days):
+        arr = np.ascontiguousarray(a, dtype=float)
+        h.update(repr(arr.shape).encode())
+        h.update(arr.tobytes())
+    h.update(repr(_battery_terms(battery_params)).encode())
+    return h.hexdigest()
+
+
+def _extend(
+    state: dict[str, Any],
+    solar_kws: np.ndarray,
+    wind_kws: np.ndarray,
+    battery_kwhs: np.ndarray,
+    inputs: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    battery_params: dict[str, Any] | None,
+) -> int:
+    """Append unseen sizes on each axis, evaluating only the new cells. Returns cells evaluated."""
+    from src.models.sizing_grid import evaluate_grid
+
+    new_s = np.array([v for v in dict.fromkeys(solar_kws.tolist()) if v not in state["solar_index"]], dtype=float)
+    new_w = np.array([v for v in dict.fromkeys(wind_kws.tolist()) if v not in state["wind_index"]], dtype=float)
+    new_b = np.array([v for v in dict.fromkeys(battery_kwhs.tolist()) if v not in state["battery_index"]], dtype=float)
+    if not (new_s.size or new_w.size or new_b.size):
+        return 0
+
+    old_s, old_w, old_b = state["solar_kws"], state["wind_kws"], state["battery_kwhs"]
+    all_s = np.concatenate([old_s, new_s])
+    all_w = np.concatenate([old_w, new_w])
+    all_b = np.concatenate([old_b, new_b])
+    n_years = inputs[0].shape[0]
+    shape = (n_years, all_s.size, all_w.size, all_b.size)
+    import_kwh = np.empty(shape)
+    export_kwh = np.empty(shape)
+    S, W, B = old_s.size, old_w.size, old_b.size
+    import_kwh[:, :S, :W, :B] = state["import_kwh"]
+    export_kwh[:, :S, :W, :B] = state["export_kwh"]
+
+    evaluated = 0
+    # New solar rows × every wind × every battery; old rows × new wind; old × old × new battery.
+    blocks = (
+        (slice(S, None), slice(None), slice(None), new_s, all_w, all_b),
+        (slice(None, S), slice(W, None), slice(None), old_s, new_w, all_b),
+        (slice(None, S), slice(None, W), slice(B, None), old_s, old_w, new_b),
+    )
+    for s_sl, w_sl, b_sl, s_vals, w_vals, b_vals in blocks:
+        if not (s_vals.size and w_vals.size and b_vals.size):
+            continue
+        block = evaluate_grid(*inputs, s_vals, w_vals, b_vals, battery_params)
+        import_kwh[:, s_sl, w_sl, b_sl] = block["import_kwh"]
+        export_kwh[:, s_sl, w_sl, b_sl] = block["export_kwh"]
+        evaluated += int(block["import_kwh"].size)
+
+    state.update({
+        "solar_kws": all_s,
+        "wind_kws": all_w,
+        "battery_kwhs": all_b,
+        "solar_index": {v: i for i, v in enumerate(all_s.tolist())},
+        "wind_index": {v: i for i, v in enumerate(all_w.tolist())},
+        "battery_index": {v: i for i, v in enumerate(all_b.tolist())},
+        "import_kwh": import_kwh,
+        "export_kwh": export_kwh,
+    })
+    return evaluated
+
+
+def _empty_state(fingerprint: str, n_years: int) -> dict[str, Any]:
+    return {
+        "fingerprint": fingerprint,
+        "solar_kws": np.zeros(0),
+        "wind_kws": np.zeros(0),
+        "battery_kwhs": np.zeros(0),
+        "solar_index": {},
+        "wind_index": {},
+        "battery_index": {},
+        "import_kwh": np.zeros((n_years, 0, 0, 0)),
+        "export_kwh": np.zeros((n_years, 0, 0, 0)),
+    }
+
+
+def cached_grid(
+    session_id: str,
+    solar_per_kw: np.ndarray,
+    wind_per_kw: np.ndarray,
+    demand: np.ndarray,
+    days: np.ndarray,
+    solar_kws: np.ndarray,
+    wind_kws: np.ndarray,
+    battery_kwhs: np.ndarray,
+    battery_params: dict[str, Any] | None,
+    with_no_battery: bool = False,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray] | None, dict[str, Any]]:
+    """
+    evaluate_grid(...) for the requested sizes, served from the session's cached tensors where possible.
+
+    Returns (grid, no_battery_grid, info). no_battery_grid is the same sweep at battery 0 (needed
+    by the NPV objective) when with_no_battery, else None. info: warm (bool — the physics matched
+    the session's state), cells_evaluated (new cells this call), cells_requested.
+    """
+    solar_per_kw = np.atleast_2d(np.asarray(solar_per_kw, dtype=float))
+    wind_per_kw = np.atleast_2d(np.asarray(wind_per_kw, dtype=float))
+    days = np.atleast_2d(np.asarray(days, dtype=float))
+    demand = np.asarray(demand, dtype=float)
+    inputs = (solar_per_kw, wind_per_kw, demand, days)
+    fingerprint = _fingerprint(*inputs, battery_params)
+    wanted_b = np.concatenate([battery_kwhs, [0.0]]) if with_no_battery else battery_kwhs
+    max_cells = min(_env_number("OPTIMISER_SESSION_MAX_CELLS", 5_000_000), _store.max_total_cells)
+
+    with _session_lock(session_id):
+        state = _store.get(session_id)
+        warm = state is not None and state["fingerprint"] == fingerprint
+        if not warm:
+            state = _empty_state(fingerprint, solar_per_kw.shape[0])
+        else:
+            grown = (
+                solar_per_kw.shape[0]
+                * len(set(state["solar_kws"].tolist()) | set(solar_kws.tolist()))
+                * len(set(state["wind_kws"].tolist()) | set(wind_kws.tolist()))
+                * len(set(state["battery_kwhs"].tolist()) | set(wanted_b.tolist()))
+            )
+            if grown > max_cells:
+                state = _empty_state(fingerprint, solar_per_kw.shape[0])
+        evaluated = _extend(state, solar_kws, wind_kws, wanted_b, inputs, battery_params)
+        _store.put(session_id, state)
+
+        i_s = np.array([state["solar_index"][v] for v in solar_kws.tolist()], dtype=int)
+        i_w = np.array([state["wind_index"][v] for v in wind_kws.tolist()], dtype=int)
+        i_b = np.array([state["battery_index"][v] for v in battery_kwhs.tolist()], dtype=int)
+        sub = np.ix_(np.arange(solar_per_kw.shape[0]), i_s, i_w, i_b)
+        grid = {
+            # Generation is linear in capacity; same expressions as evaluate_grid.
+            "solar_kwh": solar_kws[None, :] * solar_per_kw.sum(axis=1)[:, None],
+            "wind_kwh": wind_kws[None, :] * wind_per_kw.sum(axis=1)[:, None],
+            "import_kwh": state["import_kwh"][sub],
+            "export_kwh": state["export_kwh"][sub],
+        }
+        no_battery = None
+        if with_no_battery:
+            zero = np.ix_(np.arange(solar_per_kw.shape[0]), i_s, i_w, [state["battery_index"][0.0]])
+            no_battery = {
+                "solar_kwh": grid["solar_kwh"],
+                "wind_kwh": grid["wind_kwh"],
+                "import_kwh": state["import_kwh"][zero],
+                "export_kwh": state["export_kwh"][zero],
+            }
+    info = {"warm": warm, "cells_evaluated": evaluated, "cells_requested": int(grid["import_kwh"].size)}
+    return grid, no_battery, info
@@ -0,0 +1,134 @@
+"""
+Benchmark tariff card extraction (src/api/energyScraping/tariff_extract.py) on results pages.
+
+Pages come from recorded flows (a flow directory's steps/*extract_tariffs*.html, see
+src.tools.scrape_replay), results pages captured in output/scrape_debug (*_results_page.html.gz,
+see SCRAPER_DEBUG_CAPTURE), any saved .html file, or are generated with --synthetic N: a results
+page of N cards in the site's card markup, with a page shell (inline scripts, usage overview)
+sized like the live page.
+
+Usage (from project root):
+  python3 -m src.tools.bench_extractor output/scrape_debug/*_results_page.html.gz
+  python3 -m src.tools.bench_extractor output/scrape_flows/bs1 --repeat 20
+  python3 -m src.tools.bench_extractor --synthetic 30 --synthetic 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+_SUPPLIERS = ["Octopus Energy", "British Gas", "EDF", "E.ON Next", "OVO", "Scottish Power", "Outfox the Market", "Utility Warehouse"]
+
+
+def synthetic_results_page(n_cards: int, seed: int = 0) -> str:
+    """A results page with n_cards tariff cards in the comparison site's markup."""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(n_cards):
+        fixed = rng.random() < 0.7
+        months = rng.choice([12, 18, 24]) if fixed else 0
+        unit = round(rng.uniform(19.0, 29.0), 2)
+        standing = round(rng.uniform(35.0, 62.0), 2)
+        gas_unit = round(rng.uniform(5.0, 8.0), 2)
+        annual = rng.randint(1300, 2300)
+        green = rng.random() < 0.4
+        rate_value = f"{months} months" if fixed else "Variable"
+        decal = '<span class="green-electricity-decal"><svg></svg>Green electricity</span>' if green else ""
+        cards.append(f"""
+<div class="results-new-item" data-position="{i}">
+  <div class="results-new-item-brand">
+    <img src="/logos/{i}.svg" alt=""><span class="results-new-item-brand__provider-name">{rng.choice(_SUPPLIERS)}</span>
+    <span class="results-new-item-brand__tariff-name">Tariff {i} {'Fixed' if fixed else 'Flex'}</span>
+  </div>
+  <div class="results-new-item-rate-type">
+    <span class="results-new-item-rate-type__label">{'Fixed' if fixed else 'Variable'} rate</span>
+    <span class="results-new-item-rate-type__value">{rate_value}</span>
+  </div>
+  <div class="results-new-item-cost">
+    <span class="results-new-item-cost__value">£{annual // 12} a month</span>
+    <span class="results-new-item-cost__sub_value">or £{annual:,} a year</span>
+  </div>
+  <div class="results-new-item-callouts"><div class="results-new-item-callouts__cells">
+    <div class="results-new-item-callouts__cells__cell">
+      <span class="results-new-item-callouts__cells__cell__label">Early exit fee</span>
+      <span class="results-new-item-callouts__cells__cell__value">£{rng.choice([0, 50, 75, 150])}</span>
+    </div>
+    <div class="results-new-item-callouts__cells__cell">
+      <span class="results-new-item-callouts__cells__cell__label">Yearly saving</span>
+      <span class="results-new-item-callouts__cells__cell__value">£{rng.randint(0, 300)}</span>
+    </div>
+  </div></div>
+  <details><summary>Charges breakdown</summary>
+  <table class="results-new-item-charges-breakdown__table">
+    <thead><tr><th></th><th>Gas</th><th>Electricity</th></tr></thead>
+    <tbody>
+      <tr><th>Standing charge</th><td>{round(standing * 0.6, 2)}p per day</td><td>{standing}p per day</td></tr>
+      <tr><th>Unit rate</th><td>{gas_unit}p per kWh</td><td>{unit}p per kWh</td></tr>
+    </tbody>
+  </table></details>
+  <div class="tariff-decals">{decal}</div>
+  <p class="results-new-item-small-print">{'Lorem ipsum dolor sit amet. ' * 12}</p>
+</div>""")
+    state = json.dumps({"results": [{"id": i, "blob": "x" * 600} for i in range(n_cards)]})
+    return f"""<!DOCTYPE html><html><head><title>Results</title>
+<style>{'.a{{color:red}}' * 400}</style>
+<script>window.__STATE__ = {state};</script></head>
+<body><header><nav>{'<a href="#">Link</a>' * 60}</nav></header>
+<section class="current-usage-card">
+  <span class="current-usage-card__callout__value">£1,842/yr</span>
+  <div class="current-usage-overview">
+    <div class="current-usage-overview__fuel"><span class="current-usage-overview__consumption__type">Electricity</span><span>2,700 kWh / year</span></div>
+    <div class="current-usage-overview__fuel"><span class="current-usage-overview__consumption__type">Gas</span><span>11,500 kWh / year</span></div>
+  </div>
+</section>
+<main><div class="results-new">{''.join(cards)}</div></main>
+<footer>{'<p>Footer text</p>' * 80}</footer></body></html>"""
+
+
+def _pages(args: argparse.Namespace) -> list[tuple[str, str]]:
+    pages: list[tuple[str, str]] = []
+    for raw in args.paths:
+        path = Path(raw)
+        files = sorted(path.glob("steps/*extract_tariffs*.html")) if path.is_dir() else [path]
+        for f in files:
+            data = gzip.decompress(f.read_bytes()) if f.suffix == ".gz" else f.read_bytes()
+            pages.append((str(f), data.decode("utf-8", errors="replace")))
+    for n in args.synthetic or []:
+        pages.append((f"synthetic:{n}", synthetic_results_page(n)))
+    return pages
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark tariff card extraction on results pages.")
+    parser.add_argument("paths", nargs="*", help="results page .html / .html.gz files or recorded flow directories")
+    parser.add_argument("--synthetic", type=int, action="append", help="generate a page with N cards (repeatable)")
+    parser.add_argument("--repeat", type=int, default=10, help="timed extractions per page (default 10)")
+    args = parser.parse_args(argv)
+
+    from src.api.energyScraping.tariff_extract import extract_results
+
+    pages = _pages(args)
+    if not pages:
+        parser.error("give results pages, flow directories or --synthetic N")
+    print(f"{'page':48s} {'KB':>7s} {'cards':>6s} {'median ms':>10s} {'ms/card':>8s}")
+    for name, page_html in pages:
+        result = extract_results(page_html, log=False)
+        times = []
+        for _ in range(max(1, args.repeat)):
+            started = time.perf_counter()
+            extract_results(page_html, log=False)
+            times.append((time.perf_counter() - started) * 1000.0)
+        median = statistics.median(times)
+        n = len(result.cards)
+        print(f"{name[-48:]:48s} {len(page_html) / 1024:7.0f} {n:6d} {median:10.2f} {median / max(1, n):8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+"""
+Build the offline postcode index (src/api/postcode_index.py) from the ONS Postcode Directory.
+
+Download the ONSPD CSV (ons.gov.uk / geoportal.statistics.gov.uk) and point this at the
+single-file "Data/ONSPD_*_UK.csv". Optionally pass the "Documents/LA_UA names and codes UK as at
+*.csv" file so admin_district names are filled in.
+
+Usage:
+  python3 -m src.tools.build_postcode_index ONSPD_MAY_2025_UK.csv
+  python3 -m src.tools.build_postcode_index ONSPD.csv --districts "LA_UA names and codes.csv" -o output/postcode_index.bin
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from src.api.postcode_index import PostcodeIndex, build_index_from_csv, default_index_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the memory-mapped postcode index from an ONSPD CSV.")
+    parser.add_argument("csv", help="ONSPD CSV (columns pcds/pcd, lat, long, rgn, ctry, oslaua, doterm)")
+    parser.add_argument("--districts", default=None, help="optional LA/UA names and codes CSV")
+    parser.add_argument("-o", "--output", default=None, help=f"output file (default {default_index_path()})")
+    args = parser.parse_args(argv)
+
+    out = args.output or default_index_path()
+    started = time.perf_counter()
+    try:
+        count = build_index_from_csv(args.csv, out, district_names_csv=args.districts)
+    except (OSError, ValueError) as e:
+        print(f"[postcode-index] build FAILED: {type(e).__name__}: {e}")
+        return 2
+    print(f"[postcode-index] wrote {count} postcodes to {out} in {time.perf_counter() - started:.1f}s")
+
+    index = PostcodeIndex(out)
+    try:
+        print(f"[postcode-index] verified: {len(index)} records readable")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""
+Build the recommendation atlas served by /api/recommend (see src/models/recommend_atlas.py).
+
+For each outward code in the postcode index: fetch last year's monthly flux at its centroid, then
+optimise every tier combination × usage × grid-price cell for the default scenario. Outward codes
+already in an atlas with the same layout are kept, so an interrupted or partial build (--outward,
+--limit) can be resumed; progress is saved every --save-every outward codes.
+
+Usage (from project root):
+  python3 -m src.tools.build_recommend_atlas --outward BS1 BS8 SW1A
+  python3 -m src.tools.build_recommend_atlas --limit 200
+  python3 -m src.tools.build_recommend_atlas --rebuild --export-price 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+
+def _default_export_price() -> float:
+    from src.api.reference_export_price import fetch_reference_export_price_gbp_per_kwh
+
+    price = fetch_reference_export_price_gbp_per_kwh().get("export_price_per_kwh")
+    return float(price) if price is not None else 0.05
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute optimal sizing per outward code for /api/recommend.")
+    parser.add_argument("--outward", nargs="*", default=None, help="only these outward codes (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="build at most this many outward codes")
+    parser.add_argument("--export-price", type=float, default=None,
+                        help="scenario export price £/kWh (default: the Octopus reference rate, else 0.05)")
+    parser.add_argument("--rebuild", action="store_true", help="recompute outward codes already in the atlas")
+    parser.add_argument("--save-every", type=int, default=25, help="save progress every N outward codes")
+    parser.add_argument("-o", "--output", default=None, help="atlas file (default RECOMMEND_ATLAS_PATH)")
+    args = parser.parse_args(argv)
+
+    from src.api.postcode_index import get_default_index, normalize_postcode
+    from src.models.energy_balancing import get_flux_monthly_last_year
+    from src.models.recommend_atlas import (
+        RecommendAtlas,
+        Scenario,
+        default_atlas_path,
+        optimise_sizing,
+        save_atlas,
+    )
+
+    index = get_default_index()
+    if index is None:
+        print("[recommend-atlas] no postcode index; build it first (python3 -m src.tools.build_postcode_index)")
+        return 2
+    centroids = index.outward_centroids()
+    out = args.output or default_atlas_path()
+    scenario = Scenario(export_price_per_kwh=args.export_price if args.export_price is not None else _default_export_price())
+    atlas = RecommendAtlas.empty(sorted(centroids), scenario=scenario)
+
+    try:
+        previous = RecommendAtlas.load(out)
+    except (OSError, ValueError, KeyError):
+        previous = None
+    kept = 0
+    if previous is not None and not args.rebuild and atlas.same_layout(previous):
+        for code in previous.outwards:
+            if code in centroids and previous.has(code):
+                atlas.copy_outward(previous, code)
+                kept += 1
+
+    wanted = [normalize_postcode(c) for c in args.outward] if args.outward else atlas.outwards
+    todo = [c for c in wanted if c in centroids and (args.rebuild or not atlas.has(c))]
+    if args.limit is not None:
+        todo = todo[: max(0, args.limit)]
+    print(f"[recommend-atlas] {len(centroids)} outward codes, {kept} kept, {len(todo)} to build "
+          f"(export £{scenario.export_price_per_kwh:.4f}/kWh) -> {out}", flush=True)
+
+    started = time.perf_counter()
+    built = failed = 0
+    for n, code in enumerate(todo, start=1):
+        lat, lon = centroids[code]
+        try:
+            flux = get_flux_monthly_last_year(lat, lon)
+            sizing = optimise_sizing(flux, lat, lon, scenario)
+        except Exception as e:
+            failed += 1
+            print(f"[recommend-atlas] {code} failed: {e}", flush=True)
+            continue
+        atlas.set_outward(code, (lat, lon), flux[["ghi_mj_per_m2", "wind_speed_10m_max"]].to_numpy(), sizing)
+        built += 1
+        if n % max(1, args.save_every) == 0:
+            save_atlas(atlas, out)
+            rate = n / (time.perf_counter() - started)
+            print(f"[recommend-atlas] {n}/{len(todo)} ({rate:.2f} outward codes/s)", flush=True)
+    save_atlas(atlas, out)
+    print(f"[recommend-atlas] built {built}, failed {failed} in {time.perf_counter() - started:.0f}s", flush=True)
+    return 1 if failed and not built else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
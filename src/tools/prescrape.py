@@ -0,0 +1,65 @@
+"""
+Plan or run one region pre-scrape sweep (see src/web/prescrape.py) outside the web app.
+
+--plan: print the stale regions in priority order with the postcode each would scrape (no scrapes).
+--once: submit one sweep within the PRESCRAPE_* budget and wait for the scrapes to finish
+        (e.g. from cron when the web app runs with PRESCRAPE_ENABLED=0).
+
+Usage (from project root):
+  python3 -m src.tools.prescrape --plan
+  PRESCRAPE_MAX_CONCURRENT=2 python3 -m src.tools.prescrape --once
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Plan or run a region pre-scrape sweep.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--plan", action="store_true", help="print the plan only")
+    mode.add_argument("--once", action="store_true", help="run one sweep and wait for it")
+    parser.add_argument("--days", type=int, default=int(os.environ.get("PRESCRAPE_DEMAND_DAYS", "30")),
+                        help="demand window in days (default PRESCRAPE_DEMAND_DAYS or 30)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("APP_PRELOAD_MODULES", "0")
+    os.environ["PRESCRAPE_ENABLED"] = "0"
+    os.environ["PRESCRAPE_DEMAND_DAYS"] = str(args.days)
+    from src.web import app as web_app
+    from src.web.prescrape import PrescrapeScheduler, plan_prescrape
+
+    if args.plan:
+        try:
+            stats = web_app._prescrape_stats(args.days)
+        except Exception as e:
+            print(f"[prescrape] could not read saved scrapes: {e}")
+            return 2
+        targets = plan_prescrape(stats, {}, time.time(), web_app._pick_postcode_in_outward)
+        print(f"{'region':10s} {'postcode':9s} {'demand':>7s} {'age h':>7s} {'priority':>9s}")
+        for t in targets:
+            age = f"{t.age_s / 3600:7.1f}" if t.age_s is not None else f"{'never':>7s}"
+            print(f"{t.dno_id:10s} {t.postcode_display:9s} {t.demand:7d} {age} {t.priority:9.1f}")
+        print(f"[prescrape] {len(targets)} stale regions")
+        return 0
+
+    coordinator = web_app._scrape_coordinator
+    scheduler = PrescrapeScheduler(coordinator, web_app._prescrape_stats, web_app._pick_postcode_in_outward)
+    submitted = scheduler.run_once()
+    if not submitted:
+        print("[prescrape] nothing to do (all regions fresh, or no budget)")
+        return 0
+    while coordinator.running_count():
+        time.sleep(2.0)
+    failed = [s for s in submitted
+              if (coordinator.status(s["postcode"].replace(" ", "")) or {}).get("status") == "failed"]
+    print(f"[prescrape] {len(submitted)} submitted, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Record a scrape flow once against the live site, then replay it offline to benchmark the scraper.
+
+record: runs a normal scrape with SCRAPER_HAR_MODE=record; the flow (HAR, per-step DOM, flow.json
+        with the scrape arguments and step timings) lands in --out.
+replay: re-runs the same scrape --runs times against a local server serving the HAR with the
+        recorded timings (scaled by --timing; 0 = no network delay). It reports per-step and total
+        latency (median and spread) plus any requests the recording did not cover. No DB writes.
+
+Usage (from project root):
+  python3 -m src.tools.scrape_replay record "BS1 1AA" --out output/scrape_flows/bs1
+  python3 -m src.tools.scrape_replay replay output/scrape_flows/bs1 --runs 5
+  python3 -m src.tools.scrape_replay replay output/scrape_flows/bs1 --timing 0 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+
+def _headless(raw: str):
+    return "virtual" if raw == "virtual" else raw.lower() not in ("0", "false", "no")
+
+
+def _run_scrape(args: dict, headless) -> tuple[int, dict]:
+    """One scrape with the current SCRAPER_HAR_* env; returns (tariff count, flow report)."""
+    from src.api.energyScraping.ScrapeTariff import ScrapeTariff
+
+    scraper = ScrapeTariff()
+    try:
+        tariffs = scraper.scrape(headless=headless, **args) or []
+    except Exception as e:
+        report = scraper.last_flow.report() if scraper.last_flow else {"steps": []}
+        report["error"] = str(e)
+        return 0, report
+    return len(tariffs), scraper.last_flow.report()
+
+
+def summarise(reports: list[dict]) -> dict:
+    """Median / min / max seconds per step (in first-seen order) and for the whole scrape."""
+    names: list[str] = []
+    per_step: dict[str, list[float]] = {}
+    for r in reports:
+        for s in r.get("steps") or []:
+            if s["name"] not in per_step:
+                names.append(s["name"])
+            per_step.setdefault(s["name"], []).append(float(s["seconds"]))
+
+    def stats(values: list[float]) -> dict:
+        return {"median_s": round(statistics.median(values), 3), "min_s": round(min(values), 3),
+                "max_s": round(max(values), 3), "runs": len(values)}
+
+    totals = [float(r["total_seconds"]) for r in reports if "total_seconds" in r]
+    return {
+        "steps": {n: stats(per_step[n]) for n in names},
+        "total": stats(totals) if totals else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Record or replay a tariff scrape flow.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="scrape the live site and record the flow")
+    rec.add_argument("postcode")
+    rec.add_argument("--out", default=None, help="flow directory (default output/scrape_flows/<time>_<postcode>)")
+    rec.add_argument("--home-or-business", default="home", choices=("home", "business"))
+    rec.add_argument("--has-ev", default="No but interested")
+    rec.add_argument("--address-index", type=int, default=0)
+    rec.add_argument("--address-name", default="")
+    rec.add_argument("--headless", default=os.environ.get("SCRAPER_HEADLESS") or "1", help="1, 0 or virtual")
+
+    rep = sub.add_parser("replay", help="benchmark the scraper against a recorded flow")
+    rep.add_argument("flow", help="flow directory (containing flow.har and flow.json)")
+    rep.add_argument("--runs", type=int, default=3)
+    rep.add_argument("--timing", type=float, default=1.0, help="scale recorded response times (0 = instant)")
+    rep.add_argument("--headless", default="1", help="1, 0 or virtual")
+    rep.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        os.environ["SCRAPER_HAR_MODE"] = "record"
+        if args.out:
+            os.environ["SCRAPER_HAR_DIR"] = args.out
+        scrape_args = {
+            "postcode": args.postcode,
+            "address_index": args.address_index,
+            "address_name": args.address_name,
+            "fuel_type": "both",
+            "current_supplier": "Octopus",
+            "pay_method": "monthly_direct_debit",
+            "has_ev": args.has_ev,
+            "home_or_business": args.home_or_business,
+        }
+        count, report = _run_scrape(scrape_args, _headless(args.headless))
+        if report.get("error"):
+            print(f"[scrape-replay] record FAILED: {report['error']}")
+            return 1
+        print(f"[scrape-replay] recorded {count} tariffs in {report['total_seconds']:.1f}s")
+        return 0
+
+    flow_dir = Path(args.flow)
+    manifest_path = flow_dir / "flow.json"
+    if not (flow_dir / "flow.har").is_file() or not manifest_path.is_file():
+        print(f"[scrape-replay] {flow_dir} has no flow.har / flow.json (record one first)")
+        return 2
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    os.environ["SCRAPER_HAR_MODE"] = "replay"
+    os.environ["SCRAPER_HAR_DIR"] = str(flow_dir)
+    os.environ["SCRAPER_REPLAY_TIMING"] = str(max(0.0, args.timing))
+
+    reports, counts = [], []
+    for i in range(max(1, args.runs)):
+        count, report = _run_scrape(dict(manifest["args"]), _headless(args.headless))
+        counts.append(count)
+        reports.append(report)
+        status = f"error: {report['error']}" if report.get("error") else f"{count} tariffs"
+        print(f"[scrape-replay] run {i + 1}: {report.get('total_seconds', 0):.1f}s, {status}", flush=True)
+
+    summary = summarise(reports)
+    summary["recorded"] = summarise([manifest])
+    summary["tariffs"] = counts
+    summary["missed_requests"] = max((r.get("replay") or {}).get("misses", 0) for r in reports)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        recorded = summary["recorded"]["steps"]
+        print(f"{'step':32s} {'replay median':>14s} {'min':>8s} {'max':>8s} {'recorded':>10s}")
+        for name, st in summary["steps"].items():
+            live = recorded.get(name, {}).get("median_s")
+            live_txt = f"{live:9.2f}s" if live is not None else f"{'-':>10s}"
+            print(f"{name:32s} {st['median_s']:13.2f}s {st['min_s']:7.2f}s {st['max_s']:7.2f}s {live_txt}")
+        if summary["total"]:
+            t = summary["total"]
+            print(f"{'total':32s} {t['median_s']:13.2f}s {t['min_s']:7.2f}s {t['max_s']:7.2f}s")
+        print(f"[scrape-replay] tariffs per run: {counts}; requests not in the recording: {summary['missed_requests']}")
+    return 0 if all(not r.get("error") for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Load new fact_tariff_search_simple rows into the star schema (see src/data/star_etl.py).
+
+Incremental: only rows above the stored watermark are read, so it can run from cron as often as
+needed. Prints rows per second per batch and overall.
+
+Usage (from project root):
+  python3 -m src.tools.star_etl
+  STAR_ETL_BATCH_ROWS=20000 python3 -m src.tools.star_etl --max-rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental load of the simple tariff table into the star schema.")
+    parser.add_argument("--batch-rows", type=int, default=None,
+                        help="rows per batch/transaction (default STAR_ETL_BATCH_ROWS or 5000)")
+    parser.add_argument("--max-rows", type=int, default=None, help="stop after this many rows")
+    args = parser.parse_args(argv)
+
+    import mysql.connector
+
+    from src.data.star_etl import run_etl
+    from src.db import mysql_config
+
+    try:
+        conn = mysql.connector.connect(**mysql_config())
+    except Exception as e:
+        print(f"[star-etl] could not connect: {e}")
+        return 2
+    try:
+        stats = run_etl(conn, batch_rows=args.batch_rows, max_rows=args.max_rows)
+    except Exception as e:
+        print(f"[star-etl] failed: {e}")
+        return 1
+    finally:
+        conn.close()
+    print(f"[star-etl] {stats.rows} rows in {stats.batches} batches, {stats.seconds:.1f}s "
+          f"({stats.rows_per_s:,.0f} rows/s), watermark id {stats.last_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Cold-start profile for the web app (or any module): import-time report, boot time and first-request latency.
+
+Each measurement runs in a fresh interpreter, as a new gunicorn worker or scrape child would:
+1) `python -X importtime -c "import <module>"`, summarised as the slowest imports by cumulative time;
+2) boot: time to import the module and get the Flask app;
+3) first request: one request through the app's test client right after boot.
+
+APP_PRELOAD_MODULES=0 is set for the import report so the background preload thread does not
+blur what the import itself costs; boot and first request run with the environment as given.
+
+Usage (from project root):
+  python3 -m src.tools.startup_profile
+  python3 -m src.tools.startup_profile --top 15 --path /api/export-price
+  python3 -m src.tools.startup_profile --module src.web.run_scrape --no-request --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Results go to a file: the app's preload thread may still be logging to stdout. os._exit skips
+# interpreter shutdown, which a daemon thread mid-import can stall.
+_BOOT_SNIPPET = """
+import importlib, json, os, sys, time
+t0 = time.perf_counter()
+mod = importlib.import_module(sys.argv[1])
+app = getattr(mod, sys.argv[2], None)
+t1 = time.perf_counter()
+out = {"boot_ms": (t1 - t0) * 1000.0, "modules_loaded": len(sys.modules)}
+out["heavy_loaded"] = sorted(m for m in ("numpy", "pandas", "requests", "camoufox", "bs4", "lxml", "mysql.connector") if m in sys.modules)
+if app is not None and sys.argv[3]:
+    client = app.test_client()
+    body = json.loads(sys.argv[5]) if sys.argv[5] else None
+    r = client.open(sys.argv[3], method=sys.argv[4], json=body)
+    out["first_request_ms"] = (time.perf_counter() - t1) * 1000.0
+    out["status"] = r.status_code
+with open(sys.argv[6], "w") as f:
+    json.dump(out, f)
+os._exit(0)
+"""
+
+
+def parse_importtime(text: str) -> list[dict]:
+    """Rows of `-X importtime` stderr as {module, self_us, cumulative_us, depth}; other lines are skipped."""
+    rows: list[dict] = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header row
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append({
+            "module": stripped,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(name) - len(stripped)) // 2,
+        })
+    return rows
+
+
+def import_report(module: str, top: int = 20) -> dict:
+    """Total import time of module and its top imports by cumulative time, from a fresh interpreter."""
+    env = {**os.environ, "APP_PRELOAD_MODULES": "0"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PROJECT_ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    target = next((r for r in reversed(rows) if r["module"] == module), None)
+    # Only the module's own subtree: skip interpreter start-up (site, encodings) before it.
+    first = rows.index(target) if target else len(rows)
+    while first > 0 and rows[first - 1]["depth"] > 0:
+        first -= 1
+    subtree = rows[first:rows.index(target) + 1] if target else []
+    slowest = sorted((r for r in subtree if r is not target), key=lambda r: r["cumulative_us"], reverse=True)
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_ms": target["cumulative_us"] / 1000.0 if target else None,
+        "modules_imported": len(subtree),
+        "top": [
+            {"module": r["module"], "cumulative_ms": r["cumulative_us"] / 1000.0, "self_ms": r["self_us"] / 1000.0}
+            for r in slowest[:top]
+        ],
+    }
+
+
+def boot_report(module: str, app_attr: str = "app", path: str | None = "/", method: str = "GET", body: str = "") -> dict:
+    """Boot time and first-request latency of module's Flask app, from a fresh interpreter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "boot.json")
+        proc = subprocess.run(
+            [sys.executable, "-c", _BOOT_SNIPPET, module, app_attr, path or "", method, body, result_path],
+            cwd=str(PROJECT_ROOT),
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0 or not os.path.exists(result_path):
+            return {"ok": False, "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+        with open(result_path) as f:
+            return {"ok": True, **json.load(f)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time, boot and first-request profile of a fresh interpreter.")
+    parser.add_argument("--module", default="src.web.app", help="module to import (default src.web.app)")
+    parser.add_argument("--app", default="app", help="Flask app attribute in the module (default app)")
+    parser.add_argument("--top", type=int, default=20, help="slowest imports to list (default 20)")
+    parser.add_argument("--path", default="/", help="first request path (default /)")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default="", help="JSON body for the first request")
+    parser.add_argument("--no-request", action="store_true", help="only import and boot, no request")
+    parser.add_argument("--runs", type=int, default=3, help="boot measurements to take; the median is reported")
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of the text report")
+    args = parser.parse_args(argv)
+
+    imports = import_report(args.module, top=args.top)
+    boots = [
+        boot_report(args.module, args.app, None if args.no_request else args.path, args.method.upper(), args.body)
+        for _ in range(max(1, args.runs))
+    ]
+    ok = [b for b in boots if b.get("ok")]
+    boot = sorted(ok, key=lambda b: b["boot_ms"])[len(ok) // 2] if ok else boots[-1]
+    report = {"imports": imports, "boot": boot}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0 if imports["ok"] and boot.get("ok") else 1
+
+    if not imports["ok"]:
+        print(f"[startup] import of {args.module} FAILED: {imports['error']}")
+        return 1
+    print(f"[startup] import {args.module}: {imports['total_ms']:.0f} ms across {imports['modules_imported']} modules")
+    for r in imports["top"]:
+        print(f"  {r['cumulative_ms']:8.1f} ms  {r['module']}")
+    if not boot.get("ok"):
+        print(f"[startup] boot FAILED: {boot.get('error')}")
+        return 1
+    print(f"[startup] boot (median of {len(ok)}): {boot['boot_ms']:.0f} ms, {boot['modules_loaded']} modules loaded")
+    if "first_request_ms" in boot:
+        print(f"[startup] first {args.method.upper()} {args.path}: {boot['first_request_ms']:.1f} ms (status {boot['status']})")
+    print(f"[startup] heavy modules loaded at boot: {', '.join(boot['heavy_loaded']) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+"""
+Partition, roll up and prune fact_tariff_search_simple (see src/data/tariff_partitions.py).
+
+The first run on an existing install converts the table to monthly partitions (this copies the
+table once). Afterwards each run only splits future months off pmax, refreshes the rollups and
+drops expired months, so it is cheap enough to run daily from cron.
+
+Usage (from project root):
+  python3 -m src.tools.tariff_maintenance --dry-run
+  TARIFF_DETAIL_RETENTION_MONTHS=6 python3 -m src.tools.tariff_maintenance
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Partition, roll up and prune the tariff fact table.")
+    parser.add_argument("--dry-run", action="store_true", help="print the SQL without running it")
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="plan as of this date (YYYY-MM-DD; default today)")
+    args = parser.parse_args(argv)
+
+    import mysql.connector
+
+    from src.data.tariff_partitions import run_maintenance
+    from src.db import mysql_config
+
+    try:
+        conn = mysql.connector.connect(**mysql_config())
+    except Exception as e:
+        print(f"[tariff-maintenance] could not connect: {e}")
+        return 2
+    try:
+        plan = run_maintenance(conn, today=args.today, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"[tariff-maintenance] failed: {e}")
+        return 1
+    finally:
+        conn.close()
+    print(
+        f"[tariff-maintenance] {'converted, ' if plan.converted else ''}"
+        f"{len(plan.created)} partitions added, {len(plan.rolled_up)} months rolled up, "
+        f"{len(plan.dropped)} dropped{' (dry run)' if args.dry_run else ''}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,27 +10,27 @@ import os
 import subprocess
 import sys
 import threading
+import time
 import webbrowser
 from pathlib import Path
-import requests
 
 # Ensure project root is on path
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from flask import Flask, Response, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request, send_from_directory
 from flask_cors import CORS
 
+from src import metrics
 from src.db import mysql_config
-from src.models.tariff_recommendation import (
-    coerce_standing_charge_pence_per_day,
-    coerce_unit_rate_pence_per_kwh,
-)
+from src.web.scrape_coordinator import EV_SLUG_TO_ANSWER, ScrapeCoordinator, ScrapeRequest, max_freshness_ttl_s
+from src.web.serialize import OrjsonProvider, columnar, finalize_json_response
 
 app = Flask(__name__, static_folder="static", static_url_path="")
+app.json = OrjsonProvider(app)
 # Resolve static_folder so it works when run from project root
 app.static_folder = os.path.join(os.path.dirname(__file__), "static")
 
@@ -99,32 +99,69 @@ _cors_origins = [o.strip() for o in os.environ.get("CORS_ORIGINS", "").split(","
 if _cors_origins:
     CORS(app, resources={r"/api/*": {"origins": _cors_origins}})
 
-# In-memory status for background scrape jobs: postcode_norm -> {"status": "running"|"completed"|"failed", "error": str|None}
-_scrape_jobs: dict[str, dict] = {}
-_scrape_jobs_lock = threading.Lock()
+@app.before_request
+def _metrics_start_request():
+    g.request_started = time.perf_counter()
+    metrics.start_request()
+
+
+@app.after_request
+def _metrics_finish_request(response: Response) -> Response:
+    """Record request latency and attach a Server-Timing header listing the stages that ran."""
+    started = g.pop("request_started", None)
+    spans = metrics.finish_request()
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.observe(
+        "http_request_duration_seconds",
+        elapsed,
+        endpoint=endpoint,
+        method=request.method,
+        status=response.status_code,
+        help_text="HTTP request latency by route.",
+    )
+    response.headers["Server-Timing"] = metrics.server_timing_header(spans, total_s=elapsed)
+    return response
+
+
+# Registered after the metrics hook so it runs first: latency then includes compression.
+app.after_request(finalize_json_response)
+
 
+def _env_flag(name: str, default: bool) -> bool:
+    raw = (os.environ.get(name) or "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
 
-def _lookup_addresses_getaddress(postcode_norm: str) -> list[str]:
+
+def _lookup_addresses_getaddress(postcode_norm: str) -> list[str] | None:
     """
     Fast UK address lookup via getAddress.io.
-    Returns [] when API key missing or lookup fails.
+    Returns [] when the postcode has no addresses (404), None when API key missing or lookup fails.
     """
     api_key = (os.environ.get("GETADDRESS_API_KEY") or "").strip()
     if not api_key:
-        return []
+        return None
     # Keep timeout short: this endpoint is used interactively in the UI.
     timeout_s = float(os.environ.get("ADDRESS_LOOKUP_TIMEOUT_S", "10"))
     base = "https://api.getaddress.io/find"
     url = f"{base}/{postcode_norm}"
     try:
+        import requests
+
         r = requests.get(
             url,
             params={"api-key": api_key, "expand": "true"},
             timeout=timeout_s,
         )
+        if r.status_code == 404:
+            return []
         if r.status_code != 200:
             print(f"[address-lookup] getAddress status={r.status_code} postcode={postcode_norm}", flush=True)
-            return []
+            return None
         data = r.json() or {}
         raw_items = data.get("addresses") or []
         out: list[str] = []
@@ -144,7 +181,50 @@ def _lookup_addresses_getaddress(postcode_norm: str) -> list[str]:
         return out
     except Exception as e:
         print(f"[address-lookup] getAddress error postcode={postcode_norm}: {e}", flush=True)
-        return []
+        return None
+
+
+class _AddressLookupUnavailable(Exception):
+    """getAddress.io not configured or failing, and the browser fallback is disabled."""
+
+
+def _fetch_address_options(postcode_norm: str) -> tuple[list[str], str]:
+    """
+    Upstream address lookup behind src.api.address_cache: getAddress.io, then the browser when
+    ADDRESS_LOOKUP_ALLOW_SCRAPE_FALLBACK is on. Returns (options, source); raises when no answer
+    can be had, so failures are never cached as "no addresses". Only getAddress.io's empty answer
+    is "no addresses"; an empty browser result is returned as scrape_fallback, which the cache
+    treats as a failure.
+    """
+    options = _lookup_addresses_getaddress(postcode_norm)
+    if options:
+        return options, "getaddress"
+
+    # Slow browser fallback is optional: disable by default so UI stays fast.
+    if not _env_flag("ADDRESS_LOOKUP_ALLOW_SCRAPE_FALLBACK", False):
+        if options is None:
+            raise _AddressLookupUnavailable()
+        return [], "getaddress"
+
+    # Fallback to scraper-driven options when explicitly enabled.
+    from src.api.energyScraping.ScrapeTariff import ScrapeTariff
+
+    raw = (os.environ.get("SCRAPER_HEADLESS") or "").strip().lower()
+    if raw in ("1", "true", "yes"):
+        headless_mode = True
+    elif raw in ("0", "false", "no"):
+        headless_mode = False
+    elif raw == "virtual":
+        headless_mode = "virtual"
+    else:
+        headless_mode = True
+
+    scraper = ScrapeTariff()
+    scraped = scraper.fetch_address_options(postcode_norm, headless=headless_mode)
+    if not scraped and options == []:
+        return [], "getaddress"  # getAddress.io's answer stands; the cache keeps it briefly
+    # An empty scrape is a timeout or failure, not "no addresses": address_cache will not store it.
+    return scraped, "scrape_fallback"
 
 def _get_scrape_results(postcode: str) -> dict | None:
     """Load latest tariff scrape for postcode from DB. Returns None if DB unavailable or no data."""
@@ -153,49 +233,40 @@ def _get_scrape_results(postcode: str) -> dict | None:
     if not postcode_norm:
         return None
     try:
-        import mysql.connector
-        conn = mysql.connector.connect(**mysql_config())
-        cursor = conn.cursor(dictionary=True)
-        rows = []
-        is_outward_only = bool(re.match(r"^[A-Z]{1,2}\d{1,2}[A-Z]?$", postcode_norm))
-
-        if is_outward_only:
-            # Outward-only postcode area search (e.g. BS39)
-            cursor.execute(
-                """
-                SELECT annual_electricity_kwh, latitude, longitude, search_date,
-                       new_supplier_name, tariff_name, unit_rate, standing_charge, is_green
-                FROM fact_tariff_search_simple
-                WHERE UPPER(outward_code) = %s
-                  AND search_date = (
-                    SELECT MAX(search_date) FROM fact_tariff_search_simple
-                    WHERE UPPER(outward_code) = %s
-                  )
-                ORDER BY new_supplier_name
-                """,
-                (postcode_norm, postcode_norm),
-            )
-            rows = cursor.fetchall()
-        else:
-            # Latest search for this full postcode (normalized, spaces optional)
-            cursor.execute(
-                """
-                SELECT annual_electricity_kwh, latitude, longitude, search_date,
-                       new_supplier_name, tariff_name, unit_rate, standing_charge, is_green
-                FROM fact_tariff_search_simple
-                WHERE REPLACE(UPPER(postcode), ' ', '') = %s
-                  AND search_date = (
-                    SELECT MAX(search_date) FROM fact_tariff_search_simple
-                    WHERE REPLACE(UPPER(postcode), ' ', '') = %s
-                  )
-                ORDER BY new_supplier_name
-                """,
-                (postcode_norm, postcode_norm),
-            )
-            rows = cursor.fetchall()
+        with metrics.span("db.scrape_results"):
+            import mysql.connector
+            conn = mysql.connector.connect(**mysql_config())
+            cursor = conn.cursor(dictionary=True)
+            rows = []
+            is_outward_only = bool(re.match(r"^[A-Z]{1,2}\d{1,2}[A-Z]?$", postcode_norm))
+
+            if is_outward_only:
+                # Outward-only postcode area search (e.g. BS39)
+                match = "UPPER(outward_code) = %s"
+            else:
+                # Latest search for this full postcode (normalized, spaces optional)
+                match = "REPLACE(UPPER(postcode), ' ', '') = %s"
+
+            # Latest search date first, then its rows by literal date so MySQL prunes to one
+            # monthly partition (a MAX() subquery's value is not known when partitions are pruned).
+            cursor.execute(f"SELECT MAX(search_date) AS latest FROM fact_tariff_search_simple WHERE {match}",
+                           (postcode_norm,))
+            latest = (cursor.fetchone() or {}).get("latest")
+            if latest is not None:
+                cursor.execute(
+                    f"""
+                    SELECT annual_electricity_kwh, latitude, longitude, search_date,
+                           new_supplier_name, tariff_name, unit_rate, standing_charge, is_green
+                    FROM fact_tariff_search_simple
+                    WHERE search_date = %s AND {match}
+                    ORDER BY new_supplier_name
+                    """,
+                    (latest, postcode_norm),
+                )
+                rows = cursor.fetchall()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
+            conn.close()
         if not rows:
             return None
         first = rows[0]
@@ -231,6 +302,27 @@ def _get_scrape_results(postcode: str) -> dict | None:
         return None
 
 
+_SCRAPE_TAIL_LINES = 400
+
+
+def _pump_scrape_output(stream, collected: list[str], lock: threading.Lock) -> None:
+    """Echo a scrape child's output into the server log line by line, keeping the last lines for errors."""
+    for line in stream:
+        with lock:
+            collected.append(line)
+            if len(collected) > _SCRAPE_TAIL_LINES:
+                collected.pop(0)
+        print(line, end="", flush=True)
+
+
+def _scrape_tail(collected: list[str], lock: threading.Lock) -> str:
+    with lock:
+        tail = "".join(collected)
+    if len(tail) > 4500:
+        tail = tail[-4500:]
+    return tail
+
+
 def _run_scrape_subprocess(argv: list[str], cwd: Path) -> tuple[int, str]:
     """
     Run the scraper child process. Stream combined stdout/stderr into the server log in real time.
@@ -238,7 +330,6 @@ def _run_scrape_subprocess(argv: list[str], cwd: Path) -> tuple[int, str]:
     """
     collected: list[str] = []
     lock = threading.Lock()
-    max_lines = 400
 
     proc = subprocess.Popen(
         argv,
@@ -254,22 +345,66 @@ def _run_scrape_subprocess(argv: list[str], cwd: Path) -> tuple[int, str]:
     def _reader() -> None:
         if proc.stdout is None:
             return
-        for line in proc.stdout:
-            with lock:
-                collected.append(line)
-                if len(collected) > max_lines:
-                    collected.pop(0)
-            print(line, end="", flush=True)
+        _pump_scrape_output(proc.stdout, collected, lock)
 
     t = threading.Thread(target=_reader, daemon=True)
     t.start()
     code = proc.wait()
     t.join(timeout=60)
-    with lock:
-        tail = "".join(collected)
-    if len(tail) > 4500:
-        tail = tail[-4500:]
-    return code, tail
+    return code, _scrape_tail(collected, lock)
+
+
+def _run_scrape_forked(args: list[str], cwd: Path) -> tuple[int, str]:
+    """
+    Same as _run_scrape_subprocess, but the child forks from the shared forkserver, which already
+    has pandas, camoufox, lxml and mysql.connector imported, instead of booting a fresh interpreter.
+    """
+    from src.forkserver import get_context
+    from src.web.run_scrape import forked_main
+
+    ctx = get_context()
+    reader, writer = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=forked_main, args=(args, writer, str(cwd)), daemon=True)
+    try:
+        proc.start()
+    finally:
+        writer.close()  # the child holds the only write end, so EOF follows its exit
+    collected: list[str] = []
+    lock = threading.Lock()
+    stream = os.fdopen(os.dup(reader.fileno()), "r", encoding="utf-8", errors="replace")
+    reader.close()
+
+    def _reader() -> None:
+        with stream:
+            _pump_scrape_output(stream, collected, lock)
+
+    t = threading.Thread(target=_reader, daemon=True)
+    t.start()
+    proc.join()
+    t.join(timeout=60)
+    code = proc.exitcode if proc.exitcode is not None else 1
+    return code, _scrape_tail(collected, lock)
+
+
+def _scrape_child_mode() -> str:
+    """SCRAPE_CHILD_MODE: forkserver (default) or subprocess."""
+    mode = (os.environ.get("SCRAPE_CHILD_MODE") or "forkserver").strip().lower()
+    return mode if mode in ("forkserver", "subprocess") else "forkserver"
+
+
+def _run_scrape_child(args: list[str], cwd: Path) -> tuple[int, str]:
+    """Run src.web.run_scrape with args, forked from the forkserver when available, else as a subprocess."""
+    if _scrape_child_mode() == "forkserver":
+        from src.forkserver import get_context
+
+        if get_context().get_start_method() == "forkserver":
+            try:
+                return _run_scrape_forked(args, cwd)
+            except OSError as e:
+                print(f"[scrape] forkserver child failed to start ({e}); using a subprocess", flush=True)
+    # -u: unbuffered Python so prints appear while the scrape runs (pipes are not TTYs).
+    argv = [sys.executable, "-u", "-m", "src.web.run_scrape", *args]
+    return _run_scrape_subprocess(argv, cwd)
 
 
 def _run_scrape_job(
@@ -280,31 +415,26 @@ def _run_scrape_job(
     address_name: str = "",
     address_index: int = 0,
 ) -> None:
-    """Run scraper in a subprocess (avoids Playwright 'Event loop is closed' in threads)."""
-    with _scrape_jobs_lock:
-        _scrape_jobs[postcode_norm] = {"status": "running", "error": None}
+    """Run scraper in a child process (avoids Playwright 'Event loop is closed' in threads)."""
+    started = time.perf_counter()
+    outcome = "error"
     try:
         print(
-            f"[scrape] Starting subprocess for postcode {postcode_display} "
+            f"[scrape] Starting {_scrape_child_mode()} child for postcode {postcode_display} "
             f"({home_or_business}, has_ev={has_ev_slug}, address_name={address_name!r}, address_index={address_index}) ...",
             flush=True,
         )
-        # -u: unbuffered Python so prints appear while the scrape runs (pipes are not TTYs).
-        argv = [
-            sys.executable,
-            "-u",
-            "-m",
-            "src.web.run_scrape",
+        args = [
             postcode_display,
             home_or_business,
             has_ev_slug,
             address_name,
             str(max(0, int(address_index))),
         ]
-        code, tail = _run_scrape_subprocess(argv, PROJECT_ROOT)
+        code, tail = _run_scrape_child(args, PROJECT_ROOT)
+        outcome = "completed" if code == 0 else "failed"
         if code == 0:
-            with _scrape_jobs_lock:
-                _scrape_jobs[postcode_norm] = {"status": "completed", "error": None}
+            _scrape_coordinator.finish(postcode_norm, "completed")
             # Quick sanity check: if the scrape said it succeeded but the DB has no rows,
             # we likely have an RDS/permissions/config mismatch.
             try:
@@ -319,17 +449,169 @@ def _run_scrape_job(
             print(f"[scrape] Completed for postcode {postcode_display}", flush=True)
         else:
             excerpt = (tail.strip() or f"Scraper exited with code {code} (no output captured).")
-            with _scrape_jobs_lock:
-                _scrape_jobs[postcode_norm] = {"status": "failed", "error": excerpt}
+            _scrape_coordinator.finish(postcode_norm, "failed", excerpt)
             print(
                 f"[scrape] Failed for postcode {postcode_display} (exit {code})\n{excerpt}",
                 flush=True,
             )
     except Exception as e:
         err_short = str(e) or type(e).__name__
-        with _scrape_jobs_lock:
-            _scrape_jobs[postcode_norm] = {"status": "failed", "error": err_short}
+        _scrape_coordinator.finish(postcode_norm, "failed", err_short)
         print(f"[scrape] Error for postcode {postcode_display}: {err_short}")
+    finally:
+        metrics.observe(
+            "scrape_job_duration_seconds",
+            time.perf_counter() - started,
+            outcome=outcome,
+            help_text="Wall time of background tariff scrape jobs.",
+        )
+
+
+def _start_scrape_thread(req: ScrapeRequest) -> None:
+    thread = threading.Thread(
+        target=_run_scrape_job,
+        args=(req.postcode_norm, req.postcode_display, req.home_or_business, req.has_ev_slug,
+              req.address_name, max(0, req.address_index)),
+        daemon=True,
+    )
+    thread.start()
+
+
+def _search_date_floor(seconds: float) -> date:
+    """
+    Earliest search_date that can hold rows created in the last `seconds` (a day of slack for
+    time zones). Bounding search_date lets MySQL prune the monthly partitions.
+    """
+    return (datetime.now() - timedelta(seconds=seconds)).date() - timedelta(days=1)
+
+
+def _latest_scrapes_in_outward(outward_code: str, has_ev_slug: str) -> list[tuple[str, datetime]]:
+    """(postcode_norm, latest created_at) of saved scrapes in an outward code for one EV answer."""
+    import mysql.connector
+
+    with metrics.span("db.scrape_freshness"):
+        conn = mysql.connector.connect(**mysql_config())
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT REPLACE(UPPER(postcode), ' ', ''), MAX(created_at)
+                FROM fact_tariff_search_simple
+                WHERE search_date >= %s AND UPPER(outward_code) = %s AND EV_question = %s
+                GROUP BY REPLACE(UPPER(postcode), ' ', '')
+                """,
+                (
+                    _search_date_floor(max_freshness_ttl_s()),
+                    outward_code,
+                    EV_SLUG_TO_ANSWER.get(has_ev_slug, EV_SLUG_TO_ANSWER["interested"]),
+                ),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+    return [(pc, created) for pc, created in rows if pc]
+
+
+# Background scrape jobs: freshness TTL and coalescing per outward code (see scrape_coordinator).
+_scrape_coordinator = ScrapeCoordinator(_start_scrape_thread, _latest_scrapes_in_outward)
+
+
+def _prescrape_stats(days: int):
+    """OutwardStats per outward code: searches in the last `days` days and the newest saved scrape."""
+    import mysql.connector
+    from src.web.prescrape import OutwardStats
+
+    with metrics.span("db.prescrape_stats"):
+        conn = mysql.connector.connect(**mysql_config())
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT UPPER(outward_code),
+                       COUNT(DISTINCT postcode, search_date),
+                       MAX(created_at),
+                       SUBSTRING_INDEX(GROUP_CONCAT(REPLACE(UPPER(postcode), ' ', '') ORDER BY created_at DESC), ',', 1)
+                FROM fact_tariff_search_simple
+                WHERE search_date >= %s AND created_at >= NOW() - INTERVAL %s DAY AND outward_code IS NOT NULL
+                GROUP BY UPPER(outward_code)
+                """,
+                (_search_date_floor(int(days) * 86400), int(days)),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+    return {oc: OutwardStats(int(n or 0), latest, pc or None) for oc, n, latest, pc in rows if oc}
+
+
+def _pick_postcode_in_outward(outward_code: str) -> str | None:
+    """A real postcode in outward_code from the offline postcode index (None without an index)."""
+    from src.api.postcode_index import get_default_index
+
+    index = get_default_index()
+    if index is None:
+        return None
+    found = index.postcodes_in_outward(outward_code, limit=1)
+    return found[0] if found else None
+
+
+def _region_scrape_results(postcode_norm: str) -> dict | None:
+    """
+    Latest scrape in the postcode's DNO region, if within the freshness TTL (tariffs are priced per
+    region; see src.web.prescrape). Coordinates are the requested postcode's where it resolves.
+    """
+    from src.data.dno_regions import dno_for_outward_code
+    from src.web.scrape_coordinator import freshness_ttl_s, outward_code_of
+
+    _dno_name, dno_id = dno_for_outward_code(outward_code_of(postcode_norm))
+    if dno_id == "Unknown":
+        return None
+    try:
+        import mysql.connector
+
+        with metrics.span("db.region_scrape"):
+            conn = mysql.connector.connect(**mysql_config())
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT REPLACE(UPPER(postcode), ' ', ''), MAX(created_at) AS latest
+                    FROM fact_tariff_search_simple
+                    WHERE search_date >= %s AND dno_id = %s
+                    GROUP BY REPLACE(UPPER(postcode), ' ', '')
+                    ORDER BY latest DESC
+                    LIMIT 1
+                    """,
+                    (_search_date_floor(freshness_ttl_s("both", dno_id)), dno_id),
+                )
+                row = cursor.fetchone()
+                cursor.close()
+            finally:
+                conn.close()
+    except Exception as e:
+        print(f"[scrape] region lookup failed for {postcode_norm}: {e}", flush=True)
+        return None
+    if not row or not row[0] or row[1] is None:
+        return None
+    if time.time() - row[1].timestamp() > freshness_ttl_s("both", dno_id):
+        return None
+    result = _get_scrape_results(row[0])
+    if result is None:
+        return None
+    return _borrowed_scrape(result, postcode_norm, {"postcode": row[0], "scope": "region", "dno_id": dno_id})
+
+
+def _borrowed_scrape(result: dict, postcode_norm: str, served_from: dict) -> dict:
+    """Another postcode's scrape answering for postcode_norm: its coordinates where it resolves, plus served_from."""
+    from src.api.postcode_lookup import lookup as postcode_lookup
+
+    result = dict(result)
+    here = postcode_lookup(postcode_norm)
+    if here and here.get("latitude") is not None:
+        result["latitude"], result["longitude"] = float(here["latitude"]), float(here["longitude"])
+    result["served_from"] = served_from
+    return result
 
 
 @app.route("/")
@@ -343,6 +625,12 @@ def sitemap_xml():
     return Response(_render_sitemap_xml(), mimetype="application/xml")
 
 
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint: stage latency histograms, cache hit ratios, optimiser and scrape stats."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/postcode")
 @app.route("/postcode/")
 @app.route("/tariffs")
@@ -377,13 +665,47 @@ def api_postcode():
     return jsonify(result)
 
 
+@app.route("/api/postcode/bulk", methods=["POST"])
+def api_postcode_bulk():
+    """Resolve a list of UK postcodes in one call. Results are in input order; null where unresolved."""
+    from src.api.postcode_lookup import bulk_max_items, lookup_many
+    data = request.get_json() or {}
+    postcodes = data.get("postcodes")
+    if not isinstance(postcodes, list) or not postcodes:
+        return jsonify({"error": "postcodes (non-empty list) required"}), 400
+    max_items = bulk_max_items()
+    if len(postcodes) > max_items:
+        return jsonify({"error": f"at most {max_items} postcodes per request"}), 413
+    postcodes = [p.strip() if isinstance(p, str) else "" for p in postcodes]
+    with metrics.span("postcode.bulk"):
+        results = lookup_many(postcodes)
+    resolved = sum(1 for r in results if r is not None)
+    return jsonify({
+        "results": [{"query": q, "result": r} for q, r in zip(postcodes, results)],
+        "resolved": resolved,
+        "unresolved": len(results) - resolved,
+    })
+
+
 @app.route("/api/scrape-results")
 def api_scrape_results():
     """Get latest tariff scrape results for a postcode (usage + tariffs + lat/lon). Returns 200 with no_saved_scrape when none found so the app can run the scraper."""
     postcode = (request.args.get("postcode") or "").strip()
     if not postcode:
         return jsonify({"error": "postcode required"}), 400
+    # A coalesced run-scrape request is answered by another postcode's scrape in the outward code;
+    # that scrape was started because this postcode's own results were missing or stale.
+    postcode_norm = postcode.upper().replace(" ", "")
+    served_by = _scrape_coordinator.served_by(postcode_norm)
     result = _get_scrape_results(postcode)
+    if served_by != postcode_norm:
+        coalesced = _get_scrape_results(served_by)
+        if coalesced is not None and (
+            result is None or (coalesced.get("search_date") or "") >= (result.get("search_date") or "")
+        ):
+            result = _borrowed_scrape(coalesced, postcode_norm, {"postcode": served_by, "scope": "outward_code"})
+    if result is None and _env_flag("SCRAPE_RESULTS_REGION_FALLBACK", True):
+        result = _region_scrape_results(postcode_norm)
     if result is None:
         return jsonify({
             "no_saved_scrape": True,
@@ -405,55 +727,41 @@ def api_scrape_address_options():
     full_re = re.compile(r"^[A-Z]{1,2}\d{1,2}[A-Z]?\d[A-Z]{2}$")
     if not postcode_norm or not full_re.match(postcode_norm):
         return jsonify({"error": "full postcode required (e.g. BS1 1AA)"}), 400
-    try:
-        # Prefer fast API lookup when key is configured.
-        options = _lookup_addresses_getaddress(postcode_norm)
-        if options:
-            return jsonify({
-                "postcode": postcode_norm,
-                "address_options": options,
-                "source": "getaddress",
-            })
-
-        # Slow browser fallback is optional: disable by default so UI stays fast.
-        allow_slow_fallback = (os.environ.get("ADDRESS_LOOKUP_ALLOW_SCRAPE_FALLBACK") or "").strip().lower() in (
-            "1", "true", "yes", "on"
-        )
-        if not allow_slow_fallback:
-            return jsonify({
-                "postcode": postcode_norm,
-                "address_options": [],
-                "source": "none",
-                "error": "Fast address lookup unavailable. Configure GETADDRESS_API_KEY (recommended).",
-            }), 503
-
-        # Fallback to scraper-driven options when explicitly enabled.
-        from src.api.energyScraping.ScrapeTariff import ScrapeTariff
-
-        raw = (os.environ.get("SCRAPER_HEADLESS") or "").strip().lower()
-        if raw in ("1", "true", "yes"):
-            headless_mode = True
-        elif raw in ("0", "false", "no"):
-            headless_mode = False
-        elif raw == "virtual":
-            headless_mode = "virtual"
-        else:
-            headless_mode = True
+    from src.api import address_cache
 
-        scraper = ScrapeTariff()
-        options = scraper.fetch_address_options(postcode_norm, headless=headless_mode)
-        return jsonify({
-            "postcode": postcode_norm,
-            "address_options": options,
-            "source": "scrape_fallback",
-        })
+    unavailable = {
+        "postcode": postcode_norm,
+        "address_options": [],
+        "source": "none",
+        "error": "Fast address lookup unavailable. Configure GETADDRESS_API_KEY (recommended).",
+    }
+    try:
+        # Cached per postcode; concurrent requests share one getAddress call / browser session.
+        result = address_cache.lookup(postcode_norm, lambda: _fetch_address_options(postcode_norm))
+    except _AddressLookupUnavailable:
+        return jsonify(unavailable), 503
+    except LookupError as e:  # the browser fallback found nothing; worth retrying
+        return jsonify({**unavailable, "error": f"Address lookup failed: {e}"}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    if not result.options and result.source == "getaddress":  # no addresses, browser fallback off
+        return jsonify({**unavailable, "cached": result.cached}), 503
+    return jsonify({
+        "postcode": postcode_norm,
+        "address_options": result.options,
+        "source": result.source,
+        "cached": result.cached,
+    })
 
 
 @app.route("/api/run-scrape", methods=["POST"])
 def api_run_scrape():
-    """Start a background tariff scrape for the given postcode. Returns 202 when started."""
+    """
+    Start a background tariff scrape for the given postcode. Returns 202 with status "started", or
+    "coalesced" when an equivalent scrape is already running, or "fresh" when a recent scrape in
+    the same outward code already answers it (scrape-status then reads completed). "force": true
+    skips the freshness check.
+    """
     data = request.get_json() or {}
     import re
     postcode = (data.get("postcode") or "").strip()
@@ -474,18 +782,21 @@ def api_run_scrape():
         address_index = int(data.get("address_index", 0))
     except (TypeError, ValueError):
         address_index = 0
-    with _scrape_jobs_lock:
-        existing = _scrape_jobs.get(postcode_norm)
-        if existing and existing.get("status") == "running":
-            return jsonify({"error": "Scrape already running for this postcode"}), 409
-    postcode_for_cli = (postcode or "").strip() or postcode_norm
-    thread = threading.Thread(
-        target=_run_scrape_job,
-        args=(postcode_norm, postcode_for_cli, home_or_business, has_ev_slug, address_name, max(0, address_index)),
-        daemon=True,
+    req = ScrapeRequest(
+        postcode_norm=postcode_norm,
+        postcode_display=(postcode or "").strip() or postcode_norm,
+        home_or_business=home_or_business,
+        has_ev_slug=has_ev_slug,
+        address_name=address_name,
+        address_index=max(0, address_index),
     )
-    thread.start()
-    return jsonify({"status": "started", "postcode": postcode}), 202
+    decision = _scrape_coordinator.request(req, force=bool(data.get("force")))
+    metrics.inc("scrape_requests_total", action=decision["action"],
+                help_text="run-scrape requests by outcome (started, joined an in-flight job, or served fresh).")
+    if decision["action"] != "started":
+        print(f"[scrape] {postcode_norm}: {decision['action']} (served by {decision['served_by']})", flush=True)
+    status = {"started": "started", "joined": "coalesced", "fresh": "fresh"}[decision["action"]]
+    return jsonify({"status": status, "postcode": postcode, "served_by": decision["served_by"]}), 202
 
 
 @app.route("/api/scrape-status")
@@ -495,8 +806,7 @@ def api_scrape_status():
     if not postcode:
         return jsonify({"error": "postcode required"}), 400
     postcode_norm = postcode.upper().replace(" ", "")
-    with _scrape_jobs_lock:
-        job = _scrape_jobs.get(postcode_norm)
+    job = _scrape_coordinator.status(postcode_norm)
     if not job:
         return jsonify({"status": "idle"})
     return jsonify({
@@ -505,16 +815,161 @@ def api_scrape_status():
     })
 
 
+@app.route("/api/tariff-trends")
+def api_tariff_trends():
+    """
+    Monthly median unit rate (p/kWh) and standing charge (p/day) from the price histograms
+    (src/data/tariff_trends.py). Query: months (default 12, max 120), group_by (region | supplier |
+    region_supplier), and optional dno_id, supplier, fuel_type filters.
+    """
+    from src.data.tariff_trends import GROUPS, query_trends
+
+    group_by = (request.args.get("group_by") or "region_supplier").strip().lower()
+    if group_by not in GROUPS:
+        return jsonify({"error": f"group_by must be one of {', '.join(GROUPS)}"}), 400
+    try:
+        months = min(120, max(1, int(request.args.get("months") or 12)))
+    except ValueError:
+        return jsonify({"error": "months must be an integer"}), 400
+    try:
+        import mysql.connector
+
+        with metrics.span("db.tariff_trends"):
+            conn = mysql.connector.connect(**mysql_config())
+            try:
+                cursor = conn.cursor()
+                trends = query_trends(
+                    cursor,
+                    months=months,
+                    group_by=group_by,
+                    dno_id=(request.args.get("dno_id") or "").strip() or None,
+                    supplier=(request.args.get("supplier") or "").strip() or None,
+                    fuel_type=(request.args.get("fuel_type") or "").strip() or None,
+                )
+                cursor.close()
+            finally:
+                conn.close()
+    except Exception as e:
+        print(f"[tariff-trends] query failed: {e}", flush=True)
+        return jsonify({"error": "Tariff trends unavailable"}), 503
+    return jsonify({"months": months, "group_by": group_by, "trends": trends})
+
+
 @app.route("/api/export-price")
 def api_export_price():
-    """Indicative UK export rate (£/kWh) from public Octopus product data."""
-    from src.api.reference_export_price import fetch_reference_export_price_gbp_per_kwh
+    """Indicative UK export rate (£/kWh) from public Octopus product data (cached, refreshed in the background)."""
+    from src.api.reference_export_price import get_cached_reference_export_price
 
-    out = fetch_reference_export_price_gbp_per_kwh()
+    out = get_cached_reference_export_price()
     status = 200 if out.get("export_price_per_kwh") is not None else 503
     return jsonify(out), status
 
 
+@app.route("/api/demand-profile", methods=["POST"])
+def api_demand_profile_upload():
+    """
+    Upload a half-hourly smart-meter consumption CSV (multipart field "file", or the raw CSV body).
+    Parsed as a stream into a typical 365×48 year kept in memory; pass the returned profile_id as
+    demand_profile_id to /api/recommend or /api/sensitivity.
+    """
+    import codecs
+
+    from src.data.smart_meter import SmartMeterError, parse_smart_meter_csv, profile_summary, store_profile
+
+    max_mb = float(os.environ.get("SMART_METER_MAX_UPLOAD_MB", "20"))
+    if request.content_length and request.content_length > max_mb * 1024 * 1024:
+        return jsonify({"error": f"upload larger than {max_mb:g} MB"}), 413
+    upload = request.files.get("file")
+    stream = upload.stream if upload is not None else request.stream
+    try:
+        with metrics.span("demand_profile.parse"):
+            profile = parse_smart_meter_csv(codecs.iterdecode(stream, "utf-8-sig", errors="replace"))
+    except SmartMeterError as e:
+        return jsonify({"error": str(e)}), 422
+    profile_id = store_profile(profile)
+    return jsonify({"profile_id": profile_id, **profile_summary(profile)})
+
+
+@app.route("/api/demand-profile/<profile_id>")
+def api_demand_profile(profile_id: str):
+    """Summary of an uploaded demand profile (404 once expired)."""
+    from src.data.smart_meter import get_profile, profile_summary
+
+    profile = get_profile(profile_id)
+    if profile is None:
+        return jsonify({"error": "unknown or expired demand profile"}), 404
+    return jsonify({"profile_id": profile_id, **profile_summary(profile)})
+
+
+def _demand_profile_from(data: dict) -> dict | None:
+    """The stored profile named by data["demand_profile_id"]; ValueError when it is unknown."""
+    profile_id = data.get("demand_profile_id")
+    if not profile_id:
+        return None
+    from src.data.smart_meter import get_profile
+
+    profile = get_profile(str(profile_id))
+    if profile is None:
+        raise ValueError("unknown or expired demand_profile_id; upload the CSV again")
+    return profile
+
+
+def _normalise_tariffs(tariffs_data: list[dict]) -> list[dict]:
+    """Tariff keys for recommend_tariff (unit_rate p/kWh, standing_charge_day p/day). Raises ValueError/TypeError."""
+    tariffs = []
+    for t in tariffs_data:
+        if not isinstance(t, dict):
+            raise TypeError("each tariff must be an object")
+        tariffs.append({
+            "new_supplier_name": t.get("supplier_name", t.get("new_supplier_name", "")),
+            "tariff_name": t.get("tariff_name", ""),
+            "unit_rate": float(t.get("unit_rate", t.get("unit_rate_p", 0))),
+            "standing_charge_day": float(t.get("standing_charge_day", t.get("standing_charge_p_per_day", 0))),
+            "is_green": bool(t.get("is_green", False)),
+            **{k: t[k] for k in ("rate_windows", "half_hourly_rates", "export_rates") if t.get(k)},
+        })
+    return tariffs
+
+
+def _recommend_atlas_for(postcode: str, combo: str, *, eligible: bool, **scenario: float):
+    """
+    (atlas, outward code) when this request can be served from the recommendation atlas
+    (src.models.recommend_atlas): default-style inputs matching the atlas scenario, and a postcode
+    whose outward code has been built. Otherwise (None, "").
+    """
+    if not eligible or not postcode:
+        return None, ""
+    from src.api.postcode_index import normalize_postcode
+    from src.models.recommend_atlas import Scenario, get_default_atlas
+    from src.web.scrape_coordinator import outward_code_of
+
+    atlas = get_default_atlas()
+    outward = outward_code_of(normalize_postcode(postcode))
+    if (
+        atlas is None
+        or combo not in atlas.combos
+        or not atlas.has(outward)
+        or not atlas.scenario.matches(Scenario(**scenario), combo)
+    ):
+        return None, ""
+    return atlas, outward
+
+
+def _recommend_atlas_lookup(atlas, outward: str, combo: str, annual_kwh: float, tariffs: list[dict]):
+    """Atlas sizing box at this usage and the tariffs' reference grid price, or None (counted as a cache miss)."""
+    from src.models.tariff_recommendation import reference_grid_price, tariff_to_pricing_dict
+
+    pricing = []
+    for t in tariffs:
+        try:
+            pricing.append(tariff_to_pricing_dict(t))
+        except (TypeError, KeyError, ValueError):
+            continue
+    hit = atlas.lookup(outward, combo, annual_kwh, reference_grid_price(pricing) * 100.0) if pricing else None
+    metrics.record_cache("recommend_atlas", hit is not None)
+    return hit
+
+
 @app.route("/api/recommend", methods=["POST"])
 def api_recommend():
     """
@@ -524,8 +979,14 @@ def api_recommend():
       latitude, longitude,
       annual_consumption_kwh? (optional; if missing and postcode set, use scrape data),
       tariffs?: [ ... ] (optional; if missing and postcode set, use scrape tariffs),
+      session_id? (optional; enables the optimiser warm start for repeat calls from one page),
+      layout? ("records" default | "columnar": monthly_balance as {column: [values]}, ranking
+               entries reference a shared tariffs list by tariff_index),
+      include_half_hourly? (adds half_hourly_balance: 365 × 48 solar/wind/demand kWh, columnar),
       ...
     }
+    Default-scenario requests in a built outward code are sized from the recommendation atlas
+    (response "atlas": {outward_code, exact, built_at}; null when optimised live).
     """
     try:
         data = request.get_json() or {}
@@ -534,22 +995,25 @@ def api_recommend():
         longitude = data.get("longitude")
         annual_consumption_kwh = data.get("annual_consumption_kwh")
         tariffs_data = data.get("tariffs") or []
-
-        # If annual usage not provided and postcode given, try scrape results
-        from src.api.postcode_lookup import lookup as postcode_lookup
-        if (annual_consumption_kwh is None or annual_consumption_kwh == "" or float(annual_consumption_kwh or 0) <= 0) and postcode:
-            scrape = _get_scrape_results(postcode)
-            if scrape:
-                annual_consumption_kwh = scrape["annual_electricity_kwh"]
-                if not tariffs_data:
-                    tariffs_data = scrape["tariffs"]
-                if latitude is None and longitude is None:
-                    latitude = scrape["latitude"]
-                    longitude = scrape["longitude"]
-
-        latitude = float(latitude if latitude is not None else 0)
-        longitude = float(longitude if longitude is not None else 0)
-        annual_consumption_kwh = float(annual_consumption_kwh if annual_consumption_kwh not in (None, "") else 3500)
+        demand_profile = _demand_profile_from(data)
+        if demand_profile is not None:
+            annual_consumption_kwh = demand_profile["annual_kwh"]
+
+        flux_source = (data.get("flux_source") or "last_year_monthly").lower()
+        if flux_source not in ("last_year_monthly", "multi_year"):
+            raise ValueError("flux_source must be 'last_year_monthly' or 'multi_year'")
+        flux_years = max(1, min(30, int(float(data.get("flux_years", 10)))))
+        objective = (data.get("objective") or "total_cost").lower()
+        if objective not in ("total_cost", "npv"):
+            raise ValueError("objective must be 'total_cost' or 'npv'")
+        from src.models.lifetime_financials import merge_lifetime_params
+        lifetime_params = merge_lifetime_params(data.get("lifetime") or None)
+        # Per-tab id from the optimiser page: slider tweaks reuse that session's evaluated sweep.
+        session_id = str(data.get("session_id") or "").strip()[:64] or None
+        layout = (data.get("layout") or "records").lower()
+        if layout not in ("records", "columnar"):
+            raise ValueError("layout must be 'records' or 'columnar'")
+        include_half_hourly = bool(data.get("include_half_hourly", False))
         heating_fraction = float(data.get("heating_fraction", 0.6))
         insulation_r_value = float(data.get("insulation_r_value", 0))
         heat_pump_cop = float(data.get("heat_pump_cop", 1.0))
@@ -572,31 +1036,81 @@ def api_recommend():
             wind_max_kw, min_wind_kw = 0.0, 0.0
         if battery_tier == "none":
             battery_max_kwh, battery_min_kwh = 0.0, 0.0
+        atlas, atlas_outward = _recommend_atlas_for(
+            postcode,
+            f"{solar_tier}/{wind_tier}/{battery_tier}",
+            eligible=flux_source == "last_year_monthly" and objective == "total_cost"
+            and not data.get("lifetime") and demand_profile is None,
+            heating_fraction=heating_fraction,
+            insulation_r_value=insulation_r_value,
+            heat_pump_cop=heat_pump_cop,
+            export_price_per_kwh=export_price_per_kwh,
+            optimize_over_years=optimize_over_years,
+            solar_max_kw=solar_max_kw,
+            wind_max_kw=wind_max_kw,
+            min_solar_kw=min_solar_kw,
+            min_wind_kw=min_wind_kw,
+            battery_max_kwh=battery_max_kwh,
+            battery_min_kwh=battery_min_kwh,
+            battery_step_kwh=battery_step_kwh,
+        )
+
+        if latitude is not None and longitude is not None:
+            latitude, longitude = float(latitude), float(longitude)
+        if annual_consumption_kwh not in (None, ""):
+            annual_consumption_kwh = float(annual_consumption_kwh)
+        tariffs = _normalise_tariffs(tariffs_data)
+        need_scrape = bool(postcode) and (annual_consumption_kwh in (None, "") or annual_consumption_kwh <= 0)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid input: {e}"}), 400
+
+    no_tariffs_error = "No tariffs for this postcode. Enter tariffs below or run the tariff scraper first and try again."
+    if not tariffs and postcode and not need_scrape:
+        return jsonify({"error": no_tariffs_error}), 400
+
+    # Validated: now the scrape lookup, postcode lookup (when no lat/lon) and weather flux fetch run
+    # concurrently. When the tariffs must come from the scrape, the flux waits for it so a postcode
+    # without saved tariffs does not pay for a weather call.
+    from src.web.recommend_io import prefetch_recommend_inputs
+    prefetched = prefetch_recommend_inputs(
+        postcode=postcode,
+        latitude=latitude,
+        longitude=longitude,
+        need_scrape=need_scrape,
+        load_scrape=_get_scrape_results,
+        # The atlas stores its outward codes' flux: start the fetch but only wait for it on a miss.
+        defer_flux=atlas is not None,
+        flux_after_scrape=not tariffs and bool(postcode),
+        flux_source=flux_source,
+        flux_years=flux_years,
+    )
+    scrape = prefetched["scrape"]
+    try:
+        if scrape:
+            annual_consumption_kwh = scrape["annual_electricity_kwh"]
+            if not tariffs:
+                tariffs = _normalise_tariffs(scrape["tariffs"])
+        latitude = float(prefetched["latitude"] if prefetched["latitude"] is not None else 0)
+        longitude = float(prefetched["longitude"] if prefetched["longitude"] is not None else 0)
+        annual_consumption_kwh = float(annual_consumption_kwh if annual_consumption_kwh not in (None, "") else 3500)
     except (TypeError, ValueError) as e:
         return jsonify({"error": f"Invalid input: {e}"}), 400
+    if prefetched["flux_error"]:
+        # Already tried once on this request; the optimiser would only repeat the same upstream call.
+        return jsonify({"error": f"Weather data unavailable: {prefetched['flux_error']}"}), 502
+    flux = prefetched["flux"]
 
-    if not tariffs_data:
+    if not tariffs:
         # No scrape data and no tariffs provided
         if postcode:
-            return jsonify({"error": "No tariffs for this postcode. Enter tariffs below or run the tariff scraper first and try again."}), 400
+            return jsonify({"error": no_tariffs_error}), 400
         # Default example tariffs so the page works without user adding any
-        tariffs_data = [
+        tariffs = _normalise_tariffs([
             {"supplier_name": "Octopus", "tariff_name": "Flexible", "unit_rate": 24.5, "standing_charge_day": 55.0, "is_green": True},
             {"supplier_name": "British Gas", "tariff_name": "Standard", "unit_rate": 28.2, "standing_charge_day": 60.0, "is_green": False},
             {"supplier_name": "EDF", "tariff_name": "Standard", "unit_rate": 26.8, "standing_charge_day": 52.0, "is_green": True},
             {"supplier_name": "Ovo", "tariff_name": "Better", "unit_rate": 25.0, "standing_charge_day": 58.0, "is_green": True},
-        ]
-
-    # Normalise tariff keys for recommend_tariff (it accepts unit_rate p/kWh, standing_charge_day p/day)
-    tariffs = []
-    for t in tariffs_data:
-        tariffs.append({
-            "new_supplier_name": t.get("supplier_name", t.get("new_supplier_name", "")),
-            "tariff_name": t.get("tariff_name", ""),
-            "unit_rate": float(t.get("unit_rate", t.get("unit_rate_p", 0))),
-            "standing_charge_day": float(t.get("standing_charge_day", t.get("standing_charge_p_per_day", 0))),
-            "is_green": bool(t.get("is_green", False)),
-        })
+        ])
 
     from src.models.tariff_recommendation import recommend_tariff
     from src.data.energy_tiers import SOLAR_TIERS, WIND_TIERS, BATTERY_TIERS
@@ -605,8 +1119,22 @@ def api_recommend():
     wind_type = WIND_TIERS.get(wind_tier, WIND_TIERS["budget"])
     battery_type = BATTERY_TIERS.get(battery_tier, BATTERY_TIERS["none"])
 
-    try:
-        rec = recommend_tariff(
+    bounds = {
+        "solar_max_kw": max(0.0, solar_max_kw),
+        "wind_max_kw": max(0.0, wind_max_kw),
+        "min_solar_kw": max(0.0, min_solar_kw),
+        "min_wind_kw": max(0.0, min_wind_kw),
+        "battery_max_kwh": max(0.0, battery_max_kwh),
+        "battery_min_kwh": max(0.0, battery_min_kwh),
+    }
+    atlas_hit = None
+    if atlas is not None:
+        atlas_hit = _recommend_atlas_lookup(
+            atlas, atlas_outward, f"{solar_tier}/{wind_tier}/{battery_tier}", annual_consumption_kwh, tariffs
+        )
+
+    def _recommend(bounds: dict, flux) -> dict:
+        return recommend_tariff(
             tariffs,
             latitude,
             longitude,
@@ -619,17 +1147,40 @@ def api_recommend():
             insulation_r_value=insulation_r_value,
             heat_pump_cop=heat_pump_cop,
             prefer_green=prefer_green,
-            solar_max_kw=max(0.0, solar_max_kw),
-            wind_max_kw=max(0.0, wind_max_kw),
-            min_solar_kw=max(0.0, min_solar_kw),
-            min_wind_kw=max(0.0, min_wind_kw),
             battery_type_params=battery_type if battery_tier != "none" else None,
-            battery_max_kwh=max(0.0, battery_max_kwh),
-            battery_min_kwh=max(0.0, battery_min_kwh),
             battery_step_kwh=max(0.1, battery_step_kwh),
+            flux=flux,
+            flux_source=flux_source,
+            flux_years=flux_years,
+            objective=objective,
+            lifetime_params=lifetime_params,
+            measured_monthly_demand_kwh=demand_profile["monthly_kwh"] if demand_profile else None,
+            demand_half_hourly_kwh=demand_profile["typical_year_kwh"] if demand_profile else None,
+            session_id=session_id,
+            **bounds,
         )
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+
+    rec = None
+    if atlas_hit is not None:
+        # Sweep only the atlas box, on the outward code's stored flux.
+        try:
+            with metrics.span("recommend.atlas"):
+                rec = _recommend(atlas_hit.bounds(), atlas.flux_frame(atlas_outward))
+        except Exception as e:
+            print(f"[recommend-atlas] {atlas_outward} pinned run failed, optimising live: {e}", flush=True)
+            rec, atlas_hit = None, None
+        if rec is not None and rec.get("error"):
+            rec, atlas_hit = None, None
+    if rec is None:
+        if prefetched["flux_future"] is not None:
+            with metrics.span("recommend.await_flux"):
+                flux, flux_error = prefetched["flux_future"].result()
+            if flux_error:
+                return jsonify({"error": f"Weather data unavailable: {flux_error}"}), 502
+        try:
+            rec = _recommend(bounds, flux)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
     if rec.get("error"):
         return jsonify({"error": rec["error"]}), 422
@@ -665,14 +1216,67 @@ def api_recommend():
             "payback_wind_years": opt.get("payback_wind_years"),
             "payback_battery_years": opt.get("payback_battery_years"),
         },
+        "flux_source": opt.get("flux_source", flux_source),
+        "weather_years": opt.get("weather_years"),
+        "lifetime_financials": opt.get("lifetime_financials"),
+        "demand_profile_id": data.get("demand_profile_id") if demand_profile else None,
         "optimize_over_years": rec["optimize_over_years"],
         "total_cost_best_gbp": rec["ranking"][0]["total_cost_gbp"] if rec["ranking"] else None,
+        "atlas": {
+            "outward_code": atlas_hit.outward_code,
+            "exact": atlas_hit.exact,
+            "built_at": atlas_hit.built_at,
+        } if atlas_hit is not None else None,
     }
-    if opt.get("monthly_balance") is not None:
-        df = opt["monthly_balance"]
-        out["monthly_balance"] = df.to_dict(orient="records") if hasattr(df, "to_dict") else []
+    with metrics.span("recommend.serialise"):
+        df = opt.get("monthly_balance")
+        if df is not None and include_half_hourly:
+            out["half_hourly_balance"] = _half_hourly_balance(df, demand_profile)
+        response = jsonify(_apply_layout(out, df, layout))
+    return response
 
-    return jsonify(out)
+
+def _apply_layout(out: dict, monthly_balance, layout: str) -> dict:
+    """
+    Shape a /api/recommend body for the requested layout: "records" keeps monthly_balance as a list
+    of row dicts and each ranking entry's tariff inline; "columnar" sends {column: [values]} and a
+    shared tariffs list referenced by tariff_index.
+    """
+    if monthly_balance is not None:
+        out["monthly_balance"] = (
+            columnar(monthly_balance) if layout == "columnar" else monthly_balance.to_dict(orient="records")
+        )
+    if layout == "columnar":
+        # Each ranking entry otherwise repeats its full tariff dict.
+        out["tariffs"] = [r["tariff"] for r in out["ranking"]]
+        out["ranking"] = [
+            {**{k: v for k, v in r.items() if k != "tariff"}, "tariff_index": i}
+            for i, r in enumerate(out["ranking"])
+        ]
+    out["layout"] = layout
+    return out
+
+
+def _half_hourly_balance(monthly_balance, demand_profile: dict | None) -> dict:
+    """365 × 48 solar/wind/demand for the chosen sizing, flattened day-major, columnar (kWh, 3 dp)."""
+    from src.models.time_of_use import SLOTS_PER_DAY, half_hourly_profile
+
+    demand_hh = None
+    if demand_profile is not None:
+        typical = demand_profile["typical_year_kwh"]
+        total = float(typical.sum())
+        demand_hh = typical * (float(monthly_balance["demand_kwh"].sum()) / total) if total > 0 else None
+    prof = half_hourly_profile(
+        monthly_balance["solar_kwh"].tolist(),
+        monthly_balance["wind_kwh"].tolist(),
+        monthly_balance["demand_kwh"].tolist(),
+        demand_half_hourly_kwh=demand_hh,
+    )
+    return {
+        "slots_per_day": SLOTS_PER_DAY,
+        "days": int(prof["demand_kwh"].shape[0]),
+        **columnar({k: v.ravel() for k, v in prof.items()}, decimals=3),
+    }
 
 
 @app.route("/api/cost-projection", methods=["POST"])
@@ -680,7 +1284,21 @@ def api_cost_projection():
     """
     Cumulative cost vs years for incremental upgrade steps using one tariff’s unit rate and
     standing charge. Each scenario adds on top of the previous: baseline → +solar → +wind → +insulation.
+
+    cumulative_gbp stays the flat capex + annual running × years line; cumulative_lifetime_gbp,
+    cumulative_discounted_gbp and npv_gbp add degradation, price escalation, replacements and
+    discounting (optional body "lifetime": overrides for src.models.lifetime_financials defaults).
+
+    Heating demand defaults to the degree-day model (body "heating_model": "degree_days"): last
+    year's daily temperatures and monthly flux are fetched once and every insulation / heat pump
+    scenario is costed against them in one pass. "profile" keeps the fixed-COP annual demand model,
+    which is also the fallback when temperatures are unavailable.
     """
+    from src.models.tariff_recommendation import (
+        coerce_standing_charge_pence_per_day,
+        coerce_unit_rate_pence_per_kwh,
+    )
+
     try:
         data = request.get_json() or {}
         latitude = float(data.get("latitude", 0))
@@ -707,6 +1325,11 @@ def api_cost_projection():
             wind_tier = "mid"
         tariff_label = str(data.get("tariff_label") or "Selected tariff")
         scenario_ids = data.get("scenario_ids")
+        heating_model = str(data.get("heating_model") or "degree_days").lower()
+        if heating_model not in ("degree_days", "profile"):
+            raise ValueError("heating_model must be 'degree_days' or 'profile'")
+        from src.models.lifetime_financials import merge_lifetime_params
+        lifetime_params = merge_lifetime_params(data.get("lifetime") or None)
     except (TypeError, ValueError) as e:
         return jsonify({"error": f"Invalid input: {e}"}), 400
 
@@ -768,8 +1391,31 @@ def api_cost_projection():
         scenario_defs = [s for s in scenario_defs if s["id"] in want]
 
     try:
-        series_out: list[dict] = []
-        for sc in scenario_defs:
+        # One weather fetch for every scenario; degree-day demand for all of them in one array pass.
+        # The degree-day model reads flux and temperatures from the same store entry.
+        from src.models.energy_balancing import get_flux_monthly_last_year
+        flux = None
+        monthly_demand: list[list[float] | None] = [None] * len(scenario_defs)
+        seasonal_cop: list[float | None] = [None] * len(scenario_defs)
+        if heating_model == "degree_days" and scenario_defs:
+            try:
+                from src.models.energy_balancing import get_flux_and_temperature_last_year
+                from src.models.heating_demand import weather_driven_demand
+                flux, t_mean, month_of_day = get_flux_and_temperature_last_year(latitude, longitude)
+                heating = weather_driven_demand(
+                    t_mean, month_of_day, annual_consumption_kwh, heating_fraction,
+                    [sc["insulation_r_value"] for sc in scenario_defs], heat_pump_cop,
+                )
+                monthly_demand = [row.tolist() for row in heating["monthly_electricity_kwh"]]
+                seasonal_cop = [round(float(c), 2) for c in heating["seasonal_cop"]]
+            except Exception as e:
+                print(f"[cost-projection] temperatures unavailable, using profile heating model: {e}", flush=True)
+                heating_model = "profile"
+        if flux is None:
+            flux = get_flux_monthly_last_year(latitude, longitude)
+
+        evaluated: list[tuple[dict, dict]] = []
+        for i, sc in enumerate(scenario_defs):
             ev = evaluate_fixed_capacities(
                 latitude,
                 longitude,
@@ -783,7 +1429,45 @@ def api_cost_projection():
                 wind_params,
                 battery_kwh=sc.get("battery_kwh", 0.0),
                 battery_type_params=battery_params,
+                flux=flux,
+                monthly_demand_kwh=monthly_demand[i],
             )
+            ev["seasonal_cop"] = seasonal_cop[i]
+            evaluated.append((sc, ev))
+
+        # All scenarios × years in one array pass. A battery's import/export shift is read off the
+        # same combo without the battery (when that scenario was requested).
+        from src.models.lifetime_financials import lifetime_cashflows
+        by_id = {sc["id"]: ev for sc, ev in evaluated}
+        import_saving: list[float] = []
+        export_reduction: list[float] = []
+        for sc, ev in evaluated:
+            without = None
+            if "battery" in sc.get("techs", []):
+                rest = [t for t in sc["techs"] if t != "battery"]
+                without = by_id.get("combo_baseline" if not rest else "combo_" + "_".join(rest))
+            import_saving.append(float(without["annual_import_kwh"]) - float(ev["annual_import_kwh"]) if without else 0.0)
+            export_reduction.append(float(without["annual_export_kwh"]) - float(ev["annual_export_kwh"]) if without else 0.0)
+        evs = [ev for _, ev in evaluated]
+        lifetime = lifetime_cashflows(
+            solar_kwh=[float(ev["annual_solar_kwh"]) for ev in evs],
+            wind_kwh=[float(ev["annual_wind_kwh"]) for ev in evs],
+            import_kwh=[float(ev["annual_import_kwh"]) for ev in evs],
+            export_kwh=[float(ev["annual_export_kwh"]) for ev in evs],
+            solar_capex=[float(ev["solar_capex_gbp"]) for ev in evs],
+            wind_capex=[float(ev["wind_capex_gbp"]) for ev in evs],
+            battery_capex=[float(ev["battery_capex_gbp"]) for ev in evs],
+            grid_price_per_kwh=grid_gbp_per_kwh,
+            export_price_per_kwh=export_price_per_kwh,
+            standing_charge_per_year=standing_gbp_per_year,
+            battery_import_saving_kwh=import_saving,
+            battery_export_reduction_kwh=export_reduction,
+            horizon_years=max_years,
+            params=lifetime_params,
+        )
+
+        series_out: list[dict] = []
+        for i, (sc, ev) in enumerate(evaluated):
             imp = float(ev["annual_import_kwh"])
             exp = float(ev["annual_export_kwh"])
             annual_energy_cash = imp * grid_gbp_per_kwh - exp * export_price_per_kwh
@@ -799,10 +1483,15 @@ def api_cost_projection():
                 "battery_kwh": sc.get("battery_kwh", 0.0),
                 "insulation_r_value": sc["insulation_r_value"],
                 "cumulative_gbp": cumulative,
+                "cumulative_lifetime_gbp": [round(float(x), 2) for x in lifetime["cumulative_cost"][i]],
+                "cumulative_discounted_gbp": [round(float(x), 2) for x in lifetime["cumulative_discounted_cost"][i]],
+                "npv_gbp": round(float(lifetime["npv_cost"][i]), 2),
                 "annual_running_gbp": round(annual_running_gbp, 2),
                 "capex_gbp": round(capex, 2),
                 "annual_import_kwh": ev["annual_import_kwh"],
                 "annual_export_kwh": ev["annual_export_kwh"],
+                "annual_demand_kwh": ev["annual_demand_kwh"],
+                "seasonal_cop": ev["seasonal_cop"],
             })
     except Exception as e:
         import traceback
@@ -816,10 +1505,150 @@ def api_cost_projection():
         "export_price_per_kwh": export_price_per_kwh,
         "unit_rate_p_per_kwh": unit_rate_p,
         "standing_charge_p_per_day": standing_p_day,
+        "lifetime_params": lifetime_params,
+        "heating_model": heating_model,
         "series": series_out,
     })
 
 
+@app.route("/api/sensitivity", methods=["POST"])
+def api_sensitivity():
+    """
+    Monte Carlo bands for payback and total cost of a chosen sizing (e.g. the optimiser's result).
+    Samples grid/export price, capex and weather year; see src.models.sensitivity for distribution specs.
+    """
+    from src.models.sensitivity import validate_distributions
+    from src.models.tariff_recommendation import coerce_unit_rate_pence_per_kwh
+
+    try:
+        data = request.get_json() or {}
+        latitude = float(data.get("latitude", 0))
+        longitude = float(data.get("longitude", 0))
+        annual_consumption_kwh = float(data.get("annual_consumption_kwh", 3500))
+        heating_fraction = float(data.get("heating_fraction", 0.6))
+        insulation_r_value = float(data.get("insulation_r_value", 0))
+        heat_pump_cop = float(data.get("heat_pump_cop", 1.0))
+        solar_kw = max(0.0, float(data.get("solar_kw", 0.0)))
+        wind_kw = max(0.0, float(data.get("wind_kw", 0.0)))
+        battery_kwh = max(0.0, float(data.get("battery_kwh", 0.0)))
+        solar_tier = (data.get("solar_tier") or "budget").lower()
+        wind_tier = (data.get("wind_tier") or "budget").lower()
+        battery_tier = (data.get("battery_tier") or "none").lower()
+        unit_rate_p = coerce_unit_rate_pence_per_kwh(float(data.get("unit_rate_p_per_kwh", 25.0)))
+        export_price_per_kwh = float(data.get("export_price_per_kwh", 0.05))
+        horizon_years = max(1.0, min(30.0, float(data.get("horizon_years", 10))))
+        flux_source = (data.get("flux_source") or "multi_year").lower()
+        if flux_source not in ("last_year_monthly", "multi_year"):
+            raise ValueError("flux_source must be 'last_year_monthly' or 'multi_year'")
+        flux_years = max(1, min(30, int(float(data.get("flux_years", 10)))))
+        n_draws = int(float(data.get("n_draws", 5000)))
+        seed = data.get("seed")
+        seed = int(seed) if seed is not None else None
+        distributions = validate_distributions(data.get("distributions") or None) or None
+        demand_profile = _demand_profile_from(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid input: {e}"}), 400
+
+    from src.data.energy_tiers import SOLAR_TIERS, WIND_TIERS, BATTERY_TIERS
+    from src.models.energy_balancing import (
+        adjust_measured_monthly_demand,
+        get_flux_monthly_last_year,
+        get_flux_monthly_years,
+        monthly_demand_profile,
+    )
+    from src.models.sensitivity import run_sensitivity
+
+    solar_params = SOLAR_TIERS.get(solar_tier, SOLAR_TIERS["budget"])
+    wind_params = WIND_TIERS.get(wind_tier, WIND_TIERS["budget"])
+    battery_params = BATTERY_TIERS.get(battery_tier) if battery_tier != "none" else None
+    if demand_profile is not None:
+        monthly_demand = adjust_measured_monthly_demand(
+            demand_profile["monthly_kwh"], heating_fraction, insulation_r_value, heat_pump_cop,
+        )
+    else:
+        monthly_demand = monthly_demand_profile(annual_consumption_kwh, heating_fraction, insulation_r_value, heat_pump_cop)
+
+    try:
+        if flux_source == "multi_year":
+            flux = get_flux_monthly_years(latitude, longitude, flux_years)
+        else:
+            flux = get_flux_monthly_last_year(latitude, longitude)
+        out = run_sensitivity(
+            flux,
+            solar_kw,
+            wind_kw,
+            battery_kwh,
+            monthly_demand,
+            solar_params,
+            wind_params,
+            battery_type_params=battery_params,
+            grid_price_per_kwh=unit_rate_p / 100.0,
+            export_price_per_kwh=export_price_per_kwh,
+            horizon_years=horizon_years,
+            distributions=distributions,
+            n_draws=n_draws,
+            seed=seed,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    out["flux_source"] = flux_source
+    return jsonify(out)
+
+
+# Heavy modules the API views import lazily (pandas alone is ~0.4 s). Importing them in a background
+# thread once the app object exists lets gunicorn accept connections straight away while the first
+# optimiser request, usually seconds later, still finds them loaded. The scrape forkserver is warmed
+# the same way. APP_PRELOAD_MODULES=0 turns this off (e.g. one-off scripts importing the app).
+_PRELOAD_MODULES = (
+    "numpy",
+    "pandas",
+    "src.models.energy_balancing",
+    "src.models.sizing_grid",
+    "src.models.tariff_recommendation",
+)
+
+
+def _preload_modules() -> None:
+    import importlib
+
+    started = time.perf_counter()
+    for name in _PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[startup] preload of {name} failed: {e}", flush=True)
+    print(f"[startup] preloaded {len(_PRELOAD_MODULES)} modules in {time.perf_counter() - started:.2f}s", flush=True)
+    if _scrape_child_mode() == "forkserver":
+        try:
+            from src.forkserver import warm
+
+            if warm():
+                print(f"[startup] scrape forkserver ready after {time.perf_counter() - started:.2f}s", flush=True)
+        except Exception as e:
+            print(f"[startup] forkserver warm-up failed: {e}", flush=True)
+
+
+def _is_child_process() -> bool:
+    """True in a multiprocessing child that re-imported this module as its __main__."""
+    import multiprocessing
+
+    return multiprocessing.parent_process() is not None
+
+
+if os.environ.get("APP_PRELOAD_MODULES", "1").strip().lower() not in ("0", "false", "no") and not _is_child_process():
+    threading.Thread(target=_preload_modules, name="app-preload", daemon=True).start()
+
+# Region pre-scrapes (src.web.prescrape) share the scrape coordinator, so they coalesce with user
+# scrapes and count against the same concurrency cap. Off unless PRESCRAPE_ENABLED=1.
+if _env_flag("PRESCRAPE_ENABLED", False) and not _is_child_process():
+    from src.web.prescrape import PrescrapeScheduler
+
+    _prescrape_scheduler = PrescrapeScheduler(_scrape_coordinator, _prescrape_stats, _pick_postcode_in_outward)
+    _prescrape_scheduler.start_background()
+
+
 if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 5001))
@@ -0,0 +1,191 @@
+"""
+Background pre-scrape of tariffs, one representative postcode per DNO region, so first visits find warm data.
+
+Tariffs are priced per DNO region, so one fresh scrape answers every postcode in the region
+(/api/scrape-results falls back to the region's latest fresh scrape). plan_prescrape() looks at
+every region in DNO_MAPPING whose newest scrape is older than the freshness TTL
+(scrape_coordinator.freshness_ttl_s) and picks its representative postcode:
+- the region's most-requested outward code, counting saved searches in the last
+  PRESCRAPE_DEMAND_DAYS plus run-scrape requests since start. Its most recently searched postcode
+  is scraped, since that one is known to work on the comparison site.
+- for a region without demand, the first postcode of its first area's "<area>1" district.
+Regions are ordered by priority = (1 + demand) × staleness. Staleness is age / TTL, capped at
+_MAX_STALENESS; a region never scraped counts as the cap.
+
+PrescrapeScheduler.run_once() submits the top targets to the ScrapeCoordinator as ordinary home
+requests. They coalesce with user requests, respect freshness, and save through the same scrape
+child and bulk insert. It keeps a global concurrency cap: PRESCRAPE_MAX_CONCURRENT running jobs,
+user jobs included. It also keeps a rate budget of PRESCRAPE_MAX_PER_HOUR starts in any rolling
+hour. start_background() runs it every PRESCRAPE_INTERVAL_S.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from src.data.dno_regions import DNO_MAPPING, dno_for_outward_code
+from src.web.scrape_coordinator import ScrapeCoordinator, ScrapeRequest, freshness_ttl_s
+
+__all__ = ["OutwardStats", "PrescrapeScheduler", "PrescrapeTarget", "plan_prescrape"]
+
+_MAX_STALENESS = 10.0
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class OutwardStats:
+    """Saved scrapes for one outward code: searches in the demand window, newest scrape and its postcode."""
+
+    searches: int = 0
+    latest: datetime | None = None
+    latest_postcode: str | None = None
+
+
+@dataclass(frozen=True)
+class PrescrapeTarget:
+    dno_id: str
+    outward_code: str
+    postcode_norm: str
+    demand: int
+    age_s: float | None
+    priority: float
+
+    @property
+    def postcode_display(self) -> str:
+        return f"{self.postcode_norm[:-3]} {self.postcode_norm[-3:]}"
+
+
+def _regions() -> dict[str, list[str]]:
+    """dno_id -> postcode areas, in DNO_MAPPING order."""
+    regions: dict[str, list[str]] = {}
+    for area, (_dno_name, dno_id) in DNO_MAPPING.items():
+        regions.setdefault(dno_id, []).append(area)
+    return regions
+
+
+def plan_prescrape(
+    stats: dict[str, OutwardStats],
+    demand: dict[str, int],
+    now: float,
+    pick_postcode: Callable[[str], str | None],
+    fuel_type: str = "both",
+) -> list[PrescrapeTarget]:
+    """Stale regions, highest priority first, each with the postcode to scrape."""
+    by_region: dict[str, list[str]] = {}
+    for outward in set(stats) | set(demand):
+        by_region.setdefault(dno_for_outward_code(outward)[1], []).append(outward)
+
+    targets: list[PrescrapeTarget] = []
+    for dno_id, areas in _regions().items():
+        outwards = by_region.get(dno_id, [])
+        latest = max((stats[o].latest.timestamp() for o in outwards if o in stats and stats[o].latest), default=None)
+        ttl = freshness_ttl_s(fuel_type, dno_id)
+        age = None if latest is None else max(0.0, now - latest)
+        if age is not None and age < ttl:
+            continue
+        staleness = _MAX_STALENESS if age is None or ttl <= 0 else min(_MAX_STALENESS, age / ttl)
+
+        def weight(o: str) -> int:
+            return (stats[o].searches if o in stats else 0) + demand.get(o, 0)
+
+        region_demand = sum(weight(o) for o in outwards)
+        candidates = sorted(outwards, key=lambda o: (-weight(o), o)) + [f"{areas[0]}1"]
+        for outward in candidates:
+            known = stats.get(outward)
+            postcode = (known.latest_postcode if known and known.latest_postcode else None) or pick_postcode(outward)
+            if postcode:
+                targets.append(PrescrapeTarget(
+                    dno_id=dno_id,
+                    outward_code=outward,
+                    postcode_norm=postcode.upper().replace(" ", ""),
+                    demand=region_demand,
+                    age_s=age,
+                    priority=(1 + region_demand) * staleness,
+                ))
+                break
+        else:
+            print(f"[prescrape] no representative postcode for region {dno_id}", flush=True)
+    targets.sort(key=lambda t: (-t.priority, t.dno_id))
+    return targets
+
+
+class PrescrapeScheduler:
+    """
+    Submits pre-scrapes through the coordinator within the concurrency and rate budget.
+    stats(days) returns {outward_code: OutwardStats} from saved scrapes; pick_postcode(outward)
+    returns a real postcode in that outward code (or None).
+    """
+
+    def __init__(
+        self,
+        coordinator: ScrapeCoordinator,
+        stats: Callable[[int], dict[str, OutwardStats]],
+        pick_postcode: Callable[[str], str | None],
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._coordinator = coordinator
+        self._stats = stats
+        self._pick_postcode = pick_postcode
+        self._clock = clock
+        self._starts: list[float] = []
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> list[dict]:
+        """Plan and submit; returns {"postcode", "dno_id", "priority", "action"} per started or joined target."""
+        now = self._clock()
+        self._starts = [t for t in self._starts if now - t < 3600.0]
+        rate_left = _env_int("PRESCRAPE_MAX_PER_HOUR", 6) - len(self._starts)
+        slots = _env_int("PRESCRAPE_MAX_CONCURRENT", 1) - self._coordinator.running_count()
+        if rate_left <= 0 or slots <= 0:
+            return []
+        try:
+            stats = self._stats(_env_int("PRESCRAPE_DEMAND_DAYS", 30))
+        except Exception as e:
+            print(f"[prescrape] demand/age lookup failed: {e}", flush=True)
+            return []
+        submitted: list[dict] = []
+        for target in plan_prescrape(stats, self._coordinator.demand(), now, self._pick_postcode):
+            if rate_left <= 0 or slots <= 0:
+                break
+            decision = self._coordinator.request(
+                ScrapeRequest(postcode_norm=target.postcode_norm, postcode_display=target.postcode_display),
+                source_is_scheduler=True,
+            )
+            if decision["action"] == "fresh":
+                continue  # scraped since the stats were read (this process knows first)
+            if decision["action"] == "started":
+                self._starts.append(now)
+                rate_left -= 1
+                slots -= 1
+            submitted.append({"postcode": target.postcode_display, "dno_id": target.dno_id,
+                              "priority": round(target.priority, 2), "action": decision["action"]})
+        if submitted:
+            print(f"[prescrape] {submitted}", flush=True)
+        return submitted
+
+    def _loop(self, interval_s: float) -> None:
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[prescrape] run failed: {e}", flush=True)
+            time.sleep(interval_s)
+
+    def start_background(self) -> threading.Thread:
+        """Run run_once() every PRESCRAPE_INTERVAL_S (default 300) on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            interval = max(10.0, float(_env_int("PRESCRAPE_INTERVAL_S", 300)))
+            self._thread = threading.Thread(target=self._loop, args=(interval,), name="prescrape", daemon=True)
+            self._thread.start()
+        return self._thread
@@ -0,0 +1,166 @@
+"""
+Concurrent I/O for /api/recommend.
+
+The endpoint needs up to three blocking lookups before the optimiser can run: the latest saved
+scrape (MySQL), the postcode location (offline index / postcodes.io) and the monthly weather flux
+(Open-Meteo; last year or the multi-year store). Done in sequence these stack up on the request's
+critical path. gather_recommend_inputs() runs the independent ones concurrently on an asyncio
+loop, offloading each blocking client to a thread with asyncio.to_thread, and starts the weather
+fetch as soon as coordinates are known. The endpoint validates the request first, so a request
+rejected with 400 never reaches the weather API; a failed flux fetch is reported (flux_error)
+rather than silently retried by the optimiser.
+
+When the endpoint may answer from the recommendation atlas (which carries its own flux), the flux
+fetch is started but not awaited (defer_flux): the caller gets a future, ignores it on an atlas
+hit and takes its result on a miss, so the slow path still makes a single weather call.
+
+The DB driver, requests and openmeteo clients are synchronous, so they run in worker threads
+rather than as native coroutines; the view stays a regular Flask view and calls
+prefetch_recommend_inputs(), which drives the loop with asyncio.run().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from src import metrics
+
+__all__ = ["gather_recommend_inputs", "prefetch_recommend_inputs"]
+
+
+def _valid_coords(lat: Any, lon: Any) -> bool:
+    return lat is not None and lon is not None
+
+
+_FLUX_POOL: ThreadPoolExecutor | None = None
+_FLUX_POOL_LOCK = threading.Lock()
+
+
+def _flux_pool() -> ThreadPoolExecutor:
+    """Shared pool for deferred flux fetches; they outlive the prefetch's event loop."""
+    global _FLUX_POOL
+    with _FLUX_POOL_LOCK:
+        if _FLUX_POOL is None:
+            _FLUX_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recommend-flux")
+        return _FLUX_POOL
+
+
+def _fetch_flux_blocking(lat: float, lon: float, flux_source: str, flux_years: int) -> tuple[Any, str | None]:
+    """(monthly flux for flux_source, None), or (None, error message) on failure."""
+    from src.models import energy_balancing
+
+    try:
+        with metrics.span("recommend.prefetch_flux"):
+            if flux_source == "multi_year":
+                flux = energy_balancing.get_flux_monthly_years(float(lat), float(lon), flux_years)
+            else:
+                flux = energy_balancing.get_flux_monthly_last_year(float(lat), float(lon))
+        return flux, None
+    except Exception as e:
+        print(f"[recommend] flux prefetch failed lat={lat} lon={lon}: {e}", flush=True)
+        return None, str(e) or type(e).__name__
+
+
+async def _fetch_flux(lat: float, lon: float, flux_source: str, flux_years: int) -> tuple[Any, str | None]:
+    return await asyncio.to_thread(_fetch_flux_blocking, lat, lon, flux_source, flux_years)
+
+
+def _defer_flux(lat: float, lon: float, flux_source: str, flux_years: int) -> Future:
+    """Start the flux fetch without awaiting it; the future resolves to _fetch_flux_blocking's pair."""
+    ctx = contextvars.copy_context()
+    return _flux_pool().submit(ctx.run, _fetch_flux_blocking, lat, lon, flux_source, flux_years)
+
+
+async def _load_scrape(load_scrape: Callable[[str], dict | None], postcode: str) -> dict | None:
+    with metrics.span("recommend.prefetch_scrape"):
+        return await asyncio.to_thread(load_scrape, postcode)
+
+
+async def _lookup_postcode(postcode: str) -> dict | None:
+    from src.api.postcode_lookup import lookup as postcode_lookup
+
+    with metrics.span("recommend.prefetch_postcode"):
+        return await asyncio.to_thread(postcode_lookup, postcode)
+
+
+async def gather_recommend_inputs(
+    *,
+    postcode: str,
+    latitude: Any,
+    longitude: Any,
+    need_scrape: bool,
+    load_scrape: Callable[[str], dict | None],
+    fetch_flux: bool = True,
+    defer_flux: bool = False,
+    flux_after_scrape: bool = False,
+    flux_source: str = "last_year_monthly",
+    flux_years: int = 10,
+) -> dict[str, Any]:
+    """
+    Resolve scrape data, coordinates and weather flux with as much overlap as the dependencies allow.
+
+    - Coordinates in the request: scrape lookup and flux fetch run together.
+    - No coordinates but a postcode: scrape lookup and postcode lookup run together; coordinates come
+      from the scrape when it has them, else from the postcode lookup; flux follows.
+    - flux_after_scrape (the request's tariffs come from the scrape): flux waits for the scrape and
+      is skipped when it has no tariffs, since the request will then be refused.
+    - defer_flux: the flux fetch starts at the same point but is not awaited; "flux_future" holds a
+      concurrent.futures.Future of (flux, flux_error) and "flux"/"flux_error" stay None.
+
+    Returns {"scrape", "latitude", "longitude", "postcode_result", "flux", "flux_error",
+    "flux_future"}; any entry may be None.
+    """
+    flux_future: Future | None = None
+
+    def start_flux(lat: Any, lon: Any) -> asyncio.Task | None:
+        nonlocal flux_future
+        if defer_flux:
+            flux_future = _defer_flux(lat, lon, flux_source, flux_years)
+            return None
+        return asyncio.create_task(_fetch_flux(lat, lon, flux_source, flux_years))
+
+    scrape_task = (
+        asyncio.create_task(_load_scrape(load_scrape, postcode)) if need_scrape and postcode else None
+    )
+    flux_task = None
+    postcode_task = None
+    if _valid_coords(latitude, longitude):
+        if fetch_flux and not flux_after_scrape:
+            flux_task = start_flux(latitude, longitude)
+    elif postcode:
+        postcode_task = asyncio.create_task(_lookup_postcode(postcode))
+
+    scrape = await scrape_task if scrape_task else None
+    if flux_after_scrape and not (scrape and scrape.get("tariffs")):
+        fetch_flux = False
+    postcode_result = None
+    flux_started = flux_task is not None or flux_future is not None
+    if not flux_started and not _valid_coords(latitude, longitude):
+        if scrape and _valid_coords(scrape.get("latitude"), scrape.get("longitude")):
+            latitude, longitude = scrape["latitude"], scrape["longitude"]
+        if postcode_task is not None:
+            postcode_result = await postcode_task
+            if postcode_result and not _valid_coords(latitude, longitude):
+                latitude, longitude = postcode_result["latitude"], postcode_result["longitude"]
+    if not flux_started and fetch_flux and _valid_coords(latitude, longitude):
+        flux_task = start_flux(latitude, longitude)
+
+    flux, flux_error = await flux_task if flux_task else (None, None)
+    return {
+        "scrape": scrape,
+        "latitude": latitude,
+        "longitude": longitude,
+        "postcode_result": postcode_result,
+        "flux": flux,
+        "flux_error": flux_error,
+        "flux_future": flux_future,
+    }
+
+
+def prefetch_recommend_inputs(**kwargs: Any) -> dict[str, Any]:
+    """Synchronous entry point for Flask views (see gather_recommend_inputs)."""
+    return asyncio.run(gather_recommend_inputs(**kwargs))
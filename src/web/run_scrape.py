@@ -49,11 +49,14 @@ def _scraper_headless():
     return True
 
 
-_EV_SLUG_TO_ANSWER = {
-    "yes": "Yes",
-    "no": "No",
-    "interested": "No but interested",
-}
+from src.web.scrape_coordinator import EV_SLUG_TO_ANSWER as _EV_SLUG_TO_ANSWER
+
+
+def _drain_debug_writes() -> None:
+    """Debug artifacts are written by a background thread; let queued ones finish before exit."""
+    debug_capture = sys.modules.get("src.api.energyScraping.debug_capture")
+    if debug_capture is not None and not debug_capture.drain(timeout=10.0):
+        print("⚠ Debug artifact writes still pending at exit", file=sys.stderr)
 
 
 def main() -> int:
@@ -99,11 +102,13 @@ def main() -> int:
             address_name=address_name,
             headless=_scraper_headless(),
         )
+        _drain_debug_writes()
         return 0
     except Exception as e:
         import traceback
         traceback.print_exc(file=sys.stderr)
         print(f"Scrape failed: {e}", file=sys.stderr)
+        _drain_debug_writes()
         # Avoid Python shutdown/atexit so browser cleanup doesn't crash the process
         os._exit(1)
     finally:
@@ -114,6 +119,31 @@ def main() -> int:
         scraper = None
 
 
+def forked_main(args: list[str], output, cwd: str | None = None) -> None:
+    """
+    Entry point for a scrape child started from the forkserver (see src.forkserver).
+    output is the write end of a one-way Pipe; stdout and stderr are pointed at it so the web app
+    streams this child's log exactly as it does a `python -m src.web.run_scrape` subprocess.
+    """
+    os.setsid()  # own process group, like start_new_session=True
+    if cwd:
+        os.chdir(cwd)
+    fd = output.fileno()
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    output.close()
+    for _stream in (sys.stdout, sys.stderr):
+        try:
+            _stream.reconfigure(line_buffering=True)
+        except Exception:
+            pass
+    sys.argv = ["src.web.run_scrape", *args]
+    code = main()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(code)
+
+
 if __name__ == "__main__":
     exit_code = main()
     # Normal success path only; failure path uses os._exit(1)
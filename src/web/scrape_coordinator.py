@@ -0,0 +1,252 @@
+"""
+Freshness policy and request coalescing for background tariff scrapes (/api/run-scrape).
+
+A browser scrape takes 2–3 minutes, and the tariffs offered in one outward code (one DNO region)
+are the same whichever postcode in it was scraped. ScrapeCoordinator.request() decides what a
+run-scrape request needs:
+
+- fresh: a scrape in the same scope finished within the freshness TTL, either in this process or
+  according to latest_scrapes (the DB). Nothing runs; the request is "completed" at once and its
+  results are served from that scrape.
+- joined: a scrape in the same scope is already running, and the request waits on it.
+- started: a new job is registered as running and handed to start().
+
+A scope is (outward code, home/business, EV answer), or the full postcode with
+SCRAPE_COALESCE=postcode. The freshness TTL is SCRAPE_FRESH_TTL_HOURS (default 12). It is set per
+fuel type and DNO region through SCRAPE_FRESH_TTL_OVERRIDES, e.g. "SSEN_1=24,both:WPD_1=6".
+Keys are a fuel type, a DNO id or fuel:dno_id, and the most specific one wins.
+
+Each requested postcode remembers which job answers it (served_by). /api/scrape-status and
+/api/scrape-results for the requested postcode then behave exactly as if its own scrape had run.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from src.data.dno_regions import dno_for_outward_code
+
+__all__ = ["EV_SLUG_TO_ANSWER", "ScrapeCoordinator", "ScrapeRequest", "freshness_ttl_s", "outward_code_of"]
+
+# Comparison site EV question answers by API slug (run_scrape passes these to the scraper).
+EV_SLUG_TO_ANSWER = {
+    "yes": "Yes",
+    "no": "No",
+    "interested": "No but interested",
+}
+
+_FULL_RE = re.compile(r"^[A-Z]{1,2}\d{1,2}[A-Z]?\d[A-Z]{2}$")
+
+# Finished jobs and request aliases are forgotten after a day (status then reads "idle").
+_RETAIN_S = 24 * 3600.0
+
+
+def outward_code_of(postcode_norm: str) -> str:
+    """Outward code of a normalised (upper case, no spaces) full or outward-only postcode."""
+    return postcode_norm[:-3] if _FULL_RE.match(postcode_norm) else postcode_norm
+
+
+def _hours(raw: str, default: float) -> float:
+    try:
+        return max(0.0, float(raw))
+    except (TypeError, ValueError):
+        return default
+
+
+def freshness_ttl_s(fuel_type: str, region: str) -> float:
+    """Seconds a finished scrape for fuel_type in DNO region stays fresh."""
+    default = _hours(os.environ.get("SCRAPE_FRESH_TTL_HOURS", "12"), 12.0)
+    overrides: dict[str, float] = {}
+    for item in (os.environ.get("SCRAPE_FRESH_TTL_OVERRIDES") or "").split(","):
+        key, _, value = item.partition("=")
+        if key.strip() and value.strip():
+            overrides[key.strip().lower()] = _hours(value.strip(), default)
+    for key in (f"{fuel_type}:{region}".lower(), region.lower(), fuel_type.lower()):
+        if key in overrides:
+            return overrides[key] * 3600.0
+    return default * 3600.0
+
+
+def max_freshness_ttl_s() -> float:
+    """Longest freshness TTL across the default and all overrides."""
+    default = _hours(os.environ.get("SCRAPE_FRESH_TTL_HOURS", "12"), 12.0)
+    hours = [default]
+    for item in (os.environ.get("SCRAPE_FRESH_TTL_OVERRIDES") or "").split(","):
+        key, _, value = item.partition("=")
+        if key.strip() and value.strip():
+            hours.append(_hours(value.strip(), default))
+    return max(hours) * 3600.0
+
+
+def _coalesce_outward() -> bool:
+    return (os.environ.get("SCRAPE_COALESCE") or "outward").strip().lower() != "postcode"
+
+
+@dataclass(frozen=True)
+class ScrapeRequest:
+    """One /api/run-scrape request (postcode_norm: upper case, no spaces)."""
+
+    postcode_norm: str
+    postcode_display: str
+    home_or_business: str = "home"
+    has_ev_slug: str = "interested"
+    address_name: str = ""
+    address_index: int = 0
+    fuel_type: str = "both"
+
+    @property
+    def outward_code(self) -> str:
+        return outward_code_of(self.postcode_norm)
+
+    def scope(self, outward: bool = True) -> tuple[str, str, str]:
+        return (self.outward_code if outward else self.postcode_norm, self.home_or_business, self.has_ev_slug)
+
+
+class ScrapeCoordinator:
+    """
+    In-memory job table for background scrapes (the web app runs one Gunicorn worker).
+
+    start(request) launches the scrape; the job must report back through finish().
+    latest_scrapes(outward_code, has_ev_slug) -> [(postcode_norm, finished datetime)] lists saved
+    scrapes for home requests (the DB does not record home/business) and may be None.
+    """
+
+    def __init__(
+        self,
+        start: Callable[[ScrapeRequest], None],
+        latest_scrapes: Callable[[str, str], list[tuple[str, datetime]]] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._start = start
+        self._latest_scrapes = latest_scrapes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict] = {}  # job postcode -> status, error, scope, finished_at
+        self._running: dict[tuple, str] = {}  # scope -> job postcode
+        self._finished: dict[tuple, tuple[str, float]] = {}  # scope -> (job postcode, finished_at)
+        self._served_by: dict[str, str] = {}  # requested postcode -> job postcode
+        self._demand: Counter[str] = Counter()  # outward code -> run-scrape requests since start
+
+    def _ttl(self, req: ScrapeRequest) -> float:
+        _dno_name, dno_id = dno_for_outward_code(req.outward_code)
+        return freshness_ttl_s(req.fuel_type, dno_id)
+
+    def _prune(self, now: float) -> None:
+        stale = [pc for pc, job in self._jobs.items()
+                 if job["status"] != "running" and now - job.get("finished_at", now) > _RETAIN_S]
+        for pc in stale:
+            del self._jobs[pc]
+        for requested in [r for r, pc in self._served_by.items() if pc not in self._jobs]:
+            del self._served_by[requested]
+        for scope in [sc for sc, (pc, _) in self._finished.items() if pc not in self._jobs]:
+            del self._finished[scope]
+
+    def _fresh_saved(self, req: ScrapeRequest, ttl: float, now: float) -> tuple[str, float] | None:
+        """Newest saved scrape within ttl (the requested postcode's own first); outside the lock."""
+        if self._latest_scrapes is None or req.home_or_business != "home":
+            return None
+        try:
+            rows = self._latest_scrapes(req.outward_code, req.has_ev_slug) or []
+        except Exception as e:
+            print(f"[scrape] freshness lookup failed for {req.outward_code}: {e}", flush=True)
+            return None
+        fresh = [(pc, when.timestamp()) for pc, when in rows if when is not None and now - when.timestamp() <= ttl]
+        if not _coalesce_outward():
+            fresh = [f for f in fresh if f[0] == req.postcode_norm or req.postcode_norm == req.outward_code]
+        if not fresh:
+            return None
+        own = [f for f in fresh if f[0] == req.postcode_norm]
+        return own[0] if own else max(fresh, key=lambda f: f[1])
+
+    def request(self, req: ScrapeRequest, force: bool = False, source_is_scheduler: bool = False) -> dict:
+        """
+        Decide and act on a run-scrape request.
+        Returns {"action": "fresh"|"joined"|"started", "served_by": job postcode}.
+        force skips the freshness check (a running job is still joined). Requests from the
+        pre-scrape scheduler do not count as demand.
+        """
+        scope = req.scope(_coalesce_outward())
+        ttl = self._ttl(req)
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            if not source_is_scheduler:
+                self._demand[req.outward_code] += 1
+            decision = self._join_or_fresh(req, scope, ttl, now, force)
+        if decision is not None:
+            return decision
+        saved = None if force else self._fresh_saved(req, ttl, now)
+        with self._lock:
+            # Re-check: another request may have started or finished a job during the DB lookup.
+            decision = self._join_or_fresh(req, scope, ttl, now, force)
+            if decision is None and saved is not None:
+                source, finished_at = saved
+                if self._jobs.get(source, {}).get("status") in (None, "failed"):
+                    self._jobs[source] = {"status": "completed", "error": None, "scope": scope, "finished_at": finished_at}
+                self._served_by[req.postcode_norm] = source
+                decision = {"action": "fresh", "served_by": source}
+            if decision is None:
+                self._jobs[req.postcode_norm] = {"status": "running", "error": None, "scope": scope, "started_at": now}
+                self._running[scope] = req.postcode_norm
+                self._served_by[req.postcode_norm] = req.postcode_norm
+        if decision is not None:
+            return decision
+        try:
+            self._start(req)
+        except Exception as e:
+            self.finish(req.postcode_norm, "failed", str(e) or type(e).__name__)
+            raise
+        return {"action": "started", "served_by": req.postcode_norm}
+
+    def _join_or_fresh(self, req: ScrapeRequest, scope: tuple, ttl: float, now: float, force: bool) -> dict | None:
+        running = self._running.get(scope)
+        if running is not None:
+            self._served_by[req.postcode_norm] = running
+            return {"action": "joined", "served_by": running}
+        if force:
+            return None
+        finished = self._finished.get(scope)
+        if finished is not None and now - finished[1] <= ttl and finished[0] in self._jobs:
+            self._served_by[req.postcode_norm] = finished[0]
+            return {"action": "fresh", "served_by": finished[0]}
+        return None
+
+    def finish(self, job_postcode: str, status: str, error: str | None = None) -> None:
+        """Record a job's outcome: status "completed" or "failed"."""
+        now = self._clock()
+        with self._lock:
+            job = self._jobs.setdefault(job_postcode, {"scope": None})
+            job.update(status=status, error=error, finished_at=now)
+            scope = job.get("scope")
+            if scope is not None:
+                if self._running.get(scope) == job_postcode:
+                    del self._running[scope]
+                if status == "completed":
+                    self._finished[scope] = (job_postcode, now)
+
+    def status(self, postcode_norm: str) -> dict | None:
+        """{"status", "error"} of the job answering postcode_norm, or None when there is none."""
+        with self._lock:
+            job = self._jobs.get(self._served_by.get(postcode_norm, postcode_norm))
+            return {"status": job["status"], "error": job.get("error")} if job else None
+
+    def served_by(self, postcode_norm: str) -> str:
+        """Postcode whose saved scrape answers postcode_norm (itself unless coalesced)."""
+        with self._lock:
+            return self._served_by.get(postcode_norm, postcode_norm)
+
+    def running_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def demand(self) -> dict[str, int]:
+        """Run-scrape requests per outward code since this process started."""
+        with self._lock:
+            return dict(self._demand)
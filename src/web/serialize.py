@@ -0,0 +1,154 @@
+"""
+Response serialisation for the API: fast JSON, columnar series, compression and ETags.
+
+- OrjsonProvider replaces Flask's JSON provider, so every jsonify() goes through orjson when it is
+  installed (numpy scalars/arrays serialise natively, NaN becomes null). Without orjson it behaves
+  like the stdlib provider, with numpy and DataFrames still handled. A DataFrame serialises as
+  records, the API's default layout. Dates, Decimal and UUID come out as with Flask's default
+  provider (RFC 822 dates, Decimal/UUID as strings) with or without orjson.
+- columnar() turns a DataFrame or a list of records into {column: [values]}, which drops the
+  repeated keys of a records list. Monthly and half-hourly series use it when a client asks for
+  layout="columnar".
+- finalize_json_response() runs after each request. It gives GET/HEAD JSON a content-hash ETag
+  and answers a matching If-None-Match with 304. It then compresses JSON bodies above
+  RESPONSE_COMPRESS_MIN_BYTES with brotli (when installed) or gzip, per Accept-Encoding.
+
+orjson and brotli are optional (pip install .[fast]).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import sys
+from typing import Any
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+__all__ = ["OrjsonProvider", "columnar", "finalize_json_response"]
+
+_ENCODINGS = ("br", "gzip")
+# Dates pass through to _default so they keep Flask's RFC 822 format rather than orjson's ISO 8601.
+_ORJSON_OPTIONS = (
+    (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+)
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively."""
+    np = sys.modules.get("numpy")  # numpy values can only exist once numpy is imported
+    if np is not None and isinstance(obj, np.generic):
+        return obj.item()
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, "to_dict") and hasattr(obj, "columns"):
+        return obj.to_dict(orient="records")  # the API's default layout; columnar() only on request
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    # Everything else as Flask's own provider: dates as HTTP dates, Decimal/UUID as strings, dataclasses.
+    return DefaultJSONProvider.default(obj)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (falls back to the stdlib encoder)."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None:
+            kwargs.setdefault("default", _default)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def columnar(rows: Any, decimals: int | None = None) -> dict[str, list[Any]]:
+    """
+    {column: [values]} from a DataFrame, a list of record dicts or a dict of arrays.
+    decimals rounds float columns (useful for long half-hourly series).
+    """
+    import numpy as np
+
+    if hasattr(rows, "to_dict") and hasattr(rows, "columns"):
+        cols = {str(c): rows[c].to_numpy() for c in rows.columns}
+    elif isinstance(rows, dict):
+        cols = {str(k): np.asarray(v) for k, v in rows.items()}
+    else:
+        rows = list(rows or [])
+        keys = list(dict.fromkeys(k for r in rows for k in r))
+        cols = {str(k): np.asarray([r.get(k) for r in rows]) for k in keys}
+    out: dict[str, list[Any]] = {}
+    for k, v in cols.items():
+        if decimals is not None and v.dtype.kind == "f":
+            v = np.round(v, decimals)
+        out[k] = v.ravel().tolist()
+    return out
+
+
+def _min_compress_bytes() -> int:
+    try:
+        return max(0, int(float(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))))
+    except ValueError:
+        return 1024
+
+
+def _negotiate_encoding() -> str | None:
+    offered = [e for e in _ENCODINGS if e != "br" or brotli is not None]
+    best = request.accept_encodings.best_match(offered)
+    return best if best and request.accept_encodings[best] > 0 else None
+
+
+def finalize_json_response(response: Response) -> Response:
+    """ETag/304 for GET and HEAD, then Accept-Encoding compression, for 200 JSON responses."""
+    if (
+        response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.headers.get("Content-Encoding")
+    ):
+        return response
+    body = response.get_data()
+    encoding = _negotiate_encoding() if len(body) >= _min_compress_bytes() else None
+    response.vary.add("Accept-Encoding")
+
+    if request.method in ("GET", "HEAD"):
+        tag = hashlib.sha1(body).hexdigest()[:32]
+        # Compressed representations carry their own tag; any of them revalidates.
+        known = [tag] + [f"{tag}-{e}" for e in _ENCODINGS]
+        if any(request.if_none_match.contains_weak(t) for t in known):
+            not_modified = Response(status=304)
+            not_modified.set_etag(f"{tag}-{encoding}" if encoding else tag)
+            not_modified.vary.add("Accept-Encoding")
+            return not_modified
+        response.set_etag(f"{tag}-{encoding}" if encoding else tag)
+
+    if encoding == "br":
+        response.set_data(brotli.compress(body, quality=5))
+    elif encoding == "gzip":
+        response.set_data(gzip.compress(body, compresslevel=5))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
@@ -0,0 +1,135 @@
+"""Address-options cache: TTLs, negative caching, stale-on-error and single-flight lookups."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+from src.api import address_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADDRESS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("ADDRESS_CACHE_TTL_DAYS", "30")
+    monkeypatch.setenv("ADDRESS_CACHE_NEGATIVE_TTL_S", "3600")
+    address_cache.clear_memory()
+    yield tmp_path
+    address_cache.clear_memory()
+
+
+def _age(postcode: str, seconds: float) -> None:
+    """Backdate the stored entry (memory and file) by `seconds`."""
+    address_cache.clear_memory()
+    path = address_cache._path(postcode)
+    entry = json.loads(path.read_text())
+    entry["fetched_at"] -= seconds
+    path.write_text(json.dumps(entry))
+
+
+def test_hit_survives_restart_until_ttl(cache_dir) -> None:
+    calls: list[int] = []
+
+    def fetch():
+        calls.append(1)
+        return ["1 High St, Bristol", "2 High St, Bristol"], "getaddress"
+
+    first = address_cache.lookup("BS11AA", fetch)
+    assert not first.cached and first.options == ["1 High St, Bristol", "2 High St, Bristol"]
+    address_cache.clear_memory()  # new process: served from the file
+    again = address_cache.lookup("BS11AA", fetch)
+    assert again.cached and again.source == "getaddress" and len(calls) == 1
+
+    _age("BS11AA", 31 * 86400)
+    assert not address_cache.lookup("BS11AA", fetch).cached and len(calls) == 2
+
+
+def test_empty_result_is_cached_briefly(cache_dir) -> None:
+    calls: list[int] = []
+
+    def fetch():
+        calls.append(1)
+        return [], "getaddress"
+
+    address_cache.lookup("ZZ11ZZ", fetch)
+    assert address_cache.lookup("ZZ11ZZ", fetch).cached and len(calls) == 1
+    _age("ZZ11ZZ", 3601)
+    address_cache.lookup("ZZ11ZZ", fetch)
+    assert len(calls) == 2
+
+
+def test_errors_are_not_cached_and_stale_entry_is_served(cache_dir) -> None:
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        address_cache.lookup("BS11AA", boom)
+    assert not address_cache._path("BS11AA").exists()
+
+    address_cache.lookup("BS11AA", lambda: (["1 High St"], "getaddress"))
+    _age("BS11AA", 31 * 86400)
+    stale = address_cache.lookup("BS11AA", boom)
+    assert stale.cached and stale.options == ["1 High St"] and stale.age_s > 30 * 86400
+
+
+def test_concurrent_requests_share_one_lookup(cache_dir) -> None:
+    calls: list[int] = []
+    release = threading.Event()
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["1 High St"], "scrape_fallback"
+
+    results: list = []
+    threads = [threading.Thread(target=lambda: results.append(address_cache.lookup("BS11AA", slow_fetch)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r.options == ["1 High St"] for r in results)
+
+
+def test_concurrent_requests_share_the_error(cache_dir) -> None:
+    calls: list[int] = []
+    release = threading.Event()
+
+    def failing_fetch():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("browser crashed")
+
+    errors: list[Exception] = []
+
+    def worker():
+        try:
+            address_cache.lookup("BS11AA", failing_fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1 and len(errors) == 4
+
+
+def test_empty_browser_fallback_is_a_failure_not_a_negative_answer(cache_dir) -> None:
+    with pytest.raises(LookupError):
+        address_cache.lookup("BS11AA", lambda: ([], "scrape_fallback"))
+    assert not address_cache._path("BS11AA").exists()
+    assert address_cache.lookup("BS11AA", lambda: (["1 High St"], "scrape_fallback")).options == ["1 High St"]
+
+    _age("BS11AA", 31 * 86400)
+    stale = address_cache.lookup("BS11AA", lambda: ([], "scrape_fallback"))
+    assert stale.cached and stale.options == ["1 High St"]
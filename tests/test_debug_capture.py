@@ -0,0 +1,67 @@
+"""Scrape debug artifacts: capture policy, background gzip writes and size-capped rotation."""
+
+from __future__ import annotations
+
+import gzip
+import os
+import time
+
+from src.api.energyScraping.debug_capture import DebugCapture, capture_policy, drain, prune
+
+
+class _Page:
+    def __init__(self) -> None:
+        self.content_calls = 0
+
+    def content(self) -> str:
+        self.content_calls += 1
+        return "<html>" + "x" * 5000 + "</html>"
+
+    def is_closed(self) -> bool:
+        return False
+
+    def screenshot(self) -> bytes:
+        return b"\x89PNG fake"
+
+
+def test_policy_decides_what_is_captured(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("SCRAPER_DEBUG_CAPTURE", "bogus")
+    assert capture_policy() == "failure"
+
+    page = _Page()
+    off = DebugCapture("BS1 1AA", policy="off", directory=tmp_path)
+    off.html("error_page.html", page)
+    off.screenshot("error.png", page)
+    assert page.content_calls == 0 and off.saved == []
+
+    failure = DebugCapture("BS1 1AA", policy="failure", directory=tmp_path)
+    failure.html("results_page.html", page, failure=False)
+    assert page.content_calls == 0  # success artifacts are skipped without touching the page
+    failure.html("step4_fuel_page.html", page)
+    assert page.content_calls == 1
+
+    assert DebugCapture(policy="sample", sample_rate=1.0).wants(failure=False)
+    assert not DebugCapture(policy="sample", sample_rate=0.0).wants(failure=False)
+    assert DebugCapture(policy="always").wants(failure=False)
+    assert drain(timeout=5.0)
+
+
+def test_writes_are_gzipped_in_background_and_rotated(tmp_path) -> None:
+    capture = DebugCapture("bs1 1aa", policy="always", directory=tmp_path)
+    capture.html("results_page.html", "<html>results</html>")
+    capture.screenshot("error.png", _Page())
+    assert drain(timeout=5.0)
+
+    html_file = next(tmp_path.glob("*_BS11AA_results_page.html.gz"))
+    assert gzip.decompress(html_file.read_bytes()) == b"<html>results</html>"
+    assert next(tmp_path.glob("*_BS11AA_error.png")).read_bytes() == b"\x89PNG fake"
+    assert not list(tmp_path.glob("*.tmp"))
+
+    old = time.time() - 100
+    for i in range(4):
+        path = tmp_path / f"old_{i}.html.gz"
+        path.write_bytes(b"y" * 1000)
+        os.utime(path, (old + i, old + i))
+    total = sum(p.stat().st_size for p in tmp_path.iterdir())
+    assert prune(tmp_path, total - 1500) == 2
+    assert sorted(p.name for p in tmp_path.glob("old_*")) == ["old_2.html.gz", "old_3.html.gz"]
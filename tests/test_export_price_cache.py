@@ -0,0 +1,110 @@
+"""Unit tests for the cached reference export price (HTTP stubbed at ExportPriceCache._http_get)."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.api.reference_export_price import ExportPriceCache
+
+PRODUCT = {
+    "display_name": "Outgoing Octopus",
+    "single_register_electricity_tariffs": {
+        "_A": {"direct_debit_monthly": {"standard_unit_rate_exc_vat": 15.0}},
+    },
+}
+
+
+class _Resp:
+    def __init__(self, status: int, body: dict | None = None, headers: dict | None = None):
+        self.status_code = status
+        self._body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self) -> dict:
+        return self._body or {}
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(responses: list):
+        cache = ExportPriceCache(product_code="TEST", cache_path=tmp_path / "price.json", refresh_interval_s=0)
+        seen_headers: list[dict] = []
+
+        def http_get(url, headers):
+            seen_headers.append(dict(headers))
+            r = responses.pop(0)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        cache._http_get = http_get
+        return cache, seen_headers
+
+    return make
+
+
+def _get_after_fetch(cache: ExportPriceCache) -> dict:
+    """get() on a cold cache, then wait for the background fetch it started and get() again."""
+    cache.get()
+    if cache._fetch_thread is not None:
+        cache._fetch_thread.join(5)
+    return cache.get()
+
+
+def test_first_get_fetches_then_conditional_refresh_sends_validators(make_cache) -> None:
+    cache, headers = make_cache([_Resp(200, PRODUCT, {"ETag": '"v1"'}), _Resp(304)])
+    out = _get_after_fetch(cache)
+    assert out["export_price_per_kwh"] == 0.15 and out["stale"] is False
+    assert cache.refresh() is True
+    assert headers == [{}, {"If-None-Match": '"v1"'}]
+    assert cache.get()["export_price_per_kwh"] == 0.15
+
+
+def test_upstream_failure_serves_last_good_value(make_cache) -> None:
+    cache, _ = make_cache([_Resp(200, PRODUCT), _Resp(503), ConnectionError("down")])
+    _get_after_fetch(cache)
+    assert cache.refresh() is False
+    assert cache.refresh() is False
+    out = cache.get()
+    assert out["export_price_per_kwh"] == 0.15
+    assert "down" in out["last_refresh_error"]
+
+
+def test_value_is_persisted_and_reloaded(make_cache, tmp_path) -> None:
+    cache, _ = make_cache([_Resp(200, PRODUCT, {"Last-Modified": "Tue, 01 Oct 2024 00:00:00 GMT"})])
+    _get_after_fetch(cache)
+    reloaded = ExportPriceCache(product_code="TEST", cache_path=tmp_path / "price.json", refresh_interval_s=0)
+    reloaded._http_get = lambda url, headers: pytest.fail("should not hit upstream")
+    assert reloaded.get()["export_price_per_kwh"] == 0.15
+
+
+def test_no_value_and_upstream_down_reports_error(make_cache) -> None:
+    cache, _ = make_cache([ConnectionError("down")])
+    out = _get_after_fetch(cache)
+    assert out["export_price_per_kwh"] is None and "down" in out["error"]
+
+
+def test_cold_get_returns_fallback_without_waiting_and_fetches_once(tmp_path) -> None:
+    cache = ExportPriceCache(product_code="TEST", cache_path=tmp_path / "price.json", refresh_interval_s=0)
+    release = threading.Event()
+    calls: list[str] = []
+
+    def slow_http_get(url, headers):
+        calls.append(url)
+        release.wait(5)
+        return _Resp(200, PRODUCT)
+
+    cache._http_get = slow_http_get
+    for _ in range(3):
+        out = cache.get()
+        assert out["export_price_per_kwh"] is None and "not fetched yet" in out["error"]
+    release.set()
+    cache._fetch_thread.join(5)
+    assert len(calls) == 1
+    assert cache.get()["export_price_per_kwh"] == 0.15
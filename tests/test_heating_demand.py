@@ -0,0 +1,75 @@
+"""Unit tests for the degree-day heating demand model."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import demand_after_insulation_and_heat_pump, evaluate_fixed_capacities
+from src.models.heating_demand import heat_pump_cop_curve, heating_degree_days, weather_driven_demand
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+MONTH_OF_DAY = np.repeat(np.arange(12), DAYS)
+# A UK-like year: ~4 °C in January, ~17 °C in July.
+T_MEAN = 10.5 - 6.5 * np.cos(2 * np.pi * (np.arange(365) - 15) / 365)
+
+
+def test_degree_days_and_cop_curve() -> None:
+    np.testing.assert_allclose(heating_degree_days([-2.0, 15.5, 20.0]), [17.5, 0.0, 0.0])
+    cop = heat_pump_cop_curve([-5.0, 7.0, 15.0], [1.0, 3.0])
+    assert cop.shape == (2, 3)
+    np.testing.assert_allclose(cop[0], 1.0)  # resistive heating
+    assert cop[1, 1] == pytest.approx(3.0)  # rated point
+    assert cop[1, 0] < 3.0 < cop[1, 2]
+
+
+def test_resistive_heating_matches_the_annual_model() -> None:
+    out = weather_driven_demand(T_MEAN, MONTH_OF_DAY, 4000.0, 0.6, [0.0, 5.0], 1.0)
+    for i, r in enumerate((0.0, 5.0)):
+        expected = demand_after_insulation_and_heat_pump(4000.0, 0.6, r, 1.0)
+        assert out["annual_electricity_kwh"][i] == pytest.approx(expected["electricity_demand_for_optimisation_kwh"])
+    monthly = out["monthly_electricity_kwh"][0]
+    assert monthly[0] > 3 * monthly[6]  # heating follows the cold months
+    assert out["heating_electricity_daily_kwh"].shape == (2, 365)
+
+
+def test_cold_weather_lowers_seasonal_cop() -> None:
+    mild = weather_driven_demand(T_MEAN, MONTH_OF_DAY, 4000.0, 0.6, 0.0, 3.2)
+    cold = weather_driven_demand(T_MEAN - 6.0, MONTH_OF_DAY, 4000.0, 0.6, 0.0, 3.2)
+    assert cold["seasonal_cop"][0] < mild["seasonal_cop"][0]
+    assert cold["annual_electricity_kwh"][0] > mild["annual_electricity_kwh"][0]
+    warm = weather_driven_demand(np.full(365, 20.0), MONTH_OF_DAY, 4000.0, 0.6, 0.0, 1.0)
+    assert warm["annual_electricity_kwh"][0] == pytest.approx(4000.0)  # falls back to profile weights
+
+
+def test_fixed_capacities_accept_shared_flux_and_monthly_demand() -> None:
+    flux = pd.DataFrame(
+        {"ghi_mj_per_m2": np.linspace(80, 600, 12), "wind_speed_10m_max": [7.0] * 12, "days_in_month": DAYS},
+        index=pd.Index(range(1, 13), name="month"),
+    )
+    monthly = weather_driven_demand(T_MEAN, MONTH_OF_DAY, 4000.0, 0.6, 2.5, 3.0)["monthly_electricity_kwh"][0]
+    ev = evaluate_fixed_capacities(0.0, 0.0, 4000.0, 0.6, 2.5, 3.0, 4.0, 0.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"],
+                                   flux=flux, monthly_demand_kwh=monthly.tolist())
+    assert ev["annual_demand_kwh"] == pytest.approx(monthly.sum(), abs=0.1)
+    assert ev["annual_import_kwh"] > 0 and ev["annual_export_kwh"] > 0
+
+
+def test_flux_and_temperatures_come_from_one_archive_call(tmp_path, monkeypatch) -> None:
+    from src.api import weather_store
+    from src.models.energy_balancing import get_flux_and_temperature_last_year
+
+    monkeypatch.setenv("WEATHER_STORE_DIR", str(tmp_path))
+    calls: list[tuple[int, int]] = []
+
+    def fake_fetch(lat, lon, first, last):
+        calls.append((first, last))
+        return {str(y): {"ghi_mj_per_m2": [100.0] * 12, "wind_speed_10m_max": [5.0] * 12,
+                         "temperature_mean_daily": T_MEAN.tolist()} for y in range(first, last + 1)}
+
+    monkeypatch.setattr(weather_store, "_fetch_years", fake_fetch)
+    flux, t_mean, month_of_day = get_flux_and_temperature_last_year(51.45, -2.58)
+    assert len(calls) == 1
+    assert list(flux.index) == list(range(1, 13)) and flux["ghi_mj_per_m2"].tolist() == [100.0] * 12
+    assert len(t_mean) == len(month_of_day) == 365
@@ -0,0 +1,104 @@
+"""Unit tests for the lifetime cash-flow engine."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import BATTERY_TIERS, SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import optimize_system_capacity
+from src.models.lifetime_financials import DEFAULT_LIFETIME_PARAMS, lifetime_cashflows, npv_cost, year_factors
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+FLAT = {k: 0.0 for k in DEFAULT_LIFETIME_PARAMS}
+BATTERY = next(v for k, v in BATTERY_TIERS.items() if k != "none")
+
+
+def _scenarios(n: int, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    solar = rng.uniform(0, 4000, n)
+    wind = rng.uniform(0, 3000, n)
+    export = rng.uniform(0, 1, n) * (solar + wind) * 0.5
+    return {
+        "solar_kwh": solar,
+        "wind_kwh": wind,
+        "import_kwh": rng.uniform(500, 4000, n),
+        "export_kwh": export,
+        "solar_capex": solar * 1.5,
+        "wind_capex": wind * 2.0,
+        "battery_capex": rng.uniform(0, 5000, n),
+        "battery_import_saving_kwh": rng.uniform(0, 800, n),
+        "battery_export_reduction_kwh": rng.uniform(0, 400, n),
+    }
+
+
+def test_flat_parameters_reduce_to_the_linear_projection() -> None:
+    sc = _scenarios(5)
+    out = lifetime_cashflows(**sc, grid_price_per_kwh=0.25, export_price_per_kwh=0.05,
+                             standing_charge_per_year=200.0, horizon_years=20, params=FLAT)
+    capex = sc["solar_capex"] + sc["wind_capex"] + sc["battery_capex"]
+    running = sc["import_kwh"] * 0.25 - sc["export_kwh"] * 0.05 + 200.0
+    expected = capex[:, None] + running[:, None] * np.arange(1, 21)
+    np.testing.assert_allclose(out["cumulative_cost"], expected)
+    np.testing.assert_allclose(out["cumulative_discounted_cost"], expected)
+    np.testing.assert_allclose(out["npv_cost"], expected[:, -1])
+
+
+def test_npv_cost_matches_year_by_year_engine() -> None:
+    sc = _scenarios(200, seed=3)
+    shaped = {k: v.reshape(10, 20) for k, v in sc.items()}
+    kwargs = dict(grid_price_per_kwh=0.27, export_price_per_kwh=0.12, standing_charge_per_year=180.0,
+                  horizon_years=25, params={"export_price_escalation": 0.01})
+    full = lifetime_cashflows(**shaped, **kwargs)
+    assert full["cumulative_cost"].shape == (10, 20, 25)
+    np.testing.assert_allclose(npv_cost(**shaped, **kwargs), full["npv_cost"], rtol=1e-12)
+
+
+def test_npv_cost_applies_the_export_clip() -> None:
+    sc = _scenarios(6, seed=4)
+    # A battery that adds export (negative reduction) can drive a year's export below zero as it fades.
+    sc["export_kwh"][:3] = 5.0
+    sc["battery_export_reduction_kwh"][:3] = -400.0
+    kwargs = dict(grid_price_per_kwh=0.27, export_price_per_kwh=0.15, standing_charge_per_year=180.0,
+                  horizon_years=15, params={"battery_degradation": 0.05, "solar_degradation": 0.01})
+    full = lifetime_cashflows(**sc, **kwargs)
+    assert (full["export_kwh"][:3] == 0.0).any()  # the clip binds
+    np.testing.assert_allclose(npv_cost(**sc, **kwargs), full["npv_cost"], rtol=1e-12)
+    one = {k: v[0] for k, v in sc.items()}
+    np.testing.assert_allclose(npv_cost(**one, **kwargs), full["npv_cost"][0], rtol=1e-12)
+
+
+def test_degradation_replacement_and_discounting() -> None:
+    f = year_factors(13, {"battery_replacement_years": 12})
+    assert f["battery_replacement"][11] == 1.0 and f["battery_replacement"].sum() == 1.0
+    assert f["battery_capacity"][12] == 1.0  # fresh pack after the swap
+    assert f["solar_output"][0] == 1.0 and f["solar_output"][-1] < 1.0
+
+    out = lifetime_cashflows(solar_kwh=3000.0, wind_kwh=0.0, import_kwh=2000.0, export_kwh=1000.0,
+                             solar_capex=6000.0, wind_capex=0.0, battery_capex=0.0,
+                             grid_price_per_kwh=0.25, export_price_per_kwh=0.05, horizon_years=15)
+    assert np.all(np.diff(out["import_kwh"]) > 0) and np.all(np.diff(out["export_kwh"]) < 0)
+    assert out["replacement_cost"][11] == pytest.approx(600.0)
+    assert np.all(out["cumulative_discounted_cost"] < out["cumulative_cost"])
+    with pytest.raises(ValueError):
+        year_factors(5, {"inflation": 0.02})
+
+
+def test_optimiser_npv_objective_and_discounted_financials() -> None:
+    rng = np.random.default_rng(5)
+    flux = pd.DataFrame(
+        {"ghi_mj_per_m2": rng.uniform(50, 650, 12), "wind_speed_10m_max": rng.uniform(3, 11, 12), "days_in_month": DAYS},
+        index=pd.Index(range(1, 13), name="month"),
+    )
+    kwargs = dict(battery_type_params=BATTERY, battery_max_kwh=8.0, solar_max_kw=8.0, wind_max_kw=4.0)
+    simple = optimize_system_capacity(flux, 4000.0, SOLAR_TIERS["budget"], WIND_TIERS["budget"], **kwargs)
+    flat = optimize_system_capacity(flux, 4000.0, SOLAR_TIERS["budget"], WIND_TIERS["budget"],
+                                    objective="npv", lifetime_params=FLAT, **kwargs)
+    for key in ("optimal_solar_kw", "optimal_wind_kw", "optimal_battery_kwh"):
+        assert flat[key] == simple[key]
+    assert flat["financials_5_year"]["discounted_total"] == pytest.approx(flat["financials_5_year"]["total"], abs=0.05)
+    assert simple["financials_0_year"]["discounted_total"] == simple["capex"]
+    assert len(simple["lifetime_financials"]["cumulative_discounted_cost"]) == 10
+    npv = optimize_system_capacity(flux, 4000.0, SOLAR_TIERS["budget"], WIND_TIERS["budget"], objective="npv", **kwargs)
+    assert npv["lifetime_financials"]["objective"] == "npv"
@@ -0,0 +1,64 @@
+"""Unit tests for the in-process timing spans and Prometheus rendering."""
+
+from __future__ import annotations
+
+import pytest
+
+from src import metrics
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_server_timing_header_sums_repeated_stages() -> None:
+    header = metrics.server_timing_header(
+        [("db", 0.010), ("weather.fetch", 0.200), ("db", 0.005)],
+        total_s=0.5,
+    )
+    assert header == "db;dur=15.0, weather.fetch;dur=200.0, total;dur=500.0"
+
+
+def test_spans_are_collected_only_inside_a_request() -> None:
+    with metrics.span("outside"):
+        pass
+    metrics.start_request()
+    with metrics.span("inside"):
+        pass
+    spans = metrics.finish_request()
+    assert [name for name, _ in spans] == ["inside"]
+    # Both spans still feed the stage histogram.
+    text = metrics.render_prometheus()
+    assert 'powerplan_stage_duration_seconds_count{stage="outside"} 1' in text
+    assert 'powerplan_stage_duration_seconds_count{stage="inside"} 1' in text
+
+
+def test_span_records_even_when_block_raises() -> None:
+    with pytest.raises(RuntimeError):
+        with metrics.span("boom"):
+            raise RuntimeError("fail")
+    assert 'stage="boom"' in metrics.render_prometheus()
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    for v in (3, 30, 3000):
+        metrics.observe("optimiser_evaluations", v, buckets=metrics.COUNT_BUCKETS)
+    text = metrics.render_prometheus()
+    assert 'powerplan_optimiser_evaluations_bucket{le="10"} 1' in text
+    assert 'powerplan_optimiser_evaluations_bucket{le="50"} 2' in text
+    assert 'powerplan_optimiser_evaluations_bucket{le="5000"} 3' in text
+    assert 'powerplan_optimiser_evaluations_bucket{le="+Inf"} 3' in text
+    assert "powerplan_optimiser_evaluations_count 3" in text
+
+
+def test_cache_hit_ratio_gauge() -> None:
+    metrics.record_cache("weather", True)
+    metrics.record_cache("weather", True)
+    metrics.record_cache("weather", False)
+    metrics.record_cache("postcode", False)
+    text = metrics.render_prometheus()
+    assert 'powerplan_cache_hit_ratio{cache="weather"} 0.6667' in text
+    assert 'powerplan_cache_hit_ratio{cache="postcode"} 0.0000' in text
@@ -0,0 +1,55 @@
+"""Process-pool sweeps must pick exactly what the serial sweep picks."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import BATTERY_TIERS, SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import optimize_system_capacity
+from src.models.parallel_sweep import parallel_argmin, shutdown_pool
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+BATTERY = next(v for k, v in BATTERY_TIERS.items() if k != "none")
+
+
+@pytest.fixture(autouse=True)
+def _pool(monkeypatch):
+    monkeypatch.setenv("OPTIMISER_PARALLEL_MIN_CELLS", "0")
+    yield
+    shutdown_pool()
+
+
+def _multi_year_flux(n_years: int = 4) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    index = pd.MultiIndex.from_product([range(2020, 2020 + n_years), range(1, 13)], names=["year", "month"])
+    return pd.DataFrame(
+        {
+            "ghi_mj_per_m2": rng.uniform(50, 650, len(index)),
+            "wind_speed_10m_max": rng.uniform(3, 11, len(index)),
+            "days_in_month": DAYS * n_years,
+        },
+        index=index,
+    )
+
+
+@pytest.mark.parametrize("objective", ["total_cost", "npv"])
+def test_partitioned_sweep_matches_serial(objective: str) -> None:
+    kwargs = dict(battery_type_params=BATTERY, battery_max_kwh=6.0, solar_max_kw=6.0, wind_max_kw=3.0, objective=objective)
+    flux = _multi_year_flux()
+    serial = optimize_system_capacity(flux, 4500.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], workers=0, **kwargs)
+    pooled = optimize_system_capacity(flux, 4500.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], workers=2, **kwargs)
+    for key in ("optimal_solar_kw", "optimal_wind_kw", "optimal_battery_kwh", "annual_import_kwh", "capex"):
+        assert pooled[key] == serial[key]
+    assert pooled["weather_years"] == serial["weather_years"]
+
+
+def test_infeasible_and_small_sweeps() -> None:
+    ones = np.ones((1, 12))
+    args = (ones, ones, np.full(12, 1e9), np.full((1, 12), 30.0), np.arange(4.0), np.arange(3.0), np.zeros(1), None)
+    costs = dict(annual_consumption_kwh=1.2e10, min_demand_met_from_gen_pct=50.0, solar_capex_per_kw=1.0,
+                 wind_capex_per_kw=1.0, battery_capex_per_kwh=1.0, grid_price_per_kwh=0.25,
+                 export_price_per_kwh=0.05, optimize_over_years=5.0)
+    assert parallel_argmin(*args, costs, workers=2) == (None, 0)
+    assert parallel_argmin(*args, costs, workers=1) is None  # nothing to split across
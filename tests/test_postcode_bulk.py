@@ -0,0 +1,63 @@
+"""Unit tests for lookup_many batching, dedupe, ordering and caching (network stubbed at _bulk_fetch)."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.api import postcode_lookup
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record bulk batches; every postcode not starting with 'XX' resolves."""
+    seen: list[list[str]] = []
+    lock = threading.Lock()
+
+    def fake_bulk(batch):
+        with lock:
+            seen.append(list(batch))
+        return {
+            pc: (None if pc.startswith("XX") else {"postcode": pc, "latitude": 51.0, "longitude": -2.0})
+            for pc in batch
+        }
+
+    monkeypatch.setattr(postcode_lookup, "_bulk_fetch", fake_bulk)
+    monkeypatch.setattr(postcode_lookup, "get_default_index", lambda: None)
+    postcode_lookup._cache.clear()
+    yield seen
+    postcode_lookup._cache.clear()
+
+
+def test_results_follow_input_order_and_duplicates_resolve_once(calls) -> None:
+    out = postcode_lookup.lookup_many(["bs1 1aa", "XX1 1XX", "BS11AA", "", "sw1a 1aa"])
+    assert [r["postcode"] if r else None for r in out] == ["BS11AA", None, "BS11AA", None, "SW1A1AA"]
+    assert sorted(pc for batch in calls for pc in batch) == ["BS11AA", "SW1A1AA", "XX11XX"]
+
+
+def test_misses_are_split_into_batches_of_100(calls) -> None:
+    postcodes = [f"AB{i // 100} {i % 100:03d}" for i in range(250)]
+    out = postcode_lookup.lookup_many(postcodes)
+    assert all(r is not None for r in out)
+    assert sorted(len(b) for b in calls) == [50, 100, 100]
+
+
+def test_second_call_is_served_from_cache_including_not_found(calls) -> None:
+    postcode_lookup.lookup_many(["BS1 1AA", "XX1 1XX"])
+    calls.clear()
+    out = postcode_lookup.lookup_many(["XX1 1XX", "BS1 1AA"])
+    assert calls == []
+    assert out[0] is None and out[1]["postcode"] == "BS11AA"
+
+
+def test_failed_batches_are_not_cached(calls, monkeypatch) -> None:
+    monkeypatch.setattr(postcode_lookup, "_bulk_fetch", lambda batch: None)
+    assert postcode_lookup.lookup_many(["BS1 1AA"]) == [None]
+    assert postcode_lookup._cache.get("BS11AA") == (False, None)
+
+
+@pytest.mark.parametrize("raw, expected", [("", 10_000), ("lots", 10_000), ("0", 1), ("-5", 1), ("250", 250)])
+def test_bulk_max_items_tolerates_bad_settings(monkeypatch, raw: str, expected: int) -> None:
+    monkeypatch.setenv("POSTCODE_BULK_MAX_ITEMS", raw)
+    assert postcode_lookup.bulk_max_items() == expected
@@ -0,0 +1,66 @@
+"""Unit tests for the memory-mapped offline postcode index."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.api.postcode_index import PostcodeIndex, build_index
+
+
+def _row(pcds: str, lat: str, lon: str, *, rgn="E12000009", ctry="E92000001", lad="E06000023", doterm=""):
+    return {"pcds": pcds, "lat": lat, "long": lon, "rgn": rgn, "ctry": ctry, "oslaua": lad, "doterm": doterm}
+
+
+@pytest.fixture
+def index(tmp_path):
+    rows = [
+        _row("BS1 1AA", "51.4545", "-2.5879"),
+        _row("SW1A 1AA", "51.501009", "-0.141588", rgn="E12000007", lad="E09000033"),
+        _row("EH1 1AA", "55.9500", "-3.1900", rgn="S99999999", ctry="S92000003", lad="S12000036"),
+        _row("BS1 9ZZ", "51.45", "-2.58", doterm="202001"),  # terminated
+        _row("ZE9 9ZZ", "99.999999", "0.000000"),  # no grid reference
+    ]
+    path = tmp_path / "pc.bin"
+    written = build_index(rows, path, district_names={"E06000023": "Bristol, City of"})
+    assert written == 3
+    idx = PostcodeIndex(path)
+    yield idx
+    idx.close()
+
+
+def test_lookup_normalises_and_returns_location_region_and_dno(index) -> None:
+    r = index.lookup(" bs11aa ")
+    assert r is not None
+    assert r["postcode"] == "BS1 1AA"
+    assert r["outward_code"] == "BS1"
+    assert r["latitude"] == pytest.approx(51.4545, abs=1e-4)
+    assert r["longitude"] == pytest.approx(-2.5879, abs=1e-4)
+    assert r["region"] == "South West"
+    assert r["country"] == "England"
+    assert r["admin_district"] == "Bristol, City of"
+    assert r["dno_id"] != "Unknown"
+    assert r["source"] == "local_index"
+
+
+def test_non_english_postcodes_report_country_as_region(index) -> None:
+    r = index.lookup("EH1 1AA")
+    assert r is not None and r["region"] == "Scotland"
+
+
+def test_unknown_terminated_and_malformed_postcodes_miss(index) -> None:
+    assert index.lookup("BS1 9ZZ") is None
+    assert index.lookup("ZE9 9ZZ") is None
+    assert index.lookup("AAAA AAAA") is None
+    assert index.lookup("") is None
+
+
+def test_outward_centroids_average_each_outward_code(tmp_path) -> None:
+    path = tmp_path / "pc.bin"
+    build_index([_row("BS1 1AA", "51.40", "-2.50"), _row("BS1 2AB", "51.50", "-2.70"), _row("BS10 5AA", "51.5", "-2.6")], path)
+    idx = PostcodeIndex(path)
+    try:
+        centroids = idx.outward_centroids()
+    finally:
+        idx.close()
+    assert set(centroids) == {"BS1", "BS10"}
+    assert centroids["BS1"] == pytest.approx((51.45, -2.60), abs=1e-5)
@@ -0,0 +1,77 @@
+"""Region pre-scrape planning, the scheduler's concurrency/rate budget and outward-code postcode picks."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from src.api.postcode_index import PostcodeIndex, build_index
+from src.web.prescrape import OutwardStats, PrescrapeScheduler, plan_prescrape
+from src.web.scrape_coordinator import ScrapeCoordinator
+
+NOW = 2_000_000_000.0
+
+
+def _ago(hours: float) -> datetime:
+    return datetime.fromtimestamp(NOW - hours * 3600)
+
+
+def test_plan_skips_fresh_regions_and_orders_by_demand_and_age(monkeypatch) -> None:
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_HOURS", "12")
+    monkeypatch.delenv("SCRAPE_FRESH_TTL_OVERRIDES", raising=False)
+    stats = {
+        "BS1": OutwardStats(searches=3, latest=_ago(2), latest_postcode="BS11AA"),  # WPD_1: fresh
+        "BS39": OutwardStats(searches=1, latest=_ago(30), latest_postcode="BS394DB"),
+        "EH1": OutwardStats(searches=5, latest=_ago(24), latest_postcode="EH11AB"),  # SPEN_1, stale x2
+        "G2": OutwardStats(searches=1, latest=_ago(13), latest_postcode="G21AA"),
+        "M1": OutwardStats(searches=40, latest=_ago(48), latest_postcode="M11AE"),
+    }
+    picks = {"AB1": "AB101AA"}
+    targets = plan_prescrape(stats, {"G2": 20}, NOW, lambda o: picks.get(o) or (f"{o}1AA" if o.endswith("1") else None))
+    by_region = {t.dno_id: t for t in targets}
+
+    assert "WPD_1" not in by_region  # BS1 was scraped 2 h ago (BS39 shares the region)
+    assert by_region["SPEN_1"].postcode_norm == "G21AA"  # G2's live demand beats EH1's saved searches
+    assert by_region["SPEN_1"].demand == 26 and by_region["SPEN_1"].age_s == 13 * 3600
+    assert targets[0].postcode_norm == "M11AE"  # most demand and oldest
+    unscraped = [t for t in targets if t.age_s is None]
+    assert unscraped and all(t.demand == 0 for t in unscraped)
+    assert all(t.postcode_norm.startswith(t.outward_code) for t in unscraped)
+    assert [t.priority for t in targets] == sorted((t.priority for t in targets), reverse=True)
+
+
+def test_scheduler_respects_concurrency_and_rate_budget(monkeypatch) -> None:
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_HOURS", "12")
+    monkeypatch.setenv("PRESCRAPE_MAX_CONCURRENT", "2")
+    monkeypatch.setenv("PRESCRAPE_MAX_PER_HOUR", "3")
+    clock = [NOW]
+    started: list[str] = []
+    coord = ScrapeCoordinator(lambda r: started.append(r.postcode_norm), clock=lambda: clock[0])
+    scheduler = PrescrapeScheduler(coord, lambda days: {}, lambda o: f"{o}1AA", clock=lambda: clock[0])
+
+    first = scheduler.run_once()
+    assert len(started) == 2 and [s["action"] for s in first] == ["started", "started"]
+    assert scheduler.run_once() == []  # both slots busy
+    assert coord.demand() == {}  # scheduler requests are not demand
+
+    for pc in started:
+        coord.finish(pc, "completed")
+    assert len(scheduler.run_once()) == 1 and len(started) == 3  # hourly budget of 3 used up
+    coord.finish(started[-1], "completed")
+    assert scheduler.run_once() == []
+    clock[0] += 3601
+    assert len(scheduler.run_once()) == 2
+
+
+def test_index_lists_postcodes_in_outward_code(tmp_path) -> None:
+    rows = [{"pcds": pc, "lat": "51.45", "long": "-2.58", "rgn": "E12000009", "ctry": "E92000001",
+             "oslaua": "E06000023", "doterm": ""} for pc in ("BS1 1AA", "BS1 2AB", "BS10 5AA", "BS11 1AA", "BS2 0AA")]
+    path = tmp_path / "pc.bin"
+    build_index(rows, path)
+    idx = PostcodeIndex(path)
+    try:
+        assert idx.postcodes_in_outward("bs1", limit=5) == ["BS11AA", "BS12AB"]
+        assert idx.postcodes_in_outward("BS10") == ["BS105AA"]
+        assert idx.postcodes_in_outward("BS11") == ["BS111AA"]
+        assert idx.postcodes_in_outward("ZZ9") == []
+    finally:
+        idx.close()
@@ -0,0 +1,71 @@
+"""Recommendation atlas: grid bracketing, sizing boxes, scenario matching and the .npz round trip."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.recommend_atlas import UNBUILT, RecommendAtlas, Scenario, save_atlas
+
+USAGE = (2500.0, 3000.0, 3500.0)
+PRICE = (21.0, 24.0, 27.0)
+COMBOS = ("budget/budget/none", "budget/none/none")
+
+
+def _atlas() -> RecommendAtlas:
+    atlas = RecommendAtlas.empty(["BS1", "BS2"], usage_grid=USAGE, price_grid_p=PRICE, combos=COMBOS)
+    sizing = np.zeros((2, 3, 3, 3))
+    sizing[..., 0] = 3.0
+    sizing[..., 1] = 0.5
+    sizing[0, 2, 2] = (4.5, 1.0, 0.0)  # more solar and wind at high usage and price
+    flux = np.column_stack([np.linspace(50, 560, 12), np.linspace(9, 6, 12)])
+    atlas.set_outward("BS1", (51.45, -2.59), flux, sizing)
+    return atlas
+
+
+def test_on_grid_point_is_exact_and_between_points_spans_the_neighbours() -> None:
+    atlas = _atlas()
+    hit = atlas.lookup("BS1", "budget/budget/none", 3000, 24.0)
+    assert hit is not None and hit.exact
+    assert hit.bounds() == {"min_solar_kw": 3.0, "solar_max_kw": 3.0, "min_wind_kw": 0.5, "wind_max_kw": 0.5,
+                            "battery_min_kwh": 0.0, "battery_max_kwh": 0.0}
+
+    box = atlas.lookup("BS1", "budget/budget/none", 3200, 25.5)
+    assert not box.exact and box.solar_kw == (3.0, 4.5) and box.wind_kw == (0.5, 1.0)
+    assert atlas.lookup("BS1", "budget/budget/none", 2600, 25.5).exact  # neighbours agree
+
+
+def test_misses_off_grid_unbuilt_or_unknown() -> None:
+    atlas = _atlas()
+    assert atlas.lookup("BS1", "budget/budget/none", 9000, 24.0) is None
+    assert atlas.lookup("BS1", "budget/budget/none", 3000, 40.0) is None
+    assert atlas.lookup("BS2", "budget/budget/none", 3000, 24.0) is None  # not built yet
+    assert atlas.lookup("ZZ9", "budget/budget/none", 3000, 24.0) is None
+    assert atlas.lookup("BS1", "premium/budget/none", 3000, 24.0) is None
+    assert atlas.has("BS1") and not atlas.has("BS2")
+    assert (atlas.sizing[1] == UNBUILT).all()
+
+
+def test_scenario_matches_after_none_tiers_are_zeroed() -> None:
+    base = Scenario()
+    assert base.matches(Scenario(), "budget/budget/none")
+    assert not base.matches(Scenario(heating_fraction=0.5), "budget/budget/none")
+    assert not base.matches(Scenario(export_price_per_kwh=0.15), "budget/budget/none")
+    # Wind bounds and battery step do not matter when those tiers are off.
+    assert base.matches(Scenario(wind_max_kw=4.0, min_wind_kw=0.0, battery_step_kwh=2.0), "budget/none/none")
+    assert not base.matches(Scenario(wind_max_kw=4.0), "budget/budget/none")
+
+
+def test_save_and_load_round_trip(tmp_path) -> None:
+    atlas = _atlas()
+    path = tmp_path / "atlas.npz"
+    save_atlas(atlas, path)
+    loaded = RecommendAtlas.load(path)
+
+    assert loaded.same_layout(atlas) and loaded.outwards == ["BS1", "BS2"]
+    assert np.array_equal(loaded.sizing, atlas.sizing)
+    assert loaded.lookup("BS1", "budget/budget/none", 3200, 25.5).solar_kw == (3.0, 4.5)
+    flux = loaded.flux_frame("BS1")
+    assert list(flux.columns) == ["ghi_mj_per_m2", "wind_speed_10m_max", "days_in_month"]
+    assert list(flux.index) == list(range(1, 13)) and flux["ghi_mj_per_m2"].iloc[-1] == pytest.approx(560)
+    assert loaded.flux_frame("ZZ9") is None
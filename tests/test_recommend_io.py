@@ -0,0 +1,170 @@
+"""Unit tests for the concurrent /api/recommend prefetch (blocking clients stubbed with sleeps)."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.api import postcode_lookup
+from src.models import energy_balancing
+from src.web.recommend_io import prefetch_recommend_inputs
+
+
+@pytest.fixture
+def fake_flux(monkeypatch):
+    calls: list[tuple[float, float]] = []
+
+    def flux(lat, lon):
+        calls.append((lat, lon))
+        time.sleep(0.2)
+        return f"flux@{lat},{lon}"
+
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_last_year", flux)
+    return calls
+
+
+def _slow_scrape(result):
+    def load(postcode):
+        time.sleep(0.2)
+        return result
+    return load
+
+
+def test_scrape_and_flux_overlap_when_coordinates_are_given(monkeypatch) -> None:
+    # Each stub waits for the other to start, so the prefetch only finishes if both run at once.
+    scrape_started, flux_started = threading.Event(), threading.Event()
+
+    def flux(lat, lon):
+        flux_started.set()
+        assert scrape_started.wait(2), "scrape did not start while flux was in flight"
+        return f"flux@{lat},{lon}"
+
+    def load(postcode):
+        scrape_started.set()
+        assert flux_started.wait(2), "flux did not start while scrape was in flight"
+        return {"annual_electricity_kwh": 3000, "latitude": 1.0, "longitude": 2.0}
+
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_last_year", flux)
+    out = prefetch_recommend_inputs(
+        postcode="BS1 1AA", latitude=51.45, longitude=-2.58, need_scrape=True, load_scrape=load,
+    )
+    assert out["scrape"]["annual_electricity_kwh"] == 3000
+    assert (out["latitude"], out["longitude"]) == (51.45, -2.58)
+    assert out["flux"] == "flux@51.45,-2.58"
+
+
+def test_deferred_flux_is_started_but_not_awaited(monkeypatch) -> None:
+    release = threading.Event()
+    calls = []
+
+    def flux(lat, lon):
+        calls.append((lat, lon))
+        assert release.wait(2)
+        return "flux"
+
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_last_year", flux)
+    out = prefetch_recommend_inputs(
+        postcode="", latitude=51.0, longitude=-2.0, need_scrape=False, defer_flux=True,
+        load_scrape=_slow_scrape(None),
+    )
+    assert out["flux"] is None and not out["flux_future"].done()
+    release.set()
+    assert out["flux_future"].result(timeout=2) == ("flux", None)
+    assert calls == [(51.0, -2.0)]
+
+
+def test_coordinates_come_from_scrape_then_postcode(fake_flux, monkeypatch) -> None:
+    monkeypatch.setattr(postcode_lookup, "lookup", lambda pc: {"latitude": 55.0, "longitude": -3.0})
+    out = prefetch_recommend_inputs(
+        postcode="BS1 1AA", latitude=None, longitude=None, need_scrape=True,
+        load_scrape=_slow_scrape({"latitude": 51.0, "longitude": -2.0}),
+    )
+    assert (out["latitude"], out["longitude"]) == (51.0, -2.0)
+
+    out = prefetch_recommend_inputs(
+        postcode="EH1 1AA", latitude=None, longitude=None, need_scrape=True,
+        load_scrape=_slow_scrape(None),
+    )
+    assert (out["latitude"], out["longitude"]) == (55.0, -3.0)
+    assert fake_flux == [(51.0, -2.0), (55.0, -3.0)]
+
+
+def test_flux_failure_is_reported_not_raised(monkeypatch) -> None:
+    def boom(lat, lon):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_last_year", boom)
+    out = prefetch_recommend_inputs(
+        postcode="", latitude=51.0, longitude=-2.0, need_scrape=False, load_scrape=_slow_scrape(None),
+    )
+    assert out["flux"] is None and out["scrape"] is None and out["flux_error"] == "upstream down"
+
+
+def test_flux_after_scrape_is_skipped_without_scraped_tariffs(fake_flux) -> None:
+    out = prefetch_recommend_inputs(
+        postcode="BS1 1AA", latitude=51.45, longitude=-2.58, need_scrape=True, flux_after_scrape=True,
+        load_scrape=_slow_scrape(None),
+    )
+    assert out["flux"] is None and fake_flux == []
+    out = prefetch_recommend_inputs(
+        postcode="BS1 1AA", latitude=51.45, longitude=-2.58, need_scrape=True, flux_after_scrape=True,
+        load_scrape=_slow_scrape({"tariffs": [{"unit_rate": 24.5}]}),
+    )
+    assert out["flux"] == "flux@51.45,-2.58"
+
+
+def test_recommend_rejects_bad_input_and_weather_failures_without_refetching(fake_flux, monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    monkeypatch.setenv("RECOMMEND_ATLAS_ENABLED", "0")
+    from src.web import app as web_app
+
+    monkeypatch.setattr(web_app, "_get_scrape_results", lambda pc: None)
+    client = web_app.app.test_client()
+    body = {"latitude": 51.45, "longitude": -2.58, "annual_consumption_kwh": 3000}
+    r = client.post("/api/recommend", json={**body, "annual_consumption_kwh": "lots"})
+    assert r.status_code == 400
+    r = client.post("/api/recommend", json={**body, "tariffs": [{"unit_rate": "cheap"}]})
+    assert r.status_code == 400
+    r = client.post("/api/recommend", json={**body, "annual_consumption_kwh": None, "postcode": "BS1 1AA"})
+    assert r.status_code == 400 and "No tariffs" in r.get_json()["error"]
+    assert fake_flux == []
+
+    calls = []
+
+    def boom(lat, lon):
+        calls.append((lat, lon))
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_last_year", boom)
+    r = client.post("/api/recommend", json=body)
+    assert r.status_code == 502 and "upstream down" in r.get_json()["error"]
+    assert len(calls) == 1
+
+
+def test_atlas_miss_reuses_the_prefetched_flux(fake_flux, monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.web import app as web_app
+
+    atlas = SimpleNamespace(lookup=lambda *a: None)
+    monkeypatch.setattr(web_app, "_recommend_atlas_for", lambda *a, **k: (atlas, "BS1"))
+    monkeypatch.setattr(web_app, "_get_scrape_results", lambda pc: None)
+    seen = []
+
+    def recommend(*args, flux=None, **kwargs):
+        seen.append(flux)
+        return {"error": "stop here"}
+
+    from src.models import tariff_recommendation
+
+    monkeypatch.setattr(tariff_recommendation, "recommend_tariff", recommend)
+    r = web_app.app.test_client().post("/api/recommend", json={
+        "postcode": "BS1 1AA", "latitude": 51.45, "longitude": -2.58, "annual_consumption_kwh": 3000,
+        "tariffs": [{"supplier_name": "Octopus", "tariff_name": "Flexible", "unit_rate": 24.5,
+                     "standing_charge_day": 55.0}],
+    })
+    assert r.status_code == 422
+    assert fake_flux == [(51.45, -2.58)]
+    assert seen == ["flux@51.45,-2.58"]
@@ -0,0 +1,110 @@
+"""Scrape freshness TTL and coalescing of run-scrape requests per postcode and outward code."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from src.web.scrape_coordinator import ScrapeCoordinator, ScrapeRequest, freshness_ttl_s, outward_code_of
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _req(postcode: str, **kw) -> ScrapeRequest:
+    norm = postcode.upper().replace(" ", "")
+    return ScrapeRequest(postcode_norm=norm, postcode_display=postcode, **kw)
+
+
+def test_outward_code_and_ttl_overrides(monkeypatch) -> None:
+    assert outward_code_of("BS11AA") == "BS1" and outward_code_of("BS394DB") == "BS39"
+    assert outward_code_of("BS39") == "BS39"
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_HOURS", "12")
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_OVERRIDES", "SSEN_1=24,both:WPD_1=6, electricity=2")
+    assert freshness_ttl_s("both", "WPD_1") == 6 * 3600
+    assert freshness_ttl_s("both", "SSEN_1") == 24 * 3600
+    assert freshness_ttl_s("electricity", "NPG_1") == 2 * 3600
+    assert freshness_ttl_s("both", "NPG_1") == 12 * 3600
+
+
+def test_requests_coalesce_onto_running_job_then_serve_fresh(monkeypatch) -> None:
+    monkeypatch.delenv("SCRAPE_COALESCE", raising=False)
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_HOURS", "1")
+    clock = _Clock()
+    started: list[str] = []
+    coord = ScrapeCoordinator(lambda r: started.append(r.postcode_norm), clock=clock)
+
+    assert coord.request(_req("BS1 1AA"))["action"] == "started"
+    joined = coord.request(_req("BS1 1AB"))
+    assert joined == {"action": "joined", "served_by": "BS11AA"}
+    assert coord.request(_req("BS1 1AB", has_ev_slug="yes"))["action"] == "started"  # different EV answer
+    assert started == ["BS11AA", "BS11AB"]
+    assert coord.status("BS11AB") == {"status": "running", "error": None}
+
+    coord.finish("BS11AA", "completed")
+    assert coord.status("BS11AB")["status"] == "running"  # its own EV=yes job is still running
+    clock.now += 600
+    assert coord.request(_req("BS1 1ZZ")) == {"action": "fresh", "served_by": "BS11AA"}
+    assert coord.status("BS11ZZ") == {"status": "completed", "error": None}
+    assert coord.served_by("BS11ZZ") == "BS11AA"
+    assert coord.request(_req("BS1 1ZZ"), force=True)["action"] == "started"
+
+    clock.now += 3600  # past the TTL: a new scrape starts
+    coord.finish("BS11ZZ", "failed", "boom")
+    assert coord.request(_req("BS1 1AA"))["action"] == "started"
+    assert coord.status("BS11AA")["status"] == "running" and coord.status("BS11ZZ")["error"] == "boom"
+
+
+def test_saved_scrapes_from_db_answer_home_requests(monkeypatch) -> None:
+    monkeypatch.setenv("SCRAPE_FRESH_TTL_HOURS", "12")
+    clock = _Clock()
+    started: list[str] = []
+    recent = datetime.fromtimestamp(clock.now - 3600)
+    old = datetime.fromtimestamp(clock.now - 48 * 3600)
+    calls: list[tuple[str, str]] = []
+
+    def latest(outward: str, ev: str):
+        calls.append((outward, ev))
+        return [("BS11AB", recent), ("BS11AA", old)]
+
+    coord = ScrapeCoordinator(lambda r: started.append(r.postcode_norm), latest, clock=clock)
+    assert coord.request(_req("BS1 1AA")) == {"action": "fresh", "served_by": "BS11AB"}
+    assert calls == [("BS1", "interested")] and started == []
+    assert coord.status("BS11AA") == {"status": "completed", "error": None}
+    assert coord.request(_req("BS1 1AA", home_or_business="business"))["action"] == "started"
+
+    monkeypatch.setenv("SCRAPE_COALESCE", "postcode")
+    assert coord.request(_req("BS1 1AC"))["action"] == "started"  # only its own saved scrape counts
+
+
+def test_scrape_results_prefer_a_newer_coalesced_scrape(monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.web import app as web_app
+
+    saved = {
+        "BS11ZZ": {"search_date": "2026-09-01", "tariffs": [{"supplier_name": "Stale"}]},
+        "BS11AA": {"search_date": "2026-10-19", "tariffs": [{"supplier_name": "Fresh"}]},
+    }
+    monkeypatch.setattr(web_app, "_get_scrape_results", lambda pc: saved.get(pc.upper().replace(" ", "")))
+    served_by = {"BS11ZZ": "BS11AA"}
+    monkeypatch.setattr(web_app._scrape_coordinator, "served_by", lambda pc: served_by.get(pc, pc))
+    from src.api import postcode_lookup
+
+    monkeypatch.setattr(postcode_lookup, "lookup", lambda pc: {"latitude": 51.4, "longitude": -2.6})
+    saved["BS11AA"].update(latitude=51.45, longitude=-2.58)
+    client = web_app.app.test_client()
+
+    out = client.get("/api/scrape-results?postcode=BS1 1ZZ").get_json()
+    assert out["tariffs"][0]["supplier_name"] == "Fresh"
+    assert (out["latitude"], out["longitude"]) == (51.4, -2.6)  # the requested postcode's location
+    assert out["served_from"] == {"postcode": "BS11AA", "scope": "outward_code"}
+    assert saved["BS11AA"]["latitude"] == 51.45 and "served_from" not in saved["BS11AA"]
+    saved["BS11AA"]["search_date"] = "2026-08-01"  # the postcode's own scrape is newer
+    out = client.get("/api/scrape-results?postcode=BS1 1ZZ").get_json()
+    assert out["tariffs"][0]["supplier_name"] == "Stale" and "served_from" not in out
+    del saved["BS11ZZ"]
+    assert client.get("/api/scrape-results?postcode=BS1 1ZZ").get_json()["tariffs"][0]["supplier_name"] == "Fresh"
@@ -0,0 +1,111 @@
+"""Scrape flow record/replay: HAR matching, the local replay server and step timing."""
+
+from __future__ import annotations
+
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.api.energyScraping.scrape_har import HarIndex, HarReplayServer, ScrapeFlow
+from src.tools.scrape_replay import summarise
+
+START = "https://www.example-comparison.test/gas-and-electricity/"
+API = "https://api.example-comparison.test/quote"
+
+
+def _entry(method: str, url: str, body: str, status: int = 200, ms: float = 5.0, post: str | None = None,
+           encoding: str | None = None) -> dict:
+    request = {"method": method, "url": url, "headers": []}
+    if post is not None:
+        request["postData"] = {"mimeType": "application/json", "text": post}
+    content = {"mimeType": "text/html", "text": body}
+    if encoding:
+        content["encoding"] = encoding
+    return {
+        "time": ms,
+        "request": request,
+        "response": {
+            "status": status,
+            "headers": [{"name": "Content-Type", "value": "text/html"}, {"name": "Content-Encoding", "value": "br"}],
+            "content": content,
+        },
+    }
+
+
+def _har() -> dict:
+    return {"log": {"entries": [
+        _entry("GET", START, "<html>start</html>", ms=120.0),
+        _entry("GET", START + "?step=2", "<html>step 2</html>"),
+        _entry("POST", API, '{"cards": 1}', post='{"postcode": "BS1 1AA"}'),
+        _entry("POST", API, '{"cards": 2}', post='{"postcode": "BS1 1AB"}'),
+        _entry("GET", API + "?poll=1", '{"ready": false}'),
+        _entry("GET", API + "?poll=2", '{"ready": true}'),
+        _entry("GET", "https://cdn.example-comparison.test/logo.png",
+               base64.b64encode(b"\x89PNG").decode(), encoding="base64"),
+    ]}}
+
+
+def test_index_matches_by_url_body_and_order() -> None:
+    index = HarIndex(_har())
+    assert index.match("GET", START + "#top")["response"]["content"]["text"] == "<html>start</html>"
+    assert index.match("POST", API, b'{"postcode": "BS1 1AB"}')["response"]["content"]["text"] == '{"cards": 2}'
+    # Same path, unseen query: recorded polls are served in order, the last one repeating.
+    texts = [index.match("GET", API + f"?poll={n}&t=9")["response"]["content"]["text"] for n in (7, 8, 9)]
+    assert texts == ['{"ready": false}', '{"ready": true}', '{"ready": true}']
+    assert index.match("GET", "https://tracker.test/pixel") is None
+    assert index.misses == ["GET https://tracker.test/pixel"]
+
+
+def _replay(server: HarReplayServer, method: str, url: str, body: bytes = b"") -> tuple[int, dict, bytes]:
+    req = urllib.request.Request(server.url, data=body, method="POST",
+                                 headers={"X-Replay-Method": method, "X-Replay-Url": url})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, dict(resp.headers), resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), b""
+
+
+def test_replay_server_serves_recorded_bodies_with_scaled_timing(tmp_path) -> None:
+    har_path = tmp_path / "flow.har"
+    har_path.write_text(json.dumps(_har()), encoding="utf-8")
+
+    with HarReplayServer(har_path, timing=1.0) as server:
+        started = time.perf_counter()
+        status, headers, body = _replay(server, "GET", START)
+        assert time.perf_counter() - started >= 0.12
+        assert status == 200 and body == b"<html>start</html>"
+        assert "Content-Encoding" not in headers and headers["Content-Length"] == str(len(body))
+        assert _replay(server, "GET", "https://cdn.example-comparison.test/logo.png")[2] == b"\x89PNG"
+        status, headers, _ = _replay(server, "GET", "https://tracker.test/pixel")
+        assert status == 404 and headers.get("X-Replay-Miss") == "1"
+
+    with HarReplayServer(har_path, timing=0) as server:
+        started = time.perf_counter()
+        assert _replay(server, "POST", API, b'{"postcode": "BS1 1AA"}')[2] == b'{"cards": 1}'
+        assert time.perf_counter() - started < 0.1
+
+
+def test_flow_steps_are_timed_and_summarised(monkeypatch) -> None:
+    monkeypatch.delenv("SCRAPER_HAR_MODE", raising=False)
+    flow = ScrapeFlow.from_env("BS1 1AA", {"postcode": "BS1 1AA"})
+    assert flow.mode == "off" and flow.directory is None
+    with flow.step("load_page"):
+        time.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        with flow.step("step0_cookies_and_start"):
+            raise RuntimeError("no cookie banner")
+    report = flow.report()
+    assert [(s["name"], s["ok"]) for s in report["steps"]] == [("load_page", True), ("step0_cookies_and_start", False)]
+    assert report["steps"][0]["seconds"] >= 0.01
+
+    summary = summarise([
+        {"steps": [{"name": "load_page", "seconds": 1.0}, {"name": "extract_tariffs", "seconds": 0.2}], "total_seconds": 3.0},
+        {"steps": [{"name": "load_page", "seconds": 3.0}, {"name": "extract_tariffs", "seconds": 0.4}], "total_seconds": 5.0},
+    ])
+    assert list(summary["steps"]) == ["load_page", "extract_tariffs"]
+    assert summary["steps"]["load_page"]["median_s"] == 2.0 and summary["total"]["max_s"] == 5.0
@@ -0,0 +1,110 @@
+"""Unit tests for the Monte Carlo sensitivity engine."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import monthly_demand_profile
+from src.models import sensitivity
+from src.models.sensitivity import SAMPLED_QUANTITIES, run_sensitivity, sample_distribution, validate_distributions
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+SOLAR = SOLAR_TIERS["budget"]
+WIND = WIND_TIERS["budget"]
+
+
+def _flux(n_years: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    frames = {
+        2015 + i: pd.DataFrame(
+            {
+                "ghi_mj_per_m2": rng.uniform(50, 650, 12),
+                "wind_speed_10m_max": rng.uniform(3, 11, 12),
+                "days_in_month": DAYS,
+            },
+            index=pd.Index(range(1, 13), name="month"),
+        )
+        for i in range(n_years)
+    }
+    return pd.concat(frames, names=["year", "month"])
+
+
+DEMAND = monthly_demand_profile(4000.0, 0.6)
+
+
+def test_fixed_distributions_on_one_year_collapse_to_a_point() -> None:
+    fixed = {q: {"dist": "fixed"} for q in SAMPLED_QUANTITIES}
+    out = run_sensitivity(_flux(1), 4.0, 1.0, 0.0, DEMAND, SOLAR, WIND, distributions=fixed, n_draws=200, seed=1)
+    bands = out["total_cost_gbp"]
+    assert bands["p5"] == bands["p95"] == bands["mean"]
+
+
+def test_bands_are_ordered_and_seeded_runs_repeat() -> None:
+    a = run_sensitivity(_flux(10), 4.0, 1.0, 0.0, DEMAND, SOLAR, WIND, n_draws=5000, seed=42)
+    b = run_sensitivity(_flux(10), 4.0, 1.0, 0.0, DEMAND, SOLAR, WIND, n_draws=5000, seed=42)
+    assert a == b
+    cost = a["total_cost_gbp"]
+    assert cost["p5"] <= cost["p10"] <= cost["p50"] <= cost["p90"] <= cost["p95"]
+    assert 0.0 <= a["prob_payback_within_horizon"] <= 1.0
+    assert a["weather_years"] == list(range(2015, 2025))
+
+
+def test_sample_distribution_shapes_and_clipping() -> None:
+    rng = np.random.default_rng(0)
+    tri = sample_distribution({"dist": "triangular", "low_frac": 0.5, "mode_frac": 1.0, "high_frac": 1.5}, 2.0, 10_000, rng)
+    assert tri.min() >= 1.0 and tri.max() <= 3.0
+    assert sample_distribution({"dist": "normal", "mean": 0.0, "sd": 1.0}, 1.0, 1000, rng).min() >= 0.0
+    with pytest.raises(ValueError):
+        sample_distribution({"dist": "cauchy"}, 1.0, 10, rng)
+
+
+def test_draws_are_costed_in_one_vectorised_pass(monkeypatch) -> None:
+    # Cost must not grow with n_draws: the balance model runs once per call, not once per draw or year.
+    calls = {"yields": 0, "balance": 0}
+    yields, balance = sensitivity.monthly_yields, sensitivity.candidate_monthly_balance
+
+    def counting_yields(*args, **kwargs):
+        calls["yields"] += 1
+        return yields(*args, **kwargs)
+
+    def counting_balance(*args, **kwargs):
+        calls["balance"] += 1
+        return balance(*args, **kwargs)
+
+    monkeypatch.setattr(sensitivity, "monthly_yields", counting_yields)
+    monkeypatch.setattr(sensitivity, "candidate_monthly_balance", counting_balance)
+    out = run_sensitivity(_flux(10), 4.0, 2.0, 5.0, DEMAND, SOLAR, WIND, n_draws=20_000, seed=3)
+    assert out["n_draws"] == 20_000
+    assert calls == {"yields": 1, "balance": 1}
+
+
+@pytest.mark.parametrize(
+    "distributions, message",
+    [
+        (["normal"], "object keyed by quantity"),
+        ({"grid_price_per_kwh": "normal"}, "must be an object"),
+        ({"grid_price_per_kwh": {"dist": "cauchy"}}, "unknown distribution"),
+        ({"grid_price_per_kwh": {"dist": "normal", "sd": [1]}}, "sd must be a number"),
+        ({"heat_price": {"dist": "fixed"}}, "unknown sampled quantities"),
+    ],
+)
+def test_malformed_distribution_specs_are_rejected(distributions, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        validate_distributions(distributions)
+
+
+def test_sensitivity_endpoint_rejects_bad_specs_before_fetching_weather(monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.models import energy_balancing
+    from src.web import app as web_app
+
+    fetched = []
+    monkeypatch.setattr(energy_balancing, "get_flux_monthly_years", lambda *a: fetched.append(a))
+    client = web_app.app.test_client()
+    for distributions in ({"grid_price_per_kwh": "normal"}, {"grid_price_per_kwh": {"dist": "normal", "sd": {}}}):
+        r = client.post("/api/sensitivity", json={"solar_kw": 4, "distributions": distributions})
+        assert r.status_code == 400 and "Invalid input" in r.get_json()["error"]
+    assert fetched == []
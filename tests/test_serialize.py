@@ -0,0 +1,108 @@
+"""Unit tests for API response serialisation (JSON provider, columnar layout, compression, ETags)."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+
+from src.web.serialize import OrjsonProvider, columnar, finalize_json_response
+
+
+def _app() -> Flask:
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.after_request(finalize_json_response)
+
+    @app.route("/series", methods=["GET", "POST"])
+    def series():
+        return jsonify({"values": np.arange(2000, dtype=float) / 3.0, "peak": np.float32(1.5), "missing": float("nan")})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    return app
+
+
+def test_columnar_from_frames_and_records() -> None:
+    df = pd.DataFrame({"month": ["Jan", "Feb"], "solar_kwh": [1.23456, 2.5]})
+    assert columnar(df, decimals=2) == {"month": ["Jan", "Feb"], "solar_kwh": [1.23, 2.5]}
+    assert columnar([{"a": 1, "b": 2}, {"a": 3}]) == {"a": [1, 3], "b": [2, None]}
+
+
+def test_numpy_payloads_gzip_and_conditional_get() -> None:
+    client = _app().test_client()
+    r = client.get("/series", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    body = json.loads(gzip.decompress(r.data))
+    assert body["peak"] == 1.5 and body["missing"] is None and len(body["values"]) == 2000
+
+    etag = r.headers["ETag"]
+    again = client.get("/series", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    plain = client.get("/series", headers={"If-None-Match": etag})  # same content, other encoding
+    assert plain.status_code == 304
+
+
+def test_small_and_post_responses_are_not_conditional() -> None:
+    client = _app().test_client()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers and small.json == {"ok": True}
+    posted = client.post("/series", headers={"Accept-Encoding": "gzip"})
+    assert posted.headers["Content-Encoding"] == "gzip" and "ETag" not in posted.headers
+
+
+def test_dataframes_in_a_response_serialise_as_records_by_default() -> None:
+    app = _app()
+    df = pd.DataFrame({"month": ["Jan", "Feb"], "solar_kwh": [np.float64(1.5), 2.0]})
+    with app.app_context():
+        assert json.loads(app.json.dumps({"monthly_balance": df})) == {
+            "monthly_balance": [{"month": "Jan", "solar_kwh": 1.5}, {"month": "Feb", "solar_kwh": 2.0}]
+        }
+
+
+def _recommend_body() -> dict:
+    tariff = {"supplier": "Octopus Energy", "unit_rate": 24.5}
+    return {"ranking": [{"total_cost_gbp": 1200.0, "tariff": tariff}, {"total_cost_gbp": 1300.0, "tariff": tariff}]}
+
+
+def test_recommend_records_layout(monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.web.app import _apply_layout
+
+    df = pd.DataFrame({"month": ["Jan", "Feb"], "import_kwh": [310.0, 280.0]})
+    out = _apply_layout(_recommend_body(), df, "records")
+    assert out["layout"] == "records" and "tariffs" not in out
+    assert out["monthly_balance"] == [{"month": "Jan", "import_kwh": 310.0}, {"month": "Feb", "import_kwh": 280.0}]
+    assert out["ranking"][1]["tariff"]["supplier"] == "Octopus Energy"
+
+
+def test_recommend_columnar_layout(monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.web.app import _apply_layout
+
+    df = pd.DataFrame({"month": ["Jan", "Feb"], "import_kwh": [310.0, 280.0]})
+    out = _apply_layout(_recommend_body(), df, "columnar")
+    assert out["layout"] == "columnar"
+    assert out["monthly_balance"] == {"month": ["Jan", "Feb"], "import_kwh": [310.0, 280.0]}
+    assert [r["tariff_index"] for r in out["ranking"]] == [0, 1] and "tariff" not in out["ranking"][0]
+    assert out["tariffs"][out["ranking"][1]["tariff_index"]]["unit_rate"] == 24.5
+
+
+def test_decimals_and_dates_match_flasks_default_provider() -> None:
+    from flask.json.provider import DefaultJSONProvider
+
+    app = _app()
+    payload = {"rate": Decimal("24.5012"), "at": datetime(2026, 10, 19, 9, 30), "day": date(2026, 10, 1)}
+    with app.app_context():
+        out = json.loads(app.json.dumps(payload))
+        assert out == json.loads(DefaultJSONProvider(app).dumps(payload))
+        assert out["rate"] == "24.5012" and out["at"] == "Mon, 19 Oct 2026 09:30:00 GMT"
+        assert json.loads(app.json.response(payload).get_data()) == out
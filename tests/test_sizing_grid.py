@@ -0,0 +1,123 @@
+"""Unit tests for the vectorised sizing sweep and multi-year optimisation."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import BATTERY_TIERS, SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import (
+    _battery_adjusted_monthly_balance,
+    _monthly_generation_breakdown,
+    optimize_system_capacity,
+)
+from src.models.sizing_grid import evaluate_grid, solar_yield_per_kw, sweep_values, wind_yield_per_kw
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+SOLAR = SOLAR_TIERS["budget"]
+WIND = WIND_TIERS["budget"]
+BATTERY = next(v for k, v in BATTERY_TIERS.items() if k != "none")
+
+
+def _monthly_flux(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "ghi_mj_per_m2": rng.uniform(50, 650, 12),
+            "wind_speed_10m_max": rng.uniform(3, 11, 12),
+            "days_in_month": DAYS,
+        },
+        index=pd.Index(range(1, 13), name="month"),
+    )
+
+
+def _multi_year(frames: dict[int, pd.DataFrame]) -> pd.DataFrame:
+    return pd.concat(frames, names=["year", "month"])
+
+
+def test_sweep_values_match_float_accumulation() -> None:
+    assert list(sweep_values(0.5, 2.0, 0.5)) == [0.5, 1.0, 1.5, 2.0]
+    assert list(sweep_values(0.0, 0.0, 1.0)) == [0.0]
+    assert list(sweep_values(3.0, 2.0, 0.5)) == []
+
+
+def test_grid_matches_scalar_balance_for_each_candidate() -> None:
+    flux = _monthly_flux(1)
+    demand = [300.0 + 20 * i for i in range(12)]
+    days = np.array([DAYS], dtype=float)
+    solar_per_kw = solar_yield_per_kw(flux["ghi_mj_per_m2"].to_numpy()[None, :], SOLAR)
+    wind_per_kw = wind_yield_per_kw(flux["wind_speed_10m_max"].to_numpy()[None, :], WIND, days)
+    solar_kws, wind_kws, battery_kwhs = np.array([0.0, 2.5, 6.0]), np.array([0.5, 3.0]), np.array([0.0, 5.0])
+    grid = evaluate_grid(solar_per_kw, wind_per_kw, np.array(demand), days, solar_kws, wind_kws, battery_kwhs, BATTERY)
+    for i, s in enumerate(solar_kws):
+        for j, w in enumerate(wind_kws):
+            ms, mw = _monthly_generation_breakdown(flux, s, w, SOLAR, WIND)
+            for k, b in enumerate(battery_kwhs):
+                _, _, imp, exp = _battery_adjusted_monthly_balance(ms, mw, demand, DAYS, b, BATTERY)
+                assert grid["import_kwh"][0, i, j, k] == pytest.approx(imp, rel=1e-9)
+                assert grid["export_kwh"][0, i, j, k] == pytest.approx(exp, rel=1e-9)
+
+
+def test_multi_year_of_identical_years_matches_single_year() -> None:
+    flux = _monthly_flux(2)
+    kwargs = dict(battery_type_params=BATTERY, battery_max_kwh=10.0, solar_max_kw=8.0, wind_max_kw=4.0)
+    single = optimize_system_capacity(flux, 4000.0, SOLAR, WIND, **kwargs)
+    multi = optimize_system_capacity(_multi_year({2021: flux, 2022: flux, 2023: flux}), 4000.0, SOLAR, WIND, **kwargs)
+    for key in ("optimal_solar_kw", "optimal_wind_kw", "optimal_battery_kwh", "annual_import_kwh", "annual_export_kwh"):
+        assert multi[key] == pytest.approx(single[key], abs=0.05)
+    spread = multi["weather_years"]
+    assert spread["years"] == [2021, 2022, 2023]
+    assert spread["total_cost_p10"] == pytest.approx(spread["total_cost_p90"])
+    assert single["weather_years"] is None
+
+
+def test_multi_year_reports_cost_spread_across_years() -> None:
+    frames = {2015 + i: _monthly_flux(10 + i) for i in range(10)}
+    result = optimize_system_capacity(_multi_year(frames), 4000.0, SOLAR, WIND, battery_type_params=BATTERY, battery_max_kwh=10.0)
+    spread = result["weather_years"]
+    assert spread["total_cost_p10"] < spread["total_cost_mean"] < spread["total_cost_p90"]
+    assert len(spread["annual_generation_kwh_by_year"]) == 10
+    assert len(result["monthly_balance"]) == 12
+
+
+def test_weather_store_fetches_only_missing_years(tmp_path, monkeypatch) -> None:
+    from src.api import weather_store
+
+    monkeypatch.setenv("WEATHER_STORE_DIR", str(tmp_path))
+    fetched: list[tuple[int, int]] = []
+
+    def fake_fetch(lat, lon, first, last):
+        fetched.append((first, last))
+        return {str(y): {"ghi_mj_per_m2": [100.0] * 12, "wind_speed_10m_max": [5.0] * 12} for y in range(first, last + 1)}
+
+    monkeypatch.setattr(weather_store, "_fetch_years", fake_fetch)
+    weather_store.get_monthly_flux_years(51.45, -2.58, [2022, 2023])
+    df = weather_store.get_monthly_flux_years(51.45, -2.58, [2021, 2022, 2023])
+    assert fetched == [(2022, 2023), (2021, 2021)]
+    assert list(df.index.get_level_values("year").unique()) == [2021, 2022, 2023]
+    assert df.loc[(2023, 2), "days_in_month"] == 28
+
+
+def test_weather_store_does_not_refetch_years_the_archive_lacks(tmp_path, monkeypatch) -> None:
+    from src.api import weather_store
+
+    monkeypatch.setenv("WEATHER_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(weather_store, "_unavailable", {})
+    fetched: list[tuple[int, int]] = []
+
+    def fake_fetch(lat, lon, first, last):
+        fetched.append((first, last))
+        return {str(y): {"ghi_mj_per_m2": [100.0] * 12, "wind_speed_10m_max": [5.0] * 12} for y in range(first, min(last, 2022) + 1)}
+
+    monkeypatch.setattr(weather_store, "_fetch_years", fake_fetch)
+    for _ in range(3):
+        df = weather_store.get_monthly_flux_years(51.45, -2.58, [2022, 2023])
+        assert list(df.index.get_level_values("year").unique()) == [2022]
+    assert fetched == [(2022, 2023)]
+
+    monkeypatch.setenv("WEATHER_STORE_UNAVAILABLE_TTL_S", "0")
+    monkeypatch.setattr(weather_store, "_unavailable", {})
+    weather_store.get_monthly_flux_years(51.45, -2.58, [2022, 2023])
+    weather_store.get_monthly_flux_years(51.45, -2.58, [2022, 2023])
+    assert fetched == [(2022, 2023), (2023, 2023), (2023, 2023)]
@@ -0,0 +1,86 @@
+"""Unit tests for smart-meter CSV ingest."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from src.data.smart_meter import SmartMeterError, get_profile, parse_smart_meter_csv, store_profile
+from src.models.energy_balancing import adjust_measured_monthly_demand
+
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _octopus(n_slots: int, kwh: float = 0.25) -> list[str]:
+    lines = ["Consumption (kWh), Start, End\n"]
+    for i in range(n_slots):
+        t = START + timedelta(minutes=30 * i)
+        lines.append(f"{kwh},{t.isoformat()},{(t + timedelta(minutes=30)).isoformat()}\n")
+    return lines
+
+
+def test_full_year_of_half_hours() -> None:
+    profile = parse_smart_meter_csv(_octopus(365 * 48))
+    year = profile["typical_year_kwh"]
+    assert year.shape == (365, 48) and year.dtype == np.float32
+    assert profile["annual_kwh"] == pytest.approx(365 * 48 * 0.25)
+    assert profile["monthly_kwh"][1] == pytest.approx(28 * 48 * 0.25)
+    assert profile["coverage_pct"] == 100.0 and profile["interval_minutes"] == 30
+
+
+def test_hourly_and_wide_layouts_resample_to_half_hours() -> None:
+    hourly = ["timestamp,value\n"] + [
+        f"{(START + timedelta(hours=i)).strftime('%d/%m/%Y %H:%M')},0.5\n" for i in range(24 * 60)
+    ]
+    profile = parse_smart_meter_csv(hourly)
+    assert profile["interval_minutes"] == 60
+    assert profile["typical_year_kwh"][0, 0] == pytest.approx(0.25)
+
+    slots = [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30)]
+    wide = ["Date," + ",".join(slots) + "\n"] + [
+        (START + timedelta(days=d)).strftime("%Y-%m-%d") + "," + ",".join(["0.1"] * 48) + "\n" for d in range(40)
+    ]
+    assert parse_smart_meter_csv(wide)["typical_year_kwh"][5, 10] == pytest.approx(0.1)
+
+
+def test_gaps_are_filled_from_the_month_and_season() -> None:
+    lines = _octopus(60 * 48)
+    del lines[100:148]  # one day missing in January
+    profile = parse_smart_meter_csv(lines)
+    assert profile["coverage_pct"] < 100.0
+    assert not np.isnan(profile["typical_year_kwh"]).any()
+    january, july = profile["monthly_kwh"][0], profile["monthly_kwh"][6]
+    assert january == pytest.approx(31 * 48 * 0.25, rel=1e-4)
+    assert 0 < july < january  # unseen summer month scaled down by seasonal weights
+
+
+@pytest.mark.parametrize(
+    "lines, message",
+    [
+        (["when,amount\n", "x,1\n"], "columns"),
+        (_octopus(10 * 48), "days of data"),
+        (_octopus(40 * 48, kwh=-0.1), "negative"),
+        (_octopus(40 * 48, kwh=250.0), "units"),
+        (_octopus(40 * 48) + ["0.25,2400-01-01T00:00:00+00:00,2400-01-01T00:30:00+00:00\n"], "outside 2000"),
+        (_octopus(40 * 48) + ["0.25,1970-01-01T00:00:00+00:00,1970-01-01T00:30:00+00:00\n"], "outside 2000"),
+        (_octopus(40 * 48) + ["0.25,2024-01-01T00:00:00+00:00,2024-01-01T00:30:00+00:00\n"], "half-hours between"),
+        (_octopus(40 * 48) + ["0.25,2026-06-01T00:00:00+00:00,2026-06-01T00:30:00+00:00\n"], "span more than"),
+    ],
+)
+def test_unusable_uploads_are_rejected(lines: list[str], message: str) -> None:
+    with pytest.raises(SmartMeterError, match=message):
+        parse_smart_meter_csv(lines)
+
+
+def test_profile_store_and_measured_demand_adjustment() -> None:
+    profile = parse_smart_meter_csv(_octopus(40 * 48))
+    profile_id = store_profile(profile)
+    assert get_profile(profile_id.upper()) is profile
+    assert get_profile("missing") is None
+
+    monthly = [500.0] * 12
+    assert adjust_measured_monthly_demand(monthly, 0.6) == pytest.approx(monthly)
+    upgraded = adjust_measured_monthly_demand(monthly, 0.6, insulation_r_value=5.0, heat_pump_cop=3.0)
+    assert upgraded[0] < upgraded[6] < 500.0
@@ -0,0 +1,145 @@
+"""Star schema ETL: natural keys, dimension-key caching, batching and the watermark (in-memory fake MySQL)."""
+
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta
+
+from src.data.star_etl import _SOURCE_COLUMNS, date_attributes, run_etl, star_row, supplier_id, tariff_id
+
+
+class _FakeDB:
+    """Just enough of MySQL for run_etl: dimension tables, the simple source table and the watermark."""
+
+    def __init__(self, source: list[dict]) -> None:
+        self.source = source
+        self.dims: dict[str, dict] = {}  # table -> natural key -> surrogate key
+        self.dates: set[int] = set()
+        self.facts: list[tuple] = []
+        self.watermark: dict | None = None
+        self.dim_inserts: dict[str, int] = {}
+        self.commits = 0
+        self.now = datetime(2026, 10, 19, 12)
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        pass
+
+
+class _FakeCursor:
+    def __init__(self, db: _FakeDB) -> None:
+        self.db = db
+        self._result: list = []
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        sql = " ".join(sql.split())
+        db = self.db
+        self._result = []
+        if sql.startswith("CREATE TABLE"):
+            return
+        if sql.startswith("INSERT IGNORE INTO etl_watermark"):
+            db.watermark = db.watermark or {"last_id": 0, "last_search_date": None}
+        elif sql.startswith("SELECT last_id"):
+            self._result = [(db.watermark["last_id"], db.watermark["last_search_date"])]
+        elif sql.startswith("UPDATE etl_watermark"):
+            db.watermark = {"last_id": params[0], "last_search_date": params[1]}
+        elif sql.startswith("SELECT date_key FROM dim_date"):
+            self._result = [(k,) for k in db.dates]
+        elif "FROM fact_tariff_search_simple" in sql:
+            lag, floor, last_id, limit = params
+            rows = [r for r in db.source if r["id"] > last_id and r["search_date"] >= floor][:limit]
+            cutoff = db.now - timedelta(seconds=lag)  # NOW() - INTERVAL lag SECOND
+            self._result = [(*(r.get(c) for c in _SOURCE_COLUMNS), int(r["created_at"] > cutoff)) for r in rows]
+        else:
+            m = re.match(r"SELECT (\w+), (\w+) FROM (\w+)(?: WHERE \w+ IN)?", sql)
+            assert m, sql
+            keys = db.dims.setdefault(m.group(3), {})
+            wanted = set(params) if params else set(keys)
+            self._result = [(n, k) for n, k in keys.items() if n in wanted]
+
+    def executemany(self, sql: str, rows: list) -> None:
+        sql = " ".join(sql.split())
+        db = self.db
+        if sql.startswith("INSERT IGNORE INTO dim_date"):
+            db.dates.update(r[0] for r in rows)
+        elif sql.startswith("INSERT INTO fact_tariff_search "):
+            db.facts.extend(rows)
+        else:
+            table = re.match(r"INSERT INTO (\w+)", sql).group(1)
+            keys = db.dims.setdefault(table, {})
+            db.dim_inserts[table] = db.dim_inserts.get(table, 0) + 1
+            for r in rows:
+                keys.setdefault(r[0], len(keys) + 1)
+
+    def fetchall(self) -> list:
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def close(self) -> None:
+        pass
+
+
+def _row(i: int, supplier: str, tariff: str = "Fixed 12M", day: int = 1) -> dict:
+    return {
+        "id": i, "pay_method": "monthly_direct_debit", "new_supplier_name": supplier, "tariff_name": tariff,
+        "tariff_type": "Fixed", "fixed_price_length_months": 12, "is_green": 0, "region_code": "E06000023",
+        "region_name": "South West", "dno_name": "National Grid", "dno_id": "WPD_1", "postcode": "BS1 1AA",
+        "outward_code": "BS1", "latitude": 51.45, "longitude": -2.58, "fuel_type": "electricity",
+        "search_date": date(2026, 10, day), "unit_rate": 24.5, "standing_charge": 53.1, "exit_fee": 0,
+        "annual_cost_new": 1100.0, "created_at": datetime(2026, 10, day, 12),
+    }
+
+
+def test_natural_keys_fit_their_columns() -> None:
+    assert supplier_id("Octopus Energy") == "octopus-energy"
+    long_a = supplier_id("British Gas Evolve (formerly British Gas Business)")
+    long_b = supplier_id("British Gas Evolve (formerly something else)")
+    assert len(long_a) <= 20 and long_a != long_b
+    base = tariff_id("EDF", "Simply Fixed", "Fixed", "dd", 12, False)
+    assert base == tariff_id("edf ", "simply fixed", "fixed", "dd", 12, False)
+    assert base != tariff_id("Octopus", "Simply Fixed", "Fixed", "dd", 12, False)
+    assert len(base) <= 50
+    assert date_attributes(date(2026, 10, 18)) == (20261018, date(2026, 10, 18), "Sunday", 18, 10, "October", 4,
+                                                   2026, True, "Autumn")
+    row = star_row({**_row(1, "EDF"), "region_code": "", "postcode": "", "search_date": datetime(2026, 1, 2, 9)})
+    assert row.region[0] == "UNKNOWN" and row.postcode is None and row.search_date == date(2026, 1, 2)
+
+
+def test_incremental_batches_cache_dimension_keys_and_advance_watermark() -> None:
+    source = [_row(i, "EDF" if i % 2 else "Octopus Energy", day=1 + i // 3) for i in range(1, 8)]
+    db = _FakeDB(source)
+
+    stats = run_etl(db, batch_rows=3, log=False)
+    assert (stats.rows, stats.batches, stats.last_id) == (7, 3, 7)
+    assert db.watermark["last_id"] == 7 and db.commits >= 3
+    assert len(db.facts) == 7 and len(db.dims["dim_supplier"]) == 2
+    assert db.dim_inserts["dim_supplier"] == 1  # both suppliers in the first batch, cached afterwards
+    assert db.dim_inserts["dim_region"] == 1 and db.dates == {20261001, 20261002, 20261003}
+    tariff_key, supplier_key, region_key, date_key, fuel_key = db.facts[0][:5]
+    assert all(isinstance(k, int) for k in (tariff_key, supplier_key, region_key, date_key, fuel_key))
+
+    assert run_etl(db, batch_rows=3, log=False).rows == 0  # nothing above the watermark
+
+    source.append(_row(8, "Ovo", day=5))
+    again = run_etl(db, log=False)
+    assert again.rows == 1 and db.dim_inserts["dim_supplier"] == 2 and len(db.facts) == 8
+    assert run_etl(_FakeDB(source), max_rows=5, log=False).rows == 5
+
+
+def test_recent_rows_wait_for_the_lag_so_late_commits_are_not_skipped() -> None:
+    source = [_row(1, "EDF"), _row(2, "EDF"), _row(3, "Ovo")]
+    db = _FakeDB(source)
+    db.now = datetime(2026, 10, 1, 12, 15)
+    source[1]["created_at"] = datetime(2026, 10, 1, 12, 10)  # id 2 still inside the 10-minute lag
+    stats = run_etl(db, batch_rows=10, log=False, lag_s=600)
+    assert stats.rows == 1 and db.watermark["last_id"] == 1  # stops before id 2, not just skipping it
+
+    db.now = datetime(2026, 10, 1, 12, 30)
+    assert run_etl(db, log=False, lag_s=600).rows == 2 and db.watermark["last_id"] == 3
@@ -0,0 +1,51 @@
+"""Cold start: the app imports without the heavy stack, and forked scrape children behave like subprocesses."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.tools.startup_profile import parse_importtime
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_parse_importtime_rows() -> None:
+    text = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   _io",
+        "import time:      2000 |     380000 |     pandas",
+        "import time:       900 |     390000 | src.models.energy_balancing",
+        "some other stderr line",
+    ])
+    rows = parse_importtime(text)
+    assert [r["module"] for r in rows] == ["_io", "pandas", "src.models.energy_balancing"]
+    assert rows[1] == {"module": "pandas", "self_us": 2000, "cumulative_us": 380000, "depth": 2}
+    assert rows[2]["depth"] == 0
+
+
+def test_app_import_defers_heavy_modules() -> None:
+    code = "import sys, src.web.app; print(','.join(m for m in ('pandas', 'requests', 'camoufox', 'bs4') if m in sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(PROJECT_ROOT),
+        env={**os.environ, "APP_PRELOAD_MODULES": "0"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_forked_and_subprocess_scrape_children_agree(monkeypatch) -> None:
+    monkeypatch.setenv("APP_PRELOAD_MODULES", "0")
+    from src.web import app as web_app
+
+    results = {}
+    for mode in ("subprocess", "forkserver"):
+        monkeypatch.setenv("SCRAPE_CHILD_MODE", mode)
+        results[mode] = web_app._run_scrape_child(["X"], web_app.PROJECT_ROOT)  # rejected before any browser work
+    for code, tail in results.values():
+        assert code == 1 and "Postcode too short" in tail
@@ -0,0 +1,72 @@
+"""Tariff card extraction: the CSS subset compiler and single-pass results page parsing."""
+
+from __future__ import annotations
+
+import pytest
+from lxml import html as lxml_html
+
+from src.api.energyScraping.tariff_extract import compile_css, extract_results
+from src.tools.bench_extractor import synthetic_results_page
+
+
+def test_compile_css_matches_class_attr_and_descendant_selectors() -> None:
+    root = lxml_html.fromstring(
+        '<div><section class="results-new a"><div class="results-new-item" data-testid="card-1">'
+        '<span id="p">x</span></div><div class="results-new-item-brand"></div></section>'
+        '<div data-testid="other"></div></div>'
+    )
+    # Class tokens match whole words only (".results-new-item" must not hit "results-new-item-brand").
+    assert len(compile_css(".results-new-item")(root)) == 1
+    assert len(compile_css(".results-new .results-new-item #p")(root)) == 1
+    assert len(compile_css("[data-testid^='card-']")(root)) == 1
+    assert len(compile_css("[data-testid*=card], div[data-testid$=\"other\"]")(root)) == 2
+    with pytest.raises(ValueError):
+        compile_css("section > div")  # child combinator is outside the supported subset
+
+
+def test_extract_results_reads_page_and_card_fields() -> None:
+    page = extract_results(synthetic_results_page(5, seed=3), log=False)
+    assert page.card_selector == ".results-new-item" and len(page.cards) == 5
+    assert page.annual_cost_current == 1842
+    assert (page.annual_electricity_kwh, page.annual_gas_kwh) == (2700, 11500)
+    for card in page.cards:
+        assert card.new_supplier_name != "Unknown Supplier" and card.tariff_name.startswith("Tariff ")
+        assert card.fuel_type == "gas_and_electricity"
+        assert 19.0 <= card.unit_rate <= 29.0 and 35.0 <= card.standing_charge_day <= 62.0
+        assert 1300 <= card.annual_cost_new <= 2300
+        assert (card.tariff_type == "Fixed") == (card.fixed_price_length_months in (12, 18, 24))
+
+
+def test_extract_results_without_cards_samples_classes() -> None:
+    page = extract_results("<html><body><div class='spinner loading'>Please wait</div></body></html>", log=False)
+    assert page.cards == [] and page.card_selector is None
+    assert "spinner" in page.class_sample
+
+
+DECOY = (
+    '<aside class="promo"><div class="results-new-item">'
+    '<span class="results-new-item-brand__provider-name">Sponsored Energy</span>'
+    '<span class="results-new-item-cost__sub_value">or £99 a year</span></div></aside>'
+)
+
+
+def test_cards_are_read_from_the_results_container_not_decoys_outside_it() -> None:
+    page = extract_results(synthetic_results_page(3, seed=1).replace("<main>", DECOY + "<main>"), log=False)
+    assert page.scoped_to_container and len(page.cards) == 3
+    assert "Sponsored Energy" not in {c.new_supplier_name for c in page.cards}
+
+    # A decoy matching an earlier card selector must not shadow the container's own cards.
+    html = (
+        f"<html><body>{DECOY}<ul class='results-new'>"
+        "<li class='tariff-card'><h3>Real Supplier</h3></li><li class='tariff-card'><h3>Other</h3></li>"
+        "</ul></body></html>"
+    )
+    page = extract_results(html, log=False)
+    assert page.card_selector == ".tariff-card"
+    assert [c.new_supplier_name for c in page.cards] == ["Real Supplier", "Other"]
+
+
+def test_cards_fall_back_to_the_whole_page_without_a_container() -> None:
+    page = extract_results("<html><body><div class='tariff-card'><h3>Solo</h3></div></body></html>", log=False)
+    assert not page.scoped_to_container
+    assert [c.new_supplier_name for c in page.cards] == ["Solo"]
@@ -0,0 +1,146 @@
+"""Monthly partition planning for the tariff fact table: conversion, future months, rollups and retention."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+
+from src.data.tariff_partitions import (
+    Partition,
+    _parse_bound,
+    add_months,
+    final_rollups,
+    plan_maintenance,
+    run_maintenance,
+)
+from src.data.tariff_trends import PRICE_HIST_CLEAR, PRICE_HIST_REBUILD
+
+TODAY = date(2026, 10, 19)
+
+
+def _monthly(first: date, last: date) -> list[Partition]:
+    out, m = [], first
+    while m <= last:
+        out.append(Partition(f"p{m:%Y%m}", add_months(m, 1)))
+        m = add_months(m, 1)
+    return out + [Partition("pmax", None)]
+
+
+def test_converts_unpartitioned_table_from_oldest_search() -> None:
+    plan = plan_maintenance(None, set(), TODAY, oldest_search=date(2025, 8, 3), retention_months=12, ahead_months=2)
+
+    assert plan.converted
+    assert plan.created[0] == date(2025, 8, 1) and plan.created[-1] == date(2026, 12, 1)
+    assert "ADD PRIMARY KEY (id, search_date)" in plan.statements[0][0]
+    ddl = plan.statements[1][0]
+    assert "PARTITION p202508 VALUES LESS THAN ('2025-09-01')" in ddl
+    assert "PARTITION pmax VALUES LESS THAN (MAXVALUE)" in ddl
+    # Every month up to the current one is rolled up; Aug/Sep 2025 are past 12 months and dropped after.
+    assert plan.rolled_up[0] == date(2025, 8, 1) and plan.rolled_up[-1] == date(2026, 10, 1)
+    assert plan.dropped == ["p202508", "p202509"]
+    drop_at = next(i for i, (sql, _) in enumerate(plan.statements) if "DROP PARTITION" in sql)
+    assert drop_at == len(plan.statements) - 1
+
+
+def test_steady_state_adds_next_month_and_refreshes_current() -> None:
+    parts = _monthly(date(2025, 11, 1), date(2026, 12, 1))
+    rolled = {add_months(date(2025, 11, 1), i) for i in range(11)}  # Nov 2025 .. Sep 2026
+    plan = plan_maintenance(parts, rolled, TODAY, retention_months=12, ahead_months=3)
+
+    assert plan.created == [date(2027, 1, 1)]
+    assert "REORGANIZE PARTITION pmax INTO" in plan.statements[0][0]
+    assert plan.rolled_up == [date(2026, 10, 1)]  # only the current month is re-rolled
+    month = (date(2026, 10, 1), date(2026, 10, 1), date(2026, 11, 1))
+    rollup_params = [params for sql, params in plan.statements if params]
+    assert rollup_params == [month, month, (date(2026, 10, 1),), month * 2]  # rollups, histogram rebuild
+    assert plan.dropped == []
+
+
+def test_drops_months_past_retention_and_keeps_all_with_zero_retention() -> None:
+    parts = _monthly(date(2025, 6, 1), date(2027, 1, 1))
+    rolled = {add_months(date(2025, 6, 1), i) for i in range(16)}  # through Sep 2026
+    plan = plan_maintenance(parts, rolled, TODAY, retention_months=6, ahead_months=3)
+    assert plan.dropped == [f"p{m:%Y%m}" for m in (add_months(date(2025, 6, 1), i) for i in range(10))]
+    assert plan.created == []
+
+    assert plan_maintenance(parts, rolled, TODAY, retention_months=0, ahead_months=3).dropped == []
+
+
+def test_pmax_only_table_is_split_into_months() -> None:
+    plan = plan_maintenance([Partition("pmax", None)], set(), TODAY, oldest_search=date(2026, 9, 30),
+                            retention_months=12, ahead_months=1)
+    assert plan.created == [date(2026, 9, 1), date(2026, 10, 1), date(2026, 11, 1)]
+    assert "REORGANIZE PARTITION pmax INTO" in plan.statements[0][0]
+    assert plan.rolled_up == [date(2026, 9, 1), date(2026, 10, 1)]
+
+
+def test_parse_partition_bounds() -> None:
+    assert _parse_bound("'2026-11-01'") == date(2026, 11, 1)
+    assert _parse_bound("MAXVALUE") is None
+
+
+def test_month_rolled_up_mid_month_is_rolled_up_again_after_it_ends() -> None:
+    parts = _monthly(date(2026, 8, 1), date(2027, 1, 1))
+    sep = date(2026, 9, 1)
+    # Last run in September was on the 15th; rows saved after it are not in the rollup yet.
+    rows = [(date(2026, 8, 1), datetime(2026, 9, 1, 3)), (sep, datetime(2026, 9, 15, 3))]
+    rolled = final_rollups(rows)
+    assert rolled == {date(2026, 8, 1)}
+
+    plan = plan_maintenance(parts, rolled, date(2026, 10, 1), retention_months=1, ahead_months=3)
+    assert plan.rolled_up == [sep, date(2026, 10, 1)]
+    assert plan.dropped == ["p202608"]
+
+    # Even when it falls out of retention, it is re-rolled before its partition is dropped.
+    late = plan_maintenance(parts, rolled, date(2026, 11, 2), retention_months=1, ahead_months=3)
+    assert sep in late.rolled_up and "p202609" in late.dropped
+    drop_at = next(i for i, (sql, _) in enumerate(late.statements) if "DROP PARTITION" in sql)
+    assert all(params[0] != sep for _sql, params in late.statements[drop_at:] if params)
+
+    # Once a run after the month end has rolled it up, it is final.
+    assert final_rollups([(sep, datetime(2026, 10, 1, 3))]) == {sep}
+    again = plan_maintenance(parts, {date(2026, 8, 1), sep}, date(2026, 10, 2), retention_months=12, ahead_months=3)
+    assert again.rolled_up == [date(2026, 10, 1)]
+
+
+class _Conn:
+    """Records executes, commits and rollbacks; partitions p202610 + pmax, no final rollups."""
+
+    def __init__(self, fail_on: str | None = None):
+        self.events: list[str] = []
+        self.fail_on = fail_on
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        if sql == self.fail_on:
+            raise RuntimeError("lock wait timeout")
+        self.events.append(sql)
+
+    def fetchall(self):
+        if "information_schema.PARTITIONS" in self.events[-1]:
+            return [("p202610", "'2026-11-01'"), ("pmax", "MAXVALUE")]
+        return []
+
+    def commit(self):
+        self.events.append("COMMIT")
+
+    def rollback(self):
+        self.events.append("ROLLBACK")
+
+    def close(self):
+        pass
+
+
+def test_histogram_clear_and_rebuild_commit_together() -> None:
+    conn = _Conn()
+    run_maintenance(conn, today=TODAY)
+    clear = conn.events.index(PRICE_HIST_CLEAR)
+    assert conn.events[clear + 1:clear + 3] == [PRICE_HIST_REBUILD, "COMMIT"]
+
+    failing = _Conn(fail_on=PRICE_HIST_REBUILD)
+    with pytest.raises(RuntimeError):
+        run_maintenance(failing, today=TODAY)
+    assert failing.events[-2:] == [PRICE_HIST_CLEAR, "ROLLBACK"]
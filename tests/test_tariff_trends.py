@@ -0,0 +1,102 @@
+"""Price-trend histograms: bucketing on ingest, histogram medians and the trends query shape."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from src.data import tariff_trends
+from src.data.tariff_trends import hist_counts, query_trends, record_ingest, weighted_median
+
+
+def test_hist_counts_bucket_by_month_region_supplier_and_metric() -> None:
+    counts = hist_counts([
+        (datetime(2026, 10, 3, 9), "WPD_1", "EDF", "electricity", 24.5, 53.1),
+        (date(2026, 10, 20), "WPD_1", "EDF", "electricity", 24.52, 53.1),  # same 0.05p bucket
+        (date(2026, 10, 20), "WPD_1", "EDF", "electricity", 24.525, None),  # rounds half up
+        (date(2026, 9, 30), "", "EDF", "electricity", 24.5, 53.1),
+    ])
+    oct_ = (date(2026, 10, 1), "WPD_1", "EDF", "electricity")
+    assert counts[(*oct_, "ur", 490)] == 2 and counts[(*oct_, "ur", 491)] == 1
+    assert counts[(*oct_, "sc", 1062)] == 2
+    assert counts[(date(2026, 9, 1), "Unknown", "EDF", "electricity", "ur", 490)] == 1
+
+
+def test_weighted_median() -> None:
+    assert weighted_median([]) is None
+    assert weighted_median([(490, 1), (500, 1), (480, 1)]) == 24.5
+    assert weighted_median([(480, 1), (500, 1)]) == 24.5  # even total: mean of the middle two
+    assert weighted_median([(480, 5), (500, 1), (600, 1)]) == 24.0
+
+
+class _IngestConn:
+    def __init__(self) -> None:
+        self.executed: list[str] = []
+        self.batches: list[list[tuple]] = []
+        self.commits = 0
+
+    def cursor(self) -> "_IngestConn":
+        return self
+
+    def execute(self, sql: str) -> None:
+        self.executed.append(sql)
+
+    def executemany(self, sql: str, rows: list[tuple]) -> None:
+        self.batches.append(rows)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def close(self) -> None:
+        pass
+
+
+def test_record_ingest_creates_the_table_once_per_process(monkeypatch) -> None:
+    monkeypatch.setattr(tariff_trends, "_table_ensured", False)
+    conn = _IngestConn()
+    row = (date(2026, 10, 3), "WPD_1", "EDF", "electricity", 24.5, 53.1)
+    assert record_ingest(conn, [row]) == 2
+    assert record_ingest(conn, [row, row]) == 2
+    assert record_ingest(conn, []) == 0
+    assert conn.executed == [tariff_trends.PRICE_HIST_DDL]
+    assert [len(b) for b in conn.batches] == [2, 2] and conn.commits == 2
+    assert conn.batches[1][0][-1] == 2
+
+
+class _Cursor:
+    def __init__(self, rows: list[tuple]) -> None:
+        self.rows = rows
+        self.sql = ""
+        self.params: tuple = ()
+
+    def execute(self, sql: str, params: tuple) -> None:
+        self.sql, self.params = sql, params
+
+    def fetchall(self) -> list[tuple]:
+        return self.rows
+
+
+def test_query_trends_builds_medians_per_month_and_group() -> None:
+    oct_, sep = date(2026, 10, 1), date(2026, 9, 1)
+    cursor = _Cursor([
+        (sep, "WPD_1", "electricity", "ur", 480, 3),
+        (sep, "WPD_1", "electricity", "sc", 1000, 3),
+        (oct_, "WPD_1", "electricity", "ur", 490, 2),
+        (oct_, "WPD_1", "electricity", "ur", 510, 1),
+        (oct_, "WPD_1", "electricity", "sc", 1060, 3),
+    ])
+    trends = query_trends(cursor, months=3, group_by="region", dno_id="WPD_1", fuel_type="electricity",
+                          today=date(2026, 10, 19))
+
+    assert cursor.params == (date(2026, 8, 1), "WPD_1", "electricity")
+    assert "GROUP BY month_start, dno_id, fuel_type, metric, bucket" in cursor.sql
+    assert trends == [
+        {"month": "2026-09", "dno_id": "WPD_1", "fuel_type": "electricity",
+         "unit_rate_median": 24.0, "standing_charge_median": 50.0, "samples": 3},
+        {"month": "2026-10", "dno_id": "WPD_1", "fuel_type": "electricity",
+         "unit_rate_median": 24.5, "standing_charge_median": 53.0, "samples": 3},
+    ]
+
+    supplier_cursor = _Cursor([(oct_, "EDF", "gas", "ur", 140, 1)])
+    rows = query_trends(supplier_cursor, months=1, group_by="supplier", today=date(2026, 10, 19))
+    assert rows[0]["supplier"] == "EDF" and rows[0]["standing_charge_median"] is None
+    assert supplier_cursor.params == (date(2026, 10, 1),)
@@ -0,0 +1,89 @@
+"""Unit tests for half-hourly time-of-use costing."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.data.energy_tiers import BATTERY_TIERS
+from src.models.tariff_recommendation import _public_tariff, tariff_to_pricing_dict
+from src.models.time_of_use import dispatch_battery, half_hourly_profile, rate_schedule, score_tariffs
+
+SOLAR = [100, 150, 250, 350, 450, 480, 470, 400, 300, 200, 120, 80]
+WIND = [80.0] * 12
+DEMAND = [400, 380, 350, 300, 250, 220, 220, 230, 260, 320, 360, 400]
+BATTERY = BATTERY_TIERS["mid"]
+ECONOMY_7 = rate_schedule(30.0, [{"start": "23:30", "end": "06:30", "unit_rate": 9.0}])
+
+
+def test_rate_windows_wrap_midnight() -> None:
+    assert ECONOMY_7[47] == ECONOMY_7[0] == ECONOMY_7[12] == 9.0
+    assert ECONOMY_7[13] == ECONOMY_7[46] == 30.0
+    assert (ECONOMY_7 == 9.0).sum() == 14
+
+
+def test_profile_keeps_monthly_totals() -> None:
+    prof = half_hourly_profile(SOLAR, WIND, DEMAND)
+    assert prof["solar_kwh"].shape == (365, 48)
+    for key, monthly in (("solar_kwh", SOLAR), ("wind_kwh", WIND), ("demand_kwh", DEMAND)):
+        assert prof[key].sum() == pytest.approx(sum(monthly))
+    assert prof["solar_kwh"][:, :7].sum() == 0.0  # nothing before 3:30am, even at midsummer
+
+
+def test_flat_tariff_cost_and_battery_only_stores_surplus() -> None:
+    prof = half_hourly_profile(SOLAR, WIND, DEMAND)
+    net = prof["demand_kwh"] - prof["solar_kwh"] - prof["wind_kwh"]
+    out = score_tariffs(prof, [[25.0]], [[5.0]], [50.0])
+    imp, exp = np.maximum(net, 0).sum(), np.maximum(-net, 0).sum()
+    assert out["annual_cost_gbp"][0] == pytest.approx(imp * 0.25 - exp * 0.05 + 365 * 0.5)
+
+    new_imp, _ = dispatch_battery(np.maximum(net, 0), np.maximum(-net, 0), np.full(48, 25.0), np.full(48, 5.0), 10.0, BATTERY)
+    assert np.all(new_imp <= np.maximum(net, 0) + 1e-12)  # a flat price never pays for grid charging
+
+
+def test_battery_shifts_load_into_cheap_slots() -> None:
+    prof = half_hourly_profile([0.0] * 12, [0.0] * 12, DEMAND)
+    without = score_tariffs(prof, [ECONOMY_7], [[5.0]], [50.0])
+    with_battery = score_tariffs(prof, [ECONOMY_7], [[5.0]], [50.0], 10.0, BATTERY)
+    assert with_battery["annual_cost_gbp"][0] < without["annual_cost_gbp"][0]
+    assert with_battery["import_kwh"][0] > without["import_kwh"][0]  # round-trip losses
+
+
+def test_fifty_half_hourly_tariffs_score_in_one_call() -> None:
+    rng = np.random.default_rng(0)
+    prof = half_hourly_profile(SOLAR, WIND, DEMAND)
+    rates = [rng.normal(20, 8, 365 * 48) for _ in range(50)]
+    out = score_tariffs(prof, rates, [[15.0]] * 50, [50.0] * 50, 10.0, BATTERY)
+    assert out["annual_cost_gbp"].shape == (50,)
+
+
+def test_pricing_dict_time_of_use_forms() -> None:
+    go = tariff_to_pricing_dict({"unit_rate": 0.28, "standing_charge_day": 50,
+                                 "rate_windows": [{"start": "00:30", "end": "04:30", "unit_rate": 0.085}]})
+    assert go["tariff_type"] == "time_of_use" and go["import_rates_p_per_kwh"][2] == pytest.approx(8.5)
+    agile = tariff_to_pricing_dict({"standing_charge_day": 45, "half_hourly_rates": [-2.0, 30.0] * 480})
+    assert agile["tariff_type"] == "agile" and agile["unit_rate_p_per_kwh"] == 14.0
+    public = _public_tariff(agile)
+    assert "import_rates_p_per_kwh" not in public and public["import_rate_min_p_per_kwh"] == -2.0
+    assert tariff_to_pricing_dict({"unit_rate": 24.5, "standing_charge_day": 50})["tariff_type"] == "flat"
+
+
+def test_window_rates_take_the_headline_rate_units() -> None:
+    windows = [{"start": "00:00", "end": "04:00", "unit_rate": 1.5}, {"start": "13:00", "end": "16:00", "unit_rate": -0.5}]
+    pence = tariff_to_pricing_dict({"unit_rate": 24.5, "standing_charge_day": 50, "rate_windows": windows})
+    assert pence["import_rates_p_per_kwh"][0] == pytest.approx(1.5)  # not 150p
+    assert pence["import_rates_p_per_kwh"][27] == pytest.approx(-0.5)
+    pounds = tariff_to_pricing_dict({"unit_rate": 0.245, "standing_charge_day": 50,
+                                     "rate_windows": [{"start": "00:00", "end": "04:00", "unit_rate": 0.075}]})
+    assert pounds["import_rates_p_per_kwh"][0] == pytest.approx(7.5) and pounds["unit_rate_p_per_kwh"] == 24.5
+
+
+def test_tariff_objects_keep_time_of_use_rates() -> None:
+    obj = SimpleNamespace(unit_rate=28.0, standing_charge_day=50.0, new_supplier_name="Octopus Energy",
+                          tariff_name="Go", rate_windows=[{"start": "00:30", "end": "04:30", "unit_rate": 8.5}])
+    go = tariff_to_pricing_dict(obj)
+    assert go["tariff_type"] == "time_of_use" and go["import_rates_p_per_kwh"][2] == pytest.approx(8.5)
+    flat = tariff_to_pricing_dict(SimpleNamespace(unit_rate=24.5, standing_charge_day=50.0))
+    assert flat["tariff_type"] == "flat" and "import_rates_p_per_kwh" not in flat
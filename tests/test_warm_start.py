@@ -0,0 +1,98 @@
+"""Session warm start: cached sweeps must give the cold sweep's answer, evaluating only new cells."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.energy_tiers import BATTERY_TIERS, SOLAR_TIERS, WIND_TIERS
+from src.models.energy_balancing import optimize_system_capacity
+from src.models import sizing_grid, warm_start
+from src.models.sizing_grid import evaluate_grid, monthly_yields
+from src.models.warm_start import cached_grid, clear_sessions
+
+DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+BATTERY = next(v for k, v in BATTERY_TIERS.items() if k != "none")
+RESULT_KEYS = ("optimal_solar_kw", "optimal_wind_kw", "optimal_battery_kwh", "annual_import_kwh", "capex", "lifetime_financials")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sessions():
+    clear_sessions()
+    yield
+    clear_sessions()
+
+
+def _flux(n_years: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(21)
+    index = pd.MultiIndex.from_product([range(2019, 2019 + n_years), range(1, 13)], names=["year", "month"])
+    return pd.DataFrame(
+        {
+            "ghi_mj_per_m2": rng.uniform(50, 650, len(index)),
+            "wind_speed_10m_max": rng.uniform(3, 11, len(index)),
+            "days_in_month": DAYS * n_years,
+        },
+        index=index,
+    )
+
+
+def test_bound_changes_evaluate_only_new_cells() -> None:
+    _, sp, wp, days = monthly_yields(_flux(), SOLAR_TIERS["mid"], WIND_TIERS["mid"])
+    demand = np.full(12, 400.0)
+    s1, w1, b1 = np.arange(0, 4.5, 0.5), np.arange(0.5, 3.0, 0.5), np.arange(0, 5.0)
+    _, _, info = cached_grid("tab", sp, wp, demand, days, s1, w1, b1, BATTERY)
+    assert not info["warm"] and info["cells_evaluated"] == info["cells_requested"]
+
+    s2, b2 = np.arange(0, 6.5, 0.5), np.arange(0, 8.0)
+    grid, no_battery, info = cached_grid("tab", sp, wp, demand, days, s2, w1, b2, BATTERY, with_no_battery=True)
+    cold = evaluate_grid(sp, wp, demand, days, s2, w1, b2, BATTERY)
+    assert info["warm"] and 0 < info["cells_evaluated"] < info["cells_requested"]
+    for key in cold:
+        np.testing.assert_array_equal(grid[key], cold[key])
+    np.testing.assert_array_equal(no_battery["import_kwh"][..., 0], cold["import_kwh"][..., 0])
+
+    _, _, info = cached_grid("tab", sp, wp, demand * 1.1, days, s2, w1, b2, BATTERY)
+    assert not info["warm"]  # new demand: fresh state
+
+
+def test_price_and_bound_changes_match_cold_optimiser() -> None:
+    flux = _flux()
+    base = dict(battery_type_params=BATTERY, battery_max_kwh=8.0, solar_max_kw=8.0, wind_max_kw=4.0, objective="npv")
+    tweaks = [
+        {},
+        {"export_price_per_kwh": 0.15},
+        {"optimize_over_years": 12.0},
+        {"solar_max_kw": 12.0, "battery_max_kwh": 12.0},
+    ]
+    for tweak in tweaks:
+        kwargs = {**base, **tweak}
+        cold = optimize_system_capacity(flux, 4500.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], **kwargs)
+        warm = optimize_system_capacity(flux, 4500.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], session_id="tab", **kwargs)
+        for key in RESULT_KEYS:
+            assert warm[key] == cold[key]
+
+
+def test_price_only_change_evaluates_no_cells(monkeypatch) -> None:
+    flux = _flux(10)
+    kwargs = dict(battery_type_params=BATTERY, battery_max_kwh=20.0, solar_max_kw=20.0, wind_max_kw=10.0)
+    optimize_system_capacity(flux, 5000.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], session_id="tab", **kwargs)
+    calls = []
+    evaluate = sizing_grid.evaluate_grid
+    monkeypatch.setattr(sizing_grid, "evaluate_grid", lambda *a, **k: calls.append(a) or evaluate(*a, **k))
+    optimize_system_capacity(flux, 5000.0, SOLAR_TIERS["mid"], WIND_TIERS["mid"], session_id="tab",
+                             export_price_per_kwh=0.12, **kwargs)
+    assert calls == []
+
+
+def test_sessions_are_evicted_against_a_process_wide_cell_budget(monkeypatch) -> None:
+    _, sp, wp, days = monthly_yields(_flux(), SOLAR_TIERS["mid"], WIND_TIERS["mid"])
+    demand = np.full(12, 400.0)
+    s, w, b = np.arange(0, 4.5, 0.5), np.arange(0.5, 3.0, 0.5), np.arange(0, 5.0)
+    per_session = sp.shape[0] * s.size * w.size * b.size
+    monkeypatch.setattr(warm_start._store, "max_total_cells", 2.5 * per_session)
+    for tab in ("a", "b", "c"):
+        cached_grid(tab, sp, wp, demand, days, s, w, b, BATTERY)
+    assert warm_start._store.total_cells == 2 * per_session
+    assert not cached_grid("a", sp, wp, demand, days, s, w, b, BATTERY)[2]["warm"]  # least recently used
+    assert cached_grid("c", sp, wp, demand, days, s, w, b, BATTERY)[2]["warm"]